@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "accounts"
+
+    def ready(self):
+        # Drop cached JWT auth user snapshots when a User is saved or deleted.
+        from . import signals  # noqa: F401
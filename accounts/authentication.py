@@ -5,11 +5,93 @@ DRF runs authenticators before permissions: the default JWTAuthentication raises
 AuthenticationFailed on expired/invalid tokens or missing users, so AllowAny()
 never runs. Treat those as unauthenticated so anonymous clients (and clients
 with stale Authorization headers) can still hit public APIs.
+
+With ``AUTH_USER_CACHE_SECONDS`` > 0 the ``users`` row behind a token is served
+from a short-lived cache snapshot (identity, role, active flag, CRM scope)
+instead of a SELECT per request. ``accounts.signals`` drops the snapshot on every
+User save / delete; the TTL bounds staleness for queryset ``.update()`` calls and
+for per-process caches when Redis is not configured.
 """
 
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.authentication import JWTAuthentication
-from rest_framework_simplejwt.exceptions import TokenBackendError, TokenError
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenBackendError, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from common.env import int_setting
+
+logger = logging.getLogger(__name__)
+
+# Columns kept in the snapshot; everything else (password, legacy MySQL columns)
+# stays deferred and loads on first access like ``.only()``.
+SNAPSHOT_FIELDS = (
+    "id",
+    "email",
+    "username",
+    "full_name",
+    "role",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "last_login",
+    "date_joined",
+    "crm_zone",
+    "crm_designation",
+    "crm_mapping_region",
+    "crm_phone",
+    "crm_region",
+    "crm_states",
+    "crm_cities",
+    "crm_notify_leads",
+    "crm_notify_franchise",
+    "crm_notify_admission",
+)
+# Bump when SNAPSHOT_FIELDS changes so old entries are ignored after deploy.
+SNAPSHOT_VERSION = 1
+
+
+def user_cache_seconds() -> int:
+    return max(0, int_setting("AUTH_USER_CACHE_SECONDS", 0))
+
+
+def user_cache():
+    return caches[getattr(settings, "AUTH_USER_CACHE_ALIAS", "default") or "default"]
+
+
+def user_cache_key(user_id) -> str:
+    return f"auth:user:v{SNAPSHOT_VERSION}:{user_id}"
+
+
+def forget_cached_user(user_id) -> None:
+    """Drop the cached snapshot for ``user_id`` (called from User save / delete signals)."""
+    if user_id is None:
+        return
+    try:
+        user_cache().delete(user_cache_key(user_id))
+    except Exception:
+        logger.exception("Failed to drop cached auth user %s", user_id)
+
+
+def snapshot_user(user) -> dict:
+    data = {name: getattr(user, name) for name in SNAPSHOT_FIELDS}
+    # Token version for CHECK_REVOKE_TOKEN: the md5 SimpleJWT embeds in tokens, not the hash.
+    data["_password_md5"] = get_md5_hash_password(user.password) if api_settings.CHECK_REVOKE_TOKEN else ""
+    return data
+
+
+def user_from_snapshot(model, data: dict):
+    """Rebuild a saved (not adding) ``User`` with only the snapshot columns loaded."""
+    # ``from_db`` expects values in concrete-field order when some fields are deferred.
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in data]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [data[name] for name in names])
 
 
 class LenientJWTAuthentication(JWTAuthentication):
@@ -21,3 +103,33 @@ class LenientJWTAuthentication(JWTAuthentication):
             return super().authenticate(request)
         except (TokenError, TokenBackendError, AuthenticationFailed):
             return None
+
+    def get_user(self, validated_token):
+        ttl = user_cache_seconds()
+        if not ttl or api_settings.USER_ID_FIELD != "id":
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as exc:
+            raise InvalidToken("Token contained no recognizable user identification") from exc
+
+        key = user_cache_key(user_id)
+        try:
+            data = user_cache().get(key)
+        except Exception:
+            logger.exception("Auth user cache read failed")
+            data = None
+
+        if data is None:
+            user = super().get_user(validated_token)
+            try:
+                user_cache().set(key, snapshot_user(user), ttl)
+            except Exception:
+                logger.exception("Auth user cache write failed")
+            return user
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not data["is_active"]:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != data["_password_md5"]:
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        return user_from_snapshot(self.user_model, data)
@@ -0,0 +1,51 @@
+"""
+Resolve and store the parent login → ParentProfile → children link for parent accounts.
+
+  python manage.py rebuild_parent_identity_links                 # every active parent login
+  python manage.py rebuild_parent_identity_links --missing-only  # only logins with no stored link
+  python manage.py rebuild_parent_identity_links --user-id 42 --user-id 43
+
+Runs the same heuristics as a portal request (id card, email, mobile matching and
+legacy profile auto-linking), so it may attach legacy rows to users exactly as a
+first login would. Safe to re-run.
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import User, UserRole
+from accounts.profile_access import refresh_parent_identity_link
+
+
+class Command(BaseCommand):
+    help = "Rebuild stored parent identity links (students.ParentIdentityLink)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user-id", type=int, action="append", default=[], help="Only these users.")
+        parser.add_argument("--missing-only", action="store_true", help="Skip users that already have a link.")
+        parser.add_argument("--include-inactive", action="store_true", help="Also inactive parent accounts.")
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(role__iexact=UserRole.PARENT.value).order_by("id")
+        if not options["include_inactive"]:
+            users = users.filter(is_active=True)
+        if options["user_id"]:
+            users = users.filter(pk__in=options["user_id"])
+        if options["missing_only"]:
+            users = users.filter(parent_identity_link__isnull=True)
+
+        resolved = unresolved = failed = 0
+        for user in users.iterator(chunk_size=500):
+            try:
+                link = refresh_parent_identity_link(user)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"user {user.pk}: {exc}")
+                continue
+            if link.parent_profile_id:
+                resolved += 1
+            else:
+                unresolved += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"links resolved={resolved} unresolved={unresolved} failed={failed}")
+        )
@@ -5,13 +5,16 @@ still raises RelatedObjectDoesNotExist when the related row is missing.
 """
 
 import re
+from datetime import timedelta
 
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import IntegrityError
 from django.db.models import Q
+from django.utils import timezone
 from django.utils.text import slugify
 
 from accounts.models import UserRole
+from common.env import int_setting
 
 
 def _norm_role(user) -> str:
@@ -134,6 +137,99 @@ def _franchise_name_matches_login_key(name: str, key: str) -> bool:
     return bool(name_key and login_key and name_key == login_key)
 
 
+def franchise_login_key_rows(slug: str, name: str) -> list[tuple[str, str]]:
+    """
+    ``(key, kind)`` rows for the ``FranchiseLoginKey`` index of one centre.
+
+    Mirrors ``_slug_matches_login_key``: every slug segment (exact), the primary
+    and full-compact slug keys (exact, or either side a prefix of the other, so
+    their leading parts are stored as ``stem`` rows) and the compact centre name
+    used by the name fallback.
+    """
+    rows: set[tuple[str, str]] = set()
+    for key in _slug_prefix_keys(slug):
+        rows.add((key, "segment"))
+    primary = franchise_slug_login_key(slug)
+    full_compact = _compact_centre_key((slug or "").strip().lower().split("-timekid", 1)[0])
+    for key in (primary, full_compact):
+        if not key:
+            continue
+        rows.add((key, "prefix"))
+        for end in range(1, len(key)):
+            rows.add((key[:end], "stem"))
+    name_key = _compact_centre_key(name)
+    if name_key:
+        rows.add((name_key, "name"))
+    return sorted(rows)
+
+
+def ambiguous_login_keys(rows) -> set[tuple[str, str]]:
+    """
+    ``(key, group)`` pairs that point at more than one centre.
+
+    ``rows`` are ``(key, kind, franchise_id)``; slug kinds share the ``slug`` group,
+    name keys form their own.
+    """
+    owners: dict[tuple[str, str], set[int]] = {}
+    for key, kind, franchise_id in rows:
+        group = "name" if kind == "name" else "slug"
+        owners.setdefault((key, group), set()).add(franchise_id)
+    return {pair for pair, ids in owners.items() if len(ids) > 1}
+
+
+def refresh_franchise_login_keys(franchises) -> int:
+    """Rewrite the login-key rows of ``franchises`` (skipped when unchanged); returns rows written."""
+    from django.db import transaction
+
+    from franchises.models import FranchiseLoginKey
+
+    franchises = [f for f in franchises if f.pk]
+    if not franchises:
+        return 0
+    ids = [f.pk for f in franchises]
+    wanted = {
+        (f.pk, key, kind)
+        for f in franchises
+        for key, kind in franchise_login_key_rows(f.slug, f.name)
+    }
+    with transaction.atomic():
+        existing = set(
+            FranchiseLoginKey.objects.filter(franchise_id__in=ids).values_list("franchise_id", "key", "kind")
+        )
+        if existing == wanted:
+            return 0
+        FranchiseLoginKey.objects.filter(franchise_id__in=ids).delete()
+        FranchiseLoginKey.objects.bulk_create(
+            [FranchiseLoginKey(franchise_id=fid, key=key, kind=kind) for fid, key, kind in sorted(wanted)],
+            batch_size=1000,
+        )
+        flag_ambiguous_login_keys({key for _fid, key, _kind in existing | wanted})
+    return len(wanted)
+
+
+def flag_ambiguous_login_keys(keys=None) -> int:
+    """Recompute ``FranchiseLoginKey.ambiguous`` for ``keys`` (all keys when ``None``); returns rows changed."""
+    from franchises.models import FranchiseLoginKey
+
+    qs = FranchiseLoginKey.objects.order_by()
+    if keys is not None:
+        keys = list(keys)
+        if not keys:
+            return 0
+        qs = qs.filter(key__in=keys)
+    rows = list(qs.values_list("pk", "key", "kind", "franchise_id", "ambiguous"))
+    shared = ambiguous_login_keys((key, kind, fid) for _pk, key, kind, fid, _flag in rows)
+    flip_on, flip_off = [], []
+    for pk, key, kind, _fid, flag in rows:
+        wanted = (key, "name" if kind == "name" else "slug") in shared
+        if wanted != flag:
+            (flip_on if wanted else flip_off).append(pk)
+    for pks, value in ((flip_on, True), (flip_off, False)):
+        for start in range(0, len(pks), 1000):
+            FranchiseLoginKey.objects.filter(pk__in=pks[start : start + 1000]).update(ambiguous=value)
+    return len(flip_on) + len(flip_off)
+
+
 def franchise_for_centre_login(user):
     """
     Legacy imports often left ``franchise.user_id`` on HO/admin accounts while centre
@@ -141,69 +237,58 @@ def franchise_for_centre_login(user):
 
     Also matches when the slug city prefix is wrong (e.g. Kaveri Nagar slug
     ``namakkal-timekids...``) but the franchise *name* uniquely matches the login.
+
+    Candidates come from one lookup on the ``FranchiseLoginKey`` index and are
+    confirmed with ``_slug_matches_login_key`` (slug must still contain the key).
     """
     if not user or not getattr(user, "is_authenticated", False):
         return None
     if _norm_role(user) != UserRole.FRANCHISE.value:
         return None
 
-    from franchises.models import Franchise
+    from franchises.models import FranchiseLoginKey
 
     keys = _login_keys_for_franchise_user(user)
     if not keys:
         return None
 
-    # Prefer username-derived keys over email-local keys so a shared email
-    # prefix (e.g. paravur@...) cannot hijack another centre's slug match.
-    username_key = _normalize_centre_login_key(getattr(user, "username", None) or "")
-    ordered_keys = sorted(
-        keys,
-        key=lambda k: (
-            0 if k == username_key or (username_key and k.startswith(username_key)) else 1,
-            len(k),
-            k,
-        ),
-    )
+    exact: set[str] = set()
+    prefixes: set[str] = set()
+    for key in keys:
+        for variant in (_normalize_centre_login_key(key), _compact_centre_key(key)):
+            if variant:
+                exact.add(variant)
+                prefixes.update(variant[:end] for end in range(1, len(variant) + 1))
+    # Username key only — email locals are too noisy for name matching.
+    name_key = _compact_centre_key(getattr(user, "username", None) or "")
 
-    seen_ids: set[int] = set()
-    matches = []
-
-    def _add(franchise) -> None:
-        if franchise.id not in seen_ids:
-            seen_ids.add(franchise.id)
-            matches.append(franchise)
-
-    for key in ordered_keys:
-        for prefix in (f"{key}-timekid", f"{key}-"):
-            for franchise in Franchise.objects.filter(slug__istartswith=prefix).order_by("id")[:10]:
-                if _slug_matches_login_key(franchise.slug, key):
-                    _add(franchise)
-        candidates = list(
-            Franchise.objects.filter(slug__icontains=key).only("id", "slug").order_by("id")[:40]
-        )
-        for franchise in candidates:
-            if _slug_matches_login_key(franchise.slug, key):
-                _add(franchise)
+    lookup = Q(kind__in=["segment", "prefix", "stem"], key__in=sorted(exact)) | Q(
+        kind="prefix", key__in=sorted(prefixes)
+    )
+    if name_key:
+        lookup |= Q(kind="name", key=name_key)
+    rows = list(FranchiseLoginKey.objects.filter(lookup).select_related("franchise").order_by("franchise_id"))
+
+    matches: dict[int, object] = {}
+    for row in rows:
+        franchise = row.franchise
+        if row.kind == "name" or franchise.id in matches:
+            continue
+        slug = (franchise.slug or "").lower()
+        if any(key in slug and _slug_matches_login_key(franchise.slug, key) for key in keys):
+            matches[franchise.id] = franchise
 
     # Only return when exactly one centre matches — ambiguous keys
     # (paravur / namakkal) must not silently pick the lowest id.
     if len(matches) == 1:
-        return matches[0]
+        return next(iter(matches.values()))
     if matches:
         return None
 
     # Fallback: exact compact name match (KaveriNagar ↔ "Kaveri Nagar").
-    # Username key only — email locals are too noisy for name matching.
-    name_key = _compact_centre_key(getattr(user, "username", None) or "")
-    if not name_key:
-        return None
-    name_matches = [
-        f
-        for f in Franchise.objects.only("id", "name", "slug").order_by("id")
-        if _franchise_name_matches_login_key(f.name, name_key)
-    ]
+    name_matches = {row.franchise_id: row.franchise for row in rows if row.kind == "name"}
     if len(name_matches) == 1:
-        return name_matches[0]
+        return next(iter(name_matches.values()))
     return None
 
 
@@ -576,10 +661,31 @@ def parents_at_franchise(franchise):
     return ParentProfile.objects.filter(pk__in=parent_ids).select_related("user", "franchise")
 
 
-def students_at_franchise(franchise):
-    """Active students enrolled at a centre (direct parent link or legacy Centre import)."""
+def legacy_centre_keys(franchise) -> set[str]:
+    """Lower-cased imported ``Centre`` values that name ``franchise`` (its name, slug, slug with spaces)."""
+    keys = set()
+    name = (franchise.name or "").strip()
+    if name:
+        keys.add(name.lower())
+    slug = (franchise.slug or "").strip()
+    if slug:
+        keys.add(slug.replace("-", " ").lower())
+        keys.add(slug.lower())
+    return keys
+
+
+def legacy_centre_q(franchise):
+    """``StudentProfile`` filter for imported rows whose ``Centre`` is ``franchise``'s name or slug (empty ``Q`` if neither)."""
     from django.db.models import Q
 
+    centre_q = Q()
+    for key in sorted(legacy_centre_keys(franchise)):
+        centre_q |= Q(Centre__iexact=key)
+    return centre_q
+
+
+def students_at_franchise(franchise):
+    """Active students enrolled at a centre (direct parent link or legacy Centre import)."""
     from students.models import StudentProfile
 
     if not franchise:
@@ -587,15 +693,7 @@ def students_at_franchise(franchise):
 
     direct_qs = StudentProfile.objects.filter(parent__franchise=franchise, is_active=True)
 
-    centre_q = Q()
-    name = (franchise.name or "").strip()
-    if name:
-        centre_q |= Q(Centre__iexact=name)
-    slug = (franchise.slug or "").strip()
-    if slug:
-        centre_q |= Q(Centre__iexact=slug.replace("-", " "))
-        centre_q |= Q(Centre__iexact=slug)
-
+    centre_q = legacy_centre_q(franchise)
     if centre_q:
         legacy_ids = StudentProfile.objects.filter(is_active=True).filter(centre_q).values_list("pk", flat=True)
         direct_ids = direct_qs.values_list("pk", flat=True)
@@ -752,6 +850,13 @@ def enrich_parent_contact_fields(pp, user, *, persist: bool = True) -> dict[str,
 
 def resolved_parent_profile_for_user(user):
     """Parent profile for portal APIs; auto-links legacy student rows when needed."""
+    link = parent_identity_link(user)
+    if link is not None:
+        return link.parent_profile
+    return _resolve_parent_profile(user)
+
+
+def _resolve_parent_profile(user):
     profile = ensure_parent_profile_for_user(user) or parent_profile_for_user(user)
     if profile:
         enrich_parent_contact_fields(profile, user)
@@ -766,6 +871,16 @@ def primary_student_for_parent_user(user):
     if not user:
         return None, None
 
+    link = parent_identity_link(user)
+    if link is not None:
+        student = link.primary_student
+        if student is not None and student.parent_id:
+            return student, student.parent
+        return student, link.parent_profile
+    return _resolve_primary_student(user)
+
+
+def _resolve_primary_student(user):
     from students.models import StudentProfile
 
     pp = parent_profile_for_user(user)
@@ -792,6 +907,98 @@ def primary_student_for_parent_user(user):
     return None, pp
 
 
+# --- persisted parent identity -------------------------------------------
+#
+# The heuristics above cost 5–15 queries (and sometimes writes) per call. Parent
+# logins store their outcome in ``students.ParentIdentityLink``; portal requests
+# read that row (one query, memoized on the request's user object). Signals in
+# ``students.signals`` delete links when the user, profile or a student changes.
+
+
+def _identity_retry_seconds() -> int:
+    return max(0, int_setting("PARENT_IDENTITY_RETRY_SECONDS", 300))
+
+
+def refresh_parent_identity_link(user):
+    """Run the resolution heuristics for ``user`` and store the result; returns the link."""
+    from students.models import ParentIdentityLink, StudentProfile
+
+    profile = _resolve_parent_profile(user)
+    student, _student_parent = _resolve_primary_student(user)
+    student_ids = []
+    if profile:
+        student_ids = list(
+            StudentProfile.objects.filter(parent=profile, is_active=True)
+            .order_by("id")
+            .values_list("pk", flat=True)
+        )
+    link, _created = ParentIdentityLink.objects.update_or_create(
+        user_id=user.pk,
+        defaults={
+            "parent_profile": profile,
+            "primary_student": student,
+            "student_ids": student_ids,
+            "resolved_at": timezone.now(),
+        },
+    )
+    # Keep the already-loaded rows so callers don't fetch them again.
+    link.parent_profile = profile
+    link.primary_student = student
+    user._parent_identity_link = link
+    return link
+
+
+def parent_identity_link(user, *, refresh: bool = False):
+    """
+    Stored identity link for a parent login, resolved and saved when missing.
+
+    ``None`` for anonymous and non-parent users (they keep the live heuristics).
+    A link that found no profile is re-resolved after ``PARENT_IDENTITY_RETRY_SECONDS``.
+    """
+    if not user or not getattr(user, "is_authenticated", False) or not getattr(user, "pk", None):
+        return None
+    if _norm_role(user) != UserRole.PARENT.value:
+        return None
+    if refresh:
+        return refresh_parent_identity_link(user)
+
+    link = getattr(user, "_parent_identity_link", None)
+    if link is not None:
+        return link
+
+    from students.models import ParentIdentityLink
+
+    link = (
+        ParentIdentityLink.objects.select_related(
+            "parent_profile__franchise",
+            "parent_profile__user",
+            "primary_student__parent__franchise",
+        )
+        .filter(user_id=user.pk)
+        .first()
+    )
+    if link is not None and link.parent_profile_id is None:
+        if link.resolved_at < timezone.now() - timedelta(seconds=_identity_retry_seconds()):
+            link = None
+    if link is None:
+        return refresh_parent_identity_link(user)
+    user._parent_identity_link = link
+    return link
+
+
+def linked_student_ids_for_user(user) -> list[int]:
+    """Active child ids for a parent login (from the stored link)."""
+    link = parent_identity_link(user)
+    if link is not None:
+        return list(link.student_ids or [])
+    pp = _resolve_parent_profile(user)
+    if not pp:
+        return []
+    from students.models import StudentProfile
+
+    return list(StudentProfile.objects.filter(parent=pp, is_active=True).order_by("id").values_list("pk", flat=True))
+
+
 def parent_students_list_for_user(user) -> list[dict]:
     """All active linked children for parent login / mobile child switcher."""
     pp = resolved_parent_profile_for_user(user)
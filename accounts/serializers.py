@@ -9,7 +9,12 @@ from rest_framework import serializers
 from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
-from accounts.profile_access import parent_login_context, driver_profile_for_user, parent_profile_for_user
+from accounts.profile_access import (
+    driver_profile_for_user,
+    parent_identity_link,
+    parent_login_context,
+    parent_profile_for_user,
+)
 
 from .models import User, UserRole
 
@@ -304,6 +309,8 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
             "is_superuser": user.is_superuser,
         }
         if user.normalized_role() == UserRole.PARENT.value:
+            # Re-resolve the stored parent → profile → children link on every login.
+            parent_identity_link(user, refresh=True)
             data["user"].update(parent_login_context(user))
         return data
 
@@ -364,6 +371,8 @@ class ParentTokenObtainPairSerializer(TokenObtainPairSerializer):
             "access": str(refresh.access_token),
         }
 
+        # Re-resolve the stored parent → profile → children link on every login.
+        parent_identity_link(user, refresh=True)
         parent_ctx = parent_login_context(user)
 
         data["user"] = {
@@ -0,0 +1,23 @@
+"""User signal handlers."""
+
+from __future__ import annotations
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_cached_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def drop_cached_auth_user(sender, instance: User, **kwargs) -> None:
+    """
+    Any save may change role, active flag or CRM scope — drop the JWT auth snapshot.
+
+    Dropped after commit: a request racing the transaction would otherwise
+    re-cache the old row before the change is visible.
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_cached_user(user_id))
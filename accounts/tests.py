@@ -0,0 +1,260 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from accounts import authentication, profile_access
+from accounts.models import User
+from accounts.signals import drop_cached_auth_user
+from franchises.models import Franchise, FranchiseLoginKey, ParentProfile
+from students.models import ParentIdentityLink, StudentProfile
+
+
+@override_settings(
+    AUTH_USER_CACHE_SECONDS=60,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "auth-user-tests"}},
+)
+class CachedJwtUserTests(SimpleTestCase):
+    def setUp(self):
+        self.auth = authentication
+        authentication.user_cache().clear()
+        self.user = User(id=41, email="p@x.in", role="PARENT", is_active=True, crm_states="Kerala", password="x")
+
+    def test_second_request_is_served_from_snapshot(self):
+        backend = self.auth.LenientJWTAuthentication()
+        with patch.object(self.auth.JWTAuthentication, "get_user", return_value=self.user) as load:
+            first = backend.get_user({"user_id": 41})
+            second = backend.get_user({"user_id": 41})
+        load.assert_called_once()
+        self.assertIs(first, self.user)
+        self.assertEqual((second.pk, second.role, second.crm_states), (41, "PARENT", "Kerala"))
+        self.assertFalse(second._state.adding)
+        self.assertIn("password", second.get_deferred_fields())
+
+    def test_user_save_drops_snapshot_and_inactive_snapshot_is_rejected(self):
+        from rest_framework.exceptions import AuthenticationFailed
+
+        backend = self.auth.LenientJWTAuthentication()
+        key = self.auth.user_cache_key(41)
+        self.auth.user_cache().set(key, self.auth.snapshot_user(self.user), 60)
+        drop_cached_auth_user(User, self.user)
+        self.assertIsNone(self.auth.user_cache().get(key))
+
+        self.user.is_active = False
+        self.auth.user_cache().set(key, self.auth.snapshot_user(self.user), 60)
+        with self.assertRaises(AuthenticationFailed):
+            backend.get_user({"user_id": 41})
+
+    @override_settings(AUTH_USER_CACHE_SECONDS=0)
+    def test_disabled_cache_reads_the_row(self):
+        backend = self.auth.LenientJWTAuthentication()
+        with patch.object(self.auth.JWTAuthentication, "get_user", return_value=self.user) as load:
+            backend.get_user({"user_id": 41})
+            backend.get_user({"user_id": 41})
+        self.assertEqual(load.call_count, 2)
+
+
+@override_settings(
+    AUTH_USER_CACHE_SECONDS=60,
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "auth-user-db-tests"}},
+)
+class CachedJwtUserDropTests(TestCase):
+    def test_snapshot_is_dropped_after_the_save_commits(self):
+        user = User.objects.create(email="p@x.in", username="p@x.in", role="PARENT")
+        key = authentication.user_cache_key(user.pk)
+        authentication.user_cache().set(key, authentication.snapshot_user(user), 60)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user.role = "FRANCHISE"
+            user.save()
+            # Still in the transaction: a racing request must not re-cache the old role.
+            self.assertIsNotNone(authentication.user_cache().get(key))
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(authentication.user_cache().get(key))
+
+
+class ParentIdentityLinkTests(SimpleTestCase):
+    def _user(self, role="PARENT"):
+        return SimpleNamespace(pk=7, is_authenticated=True, role=role)
+
+    def _stored(self, link):
+        qs = Mock()
+        qs.select_related.return_value.filter.return_value.first.return_value = link
+        return patch("students.models.ParentIdentityLink.objects", qs)
+
+    def test_reads_stored_link_once_per_request(self):
+        from accounts import profile_access
+
+        profile = SimpleNamespace(pk=3)
+        student = SimpleNamespace(pk=11, parent_id=3, parent=profile)
+        link = SimpleNamespace(parent_profile_id=3, parent_profile=profile, primary_student=student)
+        user = self._user()
+        with self._stored(link) as objects, patch.object(profile_access, "_resolve_parent_profile") as heuristics:
+            self.assertIs(profile_access.resolved_parent_profile_for_user(user), profile)
+            self.assertEqual(profile_access.primary_student_for_parent_user(user), (student, profile))
+        heuristics.assert_not_called()
+        self.assertEqual(objects.select_related.call_count, 1)
+
+    def test_missing_or_expired_unresolved_link_is_resolved_again(self):
+        from accounts import profile_access
+
+        stale = SimpleNamespace(parent_profile_id=None, resolved_at=timezone.now() - timedelta(hours=1))
+        fresh = SimpleNamespace(parent_profile_id=None, resolved_at=timezone.now())
+        for stored, refreshed in ((None, True), (stale, True), (fresh, False)):
+            with self._stored(stored), patch.object(profile_access, "refresh_parent_identity_link") as refresh:
+                profile_access.parent_identity_link(self._user())
+            self.assertEqual(refresh.called, refreshed)
+
+    def test_non_parent_users_keep_live_heuristics(self):
+        from accounts import profile_access
+
+        with patch.object(profile_access, "_resolve_parent_profile", return_value=None) as heuristics:
+            self.assertIsNone(profile_access.parent_identity_link(self._user("FRANCHISE")))
+            profile_access.resolved_parent_profile_for_user(self._user("FRANCHISE"))
+        heuristics.assert_called_once()
+
+    def test_signals_ignore_saves_outside_identity_fields(self):
+        from students import signals
+
+        with patch.object(signals, "_drop_links") as drop:
+            signals.invalidate_identity_on_user_save(None, SimpleNamespace(pk=7), created=False, update_fields={"last_login"})
+            drop.assert_not_called()
+            signals.invalidate_identity_on_user_save(None, SimpleNamespace(pk=7), created=False, update_fields={"email"})
+            drop.assert_called_once()
+
+
+@override_settings(PARENT_FEED_OUTBOX_AUTO_DRAIN=False)
+class ParentIdentityLinkDatabaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@x.in", password="x12345678", role="ADMIN")
+        centre = Franchise.objects.create(name="Kondapur", slug="kondapur-timekids", user=admin, admin=admin)
+        cls.user = User.objects.create_user(email="p@x.in", password="x12345678", role="PARENT")
+        cls.profile = ParentProfile.objects.create(user=cls.user, franchise=centre)
+        cls.child = StudentProfile.objects.create(parent=cls.profile, first_name="A", last_name="B", class_name="LKG")
+
+    def _link(self):
+        # A fresh user object per "request" so the memoized link is not reused.
+        return profile_access.parent_identity_link(User.objects.get(pk=self.user.pk))
+
+    def test_link_is_stored_and_reused(self):
+        link = self._link()
+        self.assertEqual((link.parent_profile_id, link.student_ids), (self.profile.pk, [self.child.pk]))
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(profile_access.parent_identity_link(user).pk, link.pk)
+
+    def test_new_child_drops_the_link(self):
+        self._link()
+        with self.captureOnCommitCallbacks(execute=True):
+            sibling = StudentProfile.objects.create(parent=self.profile, first_name="C", last_name="B", class_name="UKG")
+        self.assertFalse(ParentIdentityLink.objects.filter(user_id=self.user.pk).exists())
+        self.assertEqual(self._link().student_ids, [self.child.pk, sibling.pk])
+
+    def test_login_bookkeeping_keeps_the_link(self):
+        self._link()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save(update_fields=["last_login"])
+        self.assertTrue(ParentIdentityLink.objects.filter(user_id=self.user.pk).exists())
+
+
+class FranchiseLoginKeyTests(SimpleTestCase):
+    def test_index_rows_cover_slug_rules(self):
+        from accounts.profile_access import franchise_login_key_rows
+
+        rows = set(franchise_login_key_rows("namakkal-ebcolony-timekids-preschool", "EB Colony"))
+        self.assertIn(("ebcolony", "segment"), rows)
+        self.assertIn(("namakkal", "prefix"), rows)
+        self.assertIn(("namakkalebcolony", "prefix"), rows)
+        self.assertIn(("namak", "stem"), rows)
+        self.assertIn(("ebcolony", "name"), rows)
+        self.assertIn(("vennala", "prefix"), set(franchise_login_key_rows("tkvennala-timekids", "Vennala")))
+
+    def test_ambiguous_keys_are_grouped_by_slug_and_name(self):
+        from accounts.profile_access import ambiguous_login_keys
+
+        shared = ambiguous_login_keys(
+            [("paravur", "segment", 1), ("paravur", "prefix", 2), ("kondapur", "prefix", 3), ("kondapur", "name", 4)]
+        )
+        self.assertEqual(shared, {("paravur", "slug")})
+
+    def _resolve(self, username, rows):
+        from accounts import profile_access
+
+        qs = Mock()
+        qs.filter.return_value.select_related.return_value.order_by.return_value = rows
+        user = SimpleNamespace(is_authenticated=True, role="FRANCHISE", username=username, email="")
+        with patch("franchises.models.FranchiseLoginKey.objects", qs):
+            return profile_access.franchise_for_centre_login(user)
+
+    def test_resolves_unique_slug_match_and_rejects_ambiguous(self):
+        kondapur = SimpleNamespace(id=1, slug="kondapur-timekids-preschool")
+        padma = SimpleNamespace(id=2, slug="padmaraonagarnew-timekids")
+        row = lambda f, key, kind: SimpleNamespace(franchise=f, franchise_id=f.id, key=key, kind=kind)
+        self.assertIs(self._resolve("kondapur", [row(kondapur, "kondapur", "prefix")]), kondapur)
+        self.assertIs(self._resolve("padmaraonagar", [row(padma, "padmaraonagar", "stem")]), padma)
+        other = SimpleNamespace(id=3, slug="kondapur-2")
+        self.assertIsNone(
+            self._resolve("kondapur", [row(kondapur, "kondapur", "prefix"), row(other, "kondapur", "prefix")])
+        )
+
+    def test_name_fallback_only_when_no_slug_matches(self):
+        kaveri = SimpleNamespace(id=4, slug="namakkal-timekids")
+        rows = [SimpleNamespace(franchise=kaveri, franchise_id=4, key="kaverinagar", kind="name")]
+        self.assertIs(self._resolve("KaveriNagar", rows), kaveri)
+
+
+class FranchiseLoginKeyDatabaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.kondapur = cls._centre("Kondapur", "kondapur-timekids-preschool")
+        cls.kaveri = cls._centre("Kaveri Nagar", "namakkal-timekids")
+        cls.paravur = cls._centre("Paravur", "paravur-timekids")
+        cls.paravur_north = cls._centre("North Paravur", "north-paravur-timekids")
+
+    @staticmethod
+    def _centre(name, slug):
+        owner = User.objects.create_user(email=f"{slug}@x.in", password="x12345678", role="ADMIN")
+        return Franchise.objects.create(name=name, slug=slug, user=owner, admin=owner)
+
+    def _login(self, username):
+        user = User.objects.create_user(
+            email=f"{username}@centres.in", username=username, password="x12345678", role="FRANCHISE"
+        )
+        return profile_access.franchise_for_centre_login(user)
+
+    def test_saves_keep_the_index_in_step(self):
+        keys = FranchiseLoginKey.objects.filter(franchise=self.kondapur)
+        self.assertTrue(keys.filter(key="kondapur", kind="prefix").exists())
+        self.kondapur.slug = "hyd-kondapur-timekids"
+        self.kondapur.save(update_fields=["slug"])
+        self.assertTrue(keys.filter(key="hydkondapur", kind="prefix").exists())
+        self.assertFalse(keys.filter(key="kondapurtimekidspreschool").exists())
+
+    def test_login_resolves_through_the_index(self):
+        self.assertEqual(self._login("kondapur"), self.kondapur)
+        self.assertIsNone(self._login("madhapur"))
+        self.assertEqual(self._login("KaveriNagar"), self.kaveri)
+
+    def test_shared_segment_is_ambiguous(self):
+        self.assertTrue(FranchiseLoginKey.objects.filter(key="paravur", ambiguous=True).exists())
+        self.assertIsNone(self._login("paravur"))
+
+    def test_deleting_a_centre_clears_the_shared_flag(self):
+        self.paravur_north.delete()
+        self.assertFalse(FranchiseLoginKey.objects.filter(key="paravur", ambiguous=True).exists())
+        self.assertEqual(self._login("paravur"), self.paravur)
+
+    def test_migration_backfill_matches_the_live_index(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        def index():
+            return set(FranchiseLoginKey.objects.values_list("franchise_id", "key", "kind", "ambiguous"))
+
+        live = index()
+        FranchiseLoginKey.objects.all().delete()
+        import_module("franchises.migrations.0022_franchiseloginkey").build_login_keys(apps, None)
+        self.assertEqual(index(), live)
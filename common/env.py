@@ -0,0 +1,27 @@
+"""Integer knobs from the environment (``settings.py``) and from Django settings (app modules)."""
+
+from __future__ import annotations
+
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    """``os.environ[name]`` as an int; ``default`` when unset, blank or not an integer."""
+    raw = (os.getenv(name) or "").strip()
+    try:
+        return int(raw) if raw else default
+    except ValueError:
+        return default
+
+
+def int_setting(name: str, default: int) -> int:
+    """Django setting ``name`` as an int, else the environment variable, else ``default``."""
+    from django.conf import settings
+
+    raw = getattr(settings, name, None)
+    if raw in (None, ""):
+        return env_int(name, default)
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return default
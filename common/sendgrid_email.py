@@ -8,8 +8,9 @@ from __future__ import annotations
 
 import base64
 import logging
+import threading
 from pathlib import Path
-from typing import Iterable, Sequence
+from typing import Any, Iterable, Sequence
 
 from django.conf import settings
 
@@ -18,11 +19,29 @@ logger = logging.getLogger(__name__)
 # (file_bytes, filename, mime_type) — mime defaults to application/pdf when omitted downstream
 AttachmentPayload = tuple[bytes, str] | tuple[bytes, str, str]
 
+# SendGrid v3 mail/send accepts at most 1,000 personalizations per request.
+MAX_PERSONALIZATIONS_PER_REQUEST = 1000
+
+_clients: dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
 
 def sendgrid_api_key() -> str:
     return (getattr(settings, "SENDGRID_API_KEY", None) or "").strip()
 
 
+def sendgrid_client(api_key: str | None = None):
+    """Process-wide ``SendGridAPIClient`` for ``api_key`` (default: settings), built once and reused."""
+    from sendgrid import SendGridAPIClient
+
+    key = (api_key or sendgrid_api_key()).strip()
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = SendGridAPIClient(key)
+    return client
+
+
 def default_from_email() -> str:
     return (
         getattr(settings, "MAIL_FROM_ADDRESS", None)
@@ -70,7 +89,6 @@ def send_sendgrid_message(
         return False
 
     try:
-        from sendgrid import SendGridAPIClient
         from sendgrid.helpers.mail import (
             Attachment,
             Cc,
@@ -112,7 +130,7 @@ def send_sendgrid_message(
                 )
             )
 
-        response = SendGridAPIClient(api_key).send(message)
+        response = sendgrid_client(api_key).send(message)
         if response.status_code in (200, 201, 202):
             logger.info("SendGrid sent %r to %s", subject, recipients)
             return True
@@ -123,6 +141,87 @@ def send_sendgrid_message(
         return False
 
 
+def send_sendgrid_batch(
+    *,
+    to_emails: Iterable[str],
+    subject: str,
+    html_content: str = "",
+    plain_text_content: str = "",
+    from_email: str | None = None,
+    batch_size: int = MAX_PERSONALIZATIONS_PER_REQUEST,
+) -> int:
+    """
+    Send one message to many recipients with up to 1,000 per SendGrid API call.
+
+    Every recipient gets their own personalization (a single ``To``), so nobody
+    sees anyone else's address. Addresses are de-duplicated case-insensitively.
+
+    Returns how many recipients were in requests SendGrid accepted (HTTP 202).
+    """
+    if not bool(getattr(settings, "EMAIL_SENDING_ENABLED", False)):
+        logger.info(
+            "Email sending disabled (EMAIL_SENDING_ENABLED=False); skipped batch subject=%r",
+            subject,
+        )
+        return 0
+
+    api_key = sendgrid_api_key()
+    if not api_key:
+        logger.warning("SENDGRID_API_KEY not set; batch email not sent (subject=%r)", subject)
+        return 0
+
+    seen: set[str] = set()
+    recipients: list[str] = []
+    for raw in to_emails:
+        addr = (raw or "").strip()
+        if not addr or "@" not in addr or addr.lower() in seen:
+            continue
+        seen.add(addr.lower())
+        recipients.append(addr)
+    if not recipients:
+        return 0
+
+    from sendgrid.helpers.mail import Mail, Personalization, To
+
+    client = sendgrid_client(api_key)
+    size = max(1, min(MAX_PERSONALIZATIONS_PER_REQUEST, batch_size))
+    accepted = 0
+    for start in range(0, len(recipients), size):
+        chunk = recipients[start : start + size]
+        try:
+            kwargs: dict = {"from_email": from_email or default_from_email(), "subject": subject}
+            if plain_text_content:
+                kwargs["plain_text_content"] = plain_text_content
+            if html_content:
+                kwargs["html_content"] = html_content
+            message = Mail(**kwargs)
+            for addr in chunk:
+                personalization = Personalization()
+                personalization.add_to(To(addr))
+                message.add_personalization(personalization)
+            response = client.send(message)
+            if response.status_code in (200, 201, 202):
+                accepted += len(chunk)
+            else:
+                logger.error(
+                    "SendGrid batch failed %r: HTTP %s for %s recipient(s) body=%s",
+                    subject,
+                    response.status_code,
+                    len(chunk),
+                    response.body,
+                )
+        except Exception:
+            logger.exception("SendGrid batch failed for subject=%r (%s recipients)", subject, len(chunk))
+    logger.info(
+        "SendGrid batch %r: %s/%s recipient(s) accepted in %s request(s)",
+        subject,
+        accepted,
+        len(recipients),
+        -(-len(recipients) // size),
+    )
+    return accepted
+
+
 def load_franchise_brochure_attachment() -> AttachmentPayload | None:
     """
     Load the franchise brochure PDF for personal thank-you emails.
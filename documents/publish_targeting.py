@@ -107,8 +107,8 @@ def document_matches_franchise(doc: ParentDocument, franchise: Franchise | None)
 def document_matches_parent(doc: ParentDocument, parent_profile, student=None) -> bool:
     """True when a parent login should see this document (centre + optional class filter)."""
     from accounts.profile_access import effective_franchise_for_parent
+    from students.class_labels import class_key
     from students.models import StudentProfile
-    from students.portal_views import _class_label_matches
 
     franchise = None
     if parent_profile and parent_profile.franchise_id:
@@ -130,31 +130,20 @@ def document_matches_parent(doc: ParentDocument, parent_profile, student=None) -
         return True
     if not parent_profile:
         return False
+    # Same keys as the parental-tips feed fan-out (students.notification_feed).
+    target_keys = {class_key(target) for target in targets}
+
+    def child_matches(child) -> bool:
+        return (getattr(child, "class_key", "") or class_key(child.class_name)) in target_keys
 
     if student is not None:
-        for target in targets:
-            if _class_label_matches(student.class_name, target):
-                return True
-        return False
+        return child_matches(student)
 
     active_children = StudentProfile.objects.filter(parent=parent_profile, is_active=True).only(
-        "class_name"
+        "class_name", "class_key"
     )
-    child_rows = list(active_children)
-    if len(child_rows) > 1:
-        # No ?student= (common on Android until child picker is wired): show if any child matches.
-        for child in child_rows:
-            for target in targets:
-                if _class_label_matches(child.class_name, target):
-                    return True
-        return False
-    if len(child_rows) == 1:
-        for target in targets:
-            if _class_label_matches(child_rows[0].class_name, target):
-                return True
-        return False
-
-    return False
+    # No ?student= (common on Android until child picker is wired): show if any child matches.
+    return any(child_matches(child) for child in active_children)
 
 
 def filter_documents_for_parent(queryset, parent_profile, student=None):
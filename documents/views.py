@@ -15,6 +15,7 @@ from rest_framework.permissions import IsAuthenticated
 from accounts.models import UserRole
 from accounts.permissions import IsFranchiseUser, IsParentUser, IsAdminOrApproverUser
 from accounts.profile_access import franchise_profile_for_user, resolved_parent_profile_for_user, effective_franchise_for_parent
+from students.change_stamps import ParentETagMixin, conditional_parent_get
 from .auth import QueryJWTAuthentication
 from .download_names import (
     franchise_document_download_filename,
@@ -35,7 +36,7 @@ from .serializers import (
 )
 
 
-class ParentDocumentListView(generics.ListAPIView):
+class ParentDocumentListView(ParentETagMixin, generics.ListAPIView):
     """List all active parent documents for parent app."""
     serializer_class = ParentDocumentSerializer
     permission_classes = [IsParentUser]
@@ -62,6 +63,7 @@ class ParentDocumentListView(generics.ListAPIView):
 
 @api_view(['GET'])
 @permission_classes([IsParentUser])
+@conditional_parent_get("parent_documents_by_category")
 def parent_documents_by_category(request, category):
     """Get active documents filtered by category"""
 
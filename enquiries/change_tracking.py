@@ -0,0 +1,115 @@
+"""Field change tracking for lead models without an extra SELECT per save.
+
+``ChangeTrackingMixin`` snapshots the values a row was loaded with
+(``Model.from_db``) so signal handlers and views can ask what changed:
+
+    lead = CrmLead.objects.get(pk=1)
+    lead.status = "hot"
+    lead.changed_fields()      # {"status"}
+    lead.previous("status")    # "untouched"
+
+Only the fields a model lists in ``tracked_fields`` are snapshotted (``None``
+tracks every concrete field), so loading a lead list does not deep-copy each
+row's JSON payload. The snapshot survives until ``save()`` returns, so
+``pre_save`` / ``post_save`` receivers still see the pre-save values;
+afterwards it is rolled forward to what was written. Unsaved instances,
+deferred and untracked fields have no snapshot: ``previous()`` returns
+``default`` and they never appear in ``changed_fields()``.
+
+Consumers are the Meta CAPI stage hook (``signals``, ``status``) and the
+assignment notice in ``crm_api.update_unified_lead`` (``assigned_user``).
+Lead History notes (``UnifiedLeadNote``) are written by their own endpoints
+from the request payload, and the CRM status counters are ``Count``
+aggregates, so neither diffs a saved row against its previous values.
+"""
+
+from __future__ import annotations
+
+import copy
+from typing import Any
+
+_MISSING = object()
+_tracked_attnames: dict[type, frozenset[str] | None] = {}
+
+
+class ChangeTrackingMixin:
+    """Mix into a ``models.Model`` (before ``models.Model`` in the bases)."""
+
+    # Field names (or attnames) to snapshot; ``None`` tracks every concrete field.
+    tracked_fields: tuple[str, ...] | None = None
+
+    @classmethod
+    def _tracked_attnames(cls) -> frozenset[str] | None:
+        if cls not in _tracked_attnames:
+            _tracked_attnames[cls] = (
+                None
+                if cls.tracked_fields is None
+                else frozenset(cls._meta.get_field(name).attname for name in cls.tracked_fields)
+            )
+        return _tracked_attnames[cls]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        tracked = cls._tracked_attnames()
+        instance._loaded_values = {
+            name: _snapshot_value(value)
+            for name, value in zip(field_names, values)
+            if tracked is None or name in tracked
+        }
+        return instance
+
+    def _tracked_attname(self, field: str) -> str:
+        try:
+            return self._meta.get_field(field).attname
+        except Exception:
+            return field
+
+    def previous(self, field: str, default: Any = None) -> Any:
+        """Value ``field`` had when loaded (or last saved); accepts ``assigned_user`` or ``assigned_user_id``."""
+        loaded = getattr(self, "_loaded_values", None) or {}
+        return loaded.get(self._tracked_attname(field), default)
+
+    def changed_fields(self) -> set[str]:
+        """Attnames whose current value differs from the loaded snapshot."""
+        loaded = getattr(self, "_loaded_values", None) or {}
+        return {
+            attname
+            for attname, old in loaded.items()
+            if getattr(self, attname, _MISSING) != old
+        }
+
+    def has_changed(self, field: str) -> bool:
+        return self._tracked_attname(field) in self.changed_fields()
+
+    def _reset_tracking(self, fields=None) -> None:
+        names = (
+            [self._tracked_attname(f) for f in fields]
+            if fields is not None
+            else [f.attname for f in self._meta.concrete_fields]
+        )
+        tracked = self._tracked_attnames()
+        loaded = dict(getattr(self, "_loaded_values", None) or {})
+        deferred = self.get_deferred_fields()
+        for attname in names:
+            if attname not in deferred and (tracked is None or attname in tracked):
+                loaded[attname] = _snapshot_value(getattr(self, attname, None))
+        self._loaded_values = loaded
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._reset_tracking(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        fields = kwargs.get("fields")
+        if fields is None and len(args) > 1:
+            fields = args[1]
+        self._reset_tracking(fields)
+
+
+def _snapshot_value(value: Any) -> Any:
+    # JSON fields are mutated in place by CRM code (raw_payload); copy them.
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
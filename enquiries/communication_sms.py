@@ -33,6 +33,13 @@ def normalize_mobile(raw: str) -> str:
     return ""
 
 
+def sms_api_key() -> str:
+    return (
+        os.getenv("SMS_API_KEY", "").strip()
+        or os.getenv("COMMUNICATION_API_KEY", "").strip()
+    )
+
+
 def build_otp_message(code: str) -> str:
     return OTP_MESSAGE_TEMPLATE.replace("{#var#}", str(code))
 
@@ -49,10 +56,7 @@ def send_otp_sms(phone: str, code: str) -> tuple[bool, str, dict]:
         "message": "One time password (OTP) for verifying your mobile number is XXXX - T.I.M.E. KIDS"
       }'
     """
-    api_key = (
-        os.getenv("SMS_API_KEY", "").strip()
-        or os.getenv("COMMUNICATION_API_KEY", "").strip()
-    )
+    api_key = sms_api_key()
     if not api_key:
         return False, "SMS API key is not configured.", {}
 
@@ -2162,7 +2162,8 @@ def update_unified_lead(raw_id: str, data: dict, *, include_detail: bool = False
         if "nextFollowUpDate" in data:
             lead.next_follow_up_date = parse_datetime(data["nextFollowUpDate"]) if data["nextFollowUpDate"] else None
         _apply_meeting_flags(lead, data)
-        assignment_changed = _maybe_assign_lead(lead, request, data)
+        _maybe_assign_lead(lead, request, data)
+        assignment_changed = lead.has_changed("assigned_user")
         lead.save()
         if assignment_changed:
             _notify_explicit_assignment(lead, request)
@@ -2191,7 +2192,8 @@ def update_unified_lead(raw_id: str, data: dict, *, include_detail: bool = False
         if "nextFollowUpDate" in data:
             enquiry.next_follow_up_date = parse_datetime(data["nextFollowUpDate"]) if data["nextFollowUpDate"] else None
         _apply_meeting_flags(enquiry, data)
-        assignment_changed = _maybe_assign_lead(enquiry, request, data)
+        _maybe_assign_lead(enquiry, request, data)
+        assignment_changed = enquiry.has_changed("assigned_user")
         enquiry.save()
         if assignment_changed:
             _notify_explicit_assignment(enquiry, request)
@@ -2222,7 +2224,8 @@ def update_unified_lead(raw_id: str, data: dict, *, include_detail: bool = False
         if "nextFollowUpDate" in data:
             franchise_enq.next_follow_up_date = parse_datetime(data["nextFollowUpDate"]) if data["nextFollowUpDate"] else None
         _apply_meeting_flags(franchise_enq, data)
-        assignment_changed = _maybe_assign_lead(franchise_enq, request, data)
+        _maybe_assign_lead(franchise_enq, request, data)
+        assignment_changed = franchise_enq.has_changed("assigned_user")
         franchise_enq.save()
         if assignment_changed:
             _notify_explicit_assignment(franchise_enq, request)
@@ -2253,7 +2256,8 @@ def update_unified_lead(raw_id: str, data: dict, *, include_detail: bool = False
         if "nextFollowUpDate" in data:
             row.next_follow_up_date = parse_datetime(data["nextFollowUpDate"]) if data["nextFollowUpDate"] else None
         _apply_meeting_flags(row, data)
-        assignment_changed = _maybe_assign_lead(row, request, data)
+        _maybe_assign_lead(row, request, data)
+        assignment_changed = row.has_changed("assigned_user")
         row.save()
         if assignment_changed:
             _notify_explicit_assignment(row, request)
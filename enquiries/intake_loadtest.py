@@ -0,0 +1,238 @@
+"""Load generator for the public intake endpoints.
+
+Used by ``manage.py loadtest_intake``: serves the Django app on an in-process
+threaded WSGI server, replays synthetic form payloads at a fixed concurrency
+and reports throughput, latency percentiles, DB queries per request and error
+rates per endpoint. Nothing here is imported by production code paths.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+ENDPOINTS = ("landing-submit", "crm-leads", "submit", "send-otp", "franchise-submit")
+API_PREFIX = "/api/enquiries/"
+
+_CITIES = ("Hyderabad", "Chennai", "Bengaluru", "Kochi", "Vijayawada", "Coimbatore")
+_CENTRES = ("Kondapur", "Anna Nagar", "Whitefield", "Kakkanad", "Benz Circle", "RS Puram")
+_STATES = ("Telangana", "Tamil Nadu", "Karnataka", "Kerala", "Andhra Pradesh", "Tamil Nadu")
+_LP_SOURCES = ("july_lp", "july_meta", "lp_wb", "web")
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    """Nearest-rank percentile (``pct`` in 0–100) of ``values``."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class PhoneSequence:
+    """Unique 10-digit mobiles for one run (``9`` + 2-digit run tag + 7-digit counter)."""
+
+    def __init__(self, run_tag: int | None = None):
+        self.prefix = f"9{(run_tag if run_tag is not None else random.randint(10, 99)) % 100:02d}"
+        self._next = 0
+        self._lock = threading.Lock()
+        self.issued: list[str] = []
+
+    def next(self) -> str:
+        with self._lock:
+            self._next += 1
+            phone = f"{self.prefix}{self._next:07d}"
+            self.issued.append(phone)
+            return phone
+
+
+def loadtest_email(phone: str) -> str:
+    """Marker address on every lead a run creates; cleanup only deletes rows carrying it."""
+    return f"loadtest.{phone}@example.invalid"
+
+
+def build_payload(endpoint: str, phone: str, n: int) -> tuple[str, dict[str, Any]]:
+    """``("form" | "json", body)`` shaped like the real landing / CRM / website forms."""
+    i = n % len(_CITIES)
+    name = f"Loadtest Parent {n}"
+    email = loadtest_email(phone)
+    if endpoint == "landing-submit":
+        return "form", {
+            "name": name,
+            "telephone": phone,
+            "email": email,
+            "city": _CITIES[i],
+            "Location": _CENTRES[i],
+            "source": "loadtest",
+        }
+    if endpoint == "crm-leads":
+        source = _LP_SOURCES[n % len(_LP_SOURCES)]
+        return "json", {
+            "fullName": name,
+            "mobile": phone,
+            "email": email,
+            "state": _STATES[i],
+            "city": _CITIES[i],
+            "preferredCentreLocation": _CENTRES[i],
+            "investmentRange": "15-25 Lakhs",
+            "source": source,
+            "landingPageUrl": f"https://www.timekidspreschools.in/franchise/?utm_source=loadtest&utm_campaign=c{i}",
+            "utmSource": "loadtest",
+            "utmMedium": "cpc",
+            "utmCampaign": f"loadtest_{i}",
+        }
+    if endpoint == "submit":
+        return "json", {
+            "enquiry_type": "ADMISSION" if n % 4 else "CONTACT",
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "message": "Admission enquiry for playgroup.",
+            "city": _CITIES[i],
+            "child_age": "2.5 years",
+        }
+    if endpoint == "send-otp":
+        return "json", {"phone": phone}
+    if endpoint == "franchise-submit":
+        return "json", {
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "message": "Interested in a franchise.",
+            "state": _STATES[i],
+            "city": _CITIES[i],
+        }
+    raise ValueError(f"Unknown endpoint {endpoint!r}")
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    status: int
+    seconds: float
+    error: str = ""
+
+
+@dataclass
+class QueryLog:
+    """Per-path DB query counts recorded by ``CountingWSGIApp``."""
+
+    counts: dict[str, list[int]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def add(self, path: str, n: int) -> None:
+        with self.lock:
+            self.counts.setdefault(path, []).append(n)
+
+    def for_endpoint(self, endpoint: str) -> list[int]:
+        return list(self.counts.get(f"{API_PREFIX}{endpoint}/", []))
+
+
+class CountingWSGIApp:
+    """Wrap a WSGI app and count DB queries per request on the serving thread."""
+
+    def __init__(self, app: Callable, log: QueryLog):
+        self.app = app
+        self.log = log
+
+    def __call__(self, environ, start_response):
+        from django.db import connection
+
+        executed = [0]
+
+        def counter(execute, sql, params, many, context):
+            executed[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            body = list(self.app(environ, start_response))
+        self.log.add(environ.get("PATH_INFO", ""), executed[0])
+        return body
+
+
+def post(base_url: str, endpoint: str, kind: str, body: dict[str, Any], *, client_ip: str, timeout: float) -> Sample:
+    url = f"{base_url}{API_PREFIX}{endpoint}/"
+    if kind == "form":
+        data = urllib.parse.urlencode(body).encode("utf-8")
+        content_type = "application/x-www-form-urlencoded"
+    else:
+        data = json.dumps(body).encode("utf-8")
+        content_type = "application/json"
+    request = urllib.request.Request(
+        url,
+        data=data,
+        method="POST",
+        headers={"Content-Type": content_type, "X-Forwarded-For": client_ip},
+    )
+    started = time.perf_counter()
+    try:
+        # Landing submit answers with a redirect; don't follow it.
+        opener = urllib.request.build_opener(_NoRedirect)
+        with opener.open(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+        return Sample(endpoint, status, time.perf_counter() - started)
+    except urllib.error.HTTPError as exc:
+        detail = exc.read()[:300].decode("utf-8", "replace")
+        return Sample(endpoint, exc.code, time.perf_counter() - started, detail)
+    except Exception as exc:
+        return Sample(endpoint, 0, time.perf_counter() - started, str(exc))
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+    def http_error_302(self, req, fp, code, msg, headers):
+        return fp
+
+    http_error_301 = http_error_303 = http_error_307 = http_error_302
+
+
+def is_success(sample: Sample) -> bool:
+    return 200 <= sample.status < 400
+
+
+def summarize(samples: list[Sample], wall_seconds: float, queries: list[int] | None = None) -> dict[str, Any]:
+    latencies = [s.seconds * 1000 for s in samples]
+    ok = [s for s in samples if is_success(s)]
+    statuses: dict[str, int] = {}
+    for s in samples:
+        statuses[str(s.status)] = statuses.get(str(s.status), 0) + 1
+    errors = [s.error for s in samples if not is_success(s) and s.error]
+    out: dict[str, Any] = {
+        "requests": len(samples),
+        "ok": len(ok),
+        "errors": len(samples) - len(ok),
+        "error_rate": round((len(samples) - len(ok)) / len(samples), 4) if samples else None,
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 50)),
+            "p90": _round(percentile(latencies, 90)),
+            "p95": _round(percentile(latencies, 95)),
+            "p99": _round(percentile(latencies, 99)),
+            "max": _round(max(latencies) if latencies else None),
+            "mean": _round(sum(latencies) / len(latencies) if latencies else None),
+        },
+        "sample_errors": errors[:3],
+    }
+    if queries is not None:
+        out["db_queries_per_request"] = {
+            "mean": _round(sum(queries) / len(queries) if queries else None),
+            "p95": percentile([float(q) for q in queries], 95),
+            "max": max(queries) if queries else None,
+        }
+    return out
+
+
+def _round(value: float | None) -> float | None:
+    return round(value, 2) if value is not None else None
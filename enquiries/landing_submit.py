@@ -3,13 +3,14 @@ import re
 from dataclasses import dataclass
 from typing import Any
 
-from django.db import DatabaseError
+from django.db import DatabaseError, transaction
 from django.db.models import Q
 from django.http import HttpResponseBadRequest, HttpResponseRedirect
 from franchises.franchise_geo import city_query_variants
 from franchises.models import Franchise
 
-from .models import KidsEnquiry
+from .models import KidsEnquiry, LeadNotificationKind
+from .lead_dedupe import queue_intake_notifications
 
 logger = logging.getLogger(__name__)
 
@@ -143,27 +144,33 @@ def save_landing_enquiry(post_data: Any) -> LandingEnquiryRecord:
     centre_name, centre_phone, centre_email = _centre_contact(franchise)
     state = (franchise.state if franchise else "") or ""
 
-    row = KidsEnquiry.objects.create(
-        name=name,
-        mobile=telephone,
-        mobileno=telephone,
-        email=email,
-        state=state,
-        city=city,
-        location=location,
-        enquiry_type=LANDING_ENQUIRY_TYPE,
-        source=source,
-        centre_name=centre_name or location,
-        centre_phone=centre_phone,
-        centre_email=centre_email,
-        raw_payload=_raw_payload(post_data),
-    )
+    with transaction.atomic():
+        row = KidsEnquiry.objects.create(
+            name=name,
+            mobile=telephone,
+            mobileno=telephone,
+            email=email,
+            state=state,
+            city=city,
+            location=location,
+            enquiry_type=LANDING_ENQUIRY_TYPE,
+            source=source,
+            centre_name=centre_name or location,
+            centre_phone=centre_phone,
+            centre_email=centre_email,
+            raw_payload=_raw_payload(post_data),
+        )
+        # Parent/team mail + CRM heads reminder go out after commit, off the request thread.
+        queue_intake_notifications(
+            row,
+            [LeadNotificationKind.LANDING_EMAILS, LeadNotificationKind.LANDING_HEADS_REMINDER],
+        )
     return LandingEnquiryRecord.from_kids_enquiry(row)
 
 
 def handle_landing_enquiry_post(post_data: Any):
     try:
-        record = save_landing_enquiry(post_data)
+        save_landing_enquiry(post_data)
     except ValueError as exc:
         logger.info("Landing enquiry validation failed: %s", exc)
         return HttpResponseBadRequest(str(exc))
@@ -179,26 +186,5 @@ def handle_landing_enquiry_post(post_data: Any):
             "We could not save your enquiry. Please try again or contact the centre directly."
         )
 
-    try:
-        from .emails import send_crm_heads_new_lead_reminder, send_landing_enquiry_emails
-
-        email_status = send_landing_enquiry_emails(record)
-        if email_status:
-            KidsEnquiry.objects.filter(pk=record.pk).update(email_status=email_status)
-
-        source = _post_value(post_data, "source") or getattr(record, "source", None) or "Landing"
-        send_crm_heads_new_lead_reminder(
-            name=getattr(record, "name", None) or "",
-            lead_source=f"Landing ({source})" if source else "Landing",
-            centre_name=getattr(record, "centre_name", None) or getattr(record, "location", None) or "",
-            state=getattr(record, "state", None) or "",
-            city=getattr(record, "city", None) or getattr(record, "location", None) or "",
-            phone=getattr(record, "mobileno", None) or getattr(record, "mobile", None) or "",
-            lead_email=getattr(record, "email", None) or "",
-            lead_kind="admission",
-        )
-    except Exception:
-        logger.exception("Landing enquiry email failed for id=%s", record.pk)
-
     source = _post_value(post_data, "source")
     return HttpResponseRedirect(_thank_you_path(source))
@@ -0,0 +1,291 @@
+"""Cross-source duplicate-lead detection at intake.
+
+The same parent often submits the landing page (``kids_enquiry``), the website
+admission form (``enquiry``) and a Meta Instant Form within minutes. Every
+intake path calls ``register_intake`` (or ``queue_intake_notifications``) in
+the transaction that saves the lead; it files a ``LeadIntakeKey`` and, when a
+primary with the same normalized phone and lead family arrived inside
+``LEAD_DEDUPE_WINDOW_MINUTES``, links the new lead to it. Duplicates take the
+primary's assignee (or are auto-assigned themselves when the primary has none)
+and send no parent/team emails.
+
+Families follow the CRM pipelines: landing (``kids_enquiry``) and website
+admission (``enquiry``) leads are deduped against each other; Meta Instant Form
+leads land in ``CrmLead``, the franchise-investor pipeline (investment range,
+franchise type), so they are deduped against franchise enquiries and other CRM
+campaign leads rather than against admissions. Linking across families would
+hand an admission lead to a franchise-team assignee.
+
+Keys carry no foreign key to the lead tables: deleting a lead removes its key
+(``signals.drop_lead_intake_key``), and ``find_primary`` skips primaries whose
+lead row has gone anyway (raw SQL deletes).
+
+Concurrent first submits can both become primaries; ``cluster_duplicate_leads``
+folds those (and history) together afterwards.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable
+
+from django.apps import apps
+from django.utils import timezone
+
+from common.env import int_setting
+
+from .models import LeadIntakeKey
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW_MINUTES = 24 * 60
+# Stale (deleted-lead) primaries pruned per lookup before giving up on a match.
+MAX_STALE_PRIMARIES = 3
+
+# Same split as crm_users.resolve_notify_lead_kind: CRM campaign leads are the
+# franchise pipeline, landing / website enquiries are admissions.
+LEAD_FAMILIES = {
+    "enquiries.enquiry": "admission",
+    "enquiries.kidsenquiry": "admission",
+    "enquiries.franchiseenquiry": "franchise",
+    "enquiries.crmlead": "franchise",
+}
+
+# (phone field, received-at field) per lead model.
+LEAD_FIELDS = {
+    "enquiries.enquiry": ("phone", "created_at"),
+    "enquiries.kidsenquiry": ("mobileno", "created_date"),
+    "enquiries.franchiseenquiry": ("phone", "created_at"),
+    "enquiries.crmlead": ("mobile", "created_at"),
+}
+
+
+def window() -> timedelta:
+    """LEAD_DEDUPE_WINDOW_MINUTES — 0 turns intake dedupe off."""
+    return timedelta(minutes=max(0, int_setting("LEAD_DEDUPE_WINDOW_MINUTES", DEFAULT_WINDOW_MINUTES)))
+
+
+def normalize_phone(raw: Any) -> str:
+    """Last 10 digits after stripping +91 / leading 0; empty when there are fewer than 10."""
+    digits = re.sub(r"\D", "", str(raw or ""))
+    if len(digits) == 12 and digits.startswith("91"):
+        digits = digits[2:]
+    elif len(digits) == 11 and digits.startswith("0"):
+        digits = digits[1:]
+    return digits[-10:] if len(digits) >= 10 else ""
+
+
+def lead_key(lead) -> tuple[str, str] | None:
+    """``(phone, family)`` for a lead instance, or ``None`` when it has no usable phone."""
+    label = lead._meta.label_lower
+    family = LEAD_FAMILIES.get(label)
+    if not family:
+        return None
+    phone_field, _ = LEAD_FIELDS[label]
+    phone = normalize_phone(getattr(lead, phone_field, None) or getattr(lead, "mobile", None))
+    return (phone, family) if phone else None
+
+
+def load_lead(lead_model: str, lead_id: int):
+    return apps.get_model(lead_model).objects.filter(pk=lead_id).first()
+
+
+@dataclass
+class DuplicateMatch:
+    primary: LeadIntakeKey
+    key: LeadIntakeKey
+
+    @property
+    def primary_lead(self):
+        return load_lead(self.primary.lead_model, self.primary.lead_id)
+
+
+def lead_exists(lead_model: str, lead_id: int) -> bool:
+    return apps.get_model(lead_model).objects.filter(pk=lead_id).exists()
+
+
+def find_primary(phone: str, family: str, received_at: datetime) -> LeadIntakeKey | None:
+    """
+    Latest primary for ``(phone, family)`` inside the window before ``received_at`` (one index range scan).
+
+    A primary whose lead row no longer exists is dropped and the next one is tried.
+    """
+    span = window()
+    if not span:
+        return None
+    candidates = LeadIntakeKey.objects.filter(
+        phone=phone,
+        family=family,
+        primary__isnull=True,
+        received_at__gte=received_at - span,
+        received_at__lte=received_at,
+    ).order_by("-received_at")
+    for _attempt in range(MAX_STALE_PRIMARIES + 1):
+        primary = candidates.first()
+        if primary is None or lead_exists(primary.lead_model, primary.lead_id):
+            return primary
+        logger.info("Dropping intake key for deleted lead %s#%s", primary.lead_model, primary.lead_id)
+        primary.delete()
+    return None
+
+
+def register_intake(lead, *, received_at: datetime | None = None) -> DuplicateMatch | None:
+    """File ``lead``'s dedupe key; returns the match when it duplicates an earlier lead."""
+    key = lead_key(lead)
+    if key is None or not lead.pk:
+        return None
+    phone, family = key
+    received_at = received_at or timezone.now()
+    primary = find_primary(phone, family, received_at)
+    row, _created = LeadIntakeKey.objects.get_or_create(
+        lead_model=lead._meta.label_lower,
+        lead_id=lead.pk,
+        defaults={"phone": phone, "family": family, "received_at": received_at, "primary": primary},
+    )
+    if primary is None or row.primary_id != primary.pk:
+        return None
+    logger.info(
+        "Lead %s#%s duplicates %s#%s (%s, %s)",
+        row.lead_model,
+        row.lead_id,
+        primary.lead_model,
+        primary.lead_id,
+        family,
+        phone[-4:],
+    )
+    return DuplicateMatch(primary=primary, key=row)
+
+
+def copy_primary_assignee(lead, primary_lead) -> bool:
+    """Give an unassigned duplicate the primary's assignee; True when it changed."""
+    if primary_lead is None or getattr(lead, "assigned_user_id", None):
+        return False
+    assignee_id = getattr(primary_lead, "assigned_user_id", None)
+    if not assignee_id:
+        return False
+    lead.assigned_user_id = assignee_id
+    lead.save(update_fields=["assigned_user"])
+    return True
+
+
+def link_duplicate(lead, primary_lead, *, lead_source: str = "") -> bool:
+    """
+    Assign a duplicate: the primary's assignee when it has one, else auto-assign ``lead`` itself.
+
+    The primary may never get an assignee (landing leads are not auto-assigned,
+    or the primary was deleted); the duplicate must not stay unassigned because of it.
+    """
+    if copy_primary_assignee(lead, primary_lead):
+        return True
+    if getattr(lead, "assigned_user_id", None):
+        return False
+    from .emails import assign_and_notify_new_lead
+
+    return bool(assign_and_notify_new_lead(lead, lead_source=lead_source))
+
+
+def queue_intake_notifications(
+    lead,
+    kinds: Iterable[str],
+    *,
+    params: dict[str, Any] | None = None,
+) -> DuplicateMatch | None:
+    """
+    Register ``lead`` for dedupe and queue its notifications in the current transaction.
+
+    A duplicate queues only ``LINK_DUPLICATE`` (assignee copy, no parent/team email).
+    """
+    from .models import LeadNotificationKind
+    from .notification_outbox import enqueue
+
+    match = register_intake(lead)
+    if match is None:
+        enqueue(lead, list(kinds), params=params)
+    else:
+        enqueue(
+            lead,
+            [LeadNotificationKind.LINK_DUPLICATE],
+            params={**(params or {}), "primary_model": match.primary.lead_model, "primary_id": match.primary.lead_id},
+        )
+    return match
+
+
+# --- batch clustering ------------------------------------------------------
+
+
+def backfill_keys(*, since: datetime | None = None, chunk: int = 1000) -> int:
+    """Create ``LeadIntakeKey`` rows for existing leads that have none; returns rows added."""
+    added = 0
+    for label, (phone_field, time_field) in LEAD_FIELDS.items():
+        model = apps.get_model(label)
+        qs = model.objects.order_by()
+        if since is not None:
+            qs = qs.filter(**{f"{time_field}__gte": since})
+        have = set(LeadIntakeKey.objects.filter(lead_model=label).values_list("lead_id", flat=True))
+        batch: list[LeadIntakeKey] = []
+        for pk, raw_phone, received in qs.values_list("pk", phone_field, time_field).iterator(chunk_size=chunk):
+            phone = normalize_phone(raw_phone)
+            if pk in have or not phone or received is None:
+                continue
+            batch.append(
+                LeadIntakeKey(
+                    phone=phone,
+                    family=LEAD_FAMILIES[label],
+                    lead_model=label,
+                    lead_id=pk,
+                    received_at=received,
+                )
+            )
+            if len(batch) >= chunk:
+                LeadIntakeKey.objects.bulk_create(batch, ignore_conflicts=True)
+                added += len(batch)
+                batch = []
+        if batch:
+            LeadIntakeKey.objects.bulk_create(batch, ignore_conflicts=True)
+            added += len(batch)
+    return added
+
+
+def cluster_rows(rows: list[tuple[int, str, str, datetime, int | None]], span: timedelta) -> dict[int, int | None]:
+    """
+    Assign primaries for ``(id, phone, family, received_at, current_primary_id)`` rows.
+
+    Per ``(phone, family)`` in time order, a row within ``span`` of the current
+    primary joins it; otherwise it starts a new cluster. Returns ``{id: new_primary_id}``
+    for rows whose primary changes.
+    """
+    changes: dict[int, int | None] = {}
+    current: dict[tuple[str, str], tuple[int, datetime]] = {}
+    for pk, phone, family, received, old_primary in sorted(rows, key=lambda r: (r[1], r[2], r[3], r[0])):
+        head = current.get((phone, family))
+        if head is not None and span and received - head[1] <= span:
+            new_primary = head[0]
+        else:
+            new_primary = None
+            current[(phone, family)] = (pk, received)
+        if new_primary != old_primary:
+            changes[pk] = new_primary
+    return changes
+
+
+def recluster(*, phones: Iterable[str] | None = None, dry_run: bool = False, chunk: int = 1000) -> dict[str, int]:
+    """Recompute primaries for every key (or only ``phones``); returns cluster stats."""
+    qs = LeadIntakeKey.objects.order_by()
+    if phones is not None:
+        qs = qs.filter(phone__in=list(phones))
+    rows = list(qs.values_list("pk", "phone", "family", "received_at", "primary_id").iterator(chunk_size=chunk))
+    changes = cluster_rows(rows, window())
+    duplicates = sum(
+        1 for pk, *_rest, old in rows if (changes[pk] if pk in changes else old) is not None
+    )
+    if changes and not dry_run:
+        ids = list(changes)
+        for start in range(0, len(ids), chunk):
+            part = LeadIntakeKey.objects.in_bulk(ids[start : start + chunk])
+            for pk, key in part.items():
+                key.primary_id = changes[pk]
+            LeadIntakeKey.objects.bulk_update(list(part.values()), ["primary"], batch_size=chunk)
+    return {"keys": len(rows), "changed": len(changes), "duplicates": duplicates, "primaries": len(rows) - duplicates}
@@ -0,0 +1,189 @@
+"""
+Benchmark Meta lead ingestion against the offline Graph stand-in.
+
+  python manage.py benchmark_meta_ingest
+  python manage.py benchmark_meta_ingest --forms 40 --leads-per-form 50 --latency-ms 80
+  python manage.py benchmark_meta_ingest --error-rate 0.05 --json
+
+Round 1 imports every synthetic lead (cold; at most 50 per form, the size of
+one /leads page); later rounds re-poll the same forms (steady state). Each
+round reports leads/sec, Graph calls per lead and DB queries per lead. Email
+is disabled for the run. Imported rows are deleted afterwards unless --keep.
+
+Writes CRM rows: refuses to run with DEBUG off unless --allow-non-debug.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from enquiries import meta_leads, meta_metadata_cache
+from enquiries.meta_graph_standin import FORM_NAME_PREFIX, STANDIN_PAGE_ID, StandinData, StandinServer
+
+
+def _per(value: float, count: int) -> float | None:
+    return round(value / count, 3) if count else None
+
+
+class Command(BaseCommand):
+    help = "Measure Meta lead import throughput, Graph calls/lead and DB queries/lead offline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--forms", type=int, default=10)
+        parser.add_argument("--leads-per-form", type=int, default=20)
+        parser.add_argument("--rounds", type=int, default=2, help="Round 1 is cold; the rest are steady-state polls.")
+        parser.add_argument("--latency-ms", type=int, default=0)
+        parser.add_argument("--jitter-ms", type=int, default=0)
+        parser.add_argument("--error-rate", type=float, default=0.0)
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Drop cached form/ad metadata for the stand-in ids before round 1.",
+        )
+        parser.add_argument("--keep", action="store_true", help="Keep imported CRM rows.")
+        parser.add_argument("--json", action="store_true", help="Print one machine-readable JSON report.")
+        parser.add_argument("--allow-non-debug", action="store_true")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["allow_non_debug"]:
+            raise CommandError("This writes CRM rows. Run with DEBUG=True or pass --allow-non-debug.")
+
+        data = StandinData(forms=options["forms"], leads_per_form=options["leads_per_form"])
+        server = StandinServer(
+            data,
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+        ).start()
+        overrides = {
+            "META_GRAPH_BASE_URL": server.base_url,
+            "META_PAGE_ID": STANDIN_PAGE_ID,
+            "META_PAGE_ACCESS_TOKEN": "standin-token",
+            "META_CAPI_ACCESS_TOKEN": "standin-token",
+            # Only this run's synthetic rows go to the stand-in (see _round); real
+            # pending events wait for the next regular dispatch.
+            "META_CAPI_OUTBOX_AUTO_DISPATCH": False,
+            "META_LEADS_FORM_NAMES": "*",
+            "META_LEADS_FORM_PREFIXES": FORM_NAME_PREFIX,
+            "META_LEADS_FORM_IDS": "",
+            "META_LEADS_SYNC_SINCE": "",
+            "SENDGRID_API_KEY": "",
+        }
+        saved_token = meta_leads._resolved_page_token
+        report = {
+            "config": {
+                "forms": options["forms"],
+                "leads_per_form": options["leads_per_form"],
+                "latency_ms": options["latency_ms"],
+                "jitter_ms": options["jitter_ms"],
+                "error_rate": options["error_rate"],
+            },
+            "rounds": [],
+        }
+        try:
+            with override_settings(**overrides):
+                meta_leads._resolved_page_token = None
+                meta_metadata_cache.clear_memory()
+                if options["cold"]:
+                    self._drop_cached_metadata(data)
+                for number in range(1, max(1, options["rounds"]) + 1):
+                    report["rounds"].append(self._round(number, server, data))
+        finally:
+            meta_leads._resolved_page_token = saved_token
+            meta_metadata_cache.clear_memory()
+            server.stop()
+            if not options["keep"]:
+                report["cleaned_up"] = self._cleanup(data)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report, default=str))
+            return
+        for row in report["rounds"]:
+            self.stdout.write(
+                "round {round}: polled={leads_polled} imported={imported} failed={failed} "
+                "{seconds}s leads/sec={leads_per_second} graph_calls/lead={graph_calls_per_lead} "
+                "db_queries/lead={db_queries_per_lead} capi_requests={capi_requests} "
+                "cache_hit_rate={cache_hit_rate}".format(**row)
+            )
+
+    def _round(self, number: int, server: StandinServer, data: StandinData) -> dict:
+        from enquiries.meta_capi_outbox import dispatch_outbox
+
+        server.reset()
+        # sync_page_leads reads one /leads page (≤50) per form.
+        per_form_limit = min(50, max(1, len(data.leads) // max(1, len(data.forms))))
+        polled = per_form_limit * len(data.forms)
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            summary = meta_leads.sync_page_leads(per_form_limit=per_form_limit, max_forms=len(data.forms))
+        seconds = time.perf_counter() - started
+        capi = dispatch_outbox(crm_lead_ids=self._synthetic_crm_ids(data))
+        stats = server.snapshot()
+        graph_calls = int(stats.get("http_requests", 0)) - int(stats.get("capi_requests", 0))
+        cache = summary.get("metadata_cache") or {}
+        return {
+            "round": number,
+            "leads_polled": polled,
+            "imported": summary.get("imported", 0),
+            "skipped": summary.get("skipped", 0),
+            "failed": summary.get("failed", 0),
+            "seconds": round(seconds, 3),
+            "leads_per_second": round(summary.get("imported", 0) / seconds, 2) if seconds else None,
+            "graph_calls": graph_calls,
+            "graph_calls_per_lead": _per(graph_calls, polled),
+            "db_queries": len(queries.captured_queries),
+            "db_queries_per_lead": _per(len(queries.captured_queries), polled),
+            "capi_requests": stats.get("capi_requests", 0),
+            "capi_events": stats.get("capi_events", 0),
+            "capi_sent": capi.get("sent", 0),
+            "injected_errors": stats.get("injected_errors", 0),
+            "cache_hit_rate": cache.get("hit_rate"),
+            "standin": stats,
+        }
+
+    def _synthetic_crm_ids(self, data: StandinData) -> list[int]:
+        from enquiries.models import CrmLead
+
+        return list(
+            CrmLead.objects.filter(raw_payload__meta_leadgen_id__in=list(data.leads)).values_list("pk", flat=True)
+        )
+
+    def _drop_cached_metadata(self, data: StandinData) -> None:
+        from enquiries.models import MetaGraphMetadataCache
+
+        MetaGraphMetadataCache.objects.filter(object_id__in=list(data.forms) + list(data.ads)).delete()
+
+    def _cleanup(self, data: StandinData) -> dict:
+        from enquiries.models import (
+            CrmLead,
+            LeadIntakeKey,
+            LeadNotification,
+            MetaCapiOutboxEvent,
+            MetaLeadImportClaim,
+            MetaLeadSuppress,
+            MetaLeadWebhookEvent,
+        )
+
+        ids = list(data.leads)
+        removed = {"crm_leads": 0}
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            crm_ids = list(
+                CrmLead.objects.filter(raw_payload__meta_leadgen_id__in=chunk).values_list("pk", flat=True)
+            )
+            MetaCapiOutboxEvent.objects.filter(crm_lead_id__in=crm_ids).delete()
+            LeadNotification.objects.filter(lead_model="enquiries.crmlead", lead_id__in=crm_ids).delete()
+            LeadIntakeKey.objects.filter(lead_model="enquiries.crmlead", lead_id__in=crm_ids).delete()
+            CrmLead.objects.filter(pk__in=crm_ids).delete()
+            removed["crm_leads"] += len(crm_ids)
+            # Deleting CRM rows re-suppresses their leadgen ids; drop those too.
+            MetaLeadSuppress.objects.filter(leadgen_id__in=chunk).delete()
+            MetaLeadImportClaim.objects.filter(leadgen_id__in=chunk).delete()
+            MetaLeadWebhookEvent.objects.filter(leadgen_id__in=chunk).delete()
+        return removed
@@ -0,0 +1,86 @@
+"""
+Import queued Meta webhook events from meta_lead_webhook_inbox.
+
+  python manage.py drain_meta_webhook_inbox
+  python manage.py drain_meta_webhook_inbox --workers 8 --batch-size 100
+  python manage.py drain_meta_webhook_inbox --loop 10
+  python manage.py drain_meta_webhook_inbox --replay-failed
+  python manage.py drain_meta_webhook_inbox --replay-failed --leadgen-id 1234567890123456
+  python manage.py drain_meta_webhook_inbox --stats
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from enquiries.meta_webhook_inbox import drain_inbox, inbox_counts, replay_failed
+
+
+class Command(BaseCommand):
+    help = "Drain (and optionally replay) the Meta Lead Ads webhook inbox."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=None, help="Concurrent import threads.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Rows claimed per batch.")
+        parser.add_argument(
+            "--loop",
+            type=int,
+            default=0,
+            help="Keep draining, sleeping N seconds between passes (dedicated worker).",
+        )
+        parser.add_argument(
+            "--replay-failed",
+            action="store_true",
+            help="Reset failed events to pending before draining.",
+        )
+        parser.add_argument(
+            "--include-skipped",
+            action="store_true",
+            help="With --replay-failed, also replay skipped events.",
+        )
+        parser.add_argument(
+            "--leadgen-id",
+            action="append",
+            default=[],
+            help="Limit --replay-failed to these leadgen ids (repeatable).",
+        )
+        parser.add_argument("--stats", action="store_true", help="Print per-status counts only.")
+
+    def _write_counts(self):
+        counts = inbox_counts()
+        self.stdout.write(" ".join(f"{key}={value}" for key, value in counts.items()))
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self._write_counts()
+            return
+
+        if options["replay_failed"]:
+            reset = replay_failed(
+                leadgen_ids=options["leadgen_id"] or None,
+                include_skipped=options["include_skipped"],
+            )
+            self.stdout.write(f"Replaying {reset} event(s).")
+
+        while True:
+            summary = drain_inbox(workers=options["workers"], batch_size=options["batch_size"])
+            if summary["events"] or not options["loop"]:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        "Inbox drained: events={events} imported={imported} skipped={skipped} "
+                        "failed={failed} requeued={pending}".format(
+                            events=summary["events"],
+                            imported=summary.get("imported", 0),
+                            skipped=summary.get("skipped", 0),
+                            failed=summary.get("failed", 0),
+                            pending=summary.get("pending", 0),
+                        )
+                    )
+                )
+            if not options["loop"]:
+                break
+            time.sleep(max(1, options["loop"]))
+
+        self._write_counts()
@@ -0,0 +1,174 @@
+"""
+Load-test the public intake endpoints against an in-process server.
+
+  python manage.py loadtest_intake                           # all endpoints, 200 requests each, concurrency 16
+  python manage.py loadtest_intake --endpoints submit,crm-leads --requests 1000 --concurrency 32
+  python manage.py loadtest_intake --json --output /tmp/intake-load.json
+  python manage.py loadtest_intake --no-drain                # leave queued notifications in the outbox
+  python manage.py loadtest_intake --keep                    # don't delete the leads it created
+
+Serves this project's WSGI app on a threaded local server (same process, same
+database settings), replays landing / website / CRM / franchise form payloads
+with unique phones and client IPs, and reports per endpoint: throughput,
+latency p50/p90/p95/p99, DB queries per request and error rate. SendGrid mail
+is switched off and OTP SMS is captured in memory — nothing leaves the box.
+
+Writes real rows: point it at a dev or scratch database. Refuses to run with
+DEBUG=False unless --allow-non-debug is passed. Created leads (matched by phone and
+load-test email), their outbox and dedupe rows are deleted afterwards unless --keep.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+
+from enquiries import intake_loadtest as lt
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Replay public intake form payloads at a fixed concurrency and report latency / DB query stats."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--endpoints",
+            default=",".join(lt.ENDPOINTS),
+            help=f"Comma-separated subset of: {', '.join(lt.ENDPOINTS)}.",
+        )
+        parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Parallel client threads.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--no-drain", action="store_true", help="Don't start the notification outbox drain.")
+        parser.add_argument("--keep", action="store_true", help="Keep the leads created by this run.")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+        parser.add_argument("--output", default="", help="Also write the JSON report to this path.")
+        parser.add_argument("--allow-non-debug", action="store_true", help="Run even when DEBUG=False.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options["allow_non_debug"]:
+            raise CommandError("Refusing to load-test with DEBUG=False; pass --allow-non-debug on a scratch database.")
+        endpoints = [e.strip() for e in options["endpoints"].split(",") if e.strip()]
+        unknown = sorted(set(endpoints) - set(lt.ENDPOINTS))
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s): {', '.join(unknown)}")
+        total = max(1, options["requests"])
+        concurrency = max(1, options["concurrency"])
+
+        phones = lt.PhoneSequence(run_tag=int(time.time()) % 90 + 10)
+        otp_codes: dict[str, str] = {}
+        query_log = lt.QueryLog()
+
+        def capture_sms(phone, code):
+            otp_codes[phone] = code
+
+        patches = [
+            mock.patch("enquiries.views.sms_api_key", return_value="loadtest"),
+            mock.patch("enquiries.otp_service._submit_sms", side_effect=capture_sms),
+        ]
+        if options["no_drain"]:
+            patches.append(mock.patch("enquiries.notification_outbox.kick_drain"))
+
+        report = {"concurrency": concurrency, "requests_per_endpoint": total, "endpoints": {}}
+        with override_settings(EMAIL_SENDING_ENABLED=False, SENDGRID_API_KEY=""):
+            for p in patches:
+                p.start()
+            server = ThreadedWSGIServer(("127.0.0.1", 0), _QuietHandler, allow_reuse_address=True)
+            server.set_app(lt.CountingWSGIApp(get_wsgi_application(), query_log))
+            serve = threading.Thread(target=server.serve_forever, name="loadtest-wsgi", daemon=True)
+            serve.start()
+            base_url = f"http://127.0.0.1:{server.server_address[1]}"
+            try:
+                for endpoint in endpoints:
+                    report["endpoints"][endpoint] = self._run_endpoint(
+                        endpoint, base_url, total, concurrency, options["timeout"], phones, query_log, otp_codes
+                    )
+            finally:
+                server.shutdown()
+                server.server_close()
+                for p in reversed(patches):
+                    p.stop()
+                if not options["keep"]:
+                    report["deleted"] = _cleanup(phones.issued)
+
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload + "\n")
+        if options["json"]:
+            self.stdout.write(payload)
+            return
+        for endpoint, row in report["endpoints"].items():
+            lat = row["latency_ms"]
+            db = row.get("db_queries_per_request") or {}
+            self.stdout.write(
+                f"{endpoint:<17} n={row['requests']} ok={row['ok']} err={row['error_rate']} "
+                f"rps={row['throughput_rps']} p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms "
+                f"db/req={db.get('mean')} (p95 {db.get('p95')})"
+            )
+            for err in row["sample_errors"]:
+                self.stdout.write(self.style.WARNING(f"  {err}"))
+        if "deleted" in report:
+            self.stdout.write(f"cleanup: {report['deleted']}")
+
+    def _run_endpoint(self, endpoint, base_url, total, concurrency, timeout, phones, query_log, otp_codes):
+        from enquiries import otp_service
+
+        def one(n):
+            phone = phones.next()
+            # One synthetic client per request so the per-IP OTP bucket never trips.
+            seq = int(phone[-7:])
+            client_ip = f"10.{(seq >> 16) & 255}.{(seq >> 8) & 255}.{seq & 255}"
+            kind, body = lt.build_payload(endpoint, phone, n)
+            if endpoint == "franchise-submit":
+                # The OTP step is not part of this endpoint's timing; issue it in-process.
+                otp_service.issue_otp(phone, ip=client_ip)
+                body["otp"] = otp_codes.get(phone, "")
+            return lt.post(base_url, endpoint, kind, body, client_ip=client_ip, timeout=timeout)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"load-{endpoint}") as pool:
+            samples = list(pool.map(one, range(total)))
+        wall = time.perf_counter() - started
+        return lt.summarize(samples, wall, query_log.for_endpoint(endpoint))
+
+
+def _cleanup(phones):
+    """
+    Delete the leads this run created with their outbox / dedupe rows.
+
+    A row must match both a phone issued by the run and its load-test email,
+    so a real lead that happens to share a number is never touched.
+    """
+    from django.apps import apps
+    from django.db import transaction
+
+    from enquiries.lead_dedupe import LEAD_FIELDS
+    from enquiries.models import LeadIntakeKey, LeadNotification
+
+    deleted = {}
+    phones = list(phones)
+    emails = [lt.loadtest_email(phone) for phone in phones]
+    with transaction.atomic():
+        for label, (phone_field, _time_field) in LEAD_FIELDS.items():
+            model = apps.get_model(label)
+            ids = list(
+                model.objects.filter(**{f"{phone_field}__in": phones}, email__in=emails).values_list("pk", flat=True)
+            )
+            if not ids:
+                continue
+            LeadNotification.objects.filter(lead_model=label, lead_id__in=ids).delete()
+            LeadIntakeKey.objects.filter(lead_model=label, lead_id__in=ids).delete()
+            deleted[label] = model.objects.filter(pk__in=ids).delete()[0]
+    return deleted
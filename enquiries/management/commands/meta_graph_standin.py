@@ -0,0 +1,60 @@
+"""
+Run the offline Meta Graph / CAPI stand-in server.
+
+  python manage.py meta_graph_standin --port 8765
+  python manage.py meta_graph_standin --forms 40 --leads-per-form 50 --latency-ms 120 --error-rate 0.02
+
+Point the app at it with META_GRAPH_BASE_URL=http://127.0.0.1:8765 and
+META_PAGE_ID=990000000000001 (any META_PAGE_ACCESS_TOKEN works).
+"""
+
+from __future__ import annotations
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from enquiries.meta_graph_standin import STANDIN_PAGE_ID, StandinData, StandinServer
+
+
+class Command(BaseCommand):
+    help = "Serve synthetic Meta leadgen forms, leads, ads and CAPI endpoints locally."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--forms", type=int, default=10)
+        parser.add_argument("--leads-per-form", type=int, default=20)
+        parser.add_argument("--latency-ms", type=int, default=0, help="Delay added to every HTTP request.")
+        parser.add_argument("--jitter-ms", type=int, default=0, help="Random extra delay up to N ms.")
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Probability (0–1) that a request or batch sub-request returns a Graph 500.",
+        )
+
+    def handle(self, *args, **options):
+        data = StandinData(forms=options["forms"], leads_per_form=options["leads_per_form"])
+        server = StandinServer(
+            data,
+            host=options["host"],
+            port=options["port"],
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+        ).start()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Meta Graph stand-in on {server.base_url} page_id={STANDIN_PAGE_ID} "
+                f"forms={len(data.forms)} leads={len(data.leads)}"
+            )
+        )
+        self.stdout.write(f"Stats: GET {server.base_url}/__stats__ — Ctrl+C to stop.")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
@@ -0,0 +1,50 @@
+"""
+Drain / replay the public form notification outbox (lead_notification_outbox).
+
+  python manage.py send_lead_notifications                 # send everything due
+  python manage.py send_lead_notifications --workers 8
+  python manage.py send_lead_notifications --stats
+  python manage.py send_lead_notifications --replay-failed [--id 42 --id 43]
+
+Web processes drain on their own right after each submit commits; run this
+from cron so retries are picked up even when no new forms arrive.
+"""
+
+from django.core.management.base import BaseCommand
+
+from enquiries.notification_outbox import drain_outbox, outbox_metrics, replay_failed
+
+
+class Command(BaseCommand):
+    help = "Send queued enquiry / franchise / CRM / landing form emails and record per-message status."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=0, help="Concurrent senders (default: settings).")
+        parser.add_argument("--max-batches", type=int, default=0, help="Stop after N claimed batches.")
+        parser.add_argument(
+            "--replay-failed",
+            action="store_true",
+            help="Retry messages that exhausted their attempts (optionally only --id).",
+        )
+        parser.add_argument("--id", type=int, action="append", default=[], help="Outbox row id for --replay-failed.")
+        parser.add_argument("--stats", action="store_true", help="Print outbox status counts only.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self._write_metrics()
+            return
+        if options["replay_failed"]:
+            reset = replay_failed(ids=options["id"] or None)
+            self.stdout.write(f"Replaying {reset} failed message(s).")
+        summary = drain_outbox(
+            workers=options["workers"] or None,
+            max_batches=options["max_batches"] or None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(" ".join(f"{key}={value}" for key, value in summary.items()))
+        )
+        self._write_metrics()
+
+    def _write_metrics(self):
+        metrics = outbox_metrics()
+        self.stdout.write(" ".join(f"{key}={value}" for key, value in metrics.items()))
@@ -1,4 +1,12 @@
-"""Send TIME Kids CRM stage events to Meta Conversions API (Conversion Leads)."""
+"""
+Drain / replay the Meta Conversions API outbox (Conversion Leads).
+
+  python manage.py send_meta_capi_events                 # upload everything due
+  python manage.py send_meta_capi_events --stats
+  python manage.py send_meta_capi_events --replay-failed
+  python manage.py send_meta_capi_events --crm-id 123 [--test --test-event-code TEST123]
+  python manage.py send_meta_capi_events --backfill --limit 500
+"""
 
 from django.core.management.base import BaseCommand, CommandError
 
@@ -8,15 +16,20 @@ from enquiries.meta_capi import (
     meta_capi_dataset_id,
     meta_capi_is_configured,
     meta_leadgen_id_from_lead,
-    send_crm_stage_event,
+)
+from enquiries.meta_capi_outbox import (
+    dispatch_outbox,
+    enqueue_crm_stage_events,
+    outbox_metrics,
+    replay_failed,
 )
 from enquiries.models import CrmLead
 
 
 class Command(BaseCommand):
     help = (
-        "Upload CRM lead-stage events to Meta Conversions API. "
-        "Production sends on Instant Form import and every CRM status change."
+        "Upload queued CRM lead-stage events to Meta Conversions API (≤1,000 per request). "
+        "Production queues on Instant Form import and every CRM status change."
     )
 
     def add_arguments(self, parser):
@@ -34,14 +47,20 @@ class Command(BaseCommand):
             "--crm-id",
             type=int,
             default=0,
-            help="Send the current CRM stage for this campaign_leads id.",
+            help="Queue + send the current CRM stage for this campaign_leads id.",
         )
         parser.add_argument(
             "--backfill",
             action="store_true",
-            help="Send the current stage for Instant Form leads that already exist in CRM.",
+            help="Queue + send the current stage for Instant Form leads that already exist in CRM.",
         )
         parser.add_argument("--limit", type=int, default=50, help="Max leads for --backfill (default 50).")
+        parser.add_argument(
+            "--replay-failed",
+            action="store_true",
+            help="Retry outbox events that exhausted their attempts (optionally only --crm-id).",
+        )
+        parser.add_argument("--stats", action="store_true", help="Print outbox status counts only.")
         parser.add_argument(
             "--dry-run",
             action="store_true",
@@ -51,6 +70,10 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         from django.conf import settings
 
+        if options["stats"]:
+            self._write_metrics()
+            return
+
         test_code = (
             options.get("test_event_code") or getattr(settings, "META_CAPI_TEST_EVENT_CODE", "") or ""
         ).strip()
@@ -67,64 +90,57 @@ class Command(BaseCommand):
         self.stdout.write(f"Dataset {meta_capi_dataset_id()}")
 
         crm_id = int(options.get("crm_id") or 0)
+        if options["replay_failed"]:
+            reset = replay_failed(crm_lead_ids=[crm_id] if crm_id else None)
+            self.stdout.write(f"Replaying {reset} failed event(s).")
+            self._drain()
+            return
+
+        leads: list[CrmLead] = []
         if crm_id:
             lead = CrmLead.objects.filter(pk=crm_id).first()
             if not lead:
                 raise CommandError(f"CRM lead {crm_id} not found.")
-            self._send_one(lead, test_code=test_code, dry_run=options["dry_run"])
-            return
-
-        if options["backfill"]:
-            qs = (
+            leads = [lead]
+        elif options["backfill"]:
+            leads = list(
                 CrmLead.objects.filter(raw_payload__meta_leadgen_id__isnull=False)
                 .exclude(raw_payload__meta_leadgen_id="")
                 .order_by("-id")[: max(1, int(options["limit"] or 50))]
             )
-            sent = skipped = failed = 0
-            for lead in qs:
-                result = self._send_one(lead, test_code=test_code, dry_run=options["dry_run"], quiet=True)
-                if result.get("skipped"):
-                    skipped += 1
-                elif result.get("ok") or options["dry_run"]:
-                    sent += 1
-                else:
-                    failed += 1
-            self.stdout.write(self.style.SUCCESS(f"Backfill done: sent={sent} skipped={skipped} failed={failed}"))
-            return
-
-        if options["test"]:
+        elif options["test"]:
             raise CommandError("With --test, also pass --crm-id <id> of a Meta Instant Form lead (or --backfill).")
 
-        raise CommandError("Pass --crm-id, --backfill, or --test --crm-id.")
+        if options["dry_run"]:
+            for lead in leads:
+                event_name = event_name_for_status(lead.status)
+                payload = build_crm_event(lead, event_name=event_name) or {}
+                self.stdout.write(
+                    f"dry-run crm_id={lead.pk} leadgen_id={meta_leadgen_id_from_lead(lead)} "
+                    f"event_name={event_name} payload={payload}"
+                )
+            return
 
-    def _send_one(self, lead: CrmLead, *, test_code: str, dry_run: bool, quiet: bool = False) -> dict:
-        event_name = event_name_for_status(lead.status)
-        leadgen = meta_leadgen_id_from_lead(lead)
-        if dry_run:
-            event = build_crm_event(lead, event_name=event_name)
-            payload = event or {}
+        if leads:
+            queued = enqueue_crm_stage_events(
+                [(lead, event_name_for_status(lead.status), None) for lead in leads],
+                test_event_code=test_code,
+            )
             self.stdout.write(
-                f"dry-run crm_id={lead.pk} leadgen_id={leadgen} event_name={event_name} payload={payload}"
+                f"Queued {queued} event(s); skipped {len(leads) - queued} lead(s) (not eligible or already queued)."
             )
-            return {"ok": True, "skipped": not event, "dry_run": True}
+        self._drain()
 
-        result = send_crm_stage_event(lead, event_name=event_name, test_event_code=test_code)
-        if not quiet:
-            if result.get("ok"):
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        "Sent {event} for crm_id={pk} leadgen_id={lg} response={resp}".format(
-                            event=result.get("event_name") or event_name,
-                            pk=lead.pk,
-                            lg=leadgen,
-                            resp=result.get("response"),
-                        )
-                    )
-                )
-            elif result.get("skipped"):
-                self.stdout.write(f"Skipped crm_id={lead.pk}: {result.get('reason')}")
-            else:
-                self.stderr.write(
-                    self.style.ERROR(f"Failed crm_id={lead.pk}: {result.get('error')} {result.get('detail')}")
-                )
-        return result
+    def _drain(self):
+        summary = dispatch_outbox()
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Outbox drained: requests={requests} sent={sent} events_received={events_received} "
+                "retry={retry} failed={failed}".format(**summary)
+            )
+        )
+        self._write_metrics()
+
+    def _write_metrics(self):
+        metrics = outbox_metrics()
+        self.stdout.write(" ".join(f"{key}={value}" for key, value in metrics.items()))
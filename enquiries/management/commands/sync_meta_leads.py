@@ -22,3 +22,12 @@ class Command(BaseCommand):
                 )
             )
         )
+        cache = summary.get("metadata_cache") or {}
+        self.stdout.write(
+            "Metadata cache: memory_hits={memory_hits} db_hits={db_hits} misses={misses} hit_rate={hit_rate}".format(
+                memory_hits=cache.get("memory_hits", 0),
+                db_hits=cache.get("db_hits", 0),
+                misses=cache.get("misses", 0),
+                hit_rate=cache.get("hit_rate"),
+            )
+        )
@@ -0,0 +1,106 @@
+"""
+Pre-load the Meta form / ad metadata cache so a cold start does not flood Graph.
+
+  python manage.py warm_meta_metadata_cache
+  python manage.py warm_meta_metadata_cache --days 60 --refresh
+  python manage.py warm_meta_metadata_cache --purge-expired
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from enquiries import meta_metadata_cache
+from enquiries.meta_leads import (
+    MetaGraphPrefetch,
+    _graph_get,
+    is_allowed_meta_form,
+    meta_page_id,
+)
+from enquiries.models import CrmLead
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm the Meta form/ad metadata cache: every campaign Instant Form on the Page "
+        "plus ads seen on recent CRM leads, fetched in Graph batch calls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Warm ads referenced by Meta leads created in the last N days (default 30).",
+        )
+        parser.add_argument(
+            "--all-forms",
+            action="store_true",
+            help="Include Instant Forms outside the BCWW TK import gate.",
+        )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Re-fetch entries even if they are still fresh.",
+        )
+        parser.add_argument(
+            "--purge-expired",
+            action="store_true",
+            help="Delete expired cache rows before warming.",
+        )
+
+    def handle(self, *args, **options):
+        if options["purge_expired"]:
+            removed = meta_metadata_cache.purge_expired()
+            self.stdout.write(f"Purged {removed} expired cache rows.")
+
+        page_id = meta_page_id()
+        forms: list[dict] = []
+        after = None
+        while True:
+            params = {"fields": "id,name", "limit": "100"}
+            if after:
+                params["after"] = after
+            payload = _graph_get(f"{page_id}/leadgen_forms", params)
+            batch = payload.get("data") or []
+            forms.extend(batch)
+            after = ((payload.get("paging") or {}).get("cursors") or {}).get("after")
+            if not after or not batch:
+                break
+
+        form_ids = [
+            str(f.get("id") or "").strip()
+            for f in forms
+            if options["all_forms"]
+            or is_allowed_meta_form(
+                form_id=str(f.get("id") or ""),
+                form_name=str(f.get("name") or "").strip(),
+            )
+        ]
+        form_ids = [f for f in form_ids if f]
+
+        since = timezone.now() - timedelta(days=max(1, int(options["days"] or 30)))
+        ad_ids = sorted(
+            {
+                str(ad_id).strip()
+                for ad_id in CrmLead.objects.filter(created_at__gte=since)
+                .exclude(raw_payload__meta_ad_id__isnull=True)
+                .exclude(raw_payload__meta_ad_id="")
+                .values_list("raw_payload__meta_ad_id", flat=True)
+                if ad_id and str(ad_id).strip()
+            }
+        )
+
+        prefetch = MetaGraphPrefetch(refresh=bool(options["refresh"]))
+        prefetch.load(form_ids=form_ids, ad_ids=ad_ids)
+        summary = prefetch.cache_summary()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Warmed forms={len([f for f in form_ids if f in prefetch.forms])}/{len(form_ids)} "
+                f"ads={len([a for a in ad_ids if a in prefetch.ads])}/{len(ad_ids)} "
+                f"already_cached={summary['memory_hits'] + summary['db_hits']}"
+            )
+        )
@@ -13,7 +13,6 @@ import json
 import logging
 import os
 import re
-import threading
 import time
 from datetime import datetime, timezone
 from typing import Any
@@ -339,7 +338,9 @@ def build_payload(
 
 
 def _events_url() -> str:
-    return f"https://graph.facebook.com/{meta_capi_api_version()}/{meta_capi_dataset_id()}/events"
+    from .meta_leads import graph_host
+
+    return f"{graph_host()}/{meta_capi_api_version()}/{meta_capi_dataset_id()}/events"
 
 
 def post_crm_events(
@@ -381,26 +382,38 @@ def post_crm_events(
         return {"ok": False, "error": str(exc)}
 
 
-def send_crm_stage_event(
+def prepare_crm_stage_event(
     lead: Any,
     *,
     event_name: str | None = None,
     event_time: int | None = None,
-    test_event_code: str = "",
-) -> dict[str, Any]:
-    """Build and POST one CRM stage event for a campaign lead."""
+) -> tuple[dict[str, Any] | None, str]:
+    """Return ``(event, "")`` for an uploadable stage change, else ``(None, skip_reason)``."""
     if not meta_capi_is_configured():
-        return {"ok": False, "skipped": True, "reason": "not_configured"}
+        return None, "not_configured"
     if not meta_leadgen_id_from_lead(lead):
-        return {"ok": False, "skipped": True, "reason": "not_meta_instant_form"}
+        return None, "not_meta_instant_form"
     status = getattr(lead, "status", "") or ""
     name = (event_name or event_name_for_status(status)).strip() or "Lead"
     if not should_upload_capi_event(status, event_name=name):
-        return {"ok": False, "skipped": True, "reason": "not_qualified_status"}
-
+        return None, "not_qualified_status"
     event = build_crm_event(lead, event_name=name, event_time=event_time)
     if not event:
-        return {"ok": False, "skipped": True, "reason": "insufficient_user_data"}
+        return None, "insufficient_user_data"
+    return event, ""
+
+
+def send_crm_stage_event(
+    lead: Any,
+    *,
+    event_name: str | None = None,
+    event_time: int | None = None,
+    test_event_code: str = "",
+) -> dict[str, Any]:
+    """Build and POST one CRM stage event for a campaign lead (bypasses the outbox)."""
+    event, reason = prepare_crm_stage_event(lead, event_name=event_name, event_time=event_time)
+    if not event:
+        return {"ok": False, "skipped": True, "reason": reason}
 
     code = (test_event_code or meta_capi_test_event_code()).strip()
     result = post_crm_events([event], test_event_code=code)
@@ -415,30 +428,8 @@ def send_crm_stage_event(
     return {**result, "event_name": event.get("event_name"), "crm_lead_id": getattr(lead, "pk", None)}
 
 
-def _send_async(lead_pk: int, event_name: str, event_time: int) -> None:
-    try:
-        from .models import CrmLead
-
-        lead = CrmLead.objects.filter(pk=lead_pk).first()
-        if not lead:
-            return
-        send_crm_stage_event(lead, event_name=event_name, event_time=event_time)
-    except Exception:
-        logger.exception("Meta CAPI background send failed crm_id=%s event_name=%s", lead_pk, event_name)
-
-
-def _run_in_thread(lead_pk: int, event_name: str, event_time: int) -> None:
-    thread = threading.Thread(
-        target=_send_async,
-        args=(lead_pk, event_name, event_time),
-        daemon=True,
-        name=f"meta-capi-{lead_pk}",
-    )
-    thread.start()
-
-
 def schedule_crm_stage_event(lead: Any, *, event_name: str | None = None) -> None:
-    """Fire a CAPI upload after the CRM row commits. Never raises to the request."""
+    """Queue a CAPI upload in the outbox after the CRM row commits. Never raises to the request."""
     try:
         if not meta_capi_is_configured():
             return
@@ -454,7 +445,13 @@ def schedule_crm_stage_event(lead: Any, *, event_name: str | None = None) -> Non
         event_time = int(time.time())
 
         def _after_commit() -> None:
-            _run_in_thread(int(pk), name, event_time)
+            from .meta_capi_outbox import enqueue_crm_stage_events, kick_dispatch
+
+            try:
+                if enqueue_crm_stage_events([(lead, name, event_time)]):
+                    kick_dispatch()
+            except Exception:
+                logger.exception("Meta CAPI outbox enqueue failed crm_id=%s event_name=%s", pk, name)
 
         try:
             transaction.on_commit(_after_commit)
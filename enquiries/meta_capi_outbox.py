@@ -0,0 +1,245 @@
+"""Outbox for Meta Conversions API uploads.
+
+CRM stage changes are written to ``meta_capi_outbox`` on transaction commit
+(``meta_capi.schedule_crm_stage_event``). ``dispatch_outbox`` sends due rows in
+uploads of up to 1,000 events, retries failures with exponential backoff and
+gives up after ``META_CAPI_OUTBOX_MAX_ATTEMPTS``. A mass stage change therefore
+becomes a few large uploads instead of one thread + request per lead.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from common.env import int_setting
+
+from .models import MetaCapiOutboxEvent, MetaCapiOutboxStatus
+
+logger = logging.getLogger(__name__)
+
+# Conversions API hard limit per request.
+MAX_EVENTS_PER_REQUEST = 1000
+DEFAULT_MAX_ATTEMPTS = 8
+DEFAULT_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 6 * 3600
+DEFAULT_FLUSH_DELAY_SECONDS = 2
+# A row left in ``sending`` this long belongs to a crashed dispatcher.
+SENDING_STALE_SECONDS = 600
+
+_dispatch_lock = threading.Lock()
+_dispatch_again = threading.Event()
+
+
+def outbox_batch_size() -> int:
+    return max(1, min(MAX_EVENTS_PER_REQUEST, int_setting("META_CAPI_OUTBOX_BATCH_SIZE", MAX_EVENTS_PER_REQUEST)))
+
+
+def max_attempts() -> int:
+    return max(1, int_setting("META_CAPI_OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Delay before retry number ``attempts`` + 1: base · 2^(attempts-1), capped at 6h."""
+    base = max(1, int_setting("META_CAPI_OUTBOX_BACKOFF_SECONDS", DEFAULT_BACKOFF_SECONDS))
+    return min(MAX_BACKOFF_SECONDS, base * (2 ** max(0, attempts - 1)))
+
+
+def flush_delay_seconds() -> int:
+    """Pause before a kicked dispatch so a burst of stage changes shares one upload."""
+    return max(0, int_setting("META_CAPI_OUTBOX_FLUSH_DELAY_SECONDS", DEFAULT_FLUSH_DELAY_SECONDS))
+
+
+def enqueue_crm_stage_events(
+    items: list[tuple[Any, str | None, int | None]],
+    *,
+    test_event_code: str = "",
+) -> int:
+    """
+    Queue ``(lead, event_name, event_time)`` stage events; returns events newly queued.
+
+    Leads that would not be uploaded (not Instant Form, unqualified stage, too
+    little match data) are skipped. ``event_id`` values already in the outbox
+    are ignored and not counted.
+    """
+    from .meta_capi import prepare_crm_stage_event
+
+    now = timezone.now()
+    rows: dict[str, MetaCapiOutboxEvent] = {}
+    for lead, event_name, event_time in items:
+        event, _reason = prepare_crm_stage_event(lead, event_name=event_name, event_time=event_time)
+        if not event:
+            continue
+        rows.setdefault(
+            event["event_id"],
+            MetaCapiOutboxEvent(
+                event_id=event["event_id"],
+                crm_lead_id=getattr(lead, "pk", None),
+                event_name=event["event_name"],
+                event=event,
+                test_event_code=(test_event_code or "")[:64],
+                next_attempt_at=now,
+            ),
+        )
+    if not rows:
+        return 0
+    for event_id in MetaCapiOutboxEvent.objects.filter(event_id__in=list(rows)).values_list("event_id", flat=True):
+        rows.pop(event_id, None)
+    # ignore_conflicts still covers a concurrent enqueue of the same event.
+    MetaCapiOutboxEvent.objects.bulk_create(list(rows.values()), ignore_conflicts=True)
+    return len(rows)
+
+
+def _claim_due(limit: int, crm_lead_ids: list[int] | None = None) -> list[MetaCapiOutboxEvent]:
+    now = timezone.now()
+    stale = now - timedelta(seconds=SENDING_STALE_SECONDS)
+    with transaction.atomic():
+        qs = MetaCapiOutboxEvent.objects.select_for_update(skip_locked=True).filter(
+            Q(status=MetaCapiOutboxStatus.PENDING, next_attempt_at__lte=now)
+            | Q(status=MetaCapiOutboxStatus.SENDING, next_attempt_at__lt=stale)
+        )
+        if crm_lead_ids is not None:
+            qs = qs.filter(crm_lead_id__in=crm_lead_ids)
+        ids = list(qs.order_by("next_attempt_at").values_list("pk", flat=True)[:limit])
+        if not ids:
+            return []
+        MetaCapiOutboxEvent.objects.filter(pk__in=ids).update(
+            status=MetaCapiOutboxStatus.SENDING,
+            attempts=F("attempts") + 1,
+            next_attempt_at=now,
+        )
+    return list(MetaCapiOutboxEvent.objects.filter(pk__in=ids))
+
+
+def _mark_failed(rows: list[MetaCapiOutboxEvent], error: str) -> dict[str, int]:
+    """Schedule a backoff retry, or give up once attempts are exhausted."""
+    now = timezone.now()
+    limit = max_attempts()
+    counts = {"retry": 0, "failed": 0}
+    for row in rows:
+        row.last_error = error[:2000]
+        if row.attempts >= limit:
+            row.status = MetaCapiOutboxStatus.FAILED
+            counts["failed"] += 1
+        else:
+            row.status = MetaCapiOutboxStatus.PENDING
+            row.next_attempt_at = now + timedelta(seconds=backoff_seconds(row.attempts))
+            counts["retry"] += 1
+    MetaCapiOutboxEvent.objects.bulk_update(rows, ["status", "next_attempt_at", "last_error"])
+    return counts
+
+
+def _send_group(rows: list[MetaCapiOutboxEvent], test_event_code: str) -> dict[str, int]:
+    from .meta_capi import post_crm_events
+
+    result = post_crm_events([row.event for row in rows], test_event_code=test_event_code, timeout=60)
+    if result.get("ok"):
+        MetaCapiOutboxEvent.objects.filter(pk__in=[row.pk for row in rows]).update(
+            status=MetaCapiOutboxStatus.SENT,
+            sent_at=timezone.now(),
+            last_error="",
+        )
+        received = (result.get("response") or {}).get("events_received")
+        return {"sent": len(rows), "events_received": int(received or 0)}
+    error = " ".join(str(part) for part in (result.get("error") or result.get("reason"), result.get("detail")) if part)
+    return _mark_failed(rows, error or "unknown error")
+
+
+def dispatch_outbox(
+    *,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+    crm_lead_ids: list[int] | None = None,
+) -> dict[str, int]:
+    """Upload every due outbox row, or only ``crm_lead_ids``' rows (≤1,000 per request); returns per-outcome counts."""
+    from .meta_capi import meta_capi_is_configured
+
+    summary = {"requests": 0, "sent": 0, "events_received": 0, "retry": 0, "failed": 0}
+    if not meta_capi_is_configured():
+        return summary
+    batch_size = batch_size or outbox_batch_size()
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = _claim_due(batch_size, crm_lead_ids)
+        if not rows:
+            break
+        batches += 1
+        groups: dict[str, list[MetaCapiOutboxEvent]] = {}
+        for row in rows:
+            groups.setdefault(row.test_event_code or "", []).append(row)
+        for code, group in groups.items():
+            summary["requests"] += 1
+            try:
+                counts = _send_group(group, code)
+            except Exception as exc:
+                logger.exception("Meta CAPI outbox upload failed (%s events)", len(group))
+                counts = _mark_failed(group, str(exc))
+            for key, value in counts.items():
+                summary[key] += value
+        if len(rows) < batch_size:
+            break
+    if summary["requests"]:
+        logger.info("Meta CAPI outbox dispatched: %s", summary)
+    return summary
+
+
+def _dispatch_in_background() -> None:
+    if not _dispatch_lock.acquire(blocking=False):
+        return
+    try:
+        close_old_connections()
+        while _dispatch_again.is_set():
+            _dispatch_again.clear()
+            time.sleep(flush_delay_seconds())
+            try:
+                dispatch_outbox()
+            except Exception:
+                logger.exception("Meta CAPI outbox dispatch failed")
+    finally:
+        connection.close()
+        _dispatch_lock.release()
+
+
+def kick_dispatch() -> None:
+    """Flush the outbox soon in this process; concurrent kicks share one dispatcher thread."""
+    if not getattr(settings, "META_CAPI_OUTBOX_AUTO_DISPATCH", True):
+        # Left for the next explicit dispatch (benchmarks send only their own rows).
+        return
+    _dispatch_again.set()
+    if _dispatch_lock.locked():
+        return
+    thread = threading.Thread(target=_dispatch_in_background, name="meta-capi-outbox", daemon=True)
+    thread.start()
+
+
+def replay_failed(*, crm_lead_ids: list[int] | None = None) -> int:
+    """Reset given-up rows so the next dispatch retries them from attempt one."""
+    qs = MetaCapiOutboxEvent.objects.filter(status=MetaCapiOutboxStatus.FAILED)
+    if crm_lead_ids:
+        qs = qs.filter(crm_lead_id__in=crm_lead_ids)
+    return qs.update(
+        status=MetaCapiOutboxStatus.PENDING,
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        last_error="",
+    )
+
+
+def outbox_metrics() -> dict[str, Any]:
+    """Per-status row counts plus the age of the oldest pending event (seconds)."""
+    counts: dict[str, Any] = {choice: 0 for choice in MetaCapiOutboxStatus.values}
+    for row in MetaCapiOutboxEvent.objects.order_by().values("status").annotate(n=Count("id")):
+        counts[row["status"]] = row["n"]
+    oldest = MetaCapiOutboxEvent.objects.filter(status=MetaCapiOutboxStatus.PENDING).aggregate(
+        oldest=Min("created_at")
+    )["oldest"]
+    counts["oldest_pending_seconds"] = int((timezone.now() - oldest).total_seconds()) if oldest else None
+    return counts
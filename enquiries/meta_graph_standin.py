@@ -0,0 +1,302 @@
+"""Offline stand-in for the Meta Graph / Conversions API endpoints we call.
+
+Serves synthetic Instant Forms, leads and ads plus the ``batch`` and CAPI
+``/events`` endpoints, with optional latency and error injection, so the Meta
+ingestion path can be exercised and benchmarked without network access:
+
+    python manage.py meta_graph_standin --port 8765 --forms 20 --leads-per-form 50
+    META_GRAPH_BASE_URL=http://127.0.0.1:8765 python manage.py sync_meta_leads
+
+``GET /__stats__`` returns per-endpoint request counts; ``POST /__reset__``
+clears them. Nothing here is imported by production code paths.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+STANDIN_PAGE_ID = "990000000000001"
+STANDIN_PAGE_TOKEN = "standin-page-token"
+FORM_NAME_PREFIX = "BCWW TK Standin"
+
+_CITIES = ("Hyderabad", "Chennai", "Bengaluru", "Kochi", "Vijayawada", "Coimbatore")
+
+
+class StandinData:
+    """Deterministic synthetic Page: ``forms`` × ``leads_per_form`` leads, one ad per form."""
+
+    def __init__(self, *, forms: int = 10, leads_per_form: int = 20, seed: int = 7):
+        self.page_id = STANDIN_PAGE_ID
+        self.forms: dict[str, dict[str, Any]] = {}
+        self.leads: dict[str, dict[str, Any]] = {}
+        self.ads: dict[str, dict[str, Any]] = {}
+        self.form_leads: dict[str, list[str]] = {}
+        rng = random.Random(seed)
+        now = datetime.now(timezone.utc)
+        for f in range(forms):
+            form_id = f"91{f:013d}"
+            ad_id = f"92{f:013d}"
+            city = _CITIES[f % len(_CITIES)]
+            self.forms[form_id] = {
+                "id": form_id,
+                "name": f"{FORM_NAME_PREFIX} {city} P{f + 1}",
+                "tracking_parameters": [{"key": "utm_term", "value": f"standin_{f + 1}"}],
+            }
+            self.ads[ad_id] = {
+                "id": ad_id,
+                "name": f"Standin Ad {f + 1}",
+                "url_tags": f"utm_source=facebook&utm_medium=paid&utm_campaign=standin_{f + 1}",
+            }
+            ids: list[str] = []
+            for j in range(leads_per_form):
+                lead_id = f"93{f:06d}{j:07d}"
+                created = now - timedelta(minutes=rng.randint(1, 600))
+                self.leads[lead_id] = {
+                    "id": lead_id,
+                    "created_time": created.strftime("%Y-%m-%dT%H:%M:%S+0000"),
+                    "form_id": form_id,
+                    "ad_id": ad_id,
+                    "ad_name": self.ads[ad_id]["name"],
+                    "adset_id": f"94{f:013d}",
+                    "adset_name": f"Standin Adset {f + 1}",
+                    "campaign_id": f"95{f:013d}",
+                    "campaign_name": f"Standin Campaign {f + 1}",
+                    "platform": "fb",
+                    "is_organic": False,
+                    "field_data": [
+                        {"name": "full_name", "values": [f"Standin Parent {f}-{j}"]},
+                        {"name": "phone_number", "values": [f"+919{f:03d}{j:06d}"]},
+                        {"name": "email", "values": [f"parent{f}.{j}@standin.example"]},
+                        {"name": "city", "values": [city]},
+                    ],
+                }
+                ids.append(lead_id)
+            self.form_leads[form_id] = ids
+
+    def lookup(self, object_id: str) -> dict[str, Any] | None:
+        if object_id == self.page_id:
+            return {"id": self.page_id, "name": "Standin Page", "access_token": STANDIN_PAGE_TOKEN}
+        return self.forms.get(object_id) or self.leads.get(object_id) or self.ads.get(object_id)
+
+
+def _page(items: list[Any], params: dict[str, str], default_limit: int = 25) -> dict[str, Any]:
+    try:
+        limit = max(1, min(500, int(params.get("limit") or default_limit)))
+    except ValueError:
+        limit = default_limit
+    try:
+        start = int(params.get("after") or 0)
+    except ValueError:
+        start = 0
+    chunk = items[start : start + limit]
+    body: dict[str, Any] = {"data": chunk}
+    if start + limit < len(items):
+        body["paging"] = {"cursors": {"after": str(start + limit)}}
+    return body
+
+
+def _graph_error(message: str, code: int = 100) -> dict[str, Any]:
+    return {"error": {"message": message, "type": "GraphMethodException", "code": code}}
+
+
+class StandinServer:
+    """
+    Threaded HTTP server wrapping ``StandinData``.
+
+    ``latency_ms`` (+ up to ``jitter_ms``) is slept per HTTP request;
+    ``error_rate`` is the chance that a request — or a single batch
+    sub-request — answers with a Graph 500 error.
+    """
+
+    def __init__(
+        self,
+        data: StandinData,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: int = 0,
+        jitter_ms: int = 0,
+        error_rate: float = 0.0,
+        seed: int = 11,
+    ):
+        self.data = data
+        self.latency_ms = max(0, latency_ms)
+        self.jitter_ms = max(0, jitter_ms)
+        self.error_rate = max(0.0, min(1.0, error_rate))
+        self.stats: dict[str, int] = {}
+        self.capi_events = 0
+        self._stats_lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._thread: threading.Thread | None = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def snapshot(self) -> dict[str, int]:
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["capi_events"] = self.capi_events
+        return stats
+
+    def reset(self) -> None:
+        with self._stats_lock:
+            self.stats.clear()
+            self.capi_events = 0
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._stats_lock:
+            return self._rng.random() < self.error_rate
+
+    def sleep(self) -> None:
+        delay = self.latency_ms
+        if self.jitter_ms:
+            with self._stats_lock:
+                delay += self._rng.randint(0, self.jitter_ms)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+    # --- routing -----------------------------------------------------------
+
+    def get_object(self, path: str, params: dict[str, str]) -> tuple[int, dict[str, Any]]:
+        parts = [p for p in path.strip("/").split("/") if p]
+        if parts and parts[0].startswith("v") and parts[0][1:].replace(".", "").isdigit():
+            parts = parts[1:]
+        if len(parts) == 2 and parts[1] == "leadgen_forms" and parts[0] == self.data.page_id:
+            self.count("leadgen_forms")
+            forms = [{"id": f["id"], "name": f["name"]} for f in self.data.forms.values()]
+            return 200, _page(forms, params)
+        if len(parts) == 2 and parts[1] == "leads" and parts[0] in self.data.forms:
+            self.count("form_leads")
+            leads = [self.data.leads[i] for i in self.data.form_leads.get(parts[0], [])]
+            return 200, _page(leads, params)
+        if len(parts) == 1:
+            obj = self.data.lookup(parts[0])
+            if obj is None:
+                self.count("not_found")
+                return 404, _graph_error(f"Unsupported get request. Object with ID '{parts[0]}' does not exist")
+            kind = (
+                "page" if parts[0] == self.data.page_id
+                else "form" if parts[0] in self.data.forms
+                else "ad" if parts[0] in self.data.ads
+                else "lead"
+            )
+            self.count(f"get_{kind}")
+            return 200, obj
+        self.count("not_found")
+        return 404, _graph_error(f"Unknown path {path}")
+
+    def batch(self, form: dict[str, str]) -> tuple[int, Any]:
+        try:
+            items = json.loads(form.get("batch") or "[]")
+        except json.JSONDecodeError:
+            return 400, _graph_error("Invalid batch JSON")
+        if len(items) > 50:
+            return 400, _graph_error("Too many requests in batch message. Maximum batch size is 50", 1)
+        self.count("batch")
+        self.count("batch_items", len(items))
+        out: list[dict[str, Any]] = []
+        for item in items:
+            split = urlsplit("/" + str(item.get("relative_url") or ""))
+            params = {k: v[0] for k, v in parse_qs(split.query).items()}
+            if self.should_fail():
+                self.count("injected_errors")
+                out.append({"code": 500, "body": json.dumps(_graph_error("Injected stand-in error", 2))})
+                continue
+            code, body = self.get_object(split.path, params)
+            out.append({"code": code, "body": json.dumps(body)})
+        return 200, out
+
+    def capi(self, body: dict[str, Any]) -> tuple[int, dict[str, Any]]:
+        events = body.get("data") or []
+        if len(events) > 1000:
+            return 400, _graph_error("Too many events; the limit is 1000 per request", 100)
+        self.count("capi_requests")
+        with self._stats_lock:
+            self.capi_events += len(events)
+        return 200, {"events_received": len(events), "messages": [], "fbtrace_id": "standin"}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):  # noqa: A002 - stdlib signature
+                return
+
+            def _send(self, code: int, payload: Any) -> None:
+                raw = json.dumps(payload).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+            def do_GET(self):
+                split = urlsplit(self.path)
+                if split.path == "/__stats__":
+                    return self._send(200, server.snapshot())
+                server.count("http_requests")
+                server.sleep()
+                if server.should_fail():
+                    server.count("injected_errors")
+                    return self._send(500, _graph_error("Injected stand-in error", 2))
+                params = {k: v[0] for k, v in parse_qs(split.query).items()}
+                code, body = server.get_object(split.path, params)
+                self._send(code, body)
+
+            def do_POST(self):
+                split = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                if split.path == "/__reset__":
+                    server.reset()
+                    return self._send(200, {"ok": True})
+                server.count("http_requests")
+                server.sleep()
+                if server.should_fail():
+                    server.count("injected_errors")
+                    return self._send(500, _graph_error("Injected stand-in error", 2))
+                parts = [p for p in split.path.strip("/").split("/") if p]
+                if len(parts) <= 1:
+                    form = {k: v[0] for k, v in parse_qs(raw.decode("utf-8")).items()}
+                    code, body = server.batch(form)
+                    return self._send(code, body)
+                if parts[-1] == "events":
+                    try:
+                        body = json.loads(raw.decode("utf-8") or "{}")
+                    except json.JSONDecodeError:
+                        return self._send(400, _graph_error("Invalid JSON"))
+                    code, payload = server.capi(body)
+                    return self._send(code, payload)
+                self._send(404, _graph_error(f"Unknown path {split.path}"))
+
+        return Handler
+
+    # --- lifecycle ---------------------------------------------------------
+
+    def start(self) -> "StandinServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="meta-graph-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -8,19 +8,22 @@ import json
 import logging
 import os
 import re
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
+from uuid import uuid4
 
 from django.conf import settings
+from django.db.models.fields.json import KeyTextTransform
 
-from .models import CrmLead, CrmLeadSource, MetaLeadSuppress
+from .models import CrmLead, CrmLeadSource, MetaLeadImportClaim, MetaLeadSuppress
 
 logger = logging.getLogger(__name__)
 
 GRAPH_API_VERSION = "v21.0"
-GRAPH_BASE = f"https://graph.facebook.com/{GRAPH_API_VERSION}"
+GRAPH_HOST = "https://graph.facebook.com"
+GRAPH_BASE = f"{GRAPH_HOST}/{GRAPH_API_VERSION}"
 
 # Cached Page token resolved from a system-user / user token.
 _resolved_page_token: str | None = None
@@ -473,6 +476,16 @@ def verify_meta_signature(raw_body: bytes, signature_header: str | None) -> bool
     return hmac.compare_digest(digest, expected)
 
 
+def graph_host() -> str:
+    """Graph origin; META_GRAPH_BASE_URL points it at the offline stand-in (meta_graph_standin)."""
+    configured = (getattr(settings, "META_GRAPH_BASE_URL", "") or os.getenv("META_GRAPH_BASE_URL") or "").strip()
+    return configured.rstrip("/") or GRAPH_HOST
+
+
+def graph_base() -> str:
+    return f"{graph_host()}/{GRAPH_API_VERSION}"
+
+
 def _graph_get_with_token(
     path: str,
     token: str,
@@ -485,7 +498,7 @@ def _graph_get_with_token(
 
     query = dict(params or {})
     query["access_token"] = token
-    url = f"{GRAPH_BASE}/{path.lstrip('/')}?{urlencode(query)}"
+    url = f"{graph_base()}/{path.lstrip('/')}?{urlencode(query)}"
     req = Request(url, method="GET", headers={"Accept": "application/json"})
     try:
         with urlopen(req, timeout=20) as resp:
@@ -534,17 +547,107 @@ def _graph_get(path: str, params: dict[str, str] | None = None) -> dict[str, Any
     return _graph_get_with_token(path, resolve_page_access_token(), params)
 
 
-def fetch_lead_by_id(leadgen_id: str) -> dict[str, Any]:
-    # Ads Manager CSV uses ad_name / campaign_name / adset_name — request the same fields.
-    return _graph_get(
-        str(leadgen_id),
+# Graph API accepts at most 50 sub-requests per batch POST.
+GRAPH_BATCH_MAX_REQUESTS = 50
+
+
+def _graph_batch_post_with_token(batch: list[dict[str, str]], token: str) -> list[Any]:
+    """POST one Graph ``batch`` call (≤ 50 sub-requests) and return the raw response list."""
+    from urllib.error import HTTPError
+
+    if not token:
+        raise RuntimeError("META_PAGE_ACCESS_TOKEN is not configured.")
+
+    body = urlencode(
         {
-            "fields": (
-                "id,created_time,ad_id,ad_name,adset_id,adset_name,"
-                "campaign_id,campaign_name,form_id,field_data,platform,is_organic"
-            )
+            "batch": json.dumps(batch),
+            "include_headers": "false",
+            "access_token": token,
+        }
+    ).encode("utf-8")
+    req = Request(
+        f"{graph_base()}/",
+        data=body,
+        method="POST",
+        headers={
+            "Accept": "application/json",
+            "Content-Type": "application/x-www-form-urlencoded",
         },
     )
+    try:
+        with urlopen(req, timeout=30) as resp:
+            data = json.loads(resp.read().decode("utf-8"))
+    except HTTPError as exc:
+        err_body = ""
+        try:
+            err_body = exc.read().decode("utf-8", errors="replace")
+        except Exception:
+            err_body = ""
+        raise RuntimeError(f"Meta Graph batch {exc.code}: {err_body or exc.reason}") from exc
+    if not isinstance(data, list):
+        raise RuntimeError(f"Meta Graph batch returned unexpected payload: {str(data)[:300]}")
+    return data
+
+
+def _graph_batch_item_body(item: Any) -> dict[str, Any]:
+    """Decode one batch response slot; failures become Graph-style ``{"error": …}`` dicts."""
+    if not isinstance(item, dict):
+        # Meta returns null for sub-requests that timed out inside the batch.
+        return {"error": {"message": "Batch sub-request did not complete.", "code": None}}
+    raw = item.get("body")
+    try:
+        body = json.loads(raw) if isinstance(raw, str) and raw else (raw or {})
+    except json.JSONDecodeError:
+        body = {"error": {"message": str(raw)[:300], "code": item.get("code")}}
+    if not isinstance(body, dict):
+        body = {"data": body}
+    code = int(item.get("code") or 0)
+    if code >= 400 and "error" not in body:
+        body = {"error": {"message": f"HTTP {code}", "code": code}}
+    return body
+
+
+def graph_batch_get(requests: list[tuple[str, dict[str, str] | None]]) -> list[dict[str, Any]]:
+    """
+    Run many Graph GETs through ``batch`` POSTs of up to 50 sub-requests.
+
+    ``requests`` is ``[(path, params), …]``; the result list has one body per
+    request in the same order. A failed sub-request yields ``{"error": …}``
+    rather than raising, so one bad ad/form id does not sink the whole batch.
+    """
+    if not requests:
+        return []
+    token = resolve_page_access_token()
+    results: list[dict[str, Any]] = []
+    for start in range(0, len(requests), GRAPH_BATCH_MAX_REQUESTS):
+        chunk = requests[start : start + GRAPH_BATCH_MAX_REQUESTS]
+        batch = []
+        for path, params in chunk:
+            relative_url = str(path).lstrip("/")
+            if params:
+                relative_url = f"{relative_url}?{urlencode(params)}"
+            batch.append({"method": "GET", "relative_url": relative_url})
+        try:
+            raw_items = _graph_batch_post_with_token(batch, token)
+        except Exception as exc:
+            logger.exception("Meta Graph batch failed (%s sub-requests)", len(batch))
+            results.extend({"error": {"message": str(exc), "code": None}} for _ in chunk)
+            continue
+        for index in range(len(chunk)):
+            item = raw_items[index] if index < len(raw_items) else None
+            results.append(_graph_batch_item_body(item))
+    return results
+
+
+# Ads Manager CSV uses ad_name / campaign_name / adset_name — request the same fields.
+META_LEAD_FIELDS = (
+    "id,created_time,ad_id,ad_name,adset_id,adset_name,"
+    "campaign_id,campaign_name,form_id,field_data,platform,is_organic"
+)
+
+
+def fetch_lead_by_id(leadgen_id: str) -> dict[str, Any]:
+    return _graph_get(str(leadgen_id), {"fields": META_LEAD_FIELDS})
 
 
 def fetch_form_name(form_id: str) -> str:
@@ -620,6 +723,198 @@ def fetch_ad_url_tags(ad_id: str) -> str:
     return details.get("name") or ""
 
 
+def _unique_ids(values: Any) -> list[str]:
+    seen: dict[str, None] = {}
+    for value in values or ():
+        text = _first_tracking_id(value)
+        if text:
+            seen.setdefault(text, None)
+    return list(seen)
+
+
+class MetaGraphPrefetch:
+    """
+    Lead, form and ad lookups resolved ahead of import via Graph ``batch`` calls.
+
+    ``process_leadgen_event`` / ``create_crm_lead_from_meta`` read from this
+    instead of calling Graph once per field per lead. Ids that were not
+    prefetched (or failed inside the batch) fall back to the single-GET
+    helpers, so an empty instance behaves exactly like the old code path.
+    """
+
+    FORM_FIELDS = "name,tracking_parameters"
+    AD_FIELDS = "url_tags,name"
+
+    def __init__(self, *, use_cache: bool = True, refresh: bool = False) -> None:
+        self.leads: dict[str, dict[str, Any]] = {}
+        self.forms: dict[str, dict[str, Any]] = {}
+        self.ads: dict[str, dict[str, str]] = {}
+        # refresh=True skips cache reads but still writes fresh Graph results back.
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.cache_counts = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+    def _from_cache(self, kind: str, ids: list[str]) -> list[str]:
+        """Fill from the metadata cache; return the ids that still need Graph."""
+        if not self.use_cache or self.refresh or not ids:
+            return ids
+        from . import meta_metadata_cache
+
+        found, counts = meta_metadata_cache.get_many(kind, ids)
+        for key, value in counts.items():
+            self.cache_counts[key] += value
+        target = self.forms if kind == meta_metadata_cache.KIND_FORM else self.ads
+        for object_id, data in found.items():
+            target[object_id] = dict(data)
+        return [i for i in ids if i not in found]
+
+    def cache_summary(self) -> dict[str, Any]:
+        from .meta_metadata_cache import hit_rate
+
+        return {**self.cache_counts, "hit_rate": hit_rate(self.cache_counts)}
+
+    def load(self, *, leadgen_ids: Any = (), form_ids: Any = (), ad_ids: Any = ()) -> None:
+        """Fetch every id not already held, packed into as few batch POSTs as possible."""
+        from .meta_metadata_cache import KIND_AD, KIND_FORM
+
+        requests: list[tuple[str, dict[str, str] | None]] = []
+        slots: list[tuple[str, str]] = []
+        for leadgen_id in _unique_ids(leadgen_ids):
+            if leadgen_id not in self.leads:
+                requests.append((leadgen_id, {"fields": META_LEAD_FIELDS}))
+                slots.append(("lead", leadgen_id))
+        missing_forms = [i for i in _unique_ids(form_ids) if i not in self.forms]
+        for form_id in self._from_cache(KIND_FORM, missing_forms):
+            requests.append((form_id, {"fields": self.FORM_FIELDS}))
+            slots.append(("form", form_id))
+        missing_ads = [i for i in _unique_ids(ad_ids) if i not in self.ads]
+        for ad_id in self._from_cache(KIND_AD, missing_ads):
+            requests.append((ad_id, {"fields": self.AD_FIELDS}))
+            slots.append(("ad", ad_id))
+        if not requests:
+            return
+
+        fetched_forms: dict[str, dict[str, Any]] = {}
+        fetched_ads: dict[str, dict[str, Any]] = {}
+        for (kind, key), body in zip(slots, graph_batch_get(requests)):
+            if "error" in body:
+                logger.warning(
+                    "Meta Graph batch lookup failed kind=%s id=%s error=%s",
+                    kind,
+                    key,
+                    (body.get("error") or {}).get("message"),
+                )
+                continue
+            if kind == "lead":
+                self.leads[key] = body
+            elif kind == "form":
+                fetched_forms[key] = {
+                    "name": str(body.get("name") or "").strip(),
+                    "tracking_parameters": _normalize_tracking_param_map(body.get("tracking_parameters")),
+                }
+            else:
+                fetched_ads[key] = {
+                    "name": str(body.get("name") or "").strip(),
+                    "url_tags": str(body.get("url_tags") or "").strip(),
+                }
+        self.forms.update(fetched_forms)
+        self.ads.update(fetched_ads)
+        if self.use_cache:
+            from . import meta_metadata_cache
+
+            meta_metadata_cache.set_many(KIND_FORM, fetched_forms)
+            meta_metadata_cache.set_many(KIND_AD, fetched_ads)
+
+    def lead(self, leadgen_id: str) -> dict[str, Any]:
+        if leadgen_id not in self.leads:
+            self.leads[leadgen_id] = fetch_lead_by_id(leadgen_id)
+        return self.leads[leadgen_id]
+
+    def _ensure_form(self, form_id: str) -> dict[str, Any]:
+        if form_id not in self.forms:
+            try:
+                self.load(form_ids=[form_id])
+            except Exception:
+                logger.exception("Meta form metadata lookup failed form_id=%s", form_id)
+        return self.forms.setdefault(form_id, {})
+
+    def form_name(self, form_id: str) -> str:
+        if not form_id:
+            return ""
+        entry = self._ensure_form(form_id)
+        if "name" not in entry:
+            entry["name"] = fetch_form_name(form_id)
+        return entry["name"]
+
+    def form_tracking(self, form_id: str) -> dict[str, str]:
+        if not form_id:
+            return {}
+        entry = self._ensure_form(form_id)
+        if "tracking_parameters" not in entry:
+            entry["tracking_parameters"] = fetch_form_tracking_parameters(form_id)
+        return dict(entry["tracking_parameters"])
+
+    def ad_details(self, ad_id: str) -> dict[str, str]:
+        if not ad_id:
+            return {"name": "", "url_tags": ""}
+        if ad_id not in self.ads:
+            try:
+                self.load(ad_ids=[ad_id])
+            except Exception:
+                logger.exception("Meta ad metadata lookup failed ad_id=%s", ad_id)
+        if ad_id not in self.ads:
+            self.ads[ad_id] = fetch_ad_details(ad_id)
+        return dict(self.ads[ad_id])
+
+
+def _lead_ad_id(lead_payload: dict[str, Any], webhook_value: dict[str, Any]) -> str:
+    fields = _field_map(lead_payload.get("field_data"))
+    return _first_tracking_id(
+        lead_payload.get("ad_id"),
+        webhook_value.get("ad_id"),
+        webhook_value.get("adgroup_id"),
+        fields.get("ad_id"),
+    )
+
+
+def prefetch_meta_enrichment(
+    webhook_values: list[dict[str, Any]],
+    *,
+    lead_payloads: dict[str, dict[str, Any]] | None = None,
+) -> MetaGraphPrefetch:
+    """
+    Batch-fetch everything a set of leadgen events needs before import.
+
+    Round one pulls lead payloads (unless already known, e.g. from a form's
+    ``/leads`` listing) plus any form/ad ids the webhook already carries;
+    round two pulls form/ad ids only discovered inside those payloads.
+    A 500-lead backlog costs roughly ``500 / 50`` lead batches plus one or two
+    metadata batches instead of ~2,500 single GETs.
+    """
+    prefetch = MetaGraphPrefetch()
+    for leadgen_id, payload in (lead_payloads or {}).items():
+        if leadgen_id and isinstance(payload, dict):
+            prefetch.leads[str(leadgen_id)] = payload
+
+    leadgen_ids = [_first_tracking_id(v.get("leadgen_id")) for v in webhook_values]
+    prefetch.load(
+        leadgen_ids=[lid for lid in leadgen_ids if lid],
+        form_ids=[v.get("form_id") for v in webhook_values],
+        ad_ids=[v.get("ad_id") or v.get("adgroup_id") for v in webhook_values],
+    )
+
+    form_ids: list[Any] = []
+    ad_ids: list[Any] = []
+    for leadgen_id, value in zip(leadgen_ids, webhook_values):
+        payload = prefetch.leads.get(leadgen_id) if leadgen_id else None
+        if not payload:
+            continue
+        form_ids.append(payload.get("form_id"))
+        ad_ids.append(_lead_ad_id(payload, value))
+    prefetch.load(form_ids=form_ids, ad_ids=ad_ids)
+    return prefetch
+
+
 def parse_utm_query_string(raw: str) -> dict[str, str]:
     """Parse utm_* (and gclid) from a query string or full URL."""
     text = str(raw or "").strip()
@@ -872,12 +1167,35 @@ def _infer_state_from_form_name(form_name: str) -> str:
     return state
 
 
+def already_imported_ids(leadgen_ids: Any) -> set[str]:
+    """
+    Return the subset of ``leadgen_ids`` that is suppressed or already in CRM.
+
+    One UNION query over ``meta_lead_suppress`` and the indexed
+    ``raw_payload->>'meta_leadgen_id'`` expression on ``campaign_leads``, so a
+    whole form page is checked in a single round trip.
+    """
+    ids = _unique_ids(leadgen_ids)
+    if not ids:
+        return set()
+    suppressed = (
+        MetaLeadSuppress.objects.filter(leadgen_id__in=ids)
+        .order_by()
+        .values_list("leadgen_id", flat=True)
+    )
+    in_crm = (
+        CrmLead.objects.annotate(meta_lgid=KeyTextTransform("meta_leadgen_id", "raw_payload"))
+        .filter(meta_lgid__in=ids)
+        .order_by()
+        .values_list("meta_lgid", flat=True)
+    )
+    return {str(i) for i in suppressed.union(in_crm) if i}
+
+
 def already_imported(leadgen_id: str) -> bool:
     if not leadgen_id:
         return False
-    if MetaLeadSuppress.objects.filter(leadgen_id=leadgen_id).exists():
-        return True
-    return CrmLead.objects.filter(raw_payload__meta_leadgen_id=leadgen_id).exists()
+    return leadgen_id in already_imported_ids([leadgen_id])
 
 
 def suppress_meta_leadgen(
@@ -936,17 +1254,56 @@ def mark_meta_leadgen_imported(
     )
 
 
+IMPORT_CLAIM_SECONDS = 900
+
+
+def claim_leadgen_imports(leadgen_ids: Any) -> set[str]:
+    """
+    Claim many leadgen ids for import at once; returns the ids this caller owns.
+
+    Conflict-ignoring insert into ``meta_lead_import_claim`` tagged with a
+    fresh token, then one read back by token — ids held by another worker are
+    simply absent. Claims older than ``IMPORT_CLAIM_SECONDS`` are abandoned
+    (crashed worker) and dropped first so the lead is retried.
+    """
+    ids = [i[:64] for i in _unique_ids(leadgen_ids)]
+    if not ids:
+        return set()
+    token = uuid4().hex
+    now = datetime.now(timezone.utc)
+    try:
+        MetaLeadImportClaim.objects.filter(
+            leadgen_id__in=ids,
+            claimed_at__lt=now - timedelta(seconds=IMPORT_CLAIM_SECONDS),
+        ).delete()
+        MetaLeadImportClaim.objects.bulk_create(
+            [MetaLeadImportClaim(leadgen_id=i, token=token, claimed_at=now) for i in ids],
+            ignore_conflicts=True,
+        )
+        return set(
+            MetaLeadImportClaim.objects.filter(token=token).values_list("leadgen_id", flat=True)
+        )
+    except Exception:
+        logger.exception("Meta lead import claim failed for %s ids", len(ids))
+        # Same as the old cache lock: a broken lock must not stop imports.
+        return set(ids)
+
+
+def release_leadgen_claims(leadgen_ids: Any) -> None:
+    ids = [i[:64] for i in _unique_ids(leadgen_ids)]
+    if not ids:
+        return
+    try:
+        MetaLeadImportClaim.objects.filter(leadgen_id__in=ids).delete()
+    except Exception:
+        logger.exception("Meta lead import claim release failed for %s ids", len(ids))
+
+
 def _claim_leadgen_import(leadgen_id: str) -> bool:
     """Cross-process short lock so webhook + multi-worker sync don't double-create."""
     if not leadgen_id:
         return False
-    try:
-        from django.core.cache import cache
-
-        return bool(cache.add(f"meta_lead_import:{leadgen_id}", "1", timeout=900))
-    except Exception:
-        logger.exception("Meta lead import cache lock failed leadgen_id=%s", leadgen_id)
-        return True
+    return leadgen_id[:64] in claim_leadgen_imports([leadgen_id])
 
 
 def create_crm_lead_from_meta(
@@ -954,7 +1311,9 @@ def create_crm_lead_from_meta(
     lead_payload: dict[str, Any],
     webhook_value: dict[str, Any],
     form_name: str = "",
+    prefetch: MetaGraphPrefetch | None = None,
 ) -> CrmLead:
+    lookups = prefetch or MetaGraphPrefetch()
     fields = _field_map(lead_payload.get("field_data"))
     raw_name = (fields.get("full_name") or "").strip()
     raw_phone = (fields.get("phone") or "").strip()
@@ -1026,7 +1385,7 @@ def create_crm_lead_from_meta(
         webhook_value.get("form_id"),
         fields.get("form_id"),
     )
-    form_tracking = fetch_form_tracking_parameters(form_id) if form_id else {}
+    form_tracking = lookups.form_tracking(form_id)
     # Same columns as Ads Manager Instant Form CSV:
     # id, created_time, ad_id, ad_name, adset_id, adset_name, campaign_id,
     # campaign_name, form_id, form_name, is_organic, platform
@@ -1087,7 +1446,7 @@ def create_crm_lead_from_meta(
         form_tracking.get("is_organic"),
     )
     fbclid = _first_tracking_id(fields.get("fbclid"), form_tracking.get("fbclid"))
-    ad_details = fetch_ad_details(ad_id) if ad_id else {"name": "", "url_tags": ""}
+    ad_details = lookups.ad_details(ad_id)
     if not ad_name:
         ad_name = ad_details.get("name") or ""
     ad_url_tags = ad_details.get("url_tags") or ""
@@ -1181,7 +1540,19 @@ def process_leadgen_event(
     webhook_value: dict[str, Any],
     *,
     form_name: str | None = None,
+    lead_payload: dict[str, Any] | None = None,
+    prefetch: MetaGraphPrefetch | None = None,
+    claimed: bool = False,
 ) -> dict[str, Any]:
+    """
+    Import one leadgen event into CRM.
+
+    ``lead_payload`` skips the Graph lead GET when the caller already holds it
+    (form ``/leads`` listing); ``prefetch`` supplies batch-fetched form/ad data.
+    ``claimed=True`` means the caller already ran the set-based duplicate check
+    and holds the import claim (see ``claim_new_leadgen_ids``).
+    """
+    lookups = prefetch or MetaGraphPrefetch()
     leadgen_id = _first_tracking_id(webhook_value.get("leadgen_id"))
     if not leadgen_id:
         return {"ok": False, "error": "missing_leadgen_id"}
@@ -1209,17 +1580,47 @@ def process_leadgen_event(
             "reason": "before_sync_since",
         }
 
+    if claimed:
+        return _import_claimed_leadgen(
+            webhook_value,
+            leadgen_id=leadgen_id,
+            form_name=form_name,
+            lead_payload=lead_payload,
+            lookups=lookups,
+        )
+
     if already_imported(leadgen_id):
         return {"ok": True, "skipped": True, "leadgen_id": leadgen_id}
 
     if not _claim_leadgen_import(leadgen_id):
         return {"ok": True, "skipped": True, "leadgen_id": leadgen_id, "reason": "import_in_progress"}
 
-    # Re-check after claiming lock (another worker may have finished).
-    if already_imported(leadgen_id):
-        return {"ok": True, "skipped": True, "leadgen_id": leadgen_id}
+    try:
+        # Re-check after claiming lock (another worker may have finished).
+        if already_imported(leadgen_id):
+            return {"ok": True, "skipped": True, "leadgen_id": leadgen_id}
+        return _import_claimed_leadgen(
+            webhook_value,
+            leadgen_id=leadgen_id,
+            form_name=form_name,
+            lead_payload=lead_payload,
+            lookups=lookups,
+        )
+    finally:
+        release_leadgen_claims([leadgen_id])
 
-    lead_payload = fetch_lead_by_id(leadgen_id)
+
+def _import_claimed_leadgen(
+    webhook_value: dict[str, Any],
+    *,
+    leadgen_id: str,
+    form_name: str | None,
+    lead_payload: dict[str, Any] | None,
+    lookups: MetaGraphPrefetch,
+) -> dict[str, Any]:
+    """Fetch, filter and create the CRM lead once the caller holds the import claim."""
+    if not lead_payload:
+        lead_payload = lookups.lead(leadgen_id)
     if is_before_sync_cutoff(lead_payload.get("created_time") or webhook_value.get("created_time")):
         return {
             "ok": True,
@@ -1231,7 +1632,7 @@ def process_leadgen_event(
     form_id = _first_tracking_id(lead_payload.get("form_id"), webhook_value.get("form_id"))
     resolved_form_name = (form_name or "").strip()
     if not resolved_form_name and form_id:
-        resolved_form_name = fetch_form_name(form_id)
+        resolved_form_name = lookups.form_name(form_id)
 
     if not is_allowed_meta_form(form_id=form_id, form_name=resolved_form_name):
         return {
@@ -1247,8 +1648,29 @@ def process_leadgen_event(
         lead_payload=lead_payload,
         webhook_value=webhook_value,
         form_name=resolved_form_name,
+        prefetch=lookups,
     )
 
+    try:
+        from .lead_dedupe import link_duplicate, register_intake
+
+        duplicate = register_intake(lead)
+    except Exception:
+        logger.exception("Lead dedupe failed for Meta lead id=%s crm_id=%s", leadgen_id, lead.pk)
+        duplicate = None
+    if duplicate is not None:
+        # Same parent already came in through another form — no second round of emails.
+        try:
+            link_duplicate(lead, duplicate.primary_lead)
+        except Exception:
+            logger.exception("Duplicate assignee copy failed for crm_id=%s", lead.pk)
+        return {
+            "ok": True,
+            "crm_lead_id": lead.pk,
+            "leadgen_id": leadgen_id,
+            "duplicate_of": f"{duplicate.primary.lead_model}#{duplicate.primary.lead_id}",
+        }
+
     try:
         from .emails import (
             lead_source_label_for_crm_lead,
@@ -1281,6 +1703,78 @@ def process_leadgen_event(
     return {"ok": True, "crm_lead_id": lead.pk, "leadgen_id": leadgen_id}
 
 
+def _safe_prefetch(
+    webhook_values: list[dict[str, Any]],
+    *,
+    lead_payloads: dict[str, dict[str, Any]] | None = None,
+) -> MetaGraphPrefetch:
+    """Batch prefetch that degrades to per-lead GETs instead of failing the import."""
+    if not webhook_values:
+        return MetaGraphPrefetch()
+    try:
+        return prefetch_meta_enrichment(webhook_values, lead_payloads=lead_payloads)
+    except Exception:
+        logger.exception("Meta Graph batch prefetch failed; falling back to per-lead lookups")
+        prefetch = MetaGraphPrefetch()
+        prefetch.leads.update(lead_payloads or {})
+        return prefetch
+
+
+def claim_new_leadgen_ids(leadgen_ids: Any) -> tuple[set[str], set[str]]:
+    """
+    Set-based dedupe + bulk claim for a batch of leadgen ids.
+
+    Returns ``(claimed, in_progress)``: ``claimed`` ids are new and owned by
+    this caller (release them with ``release_leadgen_claims`` when done);
+    ``in_progress`` ids are being imported by another worker. Ids already
+    imported or suppressed are in neither set. A fixed handful of queries for
+    the whole batch instead of three per lead.
+    """
+    ids = _unique_ids(leadgen_ids)
+    if not ids:
+        return set(), set()
+    imported = already_imported_ids(ids)
+    fresh = [i for i in ids if i not in imported]
+    if not fresh:
+        return set(), set()
+    claimed = claim_leadgen_imports(fresh)
+    in_progress = {i for i in fresh if i[:64] not in claimed}
+    owned = [i for i in fresh if i[:64] in claimed]
+    # Re-check after claiming (another worker may have finished in between).
+    finished = already_imported_ids(owned) if owned else set()
+    if finished:
+        release_leadgen_claims(finished)
+    return {i for i in owned if i not in finished}, in_progress
+
+
+def process_leadgen_events(webhook_values: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Import several leadgen webhook changes, sharing one dedupe query and Graph batch prefetch."""
+    ids = [_first_tracking_id(value.get("leadgen_id")) for value in webhook_values]
+    claimed, in_progress = claim_new_leadgen_ids(ids)
+    results: list[dict[str, Any]] = []
+    try:
+        prefetch = _safe_prefetch(
+            [value for value, leadgen_id in zip(webhook_values, ids) if leadgen_id in claimed]
+        )
+        for value, leadgen_id in zip(webhook_values, ids):
+            if leadgen_id and leadgen_id not in claimed:
+                result: dict[str, Any] = {"ok": True, "skipped": True, "leadgen_id": leadgen_id}
+                if leadgen_id in in_progress:
+                    result["reason"] = "import_in_progress"
+                results.append(result)
+                continue
+            try:
+                results.append(
+                    process_leadgen_event(value, prefetch=prefetch, claimed=bool(leadgen_id))
+                )
+            except Exception as exc:
+                logger.exception("Meta leadgen processing failed for %s", value.get("leadgen_id"))
+                results.append({"ok": False, "leadgen_id": value.get("leadgen_id"), "error": str(exc)})
+    finally:
+        release_leadgen_claims(claimed)
+    return results
+
+
 def sync_page_leads(*, per_form_limit: int = 20, max_forms: int = 200) -> dict[str, Any]:
     """
     Poll Meta Instant Forms for new leads and import into CRM.
@@ -1345,6 +1839,7 @@ def sync_page_leads(*, per_form_limit: int = 20, max_forms: int = 200) -> dict[s
             ]
         )
 
+    pending: list[tuple[dict[str, Any], str, dict[str, Any]]] = []
     for form in forms:
         form_id = str(form.get("id") or "").strip()
         form_name = str(form.get("name") or "").strip()
@@ -1378,6 +1873,7 @@ def sync_page_leads(*, per_form_limit: int = 20, max_forms: int = 200) -> dict[s
                 summary["results"].append({"ok": False, "form_id": form_id, "error": str(exc)})
                 continue
 
+        page: list[tuple[dict[str, Any], str, dict[str, Any]]] = []
         for lead in leads_payload.get("data") or []:
             leadgen_id = _first_tracking_id(lead.get("id"))
             if not leadgen_id:
@@ -1386,11 +1882,8 @@ def sync_page_leads(*, per_form_limit: int = 20, max_forms: int = 200) -> dict[s
                 summary["skipped_old"] += 1
                 summary["skipped"] += 1
                 continue
-            if already_imported(leadgen_id):
-                summary["skipped"] += 1
-                continue
-            try:
-                result = process_leadgen_event(
+            page.append(
+                (
                     {
                         "leadgen_id": leadgen_id,
                         "form_id": str(lead.get("form_id") or form_id),
@@ -1403,26 +1896,73 @@ def sync_page_leads(*, per_form_limit: int = 20, max_forms: int = 200) -> dict[s
                         "campaign_id": lead.get("campaign_id") or "",
                         "campaign_name": lead.get("campaign_name") or "",
                     },
-                    form_name=form_name,
-                )
-                summary["results"].append(result)
-                if result.get("reason") == "before_sync_since":
-                    summary["skipped_old"] += 1
-                    summary["skipped"] += 1
-                elif result.get("reason") == "form_not_allowed":
-                    summary["skipped_form"] += 1
-                    summary["skipped"] += 1
-                elif result.get("skipped"):
-                    summary["skipped"] += 1
-                elif result.get("ok"):
-                    summary["imported"] += 1
-                else:
-                    summary["failed"] += 1
-            except Exception as exc:
-                logger.exception("Meta lead sync failed leadgen_id=%s", leadgen_id)
-                summary["failed"] += 1
-                summary["results"].append(
-                    {"ok": False, "leadgen_id": leadgen_id, "form_id": form_id, "error": str(exc)}
+                    form_name,
+                    lead,
                 )
+            )
+        # One dedupe query per form page; steady-state polls stop here.
+        imported = already_imported_ids([value["leadgen_id"] for value, _n, _l in page])
+        summary["skipped"] += sum(1 for value, _n, _l in page if value["leadgen_id"] in imported)
+        pending.extend(item for item in page if item[0]["leadgen_id"] not in imported)
+
+    claimed, in_progress = claim_new_leadgen_ids([value["leadgen_id"] for value, _n, _l in pending])
+    for value, _form_name, _lead in pending:
+        leadgen_id = value["leadgen_id"]
+        if leadgen_id in claimed:
+            continue
+        summary["skipped"] += 1
+        if leadgen_id in in_progress:
+            summary["results"].append(
+                {"ok": True, "skipped": True, "leadgen_id": leadgen_id, "reason": "import_in_progress"}
+            )
+    pending = [item for item in pending if item[0]["leadgen_id"] in claimed]
 
+    # The /leads listing already returns full lead payloads; only form tracking
+    # parameters and ad url_tags are still needed — fetch them in batch calls.
+    prefetch = _safe_prefetch(
+        [value for value, _form_name, _lead in pending],
+        lead_payloads={value["leadgen_id"]: lead for value, _form_name, lead in pending},
+    )
+    summary["metadata_cache"] = prefetch.cache_summary()
+    try:
+        _import_pending(summary, pending, prefetch)
+    finally:
+        release_leadgen_claims(claimed)
     return summary
+
+
+def _import_pending(
+    summary: dict[str, Any],
+    pending: list[tuple[dict[str, Any], str, dict[str, Any]]],
+    prefetch: MetaGraphPrefetch,
+) -> None:
+    for value, form_name, lead in pending:
+        leadgen_id = value["leadgen_id"]
+        try:
+            result = process_leadgen_event(
+                value,
+                form_name=form_name,
+                lead_payload=lead,
+                prefetch=prefetch,
+                claimed=True,
+            )
+            summary["results"].append(result)
+            if result.get("reason") == "before_sync_since":
+                summary["skipped_old"] += 1
+                summary["skipped"] += 1
+            elif result.get("reason") == "form_not_allowed":
+                summary["skipped_form"] += 1
+                summary["skipped"] += 1
+            elif result.get("skipped"):
+                summary["skipped"] += 1
+            elif result.get("ok"):
+                summary["imported"] += 1
+            else:
+                summary["failed"] += 1
+        except Exception as exc:
+            logger.exception("Meta lead sync failed leadgen_id=%s", leadgen_id)
+            summary["failed"] += 1
+            summary["results"].append(
+                {"ok": False, "leadgen_id": leadgen_id, "form_id": value["form_id"], "error": str(exc)}
+            )
+
@@ -1,17 +1,32 @@
-"""Background Meta Lead Ads auto-sync (no manual cron required)."""
+"""Background Meta Lead Ads auto-sync (no manual cron required).
+
+Cluster-safe: a lease row in ``scheduler_lease`` elects one poller across all
+processes and hosts. The interval adapts to new leads / inbox backlog and to
+errors, and every pass is recorded in ``meta_leads_sync_run``.
+"""
 
 from __future__ import annotations
 
 import logging
 import os
+import socket
 import sys
 import threading
 import time
+from datetime import timedelta
 
 from django.conf import settings
 
+from common.env import int_setting
+
 logger = logging.getLogger(__name__)
 
+LEASE_NAME = "meta_leads_autosync"
+# Lease outlives the sleep by this much so a slow pass never loses leadership.
+LEASE_GRACE_SECONDS = 600
+FOLLOWER_CHECK_SECONDS = 60
+RUN_RETENTION_DAYS = 30
+
 _started = False
 _lock = threading.Lock()
 
@@ -58,82 +73,215 @@ def _auto_sync_enabled() -> bool:
     return bool((getattr(settings, "META_PAGE_ACCESS_TOKEN", "") or "").strip())
 
 
-def _run_once() -> None:
+def _min_interval_seconds() -> int:
+    return max(30, int_setting("META_LEADS_AUTO_SYNC_MIN_SECONDS", 60))
+
+
+def _max_interval_seconds(base: int) -> int:
+    """Longest wait: ``META_LEADS_AUTO_SYNC_MAX_SECONDS``, never below ``base`` (the default cap)."""
+    return max(base, int_setting("META_LEADS_AUTO_SYNC_MAX_SECONDS", 0))
+
+
+def next_interval(
+    current: int,
+    *,
+    base: int,
+    imported: int,
+    failed: int,
+    backlog: int,
+    errored: bool,
+) -> int:
+    """
+    Seconds until the next pass.
+
+    Errors (a crashed pass, or at least as many failures as imports) back off
+    ×2; new leads or a queued backlog halve the wait; an idle pass relaxes
+    ×1.5. Always within META_LEADS_AUTO_SYNC_MIN_SECONDS … _MAX_SECONDS
+    (unset: ``base``, so errors and idle passes never wait longer than the
+    configured interval).
+    """
+    low = _min_interval_seconds()
+    high = _max_interval_seconds(base)
+    current = max(low, min(high, int(current or base)))
+    if errored or (failed and failed >= imported):
+        return min(high, current * 2)
+    if imported or backlog:
+        return max(low, current // 2)
+    return min(high, int(current * 1.5))
+
+
+def _holder_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"[:128]
+
+
+def acquire_lease(name: str, holder: str, ttl_seconds: int) -> bool:
+    """Take or renew ``name`` for ``ttl_seconds``; False while another live holder has it."""
+    from django.db import IntegrityError, transaction
+    from django.db.models import Q
+    from django.utils import timezone
+
+    from .models import SchedulerLease
+
+    now = timezone.now()
+    expires = now + timedelta(seconds=ttl_seconds)
+    updated = SchedulerLease.objects.filter(name=name).filter(Q(holder=holder) | Q(expires_at__lt=now)).update(
+        holder=holder,
+        expires_at=expires,
+    )
+    if updated:
+        SchedulerLease.objects.filter(name=name, holder=holder, acquired_at__isnull=True).update(acquired_at=now)
+        return True
+    if SchedulerLease.objects.filter(name=name).exists():
+        return False
+    try:
+        with transaction.atomic():
+            SchedulerLease.objects.create(name=name, holder=holder, acquired_at=now, expires_at=expires)
+        return True
+    except IntegrityError:
+        return False
+
+
+def release_lease(name: str, holder: str) -> None:
+    from django.utils import timezone
+
+    from .models import SchedulerLease
+
+    SchedulerLease.objects.filter(name=name, holder=holder).update(expires_at=timezone.now())
+
+
+def _backlog() -> int:
+    from .meta_webhook_inbox import inbox_counts
+
+    return int(inbox_counts().get("pending") or 0)
+
+
+def _run_once(holder: str = "", interval: int | None = None) -> int:
+    """One pass (inbox drain, CAPI flush, form poll); records a run row and returns the next interval."""
+    from django.utils import timezone
+
+    from .models import MetaLeadsSyncRun
+
+    base = _interval_seconds()
+    interval = interval or base
     if not _lock.acquire(blocking=False):
         logger.info("Meta leads auto-sync skipped (already running)")
-        return
+        return interval
     try:
-        from .meta_leads import sync_page_leads
-
-        summary = sync_page_leads(per_form_limit=20, max_forms=200)
-        logger.info(
-            "Meta leads auto-sync: forms=%s/%s imported=%s skipped=%s skipped_old=%s skipped_form=%s failed=%s since=%s prefixes=%s",
-            summary.get("forms"),
-            summary.get("forms_total"),
-            summary.get("imported"),
-            summary.get("skipped"),
-            summary.get("skipped_old"),
-            summary.get("skipped_form"),
-            summary.get("failed"),
-            summary.get("sync_since"),
-            summary.get("form_prefixes"),
+        started = timezone.now()
+        clock = time.monotonic()
+        run = MetaLeadsSyncRun(started_at=started, holder=holder)
+        errors: list[str] = []
+        try:
+            from .meta_webhook_inbox import drain_inbox
+
+            inbox = drain_inbox()
+            run.inbox_events = int(inbox.get("events") or 0)
+            run.imported += int(inbox.get("imported") or 0)
+            run.failed += int(inbox.get("failed") or 0)
+            if inbox.get("events"):
+                logger.info("Meta webhook inbox drained: %s", inbox)
+        except Exception as exc:
+            logger.exception("Meta webhook inbox drain failed")
+            errors.append(f"inbox: {exc}")
+        try:
+            # Picks up CAPI retries whose backoff has elapsed.
+            from .meta_capi_outbox import dispatch_outbox
+
+            run.capi_sent = int(dispatch_outbox().get("sent") or 0)
+        except Exception as exc:
+            logger.exception("Meta CAPI outbox dispatch failed")
+            errors.append(f"capi: {exc}")
+        try:
+            from .meta_leads import sync_page_leads
+
+            summary = sync_page_leads(per_form_limit=20, max_forms=200)
+            run.forms = int(summary.get("forms") or 0)
+            run.imported += int(summary.get("imported") or 0)
+            run.skipped = int(summary.get("skipped") or 0)
+            run.failed += int(summary.get("failed") or 0)
+            logger.info(
+                "Meta leads auto-sync: forms=%s/%s imported=%s skipped=%s skipped_old=%s skipped_form=%s failed=%s since=%s prefixes=%s metadata_cache=%s",
+                summary.get("forms"),
+                summary.get("forms_total"),
+                summary.get("imported"),
+                summary.get("skipped"),
+                summary.get("skipped_old"),
+                summary.get("skipped_form"),
+                summary.get("failed"),
+                summary.get("sync_since"),
+                summary.get("form_prefixes"),
+                summary.get("metadata_cache"),
+            )
+        except Exception as exc:
+            logger.exception("Meta leads auto-sync failed")
+            errors.append(f"sync: {exc}")
+
+        try:
+            backlog = _backlog()
+        except Exception:
+            backlog = 0
+        interval = next_interval(
+            interval,
+            base=base,
+            imported=run.imported,
+            failed=run.failed,
+            backlog=backlog,
+            errored=bool(errors),
         )
-    except Exception:
-        logger.exception("Meta leads auto-sync failed")
+        run.finished_at = timezone.now()
+        run.duration_ms = int((time.monotonic() - clock) * 1000)
+        run.error = "\n".join(errors)[:4000]
+        run.next_interval_seconds = interval
+        try:
+            run.save()
+            MetaLeadsSyncRun.objects.filter(started_at__lt=started - timedelta(days=RUN_RETENTION_DAYS)).delete()
+        except Exception:
+            logger.exception("Meta leads auto-sync run history write failed")
+        return interval
     finally:
         _lock.release()
 
 
 def _loop() -> None:
+    from django.db import close_old_connections
+
     # Small delay so DB connections / app boot settle.
     time.sleep(20)
+    holder = _holder_id()
+    interval = _interval_seconds()
     while True:
-        _run_once()
-        time.sleep(_interval_seconds())
+        close_old_connections()
+        try:
+            leader = acquire_lease(LEASE_NAME, holder, interval + LEASE_GRACE_SECONDS)
+        except Exception:
+            logger.exception("Meta leads auto-sync lease check failed")
+            leader = False
+        if not leader:
+            # Another process (any node) is polling; take over if its lease lapses.
+            time.sleep(FOLLOWER_CHECK_SECONDS)
+            continue
+        interval = _run_once(holder, interval)
+        try:
+            acquire_lease(LEASE_NAME, holder, interval + LEASE_GRACE_SECONDS)
+        except Exception:
+            logger.exception("Meta leads auto-sync lease renew failed")
+        time.sleep(interval)
 
 
 def start_meta_leads_autosync() -> None:
+    """
+    Start the scheduler thread in this process.
+
+    Every web/worker process runs the thread, but only the holder of the
+    ``meta_leads_autosync`` lease row polls, so it is safe across nodes.
+    """
     global _started
     if _started or _should_skip_process() or not _auto_sync_enabled():
         return
-
-    # Only one process should poll (gunicorn/multi-worker safe).
-    lock_path = getattr(settings, "BASE_DIR", None)
-    lock_file = None
-    try:
-        from pathlib import Path
-
-        path = Path(str(lock_path or ".")) / "logs" / "meta_leads_autosync.lock"
-        path.parent.mkdir(parents=True, exist_ok=True)
-        lock_file = open(path, "a+", encoding="utf-8")
-        if os.name == "nt":
-            import msvcrt
-
-            lock_file.seek(0)
-            try:
-                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
-            except OSError:
-                lock_file.close()
-                logger.info("Meta leads auto-sync not started (another worker holds the lock)")
-                return
-        else:
-            import fcntl
-
-            try:
-                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            except OSError:
-                lock_file.close()
-                logger.info("Meta leads auto-sync not started (another worker holds the lock)")
-                return
-    except Exception:
-        logger.exception("Meta leads auto-sync lock setup failed; starting without file lock")
-
     _started = True
-    # Keep lock_file open for process lifetime.
-    globals()["_meta_autosync_lock_file"] = lock_file
     thread = threading.Thread(target=_loop, name="meta-leads-autosync", daemon=True)
     thread.start()
     logger.info(
-        "Meta leads auto-sync started (every %ss). Set META_LEADS_AUTO_SYNC=0 to disable.",
+        "Meta leads auto-sync scheduler started (base %ss). Set META_LEADS_AUTO_SYNC=0 to disable.",
         _interval_seconds(),
     )
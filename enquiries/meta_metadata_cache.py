@@ -0,0 +1,176 @@
+"""Two-level cache for Meta Instant Form / ad metadata.
+
+Level 1 is a per-process LRU (lost on restart); level 2 is the
+``meta_graph_metadata_cache`` table. Every entry carries its own expiry, so a
+form name fetched this morning is reused until its TTL runs out instead of
+being re-read from Graph for every lead.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any
+
+from django.utils import timezone
+
+from common.env import int_setting
+
+logger = logging.getLogger(__name__)
+
+KIND_FORM = "form"
+KIND_AD = "ad"
+
+DEFAULT_TTL_SECONDS = {
+    # Form names / tracking_parameters are edited almost never once live.
+    KIND_FORM: 24 * 3600,
+    # Agencies occasionally fix ad url_tags mid-campaign.
+    KIND_AD: 6 * 3600,
+}
+DEFAULT_MAX_ENTRIES = 2048
+
+_lru: OrderedDict[tuple[str, str], tuple[float, dict[str, Any]]] = OrderedDict()
+_lru_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+
+
+def ttl_seconds(kind: str) -> int:
+    """META_METADATA_CACHE_FORM_TTL_SECONDS / META_METADATA_CACHE_AD_TTL_SECONDS."""
+    default = DEFAULT_TTL_SECONDS.get(kind, DEFAULT_TTL_SECONDS[KIND_AD])
+    return max(60, int_setting(f"META_METADATA_CACHE_{kind.upper()}_TTL_SECONDS", default))
+
+
+def max_entries() -> int:
+    return max(16, int_setting("META_METADATA_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+
+def _lru_get(key: tuple[str, str], now: float) -> dict[str, Any] | None:
+    with _lru_lock:
+        hit = _lru.get(key)
+        if hit is None:
+            return None
+        expires, data = hit
+        if expires <= now:
+            _lru.pop(key, None)
+            return None
+        _lru.move_to_end(key)
+        return data
+
+
+def _lru_put(key: tuple[str, str], data: dict[str, Any], expires: float) -> None:
+    with _lru_lock:
+        _lru[key] = (expires, data)
+        _lru.move_to_end(key)
+        limit = max_entries()
+        while len(_lru) > limit:
+            _lru.popitem(last=False)
+
+
+def get_many(kind: str, object_ids: list[str]) -> tuple[dict[str, dict[str, Any]], dict[str, int]]:
+    """
+    Return ``({id: data}, counts)`` for fresh cached ids.
+
+    ``counts`` has ``memory_hits``, ``db_hits`` and ``misses`` for this lookup so
+    callers can report hit rates per sync run.
+    """
+    found: dict[str, dict[str, Any]] = {}
+    counts = {"memory_hits": 0, "db_hits": 0, "misses": 0}
+    ids = [i for i in dict.fromkeys(str(x) for x in object_ids if x)]
+    if not ids:
+        return found, counts
+
+    now = time.time()
+    remaining: list[str] = []
+    for object_id in ids:
+        data = _lru_get((kind, object_id), now)
+        if data is None:
+            remaining.append(object_id)
+        else:
+            found[object_id] = data
+            counts["memory_hits"] += 1
+
+    if remaining:
+        try:
+            from .models import MetaGraphMetadataCache
+
+            rows = MetaGraphMetadataCache.objects.filter(
+                kind=kind,
+                object_id__in=remaining,
+                expires_at__gt=timezone.now(),
+            ).values_list("object_id", "data", "expires_at")
+            for object_id, data, expires_at in rows:
+                found[object_id] = data or {}
+                counts["db_hits"] += 1
+                _lru_put((kind, object_id), found[object_id], expires_at.timestamp())
+        except Exception:
+            logger.exception("Meta metadata cache DB read failed kind=%s", kind)
+
+    counts["misses"] = len(ids) - counts["memory_hits"] - counts["db_hits"]
+    with _lru_lock:
+        for key, value in counts.items():
+            _stats[key] += value
+    return found, counts
+
+
+def set_many(kind: str, entries: dict[str, dict[str, Any]]) -> None:
+    """Store fresh Graph results in both tiers with this kind's TTL."""
+    if not entries:
+        return
+    ttl = ttl_seconds(kind)
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+    for object_id, data in entries.items():
+        _lru_put((kind, str(object_id)), data, expires_at.timestamp())
+    try:
+        from .models import MetaGraphMetadataCache
+
+        MetaGraphMetadataCache.objects.bulk_create(
+            [
+                MetaGraphMetadataCache(
+                    kind=kind,
+                    object_id=str(object_id)[:64],
+                    data=data,
+                    fetched_at=now,
+                    expires_at=expires_at,
+                )
+                for object_id, data in entries.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["kind", "object_id"],
+            update_fields=["data", "fetched_at", "expires_at"],
+        )
+    except Exception:
+        logger.exception("Meta metadata cache DB write failed kind=%s", kind)
+
+
+def clear_memory() -> None:
+    with _lru_lock:
+        _lru.clear()
+
+
+def purge_expired() -> int:
+    """Delete expired DB rows; returns the number removed."""
+    from .models import MetaGraphMetadataCache
+
+    deleted, _ = MetaGraphMetadataCache.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def hit_rate(counts: dict[str, int]) -> float | None:
+    total = sum(int(counts.get(k) or 0) for k in ("memory_hits", "db_hits", "misses"))
+    if not total:
+        return None
+    hits = int(counts.get("memory_hits") or 0) + int(counts.get("db_hits") or 0)
+    return round(hits / total, 4)
+
+
+def stats() -> dict[str, Any]:
+    """Process-lifetime counters (memory_hits / db_hits / misses / hit_rate / entries)."""
+    with _lru_lock:
+        snapshot: dict[str, Any] = dict(_stats)
+        snapshot["entries"] = len(_lru)
+    snapshot["hit_rate"] = hit_rate(snapshot)
+    return snapshot
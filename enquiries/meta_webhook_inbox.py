@@ -0,0 +1,253 @@
+"""Durable inbox for Meta Lead Ads webhook deliveries.
+
+``MetaLeadWebhookView`` stores each ``leadgen`` change in
+``meta_lead_webhook_inbox`` and answers Meta immediately. ``drain_inbox``
+claims pending rows (``SELECT … FOR UPDATE SKIP LOCKED`` so several workers
+can drain side by side), imports them in a bounded thread pool and records a
+status per event. Failed rows stay in the table until ``replay_failed``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from common.env import int_setting
+
+from .models import MetaLeadWebhookEvent, MetaWebhookEventStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_STALE_SECONDS = 900
+
+_drain_lock = threading.Lock()
+
+
+def inbox_workers() -> int:
+    """META_WEBHOOK_INBOX_WORKERS — concurrent import threads per drain (1–16)."""
+    return max(1, min(16, int_setting("META_WEBHOOK_INBOX_WORKERS", DEFAULT_WORKERS)))
+
+
+def inbox_batch_size() -> int:
+    return max(1, min(500, int_setting("META_WEBHOOK_INBOX_BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+
+
+def stale_after_seconds() -> int:
+    """Rows stuck in ``processing`` longer than this (crashed worker) are re-claimed."""
+    return max(60, int_setting("META_WEBHOOK_INBOX_STALE_SECONDS", DEFAULT_STALE_SECONDS))
+
+
+def leadgen_values_from_payload(payload: Any) -> list[dict[str, Any]]:
+    """``value`` dicts of every ``leadgen`` change in a Page webhook body."""
+    if not isinstance(payload, dict) or payload.get("object") != "page":
+        return []
+    values: list[dict[str, Any]] = []
+    for entry in payload.get("entry") or []:
+        for change in (entry or {}).get("changes") or []:
+            if change.get("field") != "leadgen":
+                continue
+            value = change.get("value") or {}
+            if isinstance(value, dict):
+                values.append(value)
+    return values
+
+
+def enqueue_leadgen_values(values: list[dict[str, Any]]) -> dict[str, int]:
+    """
+    Insert webhook changes into the inbox; redelivered leadgen ids are ignored.
+
+    Returns ``{"received", "queued", "duplicates", "invalid"}``.
+    """
+    from .meta_leads import _first_tracking_id
+
+    rows: dict[str, MetaLeadWebhookEvent] = {}
+    invalid = 0
+    for value in values:
+        leadgen_id = _first_tracking_id(value.get("leadgen_id"))[:64]
+        if not leadgen_id:
+            invalid += 1
+            continue
+        rows.setdefault(
+            leadgen_id,
+            MetaLeadWebhookEvent(
+                leadgen_id=leadgen_id,
+                form_id=_first_tracking_id(value.get("form_id"))[:64],
+                payload=value,
+            ),
+        )
+    queued = 0
+    if rows:
+        existing = set(
+            MetaLeadWebhookEvent.objects.filter(leadgen_id__in=list(rows)).values_list(
+                "leadgen_id", flat=True
+            )
+        )
+        fresh = [row for leadgen_id, row in rows.items() if leadgen_id not in existing]
+        if fresh:
+            MetaLeadWebhookEvent.objects.bulk_create(fresh, ignore_conflicts=True)
+        queued = len(fresh)
+    return {
+        "received": len(values),
+        "queued": queued,
+        "duplicates": len(values) - invalid - queued,
+        "invalid": invalid,
+    }
+
+
+def _claim_batch(limit: int) -> list[MetaLeadWebhookEvent]:
+    """Move up to ``limit`` pending (or stale processing) rows to ``processing``."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=stale_after_seconds())
+    with transaction.atomic():
+        ids = list(
+            MetaLeadWebhookEvent.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=MetaWebhookEventStatus.PENDING)
+                | Q(status=MetaWebhookEventStatus.PROCESSING, started_at__lt=stale)
+            )
+            .order_by("received_at")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        MetaLeadWebhookEvent.objects.filter(pk__in=ids).update(
+            status=MetaWebhookEventStatus.PROCESSING,
+            started_at=now,
+            attempts=F("attempts") + 1,
+        )
+    return list(MetaLeadWebhookEvent.objects.filter(pk__in=ids).order_by("received_at"))
+
+
+def apply_result(event: MetaLeadWebhookEvent, result: dict[str, Any]) -> None:
+    """Copy a ``process_leadgen_event`` result onto the inbox row (not saved)."""
+    event.processed_at = timezone.now()
+    event.reason = str(result.get("reason") or "")[:64]
+    if not result.get("ok"):
+        event.status = MetaWebhookEventStatus.FAILED
+        event.last_error = str(result.get("error") or "unknown error")
+    elif result.get("reason") == "import_in_progress":
+        # Another worker holds the import claim — look again on the next drain.
+        event.status = MetaWebhookEventStatus.PENDING
+        event.processed_at = None
+    elif result.get("skipped"):
+        event.status = MetaWebhookEventStatus.SKIPPED
+        event.last_error = ""
+    else:
+        event.status = MetaWebhookEventStatus.IMPORTED
+        event.crm_lead_id = result.get("crm_lead_id")
+        event.last_error = ""
+
+
+def _process_chunk(events: list[MetaLeadWebhookEvent]) -> dict[str, int]:
+    from .meta_leads import process_leadgen_events
+
+    counts: dict[str, int] = {}
+    try:
+        try:
+            results = process_leadgen_events([event.payload or {} for event in events])
+        except Exception as exc:
+            logger.exception("Meta webhook inbox chunk failed (%s events)", len(events))
+            results = [{"ok": False, "error": str(exc)} for _ in events]
+        for event, result in zip(events, results):
+            apply_result(event, result)
+            event.save(
+                update_fields=["status", "reason", "last_error", "crm_lead_id", "processed_at"]
+            )
+            counts[event.status] = counts.get(event.status, 0) + 1
+    finally:
+        # Worker threads open their own DB connection; don't leak it.
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+    return counts
+
+
+def drain_inbox(
+    *,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> dict[str, Any]:
+    """
+    Import pending inbox rows until the inbox is empty (or ``max_batches``).
+
+    Each claimed batch is split across at most ``workers`` threads; each thread
+    shares one Graph batch prefetch for its slice.
+    """
+    workers = workers or inbox_workers()
+    batch_size = batch_size or inbox_batch_size()
+    summary: dict[str, Any] = {"batches": 0, "events": 0}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="meta-inbox") as pool:
+        while max_batches is None or summary["batches"] < max_batches:
+            events = _claim_batch(batch_size)
+            if not events:
+                break
+            summary["batches"] += 1
+            summary["events"] += len(events)
+            size = max(1, -(-len(events) // workers))
+            chunks = [events[i : i + size] for i in range(0, len(events), size)]
+            requeued = 0
+            for counts in pool.map(_process_chunk, chunks):
+                requeued += counts.get(MetaWebhookEventStatus.PENDING, 0)
+                for key, value in counts.items():
+                    summary[key] = summary.get(key, 0) + value
+            if requeued and (requeued == len(events) or len(events) < batch_size):
+                # Only rows another worker is importing are left; don't spin on them.
+                break
+    return summary
+
+
+def _drain_in_background() -> None:
+    if not _drain_lock.acquire(blocking=False):
+        return
+    try:
+        close_old_connections()
+        summary = drain_inbox()
+        if summary.get("events"):
+            logger.info("Meta webhook inbox drained: %s", summary)
+    except Exception:
+        logger.exception("Meta webhook inbox drain failed")
+    finally:
+        connection.close()
+        _drain_lock.release()
+
+
+def kick_drain() -> None:
+    """Start a background drain in this process unless one is already running."""
+    if _drain_lock.locked():
+        return
+    thread = threading.Thread(target=_drain_in_background, name="meta-inbox-drain", daemon=True)
+    thread.start()
+
+
+def replay_failed(*, leadgen_ids: list[str] | None = None, include_skipped: bool = False) -> int:
+    """Put failed (optionally skipped) rows back to ``pending``; returns rows reset."""
+    statuses = [MetaWebhookEventStatus.FAILED]
+    if include_skipped:
+        statuses.append(MetaWebhookEventStatus.SKIPPED)
+    qs = MetaLeadWebhookEvent.objects.filter(status__in=statuses)
+    if leadgen_ids:
+        qs = qs.filter(leadgen_id__in=leadgen_ids)
+    return qs.update(
+        status=MetaWebhookEventStatus.PENDING,
+        started_at=None,
+        processed_at=None,
+        last_error="",
+        reason="",
+    )
+
+
+def inbox_counts() -> dict[str, int]:
+    rows = MetaLeadWebhookEvent.objects.order_by().values("status").annotate(n=Count("id"))
+    counts = {choice: 0 for choice in MetaWebhookEventStatus.values}
+    for row in rows:
+        counts[row["status"]] = row["n"]
+    return counts
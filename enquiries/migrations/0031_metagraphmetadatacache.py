@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0030_crmlead_gclid'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetaGraphMetadataCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('form', 'Instant Form'), ('ad', 'Ad')], max_length=10)),
+                ('object_id', models.CharField(max_length=64)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('fetched_at', models.DateTimeField()),
+                ('expires_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'meta_graph_metadata_cache',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='uniq_meta_graph_metadata_kind_id')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:34
+
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0031_metagraphmetadatacache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetaLeadImportClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('leadgen_id', models.CharField(max_length=64, unique=True)),
+                ('token', models.CharField(db_index=True, max_length=32)),
+                ('claimed_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'meta_lead_import_claim',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='crmlead',
+            index=models.Index(django.db.models.fields.json.KeyTextTransform('meta_leadgen_id', 'raw_payload'), name='idx_campaign_leads_meta_lgid'),
+        ),
+    ]
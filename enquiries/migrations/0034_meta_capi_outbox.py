@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0033_meta_lead_webhook_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetaCapiOutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.CharField(max_length=100, unique=True)),
+                ('crm_lead_id', models.IntegerField(blank=True, db_index=True, null=True)),
+                ('event_name', models.CharField(max_length=64)),
+                ('event', models.JSONField(default=dict)),
+                ('test_event_code', models.CharField(blank=True, default='', max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'meta_capi_outbox',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='idx_meta_capi_outbox_due')],
+            },
+        ),
+    ]
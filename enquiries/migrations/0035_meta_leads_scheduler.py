@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0034_meta_capi_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MetaLeadsSyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(db_index=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('holder', models.CharField(blank=True, default='', max_length=128)),
+                ('forms', models.PositiveIntegerField(default=0)),
+                ('imported', models.PositiveIntegerField(default=0)),
+                ('skipped', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('inbox_events', models.PositiveIntegerField(default=0)),
+                ('capi_sent', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, default='')),
+                ('next_interval_seconds', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'meta_leads_sync_run',
+                'ordering': ['-started_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SchedulerLease',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('holder', models.CharField(blank=True, default='', max_length=128)),
+                ('acquired_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'scheduler_lease',
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0035_meta_leads_scheduler'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeadNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('enquiry_emails', 'Admission/contact enquiry emails'), ('franchise_emails', 'Franchise enquiry emails'), ('crm_lead_emails', 'CRM lead emails'), ('landing_emails', 'Landing enquiry emails'), ('landing_heads_reminder', 'Landing CRM heads reminder'), ('assign_and_notify', 'Auto-assign + CRM heads reminder')], max_length=32)),
+                ('lead_model', models.CharField(help_text='app_label.model of the lead row', max_length=64)),
+                ('lead_id', models.IntegerField()),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('skipped', 'Skipped'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('result', models.CharField(blank=True, default='', max_length=32)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'lead_notification_outbox',
+                'ordering': ['next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='idx_lead_notify_due')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'lead_model', 'lead_id'), name='uniq_lead_notification')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0036_lead_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='leadnotification',
+            name='kind',
+            field=models.CharField(choices=[('enquiry_emails', 'Admission/contact enquiry emails'), ('franchise_emails', 'Franchise enquiry emails'), ('crm_lead_emails', 'CRM lead emails'), ('landing_emails', 'Landing enquiry emails'), ('landing_heads_reminder', 'Landing CRM heads reminder'), ('assign_and_notify', 'Auto-assign + CRM heads reminder'), ('link_duplicate', "Duplicate lead: copy primary's assignee (no email)")], max_length=32),
+        ),
+        migrations.CreateModel(
+            name='LeadIntakeKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phone', models.CharField(max_length=10)),
+                ('family', models.CharField(max_length=20)),
+                ('lead_model', models.CharField(help_text='app_label.model of the lead row', max_length=64)),
+                ('lead_id', models.IntegerField()),
+                ('received_at', models.DateTimeField()),
+                ('primary', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='enquiries.leadintakekey')),
+            ],
+            options={
+                'db_table': 'lead_intake_key',
+                'indexes': [models.Index(fields=['phone', 'family', 'received_at'], name='idx_lead_intake_lookup')],
+                'constraints': [models.UniqueConstraint(fields=('lead_model', 'lead_id'), name='uniq_lead_intake_lead')],
+            },
+        ),
+    ]
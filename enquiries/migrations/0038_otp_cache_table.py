@@ -0,0 +1,18 @@
+from django.core.management import call_command
+from django.db import migrations
+
+
+def create_otp_cache_table(apps, schema_editor):
+    # Backing table for the "otp" DatabaseCache alias (settings.CACHES); a no-op when it already exists.
+    call_command("createcachetable", "otp_cache", database=schema_editor.connection.alias, verbosity=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enquiries', '0037_lead_intake_dedupe'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_otp_cache_table, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,21 @@
 from django.db import models
+from django.db.models.fields.json import KeyTextTransform
 from django.core.validators import RegexValidator
 
 from franchises.models import Franchise
 
+from .change_tracking import ChangeTrackingMixin
+
 
 class EnquiryType(models.TextChoices):
     ADMISSION = "ADMISSION", "Admission"
     CONTACT = "CONTACT", "Contact"
 
 
-class Enquiry(models.Model):
+class Enquiry(ChangeTrackingMixin, models.Model):
+    # Snapshotted on load (ChangeTrackingMixin): crm_api notifies on reassignment.
+    tracked_fields = ("assigned_user",)
+
     enquiry_type = models.CharField(max_length=20, choices=EnquiryType.choices)
     name = models.CharField(max_length=255)
     email = models.EmailField()
@@ -57,9 +63,11 @@ class Enquiry(models.Model):
         return f"{self.enquiry_type} from {self.name}"
 
 
-class FranchiseEnquiry(models.Model):
+class FranchiseEnquiry(ChangeTrackingMixin, models.Model):
     """Franchise opportunity leads (separate from admission/contact `Enquiry`)."""
 
+    tracked_fields = ("assigned_user",)
+
     name = models.CharField(max_length=255)
     email = models.EmailField()
     phone = models.CharField(
@@ -116,7 +124,7 @@ class FranchiseEnquiry(models.Model):
         return f"Franchise lead from {self.name}"
 
 
-class KidsEnquiry(models.Model):
+class KidsEnquiry(ChangeTrackingMixin, models.Model):
     """
     Landing-page leads — mirrors ``public.kids_enquiry`` exactly:
     id, name, mobile, mobileno, email, state, city, location, enquiry_type,
@@ -124,6 +132,8 @@ class KidsEnquiry(models.Model):
     email_status, whatsapp_status, raw_payload.
     """
 
+    tracked_fields = ("assigned_user",)
+
     name = models.TextField()
     mobile = models.TextField(blank=True, null=True)
     mobileno = models.TextField()
@@ -204,9 +214,12 @@ class CrmLeadStatus(models.TextChoices):
     NOT_ANSWERING_CALLS = "not_answering_calls", "Not Answering Calls"
 
 
-class CrmLead(models.Model):
+class CrmLead(ChangeTrackingMixin, models.Model):
     """Campaign leads for /crm/web, /crm/fb, /crm/insta, LP, and META forms."""
 
+    # status drives Meta CAPI stage events, assigned_user the reassignment notice.
+    tracked_fields = ("status", "assigned_user")
+
     full_name = models.CharField(max_length=255)
     mobile = models.CharField(max_length=20)
     email = models.EmailField(blank=True, default="")
@@ -255,6 +268,11 @@ class CrmLead(models.Model):
             models.Index(fields=["status"], name="idx_campaign_leads_status"),
             models.Index(fields=["mobile"], name="idx_campaign_leads_mobile"),
             models.Index(fields=["gclid"], name="idx_campaign_leads_gclid"),
+            # Set-based Meta dedupe: raw_payload->>'meta_leadgen_id' IN (...).
+            models.Index(
+                KeyTextTransform("meta_leadgen_id", "raw_payload"),
+                name="idx_campaign_leads_meta_lgid",
+            ),
         ]
 
     def __str__(self) -> str:
@@ -284,6 +302,254 @@ class MetaLeadSuppress(models.Model):
         return f"Suppressed Meta leadgen {self.leadgen_id}"
 
 
+class MetaLeadImportClaim(models.Model):
+    """
+    Short-lived cross-process claim on a Meta leadgen id while it is imported.
+
+    Claims are taken in bulk with conflict-ignoring inserts so webhook and
+    auto-sync workers (on any node) never create the same lead twice. Rows
+    older than the claim window are treated as abandoned and can be re-taken.
+    """
+
+    leadgen_id = models.CharField(max_length=64, unique=True)
+    token = models.CharField(max_length=32, db_index=True)
+    claimed_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "meta_lead_import_claim"
+
+    def __str__(self) -> str:
+        return f"Import claim on Meta leadgen {self.leadgen_id}"
+
+
+class MetaWebhookEventStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    PROCESSING = "processing", "Processing"
+    IMPORTED = "imported", "Imported"
+    SKIPPED = "skipped", "Skipped"
+    FAILED = "failed", "Failed"
+
+
+class MetaLeadWebhookEvent(models.Model):
+    """
+    Inbox row for one Meta ``leadgen`` webhook change.
+
+    The webhook view only verifies the signature and inserts here, so Meta gets
+    its 200 straight away; ``meta_webhook_inbox.drain_inbox`` imports rows in
+    the background. Unique on ``leadgen_id`` so Meta redeliveries collapse.
+    """
+
+    leadgen_id = models.CharField(max_length=64, unique=True)
+    form_id = models.CharField(max_length=64, blank=True, default="")
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=MetaWebhookEventStatus.choices,
+        default=MetaWebhookEventStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    reason = models.CharField(max_length=64, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+    crm_lead_id = models.IntegerField(null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "meta_lead_webhook_inbox"
+        ordering = ["received_at"]
+        indexes = [
+            models.Index(fields=["status", "received_at"], name="idx_meta_inbox_status_recv"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Meta leadgen {self.leadgen_id} ({self.status})"
+
+
+class MetaCapiOutboxStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    SENDING = "sending", "Sending"
+    SENT = "sent", "Sent"
+    FAILED = "failed", "Failed"
+
+
+class MetaCapiOutboxEvent(models.Model):
+    """
+    Conversions API event waiting to be uploaded (or already uploaded).
+
+    Rows are added on transaction commit of a CRM stage change and sent by
+    ``meta_capi_outbox.dispatch_outbox`` in uploads of up to 1,000 events.
+    ``event_id`` is unique so a stage change queued twice is only sent once.
+    """
+
+    event_id = models.CharField(max_length=100, unique=True)
+    crm_lead_id = models.IntegerField(null=True, blank=True, db_index=True)
+    event_name = models.CharField(max_length=64)
+    event = models.JSONField(default=dict)
+    test_event_code = models.CharField(max_length=64, blank=True, default="")
+    status = models.CharField(
+        max_length=20,
+        choices=MetaCapiOutboxStatus.choices,
+        default=MetaCapiOutboxStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "meta_capi_outbox"
+        ordering = ["next_attempt_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="idx_meta_capi_outbox_due"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.event_name} for CRM lead {self.crm_lead_id} ({self.status})"
+
+
+class SchedulerLease(models.Model):
+    """
+    Named lease so exactly one process across all app servers runs a job.
+
+    Acquired / renewed with a single conditional UPDATE (holder matches or the
+    lease has expired); a crashed holder simply stops renewing.
+    """
+
+    name = models.CharField(max_length=64, primary_key=True)
+    holder = models.CharField(max_length=128, blank=True, default="")
+    acquired_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        db_table = "scheduler_lease"
+
+    def __str__(self) -> str:
+        return f"{self.name} held by {self.holder or '-'}"
+
+
+class MetaLeadsSyncRun(models.Model):
+    """One Meta leads auto-sync pass (inbox drain + CAPI flush + form poll)."""
+
+    started_at = models.DateTimeField(db_index=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    duration_ms = models.PositiveIntegerField(default=0)
+    holder = models.CharField(max_length=128, blank=True, default="")
+    forms = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    inbox_events = models.PositiveIntegerField(default=0)
+    capi_sent = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default="")
+    next_interval_seconds = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        db_table = "meta_leads_sync_run"
+        ordering = ["-started_at"]
+
+    def __str__(self) -> str:
+        return f"Meta sync {self.started_at:%Y-%m-%d %H:%M} imported={self.imported} failed={self.failed}"
+
+
+class LeadIntakeKey(models.Model):
+    """
+    Dedupe key for every lead that comes in through a public form or Meta.
+
+    ``(phone, family)`` is the 10-digit mobile plus ``admission`` / ``franchise``;
+    a lead that arrives within ``LEAD_DEDUPE_WINDOW_MINUTES`` of an earlier
+    primary with the same key points at it via ``primary`` and sends no
+    notifications of its own. Maintained by ``lead_dedupe`` at intake and by
+    ``manage.py cluster_duplicate_leads`` for history.
+    """
+
+    phone = models.CharField(max_length=10)
+    family = models.CharField(max_length=20)
+    lead_model = models.CharField(max_length=64, help_text="app_label.model of the lead row")
+    lead_id = models.IntegerField()
+    received_at = models.DateTimeField()
+    primary = models.ForeignKey(
+        "self",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="duplicates",
+    )
+
+    class Meta:
+        db_table = "lead_intake_key"
+        constraints = [
+            models.UniqueConstraint(fields=["lead_model", "lead_id"], name="uniq_lead_intake_lead"),
+        ]
+        indexes = [
+            models.Index(fields=["phone", "family", "received_at"], name="idx_lead_intake_lookup"),
+        ]
+
+    def __str__(self) -> str:
+        role = f"duplicate of #{self.primary_id}" if self.primary_id else "primary"
+        return f"{self.lead_model}#{self.lead_id} {self.family} {self.phone} ({role})"
+
+
+class LeadNotificationKind(models.TextChoices):
+    ENQUIRY_EMAILS = "enquiry_emails", "Admission/contact enquiry emails"
+    FRANCHISE_EMAILS = "franchise_emails", "Franchise enquiry emails"
+    CRM_LEAD_EMAILS = "crm_lead_emails", "CRM lead emails"
+    LANDING_EMAILS = "landing_emails", "Landing enquiry emails"
+    LANDING_HEADS_REMINDER = "landing_heads_reminder", "Landing CRM heads reminder"
+    ASSIGN_AND_NOTIFY = "assign_and_notify", "Auto-assign + CRM heads reminder"
+    LINK_DUPLICATE = "link_duplicate", "Duplicate lead: copy primary's assignee (no email)"
+
+
+class LeadNotificationStatus(models.TextChoices):
+    PENDING = "pending", "Pending"
+    SENDING = "sending", "Sending"
+    SENT = "sent", "Sent"
+    SKIPPED = "skipped", "Skipped"
+    FAILED = "failed", "Failed"
+
+
+class LeadNotification(models.Model):
+    """
+    Outbound email for a public form submission, queued with the lead row.
+
+    Inserted in the same transaction as the lead and sent by
+    ``notification_outbox.drain_outbox`` off the request thread. One row per
+    (kind, lead) so a resubmitted hook never mails twice.
+    """
+
+    kind = models.CharField(max_length=32, choices=LeadNotificationKind.choices)
+    lead_model = models.CharField(max_length=64, help_text="app_label.model of the lead row")
+    lead_id = models.IntegerField()
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=LeadNotificationStatus.choices,
+        default=LeadNotificationStatus.PENDING,
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    result = models.CharField(max_length=32, blank=True, default="")
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "lead_notification_outbox"
+        ordering = ["next_attempt_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["kind", "lead_model", "lead_id"], name="uniq_lead_notification"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="idx_lead_notify_due"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind} for {self.lead_model}#{self.lead_id} ({self.status})"
+
+
 class CrmLeadNote(models.Model):
     lead = models.ForeignKey(CrmLead, on_delete=models.CASCADE, related_name="notes")
     content = models.TextField()
@@ -310,6 +576,8 @@ class UnifiedLeadNote(models.Model):
 
 
 class OTPVerification(models.Model):
+    """Legacy OTP rows; live codes are kept in the cache by ``otp_service``."""
+
     phone = models.CharField(max_length=20, unique=True)
     code = models.CharField(max_length=6)
     is_verified = models.BooleanField(default=False)
@@ -320,3 +588,33 @@ class OTPVerification(models.Model):
 
     def __str__(self) -> str:
         return f"OTP for {self.phone}: {self.code}"
+
+
+class MetaGraphMetadataCache(models.Model):
+    """
+    Persistent tier of the Meta form / ad metadata cache.
+
+    Instant Form names, tracking_parameters and ad url_tags rarely change, so
+    they are kept here with a per-entry expiry; the in-process LRU in
+    ``enquiries.meta_metadata_cache`` sits in front and survives only until
+    restart, after which this table keeps cold starts off Graph.
+    """
+
+    KIND_FORM = "form"
+    KIND_AD = "ad"
+    KIND_CHOICES = [(KIND_FORM, "Instant Form"), (KIND_AD, "Ad")]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.CharField(max_length=64)
+    data = models.JSONField(default=dict, blank=True)
+    fetched_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = "meta_graph_metadata_cache"
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "object_id"], name="uniq_meta_graph_metadata_kind_id"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Meta {self.kind} {self.object_id}"
@@ -0,0 +1,368 @@
+"""Outbox for emails triggered by public form submissions.
+
+Enquiry, franchise, CRM-lead and landing submits call ``enqueue`` inside the
+transaction that creates the lead, so the lead and its pending emails commit
+together and the request returns without touching SendGrid. ``drain_outbox``
+claims due rows (``SELECT … FOR UPDATE SKIP LOCKED``), sends them in a bounded
+thread pool and records a status per message; failures are retried with
+exponential backoff until ``LEAD_NOTIFY_OUTBOX_MAX_ATTEMPTS``.
+
+    python manage.py send_lead_notifications            # drain now (cron)
+    python manage.py send_lead_notifications --stats
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from common.env import int_setting
+
+from .models import LeadNotification, LeadNotificationKind, LeadNotificationStatus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BACKOFF_SECONDS = 60
+MAX_BACKOFF_SECONDS = 6 * 3600
+# A row left in ``sending`` this long belongs to a crashed worker.
+SENDING_STALE_SECONDS = 900
+# Don't keep a retry timer around for longer than this; cron picks up the rest.
+MAX_RETRY_TIMER_SECONDS = 3600
+
+_drain_lock = threading.Lock()
+_drain_again = threading.Event()
+_retry_timer: threading.Timer | None = None
+
+
+def outbox_workers() -> int:
+    """LEAD_NOTIFY_OUTBOX_WORKERS — concurrent SendGrid senders per drain (1–16)."""
+    return max(1, min(16, int_setting("LEAD_NOTIFY_OUTBOX_WORKERS", DEFAULT_WORKERS)))
+
+
+def outbox_batch_size() -> int:
+    return max(1, min(500, int_setting("LEAD_NOTIFY_OUTBOX_BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+
+
+def max_attempts() -> int:
+    return max(1, int_setting("LEAD_NOTIFY_OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Delay before retry number ``attempts`` + 1: base · 2^(attempts-1), capped at 6h."""
+    base = max(1, int_setting("LEAD_NOTIFY_OUTBOX_BACKOFF_SECONDS", DEFAULT_BACKOFF_SECONDS))
+    return min(MAX_BACKOFF_SECONDS, base * (2 ** max(0, attempts - 1)))
+
+
+def email_delivery_enabled() -> bool:
+    """False when a send would be a no-op (sending disabled or no SendGrid key) — nothing to retry."""
+    from common.sendgrid_email import sendgrid_api_key
+
+    return bool(getattr(settings, "EMAIL_SENDING_ENABLED", False)) and bool(sendgrid_api_key())
+
+
+# --- enqueue ---------------------------------------------------------------
+
+
+def enqueue(lead, kinds: list[str], *, params: dict[str, Any] | None = None) -> int:
+    """
+    Queue ``kinds`` for ``lead`` and kick a drain once the transaction commits.
+
+    Call inside the transaction that created ``lead``. Kinds already queued for
+    the lead are ignored. Returns rows written.
+    """
+    now = timezone.now()
+    rows = [
+        LeadNotification(
+            kind=kind,
+            lead_model=lead._meta.label_lower,
+            lead_id=lead.pk,
+            params=dict(params or {}),
+            next_attempt_at=now,
+        )
+        for kind in dict.fromkeys(kinds)
+    ]
+    if not rows:
+        return 0
+    LeadNotification.objects.bulk_create(rows, ignore_conflicts=True)
+    transaction.on_commit(kick_drain)
+    return len(rows)
+
+
+# --- handlers --------------------------------------------------------------
+
+
+def _bool_outcome(ok: bool) -> str:
+    if ok:
+        return "sent"
+    return "failed" if email_delivery_enabled() else "skipped"
+
+
+def _send_enquiry_emails(lead, params: dict[str, Any]) -> str:
+    from .emails import send_enquiry_email
+
+    return _bool_outcome(send_enquiry_email(lead))
+
+
+def _send_franchise_emails(lead, params: dict[str, Any]) -> str:
+    from .emails import send_franchise_enquiry_email
+
+    return _bool_outcome(send_franchise_enquiry_email(lead))
+
+
+def _send_crm_lead_emails(lead, params: dict[str, Any]) -> str:
+    from .emails import send_crm_lead_enquiry_emails
+
+    return _bool_outcome(send_crm_lead_enquiry_emails(lead))
+
+
+def _send_landing_emails(lead, params: dict[str, Any]) -> str:
+    from .emails import send_landing_enquiry_emails
+    from .landing_submit import LandingEnquiryRecord
+    from .models import KidsEnquiry
+
+    email_status = send_landing_enquiry_emails(LandingEnquiryRecord.from_kids_enquiry(lead))
+    if email_status:
+        KidsEnquiry.objects.filter(pk=lead.pk).update(email_status=email_status)
+    if email_status in ("sent", "partial"):
+        return "sent"
+    return "failed" if email_status == "failed" and email_delivery_enabled() else "skipped"
+
+
+def _send_landing_heads_reminder(lead, params: dict[str, Any]) -> str:
+    from .emails import send_crm_heads_new_lead_reminder
+
+    if not getattr(settings, "CRM_NOTIFY_ALL_HANDLERS", True):
+        return "skipped"
+    source = params.get("source") or getattr(lead, "source", None) or "Landing"
+    ok = send_crm_heads_new_lead_reminder(
+        name=lead.name or "",
+        lead_source=f"Landing ({source})" if source else "Landing",
+        centre_name=lead.centre_name or lead.location or "",
+        state=lead.state or "",
+        city=lead.city or lead.location or "",
+        phone=lead.mobileno or lead.mobile or "",
+        lead_email=lead.email or "",
+        lead_kind="admission",
+    )
+    return _bool_outcome(ok)
+
+
+def _assign_and_notify(lead, params: dict[str, Any]) -> str:
+    from .emails import assign_and_notify_new_lead
+
+    if not getattr(settings, "CRM_NOTIFY_ALL_HANDLERS", True):
+        # Still auto-assign; there is just no reminder to send.
+        assign_and_notify_new_lead(lead, lead_source=params.get("lead_source") or "")
+        return "skipped"
+    return _bool_outcome(assign_and_notify_new_lead(lead, lead_source=params.get("lead_source") or ""))
+
+
+def _link_duplicate(lead, params: dict[str, Any]) -> str:
+    from .lead_dedupe import link_duplicate, load_lead
+
+    primary = None
+    if params.get("primary_model") and params.get("primary_id"):
+        primary = load_lead(params["primary_model"], params["primary_id"])
+    return "sent" if link_duplicate(lead, primary, lead_source=params.get("lead_source") or "") else "skipped"
+
+
+HANDLERS: dict[str, Callable[[Any, dict[str, Any]], str]] = {
+    LeadNotificationKind.ENQUIRY_EMAILS: _send_enquiry_emails,
+    LeadNotificationKind.FRANCHISE_EMAILS: _send_franchise_emails,
+    LeadNotificationKind.CRM_LEAD_EMAILS: _send_crm_lead_emails,
+    LeadNotificationKind.LANDING_EMAILS: _send_landing_emails,
+    LeadNotificationKind.LANDING_HEADS_REMINDER: _send_landing_heads_reminder,
+    LeadNotificationKind.ASSIGN_AND_NOTIFY: _assign_and_notify,
+    LeadNotificationKind.LINK_DUPLICATE: _link_duplicate,
+}
+
+
+def _load_lead(row: LeadNotification):
+    model = apps.get_model(row.lead_model)
+    qs = model.objects.all()
+    if any(f.name == "franchise" for f in model._meta.concrete_fields):
+        qs = qs.select_related("franchise")
+    return qs.filter(pk=row.lead_id).first()
+
+
+# --- drain -----------------------------------------------------------------
+
+
+def _claim_due(limit: int) -> list[LeadNotification]:
+    now = timezone.now()
+    stale = now - timedelta(seconds=SENDING_STALE_SECONDS)
+    with transaction.atomic():
+        ids = list(
+            LeadNotification.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=LeadNotificationStatus.PENDING, next_attempt_at__lte=now)
+                | Q(status=LeadNotificationStatus.SENDING, next_attempt_at__lt=stale)
+            )
+            .order_by("next_attempt_at")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        LeadNotification.objects.filter(pk__in=ids).update(
+            status=LeadNotificationStatus.SENDING,
+            attempts=F("attempts") + 1,
+            next_attempt_at=now,
+        )
+    return list(LeadNotification.objects.filter(pk__in=ids).order_by("next_attempt_at"))
+
+
+def apply_outcome(row: LeadNotification, outcome: str, error: str = "") -> None:
+    """Move ``row`` to its next status for a handler outcome (not saved)."""
+    now = timezone.now()
+    row.result = outcome[:32]
+    if outcome == "sent":
+        row.status = LeadNotificationStatus.SENT
+        row.sent_at = now
+        row.last_error = ""
+    elif outcome == "skipped":
+        row.status = LeadNotificationStatus.SKIPPED
+        row.last_error = error[:2000]
+    elif row.attempts >= max_attempts():
+        row.status = LeadNotificationStatus.FAILED
+        row.last_error = (error or "send failed")[:2000]
+    else:
+        row.status = LeadNotificationStatus.PENDING
+        row.next_attempt_at = now + timedelta(seconds=backoff_seconds(row.attempts))
+        row.last_error = (error or "send failed")[:2000]
+
+
+def send_one(row: LeadNotification) -> str:
+    """Run the handler for one claimed row and save its status; returns the new status."""
+    try:
+        handler = HANDLERS.get(row.kind)
+        lead = _load_lead(row) if handler else None
+        if handler is None:
+            apply_outcome(row, "skipped", f"unknown kind {row.kind!r}")
+        elif lead is None:
+            apply_outcome(row, "skipped", "lead no longer exists")
+        else:
+            try:
+                apply_outcome(row, handler(lead, row.params or {}))
+            except Exception as exc:
+                logger.exception("Lead notification %s failed for %s#%s", row.kind, row.lead_model, row.lead_id)
+                apply_outcome(row, "failed", str(exc))
+        row.save(update_fields=["status", "result", "last_error", "next_attempt_at", "sent_at"])
+        return row.status
+    finally:
+        # Worker threads open their own DB connection; don't leak it.
+        if threading.current_thread() is not threading.main_thread():
+            connection.close()
+
+
+def drain_outbox(
+    *,
+    workers: int | None = None,
+    batch_size: int | None = None,
+    max_batches: int | None = None,
+) -> dict[str, int]:
+    """Send every due row, ``workers`` messages at a time; returns counts by resulting status."""
+    workers = workers or outbox_workers()
+    batch_size = batch_size or outbox_batch_size()
+    summary: dict[str, int] = {"batches": 0, "messages": 0}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lead-notify") as pool:
+        while max_batches is None or summary["batches"] < max_batches:
+            rows = _claim_due(batch_size)
+            if not rows:
+                break
+            summary["batches"] += 1
+            summary["messages"] += len(rows)
+            for status in pool.map(send_one, rows):
+                summary[status] = summary.get(status, 0) + 1
+            if len(rows) < batch_size:
+                break
+    return summary
+
+
+def next_retry_in_seconds() -> float | None:
+    """Seconds until the earliest pending retry is due (``None`` when nothing is waiting)."""
+    due = LeadNotification.objects.filter(status=LeadNotificationStatus.PENDING).aggregate(
+        due=Min("next_attempt_at")
+    )["due"]
+    if due is None:
+        return None
+    return max(0.0, (due - timezone.now()).total_seconds())
+
+
+def _schedule_retry() -> None:
+    global _retry_timer
+    delay = next_retry_in_seconds()
+    if delay is None or delay > MAX_RETRY_TIMER_SECONDS:
+        return
+    if _retry_timer is not None:
+        _retry_timer.cancel()
+    _retry_timer = threading.Timer(delay + 1, kick_drain)
+    _retry_timer.daemon = True
+    _retry_timer.start()
+
+
+def _drain_in_background() -> None:
+    if not _drain_lock.acquire(blocking=False):
+        return
+    try:
+        close_old_connections()
+        while _drain_again.is_set():
+            _drain_again.clear()
+            try:
+                summary = drain_outbox()
+                if summary.get("messages"):
+                    logger.info("Lead notification outbox drained: %s", summary)
+            except Exception:
+                logger.exception("Lead notification outbox drain failed")
+        try:
+            _schedule_retry()
+        except Exception:
+            logger.exception("Lead notification retry scheduling failed")
+    finally:
+        connection.close()
+        _drain_lock.release()
+
+
+def kick_drain() -> None:
+    """Send due notifications soon in this process; concurrent kicks share one drainer thread."""
+    _drain_again.set()
+    if _drain_lock.locked():
+        return
+    thread = threading.Thread(target=_drain_in_background, name="lead-notify-drain", daemon=True)
+    thread.start()
+
+
+def replay_failed(*, ids: list[int] | None = None) -> int:
+    """Reset given-up rows so the next drain retries them from attempt one."""
+    qs = LeadNotification.objects.filter(status=LeadNotificationStatus.FAILED)
+    if ids:
+        qs = qs.filter(pk__in=ids)
+    return qs.update(
+        status=LeadNotificationStatus.PENDING,
+        attempts=0,
+        next_attempt_at=timezone.now(),
+        last_error="",
+    )
+
+
+def outbox_metrics() -> dict[str, Any]:
+    """Per-status row counts plus the age of the oldest pending message (seconds)."""
+    counts: dict[str, Any] = {choice: 0 for choice in LeadNotificationStatus.values}
+    for row in LeadNotification.objects.order_by().values("status").annotate(n=Count("id")):
+        counts[row["status"]] = row["n"]
+    oldest = LeadNotification.objects.filter(status=LeadNotificationStatus.PENDING).aggregate(
+        oldest=Min("created_at")
+    )["oldest"]
+    counts["oldest_pending_seconds"] = int((timezone.now() - oldest).total_seconds()) if oldest else None
+    return counts
@@ -0,0 +1,227 @@
+"""Mobile OTP issue / verify on the shared cache instead of ``otp_verification``.
+
+Each OTP lives under one cache key with a TTL (``OTP_TTL_SECONDS``), so expiry
+needs no cleanup and a send/verify burst on a paid campaign never touches the
+database. Sends are limited three ways:
+
+- a resend cooldown per phone (``OTP_RESEND_SECONDS``, the old 30-second rule);
+- a send budget per phone and one per client IP (``OTP_*_BUCKET_*``): at most
+  ``capacity`` sends per ``capacity × refill`` seconds, claimed atomically;
+- a verify attempt counter per issued code (``OTP_MAX_VERIFY_ATTEMPTS``), after
+  which the code is burned and a new OTP is required.
+
+The SMS itself goes out on a small thread pool so ``/send-otp/`` answers as
+soon as the code is stored. Every worker must see the same entries (send and
+verify usually hit different processes), so ``OTP_CACHE_ALIAS`` points at Redis
+when ``REDIS_CACHE_URL`` is set and at the database-backed ``otp`` cache
+otherwise, never at the per-process default cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import caches
+
+from common.env import int_setting
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "otp:v1"
+
+DEFAULT_TTL_SECONDS = 600
+DEFAULT_RESEND_SECONDS = 30
+DEFAULT_MAX_VERIFY_ATTEMPTS = 5
+DEFAULT_PHONE_BUCKET_CAPACITY = 5
+DEFAULT_PHONE_BUCKET_REFILL_SECONDS = 120
+DEFAULT_IP_BUCKET_CAPACITY = 20
+DEFAULT_IP_BUCKET_REFILL_SECONDS = 30
+DEFAULT_SMS_WORKERS = 4
+DEFAULT_TRUSTED_PROXY_COUNT = 1
+
+# Verify outcomes.
+OK = "ok"
+MISSING = "missing"
+MISMATCH = "mismatch"
+LOCKED = "locked"
+
+_sms_pool: ThreadPoolExecutor | None = None
+_sms_pool_lock = threading.Lock()
+
+
+def otp_cache():
+    return caches[getattr(settings, "OTP_CACHE_ALIAS", "default") or "default"]
+
+
+def ttl_seconds() -> int:
+    return max(60, int_setting("OTP_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+
+
+def resend_seconds() -> int:
+    return max(0, int_setting("OTP_RESEND_SECONDS", DEFAULT_RESEND_SECONDS))
+
+
+def max_verify_attempts() -> int:
+    return max(1, int_setting("OTP_MAX_VERIFY_ATTEMPTS", DEFAULT_MAX_VERIFY_ATTEMPTS))
+
+
+def _key(kind: str, value: str) -> str:
+    return f"{CACHE_PREFIX}:{kind}:{value}"
+
+
+def _digest(phone: str, code: str) -> str:
+    # Never keep the plain code in a shared cache.
+    return hmac.new(settings.SECRET_KEY.encode(), f"{phone}:{code}".encode(), hashlib.sha256).hexdigest()
+
+
+def client_ip(request) -> str:
+    """
+    Address the per-IP bucket keys on.
+
+    Only hops appended by our own proxies can be trusted: with
+    ``OTP_TRUSTED_PROXY_COUNT`` = N the client is the N-th ``X-Forwarded-For``
+    entry from the right (anything further left is client-supplied). With 0, or
+    fewer hops than expected, ``REMOTE_ADDR`` is used.
+    """
+    meta = getattr(request, "META", {}) or {}
+    proxies = max(0, int_setting("OTP_TRUSTED_PROXY_COUNT", DEFAULT_TRUSTED_PROXY_COUNT))
+    if proxies:
+        hops = [hop.strip() for hop in (meta.get("HTTP_X_FORWARDED_FOR") or "").split(",") if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    return (meta.get("REMOTE_ADDR") or "").strip() or "unknown"
+
+
+def take_token(bucket: str, capacity: int, refill_seconds: int) -> float:
+    """
+    Spend one send from ``bucket``; returns 0 when allowed, else seconds until the window resets.
+
+    A bucket allows ``capacity`` sends per window of ``capacity × refill_seconds``
+    that starts with its first send (the same long-run rate as a token bucket
+    refilling one token every ``refill_seconds``). Each send claims a numbered
+    slot with ``cache.add``, which is atomic on Redis and on the database cache
+    alike, so racing requests never spend the same slot; the ``next`` entry is
+    only a hint of where to start (every slot below it is taken).
+    """
+    cache = otp_cache()
+    now = time.time()
+    capacity = max(1, capacity)
+    span = capacity * max(1, refill_seconds)
+    window_key = _key("bucket", bucket)
+    start = now if cache.add(window_key, now, timeout=span) else cache.get(window_key)
+    if start is None:
+        # Expired between the two calls: open the next window.
+        cache.add(window_key, now, timeout=span)
+        start = cache.get(window_key, now)
+    window = f"{bucket}:{start:.6f}"
+    retry_after = max(1.0, start + span - now)
+    hint_key = _key("bucket-next", window)
+    for slot in range(cache.get(hint_key) or 0, capacity):
+        if cache.add(_key("bucket-slot", f"{window}:{slot}"), 1, timeout=int(retry_after) + 1):
+            cache.set(hint_key, slot + 1, timeout=int(retry_after) + 1)
+            return 0.0
+    return retry_after
+
+
+@dataclass
+class IssueResult:
+    ok: bool
+    reason: str = OK
+    retry_after: int = 0
+
+
+def issue_otp(phone: str, *, ip: str = "") -> IssueResult:
+    """Store a fresh 4-digit code for ``phone`` and queue its SMS; ``phone`` is already normalized."""
+    cache = otp_cache()
+    wait = resend_seconds()
+    cooldown_key = _key("cooldown", phone)
+    if wait and not cache.add(cooldown_key, 1, timeout=wait):
+        return IssueResult(False, "cooldown", wait)
+
+    # Phone first: a request rejected for its number should not spend the IP's budget.
+    for bucket, capacity, refill in (
+        (
+            f"phone:{phone}",
+            int_setting("OTP_PHONE_BUCKET_CAPACITY", DEFAULT_PHONE_BUCKET_CAPACITY),
+            int_setting("OTP_PHONE_BUCKET_REFILL_SECONDS", DEFAULT_PHONE_BUCKET_REFILL_SECONDS),
+        ),
+        (
+            f"ip:{ip or 'unknown'}",
+            int_setting("OTP_IP_BUCKET_CAPACITY", DEFAULT_IP_BUCKET_CAPACITY),
+            int_setting("OTP_IP_BUCKET_REFILL_SECONDS", DEFAULT_IP_BUCKET_REFILL_SECONDS),
+        ),
+    ):
+        retry_after = take_token(bucket, capacity, refill)
+        if retry_after:
+            # Nothing was sent, so the phone may retry as soon as a bucket allows it.
+            if wait:
+                cache.delete(cooldown_key)
+            return IssueResult(False, "rate_limited", max(1, int(retry_after + 0.999)))
+
+    code = f"{secrets.randbelow(10000):04d}"
+    cache.set(_key("code", phone), {"digest": _digest(phone, code)}, timeout=ttl_seconds())
+    # A new code gets a fresh set of verify attempts.
+    cache.delete(_key("tries", phone))
+    _submit_sms(phone, code)
+    return IssueResult(True)
+
+
+def _deliver_sms(phone: str, code: str) -> None:
+    from .communication_sms import send_otp_sms
+
+    try:
+        success, detail, meta = send_otp_sms(phone, code)
+    except Exception:
+        logger.exception("OTP SMS delivery crashed for %s", phone)
+        return
+    if not success:
+        logger.warning("OTP SMS not delivered to %s: %s", phone, detail)
+
+
+def _submit_sms(phone: str, code: str) -> None:
+    global _sms_pool
+    with _sms_pool_lock:
+        if _sms_pool is None:
+            workers = max(1, min(16, int_setting("OTP_SMS_WORKERS", DEFAULT_SMS_WORKERS)))
+            _sms_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="otp-sms")
+        pool = _sms_pool
+    pool.submit(_deliver_sms, phone, code)
+
+
+def verify_otp(phone: str, code: str) -> str:
+    """
+    Check ``code`` for ``phone``; returns ``OK``, ``MISSING`` (never sent or expired),
+    ``MISMATCH`` or ``LOCKED`` (too many wrong codes — request a new OTP).
+
+    A correct code stays valid until ``consume_otp`` or its TTL, because the
+    form submit re-checks it after ``/verify-otp/``.
+    """
+    cache = otp_cache()
+    entry = cache.get(_key("code", phone))
+    if not entry:
+        return MISSING
+    tries_key = _key("tries", phone)
+    limit = max_verify_attempts()
+    if (cache.get(tries_key) or 0) >= limit:
+        return LOCKED
+    if not hmac.compare_digest(entry.get("digest") or "", _digest(phone, str(code or "").strip())):
+        cache.add(tries_key, 0, timeout=ttl_seconds())
+        try:
+            tries = cache.incr(tries_key)
+        except ValueError:
+            tries = 1
+        return LOCKED if tries >= limit else MISMATCH
+    return OK
+
+
+def consume_otp(phone: str) -> None:
+    """Burn the code once the form it protected has been saved."""
+    otp_cache().delete_many([_key("code", phone), _key("tries", phone)])
@@ -4,28 +4,14 @@ from __future__ import annotations
 
 import logging
 
-from django.db.models.signals import post_save, pre_delete, pre_save
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
-from .models import CrmLead
+from .models import CrmLead, Enquiry, FranchiseEnquiry, KidsEnquiry, LeadIntakeKey
 
 logger = logging.getLogger(__name__)
 
 
-@receiver(pre_save, sender=CrmLead)
-def capture_crm_status_before_save(sender, instance: CrmLead, **kwargs) -> None:
-    """Remember previous status so CAPI only fires on real stage changes."""
-    if not instance.pk:
-        instance._meta_capi_prev_status = None  # type: ignore[attr-defined]
-        return
-    try:
-        instance._meta_capi_prev_status = sender.objects.filter(pk=instance.pk).values_list(  # type: ignore[attr-defined]
-            "status", flat=True
-        ).first()
-    except Exception:
-        instance._meta_capi_prev_status = None  # type: ignore[attr-defined]
-
-
 @receiver(post_save, sender=CrmLead)
 def send_meta_capi_on_crm_stage_change(sender, instance: CrmLead, created: bool, raw: bool = False, **kwargs) -> None:
     """Upload Conversion Leads events: Lead on Instant Form import, then every CRM stage."""
@@ -44,8 +30,9 @@ def send_meta_capi_on_crm_stage_change(sender, instance: CrmLead, created: bool,
             # New Instant Form → always send Lead so Meta can match coverage.
             schedule_crm_stage_event(instance, event_name="Lead")
             return
-        prev = getattr(instance, "_meta_capi_prev_status", None)
-        if prev is None or prev == instance.status:
+        # Loaded-value snapshot (ChangeTrackingMixin) — no SELECT before every save.
+        prev = instance.previous("status")
+        if prev is None or not instance.has_changed("status"):
             return
         schedule_crm_stage_event(instance, event_name=event_name_for_status(instance.status))
     except Exception:
@@ -67,3 +54,12 @@ def suppress_meta_lead_on_crm_delete(sender, instance: CrmLead, **kwargs) -> Non
             "Failed to suppress Meta leadgen on CRM delete id=%s",
             getattr(instance, "pk", None),
         )
+
+
+@receiver(post_delete, sender=Enquiry, dispatch_uid="enquiries_drop_intake_key_enquiry")
+@receiver(post_delete, sender=KidsEnquiry, dispatch_uid="enquiries_drop_intake_key_kidsenquiry")
+@receiver(post_delete, sender=FranchiseEnquiry, dispatch_uid="enquiries_drop_intake_key_franchiseenquiry")
+@receiver(post_delete, sender=CrmLead, dispatch_uid="enquiries_drop_intake_key_crmlead")
+def drop_lead_intake_key(sender, instance, **kwargs) -> None:
+    """A deleted lead must not stay the dedupe primary for later submits (its duplicates become primaries)."""
+    LeadIntakeKey.objects.filter(lead_model=sender._meta.label_lower, lead_id=instance.pk).delete()
@@ -1,19 +1,38 @@
+import json
+import time
+from datetime import timedelta
 from types import SimpleNamespace
+from unittest.mock import Mock, patch
 
 from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
 
 from accounts.crm_zones import filter_qs_by_zone_or_assigned
 from accounts.models import User
+from enquiries import (
+    intake_loadtest,
+    lead_dedupe,
+    meta_capi_outbox,
+    meta_metadata_cache,
+    meta_webhook_inbox,
+    notification_outbox,
+    otp_service,
+)
 from enquiries.crm_api import campaign_channel_api_key, effective_source_bucket_key, should_include_in_google_bucket
 from enquiries.emails import lead_source_label_for_crm_lead
 from enquiries.meta_leads import (
+    MetaGraphPrefetch,
     _field_map,
     _first_tracking_id,
+    claim_new_leadgen_ids,
     form_name_to_utm_token,
+    graph_batch_get,
     is_allowed_meta_form,
     meta_instant_form_utm_fields,
     parse_utm_query_string,
+    prefetch_meta_enrichment,
     strip_meta_export_prefix,
+    sync_page_leads,
 )
 from enquiries.meta_capi import (
     build_crm_event,
@@ -25,7 +44,21 @@ from enquiries.meta_capi import (
     send_crm_stage_event,
     should_upload_capi_event,
 )
-from enquiries.models import CrmLead, CrmLeadSource
+from enquiries.models import (
+    CrmLead,
+    CrmLeadSource,
+    Enquiry,
+    FranchiseEnquiry,
+    KidsEnquiry,
+    LeadIntakeKey,
+    LeadNotification,
+    LeadNotificationKind,
+    LeadNotificationStatus,
+    MetaCapiOutboxEvent,
+    MetaCapiOutboxStatus,
+    MetaLeadWebhookEvent,
+    MetaWebhookEventStatus,
+)
 
 
 class MetaInstantFormUtmTests(SimpleTestCase):
@@ -436,3 +469,755 @@ class MetaCapiPayloadTests(SimpleTestCase):
         result = send_crm_stage_event(lead)
         self.assertTrue(result.get("skipped"))
         self.assertEqual(result.get("reason"), "not_qualified_status")
+
+
+class MetaGraphBatchTests(SimpleTestCase):
+    def setUp(self):
+        cache_get = patch(
+            "enquiries.meta_metadata_cache.get_many",
+            return_value=({}, {"memory_hits": 0, "db_hits": 0, "misses": 0}),
+        )
+        cache_set = patch("enquiries.meta_metadata_cache.set_many")
+        cache_get.start()
+        cache_set.start()
+        self.addCleanup(cache_get.stop)
+        self.addCleanup(cache_set.stop)
+
+    def _fake_batch(self, calls):
+        def fake(batch, token):
+            calls.append(batch)
+            out = []
+            for item in batch:
+                path = item["relative_url"].split("?", 1)[0]
+                if path == "bad":
+                    out.append({"code": 400, "body": json.dumps({"error": {"message": "nope"}})})
+                elif path.startswith("ad"):
+                    out.append({"code": 200, "body": json.dumps({"name": f"Ad {path}", "url_tags": "utm_content=dm"})})
+                elif path.startswith("form"):
+                    out.append(
+                        {
+                            "code": 200,
+                            "body": json.dumps(
+                                {"name": f"Form {path}", "tracking_parameters": [{"key": "utm_term", "value": "t1"}]}
+                            ),
+                        }
+                    )
+                else:
+                    out.append({"code": 200, "body": json.dumps({"id": path, "form_id": "form1", "ad_id": "ad1"})})
+            return out
+
+        return fake
+
+    def test_graph_batch_get_chunks_at_fifty_and_keeps_order(self):
+        calls = []
+        requests = [(f"lead{i}", {"fields": "id"}) for i in range(120)] + [("bad", None)]
+        with patch("enquiries.meta_leads.resolve_page_access_token", return_value="tok"), patch(
+            "enquiries.meta_leads._graph_batch_post_with_token", side_effect=self._fake_batch(calls)
+        ):
+            bodies = graph_batch_get(requests)
+        self.assertEqual([len(batch) for batch in calls], [50, 50, 21])
+        self.assertEqual(bodies[0]["id"], "lead0")
+        self.assertEqual(bodies[119]["id"], "lead119")
+        self.assertIn("error", bodies[120])
+        self.assertEqual(calls[0][0]["relative_url"], "lead0?fields=id")
+
+    def test_prefetch_maps_leads_forms_and_ads_in_two_rounds(self):
+        calls = []
+        with patch("enquiries.meta_leads.resolve_page_access_token", return_value="tok"), patch(
+            "enquiries.meta_leads._graph_batch_post_with_token", side_effect=self._fake_batch(calls)
+        ):
+            prefetch = prefetch_meta_enrichment([{"leadgen_id": f"lead{i}"} for i in range(60)])
+        # 60 leads → two lead batches; one shared form + ad → one metadata batch.
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(prefetch.lead("lead59")["id"], "lead59")
+        self.assertEqual(prefetch.form_name("form1"), "Form form1")
+        self.assertEqual(prefetch.form_tracking("form1"), {"utm_term": "t1"})
+        self.assertEqual(prefetch.ad_details("ad1"), {"name": "Ad ad1", "url_tags": "utm_content=dm"})
+
+    def test_prefetch_skips_graph_when_lead_payloads_are_known(self):
+        calls = []
+        with patch("enquiries.meta_leads.resolve_page_access_token", return_value="tok"), patch(
+            "enquiries.meta_leads._graph_batch_post_with_token", side_effect=self._fake_batch(calls)
+        ):
+            prefetch = prefetch_meta_enrichment(
+                [{"leadgen_id": "lead1", "form_id": "form1", "ad_id": "ad1"}],
+                lead_payloads={"lead1": {"id": "lead1", "form_id": "form1"}},
+            )
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(calls[0]), 2)
+        self.assertEqual(prefetch.lead("lead1"), {"id": "lead1", "form_id": "form1"})
+
+
+class MetaMetadataCacheTests(SimpleTestCase):
+    def setUp(self):
+        meta_metadata_cache.clear_memory()
+        self.addCleanup(meta_metadata_cache.clear_memory)
+        model = patch("enquiries.models.MetaGraphMetadataCache.objects")
+        self.objects = model.start()
+        self.addCleanup(model.stop)
+        self.objects.filter.return_value.values_list.return_value = []
+
+    def test_memory_tier_serves_repeat_lookups_without_db(self):
+        meta_metadata_cache.set_many("form", {"f1": {"name": "BCWW TK Kerala LLK P1"}})
+        self.objects.bulk_create.assert_called_once()
+        found, counts = meta_metadata_cache.get_many("form", ["f1", "f2"])
+        self.assertEqual(found, {"f1": {"name": "BCWW TK Kerala LLK P1"}})
+        self.assertEqual(counts, {"memory_hits": 1, "db_hits": 0, "misses": 1})
+        self.assertEqual(meta_metadata_cache.hit_rate(counts), 0.5)
+
+    def test_expired_memory_entries_fall_through(self):
+        meta_metadata_cache._lru_put(("ad", "a1"), {"name": "old"}, time.time() - 1)
+        found, counts = meta_metadata_cache.get_many("ad", ["a1"])
+        self.assertEqual(found, {})
+        self.assertEqual(counts["misses"], 1)
+
+    @override_settings(META_METADATA_CACHE_MAX_ENTRIES=16)
+    def test_lru_evicts_least_recently_used(self):
+        for i in range(20):
+            meta_metadata_cache._lru_put(("ad", f"a{i}"), {}, time.time() + 60)
+        self.assertEqual(meta_metadata_cache.stats()["entries"], 16)
+        self.assertIsNone(meta_metadata_cache._lru_get(("ad", "a0"), time.time()))
+        self.assertIsNotNone(meta_metadata_cache._lru_get(("ad", "a19"), time.time()))
+
+    def test_prefetch_reports_cache_hits_and_skips_graph(self):
+        meta_metadata_cache.set_many("form", {"f1": {"name": "Form", "tracking_parameters": {}}})
+        with patch("enquiries.meta_leads.graph_batch_get") as batch:
+            prefetch = MetaGraphPrefetch()
+            prefetch.load(form_ids=["f1"])
+        batch.assert_not_called()
+        self.assertEqual(prefetch.form_name("f1"), "Form")
+        self.assertEqual(prefetch.cache_summary()["hit_rate"], 1.0)
+
+
+class MetaLeadDedupeTests(SimpleTestCase):
+    def test_claim_new_leadgen_ids_splits_claimed_and_in_progress(self):
+        with patch(
+            "enquiries.meta_leads.already_imported_ids", side_effect=[{"a"}, set()]
+        ) as imported, patch(
+            "enquiries.meta_leads.claim_leadgen_imports", return_value={"b"}
+        ) as claim:
+            claimed, in_progress = claim_new_leadgen_ids(["a", "b", "c", "b"])
+        self.assertEqual(claimed, {"b"})
+        self.assertEqual(in_progress, {"c"})
+        claim.assert_called_once_with(["b", "c"])
+        self.assertEqual(imported.call_args_list[1].args[0], ["b"])
+
+    def test_steady_state_sync_is_one_dedupe_query_per_form(self):
+        forms = {"data": [{"id": f"form{i}", "name": f"BCWW TK Form {i}"} for i in range(3)]}
+
+        def fake_graph_get(path, params=None):
+            if path.endswith("/leadgen_forms"):
+                return forms
+            form_id = path.split("/", 1)[0]
+            return {"data": [{"id": f"{form_id}-lead{j}", "form_id": form_id} for j in range(5)]}
+
+        with patch("enquiries.meta_leads.meta_page_id", return_value="page1"), patch(
+            "enquiries.meta_leads.meta_leads_sync_since", return_value=None
+        ), patch("enquiries.meta_leads.is_allowed_meta_form", return_value=True), patch(
+            "enquiries.meta_leads._graph_get", side_effect=fake_graph_get
+        ), patch(
+            "enquiries.meta_leads.already_imported_ids", side_effect=lambda ids: set(ids)
+        ) as imported, patch(
+            "enquiries.meta_leads.claim_leadgen_imports"
+        ) as claim, patch(
+            "enquiries.meta_leads.process_leadgen_event"
+        ) as process:
+            summary = sync_page_leads()
+        self.assertEqual(imported.call_count, 3)
+        claim.assert_not_called()
+        process.assert_not_called()
+        self.assertEqual(summary["skipped"], 15)
+        self.assertEqual(summary["imported"], 0)
+
+
+class MetaWebhookInboxTests(SimpleTestCase):
+    def _payload(self, *leadgen_ids):
+        return {
+            "object": "page",
+            "entry": [
+                {
+                    "changes": [{"field": "leadgen", "value": {"leadgen_id": i, "form_id": "f1"}} for i in leadgen_ids]
+                    + [{"field": "feed", "value": {"post_id": "x"}}]
+                }
+            ],
+        }
+
+    def test_enqueue_collapses_redeliveries(self):
+        values = meta_webhook_inbox.leadgen_values_from_payload(self._payload("l1", "l2", "l2", ""))
+        self.assertEqual(len(values), 4)
+        with patch("enquiries.models.MetaLeadWebhookEvent.objects") as objects:
+            objects.filter.return_value.values_list.return_value = ["l1"]
+            summary = meta_webhook_inbox.enqueue_leadgen_values(values)
+        self.assertEqual(summary, {"received": 4, "queued": 1, "duplicates": 2, "invalid": 1})
+        created = objects.bulk_create.call_args.args[0]
+        self.assertEqual([row.leadgen_id for row in created], ["l2"])
+
+    def test_apply_result_maps_statuses(self):
+        event = MetaLeadWebhookEvent(leadgen_id="l1")
+        meta_webhook_inbox.apply_result(event, {"ok": True, "crm_lead_id": 7, "leadgen_id": "l1"})
+        self.assertEqual((event.status, event.crm_lead_id), (MetaWebhookEventStatus.IMPORTED, 7))
+        meta_webhook_inbox.apply_result(event, {"ok": True, "skipped": True, "reason": "import_in_progress"})
+        self.assertEqual(event.status, MetaWebhookEventStatus.PENDING)
+        meta_webhook_inbox.apply_result(event, {"ok": False, "error": "Graph timeout"})
+        self.assertEqual((event.status, event.last_error), (MetaWebhookEventStatus.FAILED, "Graph timeout"))
+
+    def test_webhook_acks_without_importing(self):
+        from enquiries.views import MetaLeadWebhookView
+
+        request = RequestFactory().post(
+            "/api/enquiries/meta-leads/webhook/",
+            data=json.dumps(self._payload("l1")),
+            content_type="application/json",
+        )
+        with patch("enquiries.meta_leads.verify_meta_signature", return_value=True), patch(
+            "enquiries.meta_webhook_inbox.enqueue_leadgen_values",
+            return_value={"received": 1, "queued": 1, "duplicates": 0, "invalid": 0},
+        ) as enqueue, patch("enquiries.meta_leads.process_leadgen_events") as process, patch(
+            "django.db.transaction.on_commit"
+        ) as on_commit:
+            response = MetaLeadWebhookView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["queued"], 1)
+        self.assertEqual(enqueue.call_args.args[0], [{"leadgen_id": "l1", "form_id": "f1"}])
+        process.assert_not_called()
+        on_commit.assert_called_once_with(meta_webhook_inbox.kick_drain)
+
+
+@override_settings(META_CAPI_ACCESS_TOKEN="test-token", META_CAPI_OUTBOX_BACKOFF_SECONDS=30)
+class MetaCapiOutboxTests(SimpleTestCase):
+    def _rows(self, n, start=0):
+        return [
+            MetaCapiOutboxEvent(pk=start + i, event_id=f"e{start + i}", event={"event_id": f"e{start + i}"})
+            for i in range(n)
+        ]
+
+    def test_backoff_doubles_and_caps(self):
+        self.assertEqual(
+            [meta_capi_outbox.backoff_seconds(a) for a in (1, 2, 3)],
+            [30, 60, 120],
+        )
+        self.assertEqual(meta_capi_outbox.backoff_seconds(30), meta_capi_outbox.MAX_BACKOFF_SECONDS)
+
+    def test_dispatch_sends_at_most_one_thousand_events_per_request(self):
+        batches = [self._rows(1000), self._rows(1000, 1000), self._rows(500, 2000), []]
+        with patch("enquiries.meta_capi_outbox._claim_due", side_effect=batches), patch(
+            "enquiries.models.MetaCapiOutboxEvent.objects"
+        ), patch(
+            "enquiries.meta_capi.post_crm_events",
+            side_effect=lambda events, **kw: {"ok": True, "response": {"events_received": len(events)}},
+        ) as post:
+            summary = meta_capi_outbox.dispatch_outbox()
+        self.assertEqual([len(call.args[0]) for call in post.call_args_list], [1000, 1000, 500])
+        self.assertEqual(summary["sent"], 2500)
+        self.assertEqual(summary["requests"], 3)
+
+    @override_settings(META_CAPI_OUTBOX_MAX_ATTEMPTS=3)
+    def test_failed_upload_backs_off_then_gives_up(self):
+        retry, exhausted = self._rows(2)
+        retry.attempts, exhausted.attempts = 2, 3
+        with patch("enquiries.models.MetaCapiOutboxEvent.objects") as objects:
+            counts = meta_capi_outbox._mark_failed([retry, exhausted], "HTTP 500")
+        objects.bulk_update.assert_called_once()
+        self.assertEqual(counts, {"retry": 1, "failed": 1})
+        self.assertEqual(retry.status, MetaCapiOutboxStatus.PENDING)
+        self.assertEqual(exhausted.status, MetaCapiOutboxStatus.FAILED)
+        self.assertEqual(exhausted.last_error, "HTTP 500")
+
+
+@override_settings(META_CAPI_ACCESS_TOKEN="test-token")
+class MetaCapiOutboxDatabaseTests(TestCase):
+    def test_dispatch_can_be_limited_to_given_leads(self):
+        now = timezone.now()
+        for lead_id in (1, 2):
+            MetaCapiOutboxEvent.objects.create(
+                event_id=f"e{lead_id}", crm_lead_id=lead_id, event_name="Lead", event={}, next_attempt_at=now
+            )
+        with patch(
+            "enquiries.meta_capi.post_crm_events",
+            side_effect=lambda events, **kw: {"ok": True, "response": {"events_received": len(events)}},
+        ) as post:
+            summary = meta_capi_outbox.dispatch_outbox(crm_lead_ids=[2])
+        self.assertEqual(summary["sent"], 1)
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(
+            dict(MetaCapiOutboxEvent.objects.values_list("crm_lead_id", "status")),
+            {1: MetaCapiOutboxStatus.PENDING, 2: MetaCapiOutboxStatus.SENT},
+        )
+
+    @override_settings(META_CAPI_OUTBOX_AUTO_DISPATCH=False)
+    def test_kick_can_be_switched_off(self):
+        with patch("enquiries.meta_capi_outbox.threading.Thread") as thread:
+            meta_capi_outbox.kick_dispatch()
+        thread.assert_not_called()
+
+
+class LeadNotificationOutboxTests(SimpleTestCase):
+    def _row(self, attempts=1, kind=LeadNotificationKind.ENQUIRY_EMAILS):
+        return LeadNotification(
+            pk=1, kind=kind, lead_model="enquiries.enquiry", lead_id=7, attempts=attempts
+        )
+
+    def _send(self, row, handler):
+        with patch.dict(notification_outbox.HANDLERS, {row.kind: handler}), patch(
+            "enquiries.notification_outbox._load_lead", return_value=SimpleNamespace(pk=7)
+        ), patch.object(LeadNotification, "save"):
+            return notification_outbox.send_one(row)
+
+    def test_enqueue_writes_rows_and_kicks_after_commit(self):
+        lead = Enquiry(pk=7, name="Asha")
+        with patch("enquiries.models.LeadNotification.objects") as objects, patch(
+            "enquiries.notification_outbox.transaction.on_commit"
+        ) as on_commit:
+            written = notification_outbox.enqueue(
+                lead,
+                [LeadNotificationKind.ENQUIRY_EMAILS, LeadNotificationKind.ASSIGN_AND_NOTIFY],
+                params={"lead_source": "Admission"},
+            )
+        rows = objects.bulk_create.call_args.args[0]
+        self.assertEqual(written, 2)
+        self.assertEqual({(r.lead_model, r.lead_id) for r in rows}, {("enquiries.enquiry", 7)})
+        self.assertTrue(objects.bulk_create.call_args.kwargs["ignore_conflicts"])
+        on_commit.assert_called_once_with(notification_outbox.kick_drain)
+
+    @override_settings(EMAIL_SENDING_ENABLED=True, SENDGRID_API_KEY="k", LEAD_NOTIFY_OUTBOX_BACKOFF_SECONDS=60)
+    def test_failed_send_backs_off_then_gives_up(self):
+        row = self._row(attempts=2)
+        self.assertEqual(self._send(row, lambda lead, params: "failed"), LeadNotificationStatus.PENDING)
+        self.assertGreater(row.next_attempt_at, timezone.now() + timedelta(seconds=110))
+        row = self._row(attempts=notification_outbox.max_attempts())
+        self.assertEqual(self._send(row, Mock(side_effect=RuntimeError("HTTP 503"))), LeadNotificationStatus.FAILED)
+        self.assertEqual(row.last_error, "HTTP 503")
+
+    def test_success_and_disabled_delivery(self):
+        row = self._row()
+        self.assertEqual(self._send(row, lambda lead, params: "sent"), LeadNotificationStatus.SENT)
+        self.assertIsNotNone(row.sent_at)
+        with override_settings(EMAIL_SENDING_ENABLED=False):
+            with patch("enquiries.emails.send_enquiry_email", return_value=False):
+                self.assertEqual(
+                    notification_outbox._send_enquiry_emails(SimpleNamespace(), {}), "skipped"
+                )
+
+    def test_crm_lead_submit_queues_instead_of_sending(self):
+        from enquiries.views import CrmLeadCreateView
+
+        view = CrmLeadCreateView()
+        view.request = SimpleNamespace(data={"skipEmails": "true"})
+        serializer = Mock()
+        serializer.save.return_value = CrmLead(pk=3, source="web")
+        with patch("enquiries.views.transaction"), patch(
+            "enquiries.notification_outbox.enqueue"
+        ) as enqueue, patch("enquiries.emails.send_crm_lead_enquiry_emails") as send:
+            view.perform_create(serializer)
+        send.assert_not_called()
+        self.assertEqual(enqueue.call_args.args[1], [LeadNotificationKind.ASSIGN_AND_NOTIFY])
+
+
+class SendGridBatchTests(SimpleTestCase):
+    @override_settings(EMAIL_SENDING_ENABLED=True, SENDGRID_API_KEY="k")
+    def test_packs_recipients_into_private_personalizations(self):
+        from common import sendgrid_email
+
+        client = Mock()
+        client.send.return_value = SimpleNamespace(status_code=202, body="")
+        addresses = [f"parent{i}@example.com" for i in range(2300)] + ["PARENT0@example.com", "", "bad"]
+        with patch("common.sendgrid_email.sendgrid_client", return_value=client):
+            accepted = sendgrid_email.send_sendgrid_batch(to_emails=addresses, subject="Sports day")
+        self.assertEqual(accepted, 2300)
+        payloads = [call.args[0].get() for call in client.send.call_args_list]
+        self.assertEqual([len(p["personalizations"]) for p in payloads], [1000, 1000, 300])
+        self.assertTrue(all(len(pz["to"]) == 1 for p in payloads for pz in p["personalizations"]))
+
+    @override_settings(EMAIL_SENDING_ENABLED=True, SENDGRID_API_KEY="k")
+    def test_rejected_request_counts_nothing(self):
+        from common import sendgrid_email
+
+        client = Mock()
+        client.send.side_effect = [SimpleNamespace(status_code=400, body="bad"), RuntimeError("reset")]
+        with patch("common.sendgrid_email.sendgrid_client", return_value=client):
+            accepted = sendgrid_email.send_sendgrid_batch(
+                to_emails=["a@example.com", "b@example.com"], subject="x", batch_size=1
+            )
+        self.assertEqual(accepted, 0)
+        self.assertEqual(client.send.call_count, 2)
+
+
+class LeadDedupeTests(SimpleTestCase):
+    def test_key_normalizes_phone_and_family(self):
+        self.assertEqual(lead_dedupe.lead_key(KidsEnquiry(pk=1, mobileno="+91 98765-43210")), ("9876543210", "admission"))
+        self.assertEqual(lead_dedupe.lead_key(CrmLead(pk=2, mobile="09876543210")), ("9876543210", "franchise"))
+        self.assertIsNone(lead_dedupe.lead_key(Enquiry(pk=3, phone="12345")))
+
+    def test_cluster_rows_joins_within_window_of_primary(self):
+        t0 = timezone.now()
+        rows = [
+            (1, "9876543210", "admission", t0, None),
+            (2, "9876543210", "admission", t0 + timedelta(minutes=5), None),
+            (3, "9876543210", "franchise", t0 + timedelta(minutes=6), None),
+            (4, "9876543210", "admission", t0 + timedelta(hours=3), 1),
+            (5, "9876543210", "admission", t0 + timedelta(hours=3, minutes=1), None),
+        ]
+        changes = lead_dedupe.cluster_rows(rows, timedelta(hours=1))
+        self.assertEqual(changes, {2: 1, 4: None, 5: 4})
+
+    def test_duplicate_intake_only_links_assignee(self):
+        lead = Enquiry(pk=9, phone="9876543210")
+        primary = LeadIntakeKey(pk=1, lead_model="enquiries.kidsenquiry", lead_id=4)
+        match = lead_dedupe.DuplicateMatch(primary=primary, key=LeadIntakeKey(pk=2, primary=primary))
+        with patch("enquiries.lead_dedupe.register_intake", return_value=match), patch(
+            "enquiries.notification_outbox.enqueue"
+        ) as enqueue:
+            lead_dedupe.queue_intake_notifications(lead, [LeadNotificationKind.ENQUIRY_EMAILS])
+        self.assertEqual(enqueue.call_args.args[1], [LeadNotificationKind.LINK_DUPLICATE])
+        self.assertEqual(enqueue.call_args.kwargs["params"], {"primary_model": "enquiries.kidsenquiry", "primary_id": 4})
+
+    def test_copy_primary_assignee(self):
+        lead = Enquiry(pk=9)
+        with patch.object(Enquiry, "save") as save:
+            self.assertTrue(lead_dedupe.copy_primary_assignee(lead, KidsEnquiry(pk=4, assigned_user_id=7)))
+            save.assert_called_once_with(update_fields=["assigned_user"])
+            self.assertFalse(lead_dedupe.copy_primary_assignee(lead, KidsEnquiry(pk=4, assigned_user_id=8)))
+        self.assertEqual(lead.assigned_user_id, 7)
+
+
+@override_settings(LEAD_DEDUPE_WINDOW_MINUTES=60)
+class LeadDedupeDatabaseTests(TestCase):
+    def _enquiry(self, phone="9876543210"):
+        return Enquiry.objects.create(enquiry_type="ADMISSION", name="Parent", email="p@example.com", phone=phone)
+
+    def test_meta_crm_lead_duplicates_franchise_enquiry(self):
+        primary = FranchiseEnquiry.objects.create(name="Investor", email="i@example.com", phone="9876543210")
+        self.assertIsNone(lead_dedupe.register_intake(primary))
+        meta = CrmLead.objects.create(full_name="Investor", mobile="+91 98765 43210", source=CrmLeadSource.JULY_META)
+        match = lead_dedupe.register_intake(meta)
+        self.assertEqual((match.primary.lead_model, match.primary.lead_id), ("enquiries.franchiseenquiry", primary.pk))
+
+    def test_deleted_primary_is_not_matched(self):
+        first = self._enquiry()
+        lead_dedupe.register_intake(first)
+        first.delete()
+        self.assertFalse(LeadIntakeKey.objects.filter(lead_model="enquiries.enquiry", lead_id=first.pk).exists())
+        self.assertIsNone(lead_dedupe.register_intake(self._enquiry()))
+
+    def test_primary_removed_without_signals_is_skipped(self):
+        first, second = self._enquiry(), self._enquiry()
+        lead_dedupe.register_intake(first)
+        Enquiry.objects.filter(pk=first.pk)._raw_delete(Enquiry.objects.db)
+        self.assertIsNone(lead_dedupe.register_intake(second))
+        self.assertEqual(list(LeadIntakeKey.objects.values_list("lead_id", flat=True)), [second.pk])
+
+    def test_duplicate_of_unassigned_primary_is_auto_assigned(self):
+        first, second = self._enquiry(), self._enquiry()
+        with patch("enquiries.emails.assign_and_notify_new_lead", return_value=True) as assign:
+            self.assertTrue(lead_dedupe.link_duplicate(second, first, lead_source="Admission"))
+        assign.assert_called_once_with(second, lead_source="Admission")
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "otp-tests"}},
+    OTP_CACHE_ALIAS="default",
+    OTP_RESEND_SECONDS=0,
+)
+class OtpServiceTests(SimpleTestCase):
+    def setUp(self):
+        otp_service.otp_cache().clear()
+        patcher = patch("enquiries.otp_service._submit_sms")
+        self.sms = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _issue(self, phone="9876543210", ip="1.2.3.4"):
+        result = otp_service.issue_otp(phone, ip=ip)
+        code = self.sms.call_args.args[1] if result.ok else None
+        return result, code
+
+    def test_issue_queues_sms_and_code_verifies_until_consumed(self):
+        result, code = self._issue()
+        self.assertTrue(result.ok)
+        self.sms.assert_called_once_with("9876543210", code)
+        self.assertEqual(otp_service.verify_otp("9876543210", code), otp_service.OK)
+        # The form submit re-checks the same code, then burns it.
+        self.assertEqual(otp_service.verify_otp("9876543210", code), otp_service.OK)
+        otp_service.consume_otp("9876543210")
+        self.assertEqual(otp_service.verify_otp("9876543210", code), otp_service.MISSING)
+
+    @override_settings(OTP_MAX_VERIFY_ATTEMPTS=3)
+    def test_wrong_codes_lock_the_otp(self):
+        _result, code = self._issue()
+        wrong = f"{(int(code) + 1) % 10000:04d}"
+        outcomes = [otp_service.verify_otp("9876543210", wrong) for _ in range(3)]
+        self.assertEqual(outcomes, [otp_service.MISMATCH, otp_service.MISMATCH, otp_service.LOCKED])
+        self.assertEqual(otp_service.verify_otp("9876543210", code), otp_service.LOCKED)
+        _result, fresh = self._issue()
+        self.assertEqual(otp_service.verify_otp("9876543210", fresh), otp_service.OK)
+
+    @override_settings(OTP_PHONE_BUCKET_CAPACITY=2, OTP_IP_BUCKET_CAPACITY=3, OTP_IP_BUCKET_REFILL_SECONDS=60)
+    def test_phone_and_ip_buckets(self):
+        self.assertTrue(self._issue()[0].ok)
+        self.assertTrue(self._issue()[0].ok)
+        limited = self._issue()[0]
+        self.assertEqual((limited.ok, limited.reason), (False, "rate_limited"))
+        self.assertTrue(self._issue(phone="9876500000")[0].ok)
+        limited = self._issue(phone="9876511111")[0]
+        self.assertEqual(limited.reason, "rate_limited")
+        self.assertGreater(limited.retry_after, 0)
+        self.assertTrue(self._issue(phone="9876511111", ip="5.6.7.8")[0].ok)
+
+    @override_settings(OTP_RESEND_SECONDS=30)
+    def test_resend_cooldown(self):
+        self.assertTrue(self._issue()[0].ok)
+        self.assertEqual(self._issue()[0].reason, "cooldown")
+
+    @override_settings(OTP_RESEND_SECONDS=30, OTP_IP_BUCKET_CAPACITY=1)
+    def test_rate_limited_send_does_not_start_the_cooldown(self):
+        self.assertTrue(self._issue(phone="9876500000")[0].ok)
+        self.assertEqual(self._issue()[0].reason, "rate_limited")
+        self.assertTrue(self._issue(ip="5.6.7.8")[0].ok)
+
+    def test_racing_sends_never_overspend_a_bucket(self):
+        import threading
+
+        start = threading.Barrier(12)
+        outcomes = []
+
+        def send():
+            start.wait()
+            outcomes.append(otp_service.take_token("ip:race", 5, 60))
+
+        threads = [threading.Thread(target=send) for _ in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(outcomes.count(0.0), 5)
+        self.assertTrue(all(wait > 0 for wait in outcomes if wait))
+
+    def _request(self, remote="10.0.0.9", forwarded=""):
+        request = RequestFactory().post("/send-otp/", REMOTE_ADDR=remote)
+        if forwarded:
+            request.META["HTTP_X_FORWARDED_FOR"] = forwarded
+        return request
+
+    @override_settings(OTP_TRUSTED_PROXY_COUNT=1)
+    def test_client_ip_ignores_client_supplied_forwarded_hops(self):
+        self.assertEqual(otp_service.client_ip(self._request(forwarded="6.6.6.6, 203.0.113.7")), "203.0.113.7")
+        self.assertEqual(otp_service.client_ip(self._request()), "10.0.0.9")
+
+    @override_settings(OTP_TRUSTED_PROXY_COUNT=0)
+    def test_client_ip_without_proxy_uses_remote_addr(self):
+        self.assertEqual(otp_service.client_ip(self._request(forwarded="6.6.6.6")), "10.0.0.9")
+
+
+@override_settings(
+    CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "otp-db-tests"},
+        "otp": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "otp_cache"},
+    },
+    OTP_CACHE_ALIAS="otp",
+    OTP_RESEND_SECONDS=0,
+)
+class OtpDatabaseCacheTests(TestCase):
+    """Without Redis the OTP state lives in the shared ``otp_cache`` table, not per-process memory."""
+
+    def test_code_is_stored_in_the_shared_table(self):
+        from django.db import connection
+
+        with patch("enquiries.otp_service._submit_sms") as sms:
+            self.assertTrue(otp_service.issue_otp("9876543210", ip="1.2.3.4").ok)
+        code = sms.call_args.args[1]
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT cache_key FROM otp_cache")
+            keys = {row[0] for row in cursor.fetchall()}
+        self.assertIn(":1:otp:v1:code:9876543210", keys)
+        self.assertEqual(otp_service.verify_otp("9876543210", code), otp_service.OK)
+        self.assertEqual(otp_service.verify_otp("9876543210", "xxxx"), otp_service.MISMATCH)
+
+    def test_bucket_slots_are_claimed_in_the_shared_table(self):
+        self.assertEqual([otp_service.take_token("phone:1", 2, 60) > 0 for _ in range(3)], [False, False, True])
+
+    def test_migration_creates_the_table(self):
+        from importlib import import_module
+
+        from django.apps import apps
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE otp_cache")
+        migration = import_module("enquiries.migrations.0038_otp_cache_table")
+        migration.create_otp_cache_table(apps, SimpleNamespace(connection=connection))
+        # Re-running is a no-op once the table exists.
+        migration.create_otp_cache_table(apps, SimpleNamespace(connection=connection))
+        self.assertIn("otp_cache", connection.introspection.table_names())
+
+
+class ChangeTrackingMixinTests(SimpleTestCase):
+    def _loaded_lead(self, **overrides):
+        values = {f.attname: f.get_default() for f in CrmLead._meta.concrete_fields}
+        values.update({"id": 5, "status": "untouched", "raw_payload": {"meta_leadgen_id": "123"}}, **overrides)
+        names = [f.attname for f in CrmLead._meta.concrete_fields]
+        return CrmLead.from_db("default", names, [values[n] for n in names])
+
+    def test_tracks_changes_against_loaded_values(self):
+        lead = self._loaded_lead(assigned_user_id=3)
+        self.assertEqual(lead.changed_fields(), set())
+        lead.status = "hot"
+        lead.assigned_user_id = 4
+        lead.raw_payload["crm_last_assigner_id"] = 9
+        lead.full_name = "Ravi"
+        self.assertEqual(lead.changed_fields(), {"status", "assigned_user_id"})
+        self.assertEqual(lead.previous("status"), "untouched")
+        self.assertEqual(lead.previous("assigned_user"), 3)
+        self.assertTrue(lead.has_changed("assigned_user"))
+
+    def test_only_tracked_fields_are_snapshotted(self):
+        lead = self._loaded_lead()
+        self.assertEqual(set(lead._loaded_values), {"status", "assigned_user_id"})
+        self.assertIsNone(lead.previous("raw_payload"))
+        self.assertFalse(lead.has_changed("full_name"))
+
+    def test_snapshot_rolls_forward_after_save(self):
+        lead = self._loaded_lead()
+        lead.status = "hot"
+        lead.assigned_user_id = 4
+        with patch("django.db.models.Model.save"):
+            lead.save(update_fields=["status"])
+        self.assertEqual(lead.changed_fields(), {"assigned_user_id"})
+        self.assertEqual(lead.previous("status"), "hot")
+
+    def test_unsaved_instances_report_no_previous_value(self):
+        lead = CrmLead(status="hot")
+        self.assertIsNone(lead.previous("status"))
+        self.assertEqual(lead.changed_fields(), set())
+
+    def test_capi_signal_uses_snapshot_instead_of_select(self):
+        from enquiries.signals import send_meta_capi_on_crm_stage_change
+
+        lead = self._loaded_lead()
+        with patch("enquiries.meta_capi.schedule_crm_stage_event") as schedule:
+            send_meta_capi_on_crm_stage_change(CrmLead, lead, created=False)
+            schedule.assert_not_called()
+            lead.status = "follow_up"
+            send_meta_capi_on_crm_stage_change(CrmLead, lead, created=False)
+        schedule.assert_called_once_with(lead, event_name="Follow-up")
+
+
+@override_settings(META_LEADS_AUTO_SYNC_MIN_SECONDS=60, META_LEADS_AUTO_SYNC_MAX_SECONDS=1800)
+class MetaLeadsSchedulerTests(SimpleTestCase):
+    def test_interval_adapts_to_backlog_errors_and_idle(self):
+        from enquiries.meta_leads_autosync import next_interval
+
+        args = {"base": 300, "imported": 0, "failed": 0, "backlog": 0, "errored": False}
+        self.assertEqual(next_interval(300, **{**args, "imported": 4}), 150)
+        self.assertEqual(next_interval(300, **{**args, "backlog": 12}), 150)
+        self.assertEqual(next_interval(90, **{**args, "imported": 1}), 60)
+        self.assertEqual(next_interval(300, **{**args, "errored": True}), 600)
+        self.assertEqual(next_interval(300, **{**args, "imported": 1, "failed": 3}), 600)
+        self.assertEqual(next_interval(300, **args), 450)
+        self.assertEqual(next_interval(1500, **args), 1800)
+
+    @override_settings(META_LEADS_AUTO_SYNC_MAX_SECONDS=0)
+    def test_interval_never_exceeds_the_base_without_a_cap(self):
+        from enquiries.meta_leads_autosync import next_interval
+
+        args = {"base": 300, "imported": 0, "failed": 0, "backlog": 0, "errored": False}
+        self.assertEqual(next_interval(300, **{**args, "errored": True}), 300)
+        self.assertEqual(next_interval(300, **args), 300)
+        self.assertEqual(next_interval(300, **{**args, "imported": 2}), 150)
+
+    def test_lease_is_not_taken_while_another_holder_is_live(self):
+        from enquiries.meta_leads_autosync import acquire_lease
+
+        with patch("enquiries.models.SchedulerLease.objects") as objects:
+            objects.filter.return_value.filter.return_value.update.return_value = 0
+            objects.filter.return_value.exists.return_value = True
+            self.assertFalse(acquire_lease("meta_leads_autosync", "web-2:41", 900))
+            objects.create.assert_not_called()
+
+            objects.filter.return_value.filter.return_value.update.return_value = 1
+            self.assertTrue(acquire_lease("meta_leads_autosync", "web-2:41", 900))
+
+
+class MetaGraphStandinTests(SimpleTestCase):
+    def setUp(self):
+        from enquiries.meta_graph_standin import StandinData, StandinServer
+
+        self.server = StandinServer(StandinData(forms=2, leads_per_form=3)).start()
+        self.addCleanup(self.server.stop)
+        token = patch("enquiries.meta_leads._resolved_page_token", "standin-token")
+        token.start()
+        self.addCleanup(token.stop)
+
+    def test_serves_forms_leads_and_batches(self):
+        from enquiries.meta_graph_standin import STANDIN_PAGE_ID
+        from enquiries.meta_leads import _graph_get
+
+        with override_settings(META_GRAPH_BASE_URL=self.server.base_url):
+            forms = _graph_get(f"{STANDIN_PAGE_ID}/leadgen_forms", {"fields": "id,name", "limit": "1"})
+            self.assertEqual(len(forms["data"]), 1)
+            self.assertEqual(forms["paging"]["cursors"]["after"], "1")
+            form_id = forms["data"][0]["id"]
+            leads = _graph_get(f"{form_id}/leads", {"limit": "50"})["data"]
+            bodies = graph_batch_get([(lead["id"], None) for lead in leads] + [("404404", None)])
+        self.assertEqual([b["id"] for b in bodies[:3]], [lead["id"] for lead in leads])
+        self.assertIn("error", bodies[3])
+        stats = self.server.snapshot()
+        self.assertEqual(stats["batch"], 1)
+        self.assertEqual(stats["batch_items"], 4)
+
+    def test_error_injection_and_capi_endpoint(self):
+        from enquiries.meta_capi import post_crm_events
+
+        with override_settings(META_GRAPH_BASE_URL=self.server.base_url, META_CAPI_ACCESS_TOKEN="t"):
+            sent = post_crm_events([{"event_id": "a"}, {"event_id": "b"}])
+            self.server.error_rate = 1.0
+            bodies = graph_batch_get([("anything", None)])
+        self.assertEqual(sent["response"]["events_received"], 2)
+        self.assertEqual(self.server.snapshot()["capi_events"], 2)
+        self.assertIn("error", bodies[0])
+
+
+class IntakeLoadtestReportTests(SimpleTestCase):
+    def test_percentiles_and_summary(self):
+        self.assertIsNone(intake_loadtest.percentile([], 50))
+        values = [float(v) for v in range(1, 101)]
+        self.assertEqual(intake_loadtest.percentile(values, 50), 50.0)
+        self.assertEqual(intake_loadtest.percentile(values, 99), 99.0)
+        self.assertEqual(intake_loadtest.percentile(values, 100), 100.0)
+
+        samples = [
+            intake_loadtest.Sample("submit", 201, 0.010),
+            intake_loadtest.Sample("submit", 201, 0.030),
+            intake_loadtest.Sample("submit", 400, 0.020, "bad phone"),
+            intake_loadtest.Sample("submit", 0, 0.040, "timed out"),
+        ]
+        row = intake_loadtest.summarize(samples, 2.0, [10, 12, 12, 14])
+        self.assertEqual((row["ok"], row["errors"], row["error_rate"]), (2, 2, 0.5))
+        self.assertEqual(row["statuses"], {"201": 2, "400": 1, "0": 1})
+        self.assertEqual(row["throughput_rps"], 2.0)
+        self.assertEqual(row["latency_ms"]["p50"], 20.0)
+        self.assertEqual(row["latency_ms"]["max"], 40.0)
+        self.assertEqual(row["db_queries_per_request"], {"mean": 12.0, "p95": 14.0, "max": 14})
+        self.assertEqual(row["sample_errors"], ["bad phone", "timed out"])
+
+    def test_payloads_use_unique_valid_phones(self):
+        phones = intake_loadtest.PhoneSequence(run_tag=42)
+        first, second = phones.next(), phones.next()
+        self.assertEqual((first, second), ("9420000001", "9420000002"))
+        kind, body = intake_loadtest.build_payload("landing-submit", first, 0)
+        self.assertEqual((kind, body["telephone"]), ("form", first))
+        kind, body = intake_loadtest.build_payload("crm-leads", second, 1)
+        self.assertEqual((kind, body["mobile"]), ("json", second))
+        with self.assertRaises(ValueError):
+            intake_loadtest.build_payload("verify-otp", first, 0)
+
+
+class IntakeLoadtestCleanupTests(TestCase):
+    def test_cleanup_spares_real_leads_sharing_a_phone(self):
+        from enquiries.management.commands.loadtest_intake import _cleanup
+
+        phone = "9420000001"
+        Enquiry.objects.create(
+            enquiry_type="ADMISSION", name="Loadtest Parent 0", email=intake_loadtest.loadtest_email(phone), phone=phone
+        )
+        real = Enquiry.objects.create(enquiry_type="ADMISSION", name="Parent", email="parent@example.com", phone=phone)
+        self.assertEqual(_cleanup([phone]), {"enquiries.enquiry": 1})
+        self.assertEqual(list(Enquiry.objects.values_list("pk", flat=True)), [real.pk])
@@ -17,6 +17,7 @@ from .views import (
     AdminCrmStatesView,
     AdminCrmUsersView,
     AdminEnquiryListView,
+    AdminMetaLeadsSyncRunsView,
     CrmLeadCreateView,
     CrmLeadMeetingPreferenceView,
     MetaLeadWebhookView,
@@ -42,6 +43,7 @@ urlpatterns = [
     path("meta-leads/webhook", MetaLeadWebhookView.as_view()),
     path("meta-leads/sync/", MetaLeadSyncView.as_view(), name="meta-lead-sync"),
     path("meta-leads/sync", MetaLeadSyncView.as_view()),
+    path("admin/meta-leads/sync-runs/", AdminMetaLeadsSyncRunsView.as_view(), name="admin-meta-leads-sync-runs"),
 
     path("admin/crm-leads/", AdminCrmLeadListView.as_view(), name="admin-crm-leads"),
     path("admin/crm-leads/reports/", AdminCrmReportsView.as_view(), name="admin-crm-leads-reports"),
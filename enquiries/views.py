@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.db.models import Q
 from django.utils.decorators import method_decorator
 from django.views import View
@@ -12,7 +13,8 @@ from .permissions import can_view_crm_leads, can_view_landing_leads
 from accounts.profile_access import franchise_profile_for_user
 
 from .landing_submit import handle_landing_enquiry_post
-from .models import CrmLead, Enquiry, EnquiryType, FranchiseEnquiry, KidsEnquiry, OTPVerification
+from . import otp_service
+from .models import CrmLead, Enquiry, EnquiryType, FranchiseEnquiry, KidsEnquiry
 from .serializers import (
     CrmLeadSerializer,
     EnquirySerializer,
@@ -22,7 +24,6 @@ from .serializers import (
     KidsEnquirySerializer,
 )
 
-import random
 import re
 from datetime import timedelta
 
@@ -32,7 +33,7 @@ from django.shortcuts import get_object_or_404
 from django.utils.dateparse import parse_datetime
 from django.utils import timezone
 
-from .communication_sms import send_otp_sms
+from .communication_sms import sms_api_key
 
 
 def _is_campaign_readonly_user(request) -> bool:
@@ -51,6 +52,19 @@ def _normalize_otp_phone(raw: str) -> str:
     return digits
 
 
+_OTP_SUBMIT_ERRORS = {
+    otp_service.MISSING: "OTP expired or not verified. Please request a new OTP.",
+    otp_service.MISMATCH: "Invalid OTP. Please check the code and try again.",
+    otp_service.LOCKED: "Too many incorrect OTP attempts. Please request a new OTP.",
+}
+
+
+def _otp_submit_error(phone: str, code: str) -> str | None:
+    """Message to show when a form's OTP does not check out; ``None`` when it does."""
+    outcome = otp_service.verify_otp(phone, code)
+    return None if outcome == otp_service.OK else _OTP_SUBMIT_ERRORS[outcome]
+
+
 def _slugify_city(value: str) -> str:
     return (
         value.strip()
@@ -270,36 +284,21 @@ class EnquiryCreateView(generics.CreateAPIView):
         return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        enquiry: Enquiry = serializer.save()
-        self._send_notifications(enquiry)
+        with transaction.atomic():
+            enquiry: Enquiry = serializer.save()
+            self._send_notifications(enquiry)
 
     def _send_notifications(self, enquiry: Enquiry) -> None:
-        import logging
-        import traceback
-
-        logger = logging.getLogger(__name__)
-
-        try:
-            from .emails import (
-                lead_source_label_for_enquiry,
-                assign_and_notify_new_lead,
-                send_enquiry_email,
-            )
-
-            email_sent = send_enquiry_email(enquiry)
-
-            if email_sent:
-                logger.info(f"Email notification sent for enquiry from {enquiry.name}")
-            else:
-                logger.warning(f"Failed to send email notification for enquiry from {enquiry.name}")
-
-            assign_and_notify_new_lead(
-                enquiry,
-                lead_source=lead_source_label_for_enquiry(enquiry),
-            )
-        except Exception as e:
-            logger.error(f"Error sending enquiry email notification: {str(e)}")
-            logger.error(traceback.format_exc())
+        """Queue parent/team emails + auto-assign; sent by the notification outbox after commit."""
+        from .emails import lead_source_label_for_enquiry
+        from .lead_dedupe import queue_intake_notifications
+        from .models import LeadNotificationKind
+
+        queue_intake_notifications(
+            enquiry,
+            [LeadNotificationKind.ENQUIRY_EMAILS, LeadNotificationKind.ASSIGN_AND_NOTIFY],
+            params={"lead_source": lead_source_label_for_enquiry(enquiry)},
+        )
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -324,22 +323,9 @@ class FranchiseEnquiryCreateView(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        otp_record = OTPVerification.objects.filter(phone=phone_norm).first()
-        if not otp_record:
-            return Response(
-                {"error": "Please verify your mobile number with OTP first."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if otp_record.created_at and (timezone.now() - otp_record.created_at) > timedelta(minutes=10):
-            return Response(
-                {"error": "OTP expired. Please request a new OTP."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        if otp_record.code != otp_code:
-            return Response(
-                {"error": "Invalid OTP. Please check the code and try again."},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        otp_error = _otp_submit_error(phone_norm, otp_code)
+        if otp_error:
+            return Response({"error": otp_error}, status=status.HTTP_400_BAD_REQUEST)
 
         if FranchiseEnquiry.objects.filter(phone=phone_norm).exists():
             return Response(
@@ -354,34 +340,24 @@ class FranchiseEnquiryCreateView(generics.CreateAPIView):
 
         response = super().create(request, *args, **kwargs)
         if response.status_code in (200, 201):
-            otp_record.is_verified = True
-            otp_record.save(update_fields=["is_verified"])
+            otp_service.consume_otp(phone_norm)
         return response
 
     def perform_create(self, serializer):
-        lead: FranchiseEnquiry = serializer.save()
-        self._send_notifications(lead)
+        with transaction.atomic():
+            lead: FranchiseEnquiry = serializer.save()
+            self._send_notifications(lead)
 
     def _send_notifications(self, lead: FranchiseEnquiry) -> None:
-        import logging
-        import traceback
-
-        logger = logging.getLogger(__name__)
-
-        try:
-            from .emails import assign_and_notify_new_lead, send_franchise_enquiry_email
-
-            email_sent = send_franchise_enquiry_email(lead)
-
-            if email_sent:
-                logger.info(f"Email notification sent for franchise lead from {lead.name}")
-            else:
-                logger.warning(f"Failed to send email notification for franchise lead from {lead.name}")
-
-            assign_and_notify_new_lead(lead, lead_source="Franchise")
-        except Exception as e:
-            logger.error(f"Error sending franchise enquiry email notification: {str(e)}")
-            logger.error(traceback.format_exc())
+        """Queue franchise ack/team emails + auto-assign for the notification outbox."""
+        from .lead_dedupe import queue_intake_notifications
+        from .models import LeadNotificationKind
+
+        queue_intake_notifications(
+            lead,
+            [LeadNotificationKind.FRANCHISE_EMAILS, LeadNotificationKind.ASSIGN_AND_NOTIFY],
+            params={"lead_source": "Franchise"},
+        )
 
 
 class AdminEnquiryListView(APIView):
@@ -529,32 +505,17 @@ class CrmLeadCreateView(generics.CreateAPIView):
                     {"detail": "Enter a valid 10-digit Indian mobile number."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            otp_record = OTPVerification.objects.filter(phone=phone).first()
-            if not otp_record:
-                return Response(
-                    {"detail": "Please verify your mobile number with OTP first."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if otp_record.created_at and (timezone.now() - otp_record.created_at) > timedelta(minutes=10):
-                return Response(
-                    {"detail": "OTP expired. Please request a new OTP."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            if otp_record.code != otp_code:
-                return Response(
-                    {"detail": "Invalid OTP. Please check the code and try again."},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            otp_error = _otp_submit_error(phone, otp_code)
+            if otp_error:
+                return Response({"detail": otp_error}, status=status.HTTP_400_BAD_REQUEST)
             response = super().create(request, *args, **kwargs)
             if response.status_code in (200, 201):
-                otp_record.is_verified = True
-                otp_record.save(update_fields=["is_verified"])
+                otp_service.consume_otp(phone)
             return response
 
         return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        lead = serializer.save()
         # Demo / preview LPs can pass skipEmails=true so no acknowledgement or team mail goes out.
         # Auto-assign still runs so CRM shows "Assigned to …" even on demo submits.
         raw_skip = self.request.data.get("skipEmails")
@@ -562,42 +523,20 @@ class CrmLeadCreateView(generics.CreateAPIView):
             raw_skip = self.request.data.get("skip_emails")
         skip_emails = str(raw_skip or "").strip().lower() in ("1", "true", "yes", "y")
 
-        from .emails import (
-            lead_source_label_for_crm_lead,
-            assign_and_notify_new_lead,
-            send_crm_lead_enquiry_emails,
-        )
-
-        import logging
-
-        log = logging.getLogger(__name__)
-        try:
-            if skip_emails:
-                # Assign only — no parent/team mail.
-                assign_and_notify_new_lead(
-                    lead,
-                    lead_source=lead_source_label_for_crm_lead(lead),
-                )
-            else:
-                try:
-                    send_crm_lead_enquiry_emails(lead)
-                except Exception:
-                    log.exception(
-                        "CRM parent/team emails failed for CrmLead id=%s",
-                        getattr(lead, "pk", None),
-                    )
-                try:
-                    assign_and_notify_new_lead(
-                        lead,
-                        lead_source=lead_source_label_for_crm_lead(lead),
-                    )
-                except Exception:
-                    log.exception(
-                        "CRM auto-assign/notify failed for CrmLead id=%s",
-                        getattr(lead, "pk", None),
-                    )
-        except Exception:
-            log.exception("CRM post-create hooks failed for CrmLead id=%s", getattr(lead, "pk", None))
+        from .emails import lead_source_label_for_crm_lead
+        from .lead_dedupe import queue_intake_notifications
+        from .models import LeadNotificationKind
+
+        kinds = [LeadNotificationKind.ASSIGN_AND_NOTIFY]
+        if not skip_emails:
+            kinds.insert(0, LeadNotificationKind.CRM_LEAD_EMAILS)
+        with transaction.atomic():
+            lead = serializer.save()
+            # Sent after commit by the notification outbox, never on the request thread;
+            # a repeat of a recent lead only inherits its assignee.
+            queue_intake_notifications(
+                lead, kinds, params={"lead_source": lead_source_label_for_crm_lead(lead)}
+            )
 
 
 @method_decorator(csrf_exempt, name="dispatch")
@@ -1147,42 +1086,35 @@ class SendOTPView(APIView):
                 status=400,
             )
 
-        existing = OTPVerification.objects.filter(phone=phone).first()
-        if existing and existing.created_at and (timezone.now() - existing.created_at) < timedelta(seconds=30):
-            return JsonResponse(
-                {"success": False, "detail": "Please wait 30 seconds before requesting another OTP."},
-                status=429,
-            )
-
-        # 4-digit OTP — sent only via real SMS to the number entered on the form.
-        code = f"{random.randint(0, 9999):04d}"
-        OTPVerification.objects.update_or_create(
-            phone=phone,
-            defaults={"code": code, "is_verified": False},
-        )
-
-        success, detail, sms_meta = send_otp_sms(phone, code)
-        message_id = (sms_meta or {}).get("message_id")
-        sent_to = (sms_meta or {}).get("mobile") or phone
         masked = f"+91 ******{phone[-4:]}"
-
-        if not success:
+        if not sms_api_key():
             return JsonResponse(
                 {
                     "success": False,
                     "detail": f"Failed to send OTP to {masked}. Please try again.",
-                    "error": detail,
-                    "sent_to": sent_to,
+                    "error": "SMS API key is not configured.",
+                    "sent_to": phone,
                 },
                 status=502,
             )
 
+        # Code goes to the shared cache; the SMS is sent on a worker thread.
+        result = otp_service.issue_otp(phone, ip=otp_service.client_ip(request))
+        if not result.ok:
+            if result.reason == "cooldown":
+                detail = f"Please wait {result.retry_after} seconds before requesting another OTP."
+            else:
+                detail = f"Too many OTP requests. Please try again in {result.retry_after} seconds."
+            response = JsonResponse({"success": False, "detail": detail}, status=429)
+            response["Retry-After"] = str(result.retry_after)
+            return response
+
         return JsonResponse(
             {
                 "success": True,
                 "detail": f"OTP sent to {masked}.",
-                "sent_to": sent_to,
-                "message_id": message_id,
+                "sent_to": phone,
+                "queued": True,
             }
         )
 
@@ -1196,18 +1128,17 @@ class VerifyOTPView(APIView):
         if not phone or not code:
             return JsonResponse({"valid": False, "detail": "Phone and OTP are required."}, status=400)
 
-        otp_record = OTPVerification.objects.filter(phone=phone).first()
-        if not otp_record:
-            return JsonResponse({"valid": False, "detail": "OTP not found. Please request a new OTP."}, status=400)
-
-        if otp_record.created_at and (timezone.now() - otp_record.created_at) > timedelta(minutes=10):
-            return JsonResponse({"valid": False, "detail": "OTP expired. Please request a new OTP."}, status=400)
-
-        if otp_record.code != code:
+        outcome = otp_service.verify_otp(phone, code)
+        if outcome == otp_service.MISSING:
+            return JsonResponse(
+                {"valid": False, "detail": "OTP expired or not found. Please request a new OTP."}, status=400
+            )
+        if outcome == otp_service.LOCKED:
+            return JsonResponse(
+                {"valid": False, "detail": "Too many incorrect attempts. Please request a new OTP."}, status=429
+            )
+        if outcome != otp_service.OK:
             return JsonResponse({"valid": False, "detail": "Invalid OTP code."}, status=400)
-
-        otp_record.is_verified = True
-        otp_record.save(update_fields=["is_verified"])
         return JsonResponse({"valid": True, "detail": "OTP verified successfully."})
 
 class LeadNoteListCreateView(APIView):
@@ -1323,7 +1254,8 @@ class MetaLeadWebhookView(APIView):
         return Response({"detail": "Webhook verification failed."}, status=status.HTTP_403_FORBIDDEN)
 
     def post(self, request):
-        from .meta_leads import process_leadgen_event, verify_meta_signature
+        from .meta_leads import verify_meta_signature
+        from .meta_webhook_inbox import enqueue_leadgen_values, kick_drain, leadgen_values_from_payload
 
         raw_body = request.body or b""
         signature = request.META.get("HTTP_X_HUB_SIGNATURE_256") or request.headers.get("X-Hub-Signature-256")
@@ -1334,30 +1266,77 @@ class MetaLeadWebhookView(APIView):
         if payload.get("object") != "page":
             return Response({"ok": True, "ignored": True})
 
-        results = []
-        for entry in payload.get("entry") or []:
-            for change in entry.get("changes") or []:
-                if change.get("field") != "leadgen":
-                    continue
-                value = change.get("value") or {}
-                try:
-                    results.append(process_leadgen_event(value))
-                except Exception as exc:
-                    import logging
-
-                    logging.getLogger(__name__).exception(
-                        "Meta leadgen processing failed for %s", value.get("leadgen_id")
-                    )
-                    results.append(
-                        {
-                            "ok": False,
-                            "leadgen_id": value.get("leadgen_id"),
-                            "error": str(exc),
-                        }
-                    )
+        # Store and acknowledge; Graph fetches + CRM writes happen off the request.
+        summary = enqueue_leadgen_values(leadgen_values_from_payload(payload))
+        if summary["queued"]:
+            from django.db import transaction
+
+            transaction.on_commit(kick_drain)
+        return Response({"ok": True, **summary})
 
-        # Always 200 so Meta does not retry endlessly on partial failures we already logged.
-        return Response({"ok": True, "results": results})
+
+class AdminMetaLeadsSyncRunsView(APIView):
+    """Auto-sync scheduler status: current lease holder, recent runs and 24h totals."""
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from django.db.models import Avg, Count, Sum
+
+        from .meta_leads_autosync import LEASE_NAME
+        from .meta_webhook_inbox import inbox_counts
+        from .models import MetaLeadsSyncRun, SchedulerLease
+
+        try:
+            limit = max(1, min(200, int(request.query_params.get("limit") or 50)))
+        except (TypeError, ValueError):
+            limit = 50
+        lease = SchedulerLease.objects.filter(name=LEASE_NAME).first()
+        runs = MetaLeadsSyncRun.objects.order_by("-started_at")[:limit]
+        since = timezone.now() - timedelta(hours=24)
+        totals = MetaLeadsSyncRun.objects.filter(started_at__gte=since).aggregate(
+            runs=Count("id"),
+            imported=Sum("imported"),
+            failed=Sum("failed"),
+            avg_duration_ms=Avg("duration_ms"),
+        )
+        return Response(
+            {
+                "lease": {
+                    "holder": lease.holder,
+                    "acquiredAt": lease.acquired_at,
+                    "expiresAt": lease.expires_at,
+                    "active": lease.expires_at > timezone.now(),
+                }
+                if lease
+                else None,
+                "last24h": {
+                    "runs": totals["runs"] or 0,
+                    "imported": totals["imported"] or 0,
+                    "failed": totals["failed"] or 0,
+                    "avgDurationMs": int(totals["avg_duration_ms"] or 0),
+                },
+                "inbox": inbox_counts(),
+                "runs": [
+                    {
+                        "id": run.pk,
+                        "startedAt": run.started_at,
+                        "finishedAt": run.finished_at,
+                        "durationMs": run.duration_ms,
+                        "holder": run.holder,
+                        "forms": run.forms,
+                        "imported": run.imported,
+                        "skipped": run.skipped,
+                        "failed": run.failed,
+                        "inboxEvents": run.inbox_events,
+                        "capiSent": run.capi_sent,
+                        "error": run.error,
+                        "nextIntervalSeconds": run.next_interval_seconds,
+                    }
+                    for run in runs
+                ],
+            }
+        )
 
 
 @method_decorator(csrf_exempt, name="dispatch")
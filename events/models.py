@@ -2,9 +2,10 @@ from django.conf import settings
 from django.db import models
 
 from franchises.models import Franchise
+from students.class_labels import CLASS_KEY_MAX_LENGTH, ClassKeyMixin
 
 
-class Event(models.Model):
+class Event(ClassKeyMixin, models.Model):
     franchise = models.ForeignKey(Franchise, on_delete=models.CASCADE, related_name="events")
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -17,6 +18,13 @@ class Event(models.Model):
         default="",
         help_text="Empty = all classes (public centre page + all parents). Set to limit parent app visibility.",
     )
+    class_key = models.CharField(
+        max_length=CLASS_KEY_MAX_LENGTH,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Canonical form of class_name (students.class_labels.class_key); set on save.",
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="events_created"
     )
@@ -26,6 +34,7 @@ class Event(models.Model):
     class Meta:
         db_table = "event"
         ordering = ["-start_date", "title"]
+        indexes = [models.Index(fields=["franchise", "class_key"], name="idx_event_franchise_ckey")]
 
     def __str__(self) -> str:
         title = (self.title or "").strip() or "(untitled)"
@@ -10,18 +10,18 @@ def public_event_q() -> Q:
 
 def event_visible_q(parent_profile) -> Q:
     """All-classes events plus class rows matching the parent's children."""
-    from students.portal_views import _matching_target_class_names
+    from students.portal_views import _parent_class_keys
 
     vis = public_event_q()
-    matching_classes = _matching_target_class_names(parent_profile)
-    if matching_classes:
-        vis |= Q(class_name__in=matching_classes)
+    keys = _parent_class_keys(parent_profile)
+    if keys:
+        vis |= Q(class_key__in=sorted(keys))
     return vis
 
 
 def parent_event_class_filter_options() -> list[dict[str, str]]:
     """Dropdown options for parent gallery (web + mobile)."""
-    from students.portal_views import HOMEWORK_CLASS_LABELS
+    from students.class_labels import HOMEWORK_CLASS_LABELS
 
     options: list[dict[str, str]] = [{"value": "", "label": "All classes"}]
     for label in HOMEWORK_CLASS_LABELS:
@@ -64,56 +64,21 @@ def event_row_visible_for_student(event, student) -> bool:
     target_class = (getattr(event, "class_name", None) or "").strip()
     if not target_class:
         return True
-    from students.portal_views import _class_label_matches
+    from students.class_labels import class_key
 
-    return _class_label_matches(student.class_name, target_class)
-
-
-def _event_target_class_names_for_student(student) -> set[str]:
-    """Stored ``class_name`` values that may match one child's class (DB pre-filter)."""
-    from students.portal_views import (
-        HOMEWORK_CLASS_LABELS,
-        _canonical_class_label,
-        _class_label_matches,
-        _strip_legacy_class_year,
-    )
-
-    cn = (getattr(student, "class_name", None) or "").strip()
-    if not cn:
-        return set()
-
-    names: set[str] = {cn}
-    stripped = _strip_legacy_class_year(cn)
-    if stripped:
-        names.add(stripped)
-    canon = _canonical_class_label(cn)
-    if canon:
-        names.add(canon)
-    for label in HOMEWORK_CLASS_LABELS:
-        if _class_label_matches(cn, label):
-            names.add(label)
-    return {n for n in names if n}
+    target_key = getattr(event, "class_key", "") or class_key(target_class)
+    return target_key == class_key(student.class_name)
 
 
 def filter_events_for_class_name(queryset, class_name: str):
-    """Centre-wide rows plus events tagged to ``class_name`` (fuzzy class match)."""
+    """Centre-wide rows plus events tagged to ``class_name`` (matched on ``class_key``)."""
     target = (class_name or "").strip()
     if not target or target.lower() in ("all", "all classes"):
         return queryset
 
-    from students.portal_views import _class_label_matches, normalize_portal_class_name
+    from students.class_labels import class_key
 
-    normalized = normalize_portal_class_name(target) or target
-    ids = []
-    for row in queryset:
-        row_class = (getattr(row, "class_name", None) or "").strip()
-        if not row_class:
-            ids.append(row.pk)
-        elif _class_label_matches(row_class, normalized) or _class_label_matches(row_class, target):
-            ids.append(row.pk)
-    if not ids:
-        return queryset.none()
-    return queryset.filter(pk__in=ids)
+    return queryset.filter(Q(class_name="") | Q(class_key=class_key(target)))
 
 
 def filter_events_for_student(queryset, student):
@@ -121,13 +86,9 @@ def filter_events_for_student(queryset, student):
     if student is None:
         return queryset.filter(class_name="")
 
-    names = _event_target_class_names_for_student(student)
-    if names:
-        pre = queryset.filter(Q(class_name="") | Q(class_name__in=names))
-    else:
-        pre = queryset.filter(class_name="")
+    from students.portal_views import _student_class_key
 
-    ids = [row.pk for row in pre if event_row_visible_for_student(row, student)]
-    if not ids:
-        return queryset.none()
-    return queryset.filter(pk__in=ids)
+    key = _student_class_key(student)
+    if not key:
+        return queryset.filter(class_name="")
+    return queryset.filter(Q(class_name="") | Q(class_key=key))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FranchisesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "franchises"
+
+    def ready(self):
+        # Rebuild centre-login keys (FranchiseLoginKey) when a franchise slug / name changes.
+        from . import signals  # noqa: F401
@@ -0,0 +1,46 @@
+"""
+Rebuild the centre-login key index (franchise_login_key) and report ambiguous keys.
+
+  python manage.py rebuild_franchise_login_keys
+  python manage.py rebuild_franchise_login_keys --report-only
+
+Keys are refreshed automatically on Franchise save and delete; run this after bulk slug/name
+updates (queryset .update(), imports). Ambiguous keys match more than one centre:
+a login that only hits those resolves to no centre until its username is fixed
+or Franchise.user is linked directly (python manage.py link_franchise_centre_logins).
+"""
+
+from django.core.management.base import BaseCommand
+
+from accounts.profile_access import flag_ambiguous_login_keys, refresh_franchise_login_keys
+from franchises.models import Franchise, FranchiseLoginKey, FranchiseLoginKeyKind
+
+
+class Command(BaseCommand):
+    help = "Rebuild FranchiseLoginKey rows from slugs / names and list keys shared by several centres."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--report-only", action="store_true", help="Only list ambiguous keys.")
+
+    def handle(self, *args, **options):
+        if not options["report_only"]:
+            written = 0
+            franchises = list(Franchise.objects.only("id", "slug", "name").order_by("id"))
+            for start in range(0, len(franchises), 200):
+                written += refresh_franchise_login_keys(franchises[start : start + 200])
+            FranchiseLoginKey.objects.exclude(franchise_id__in=[f.pk for f in franchises]).delete()
+            flipped = flag_ambiguous_login_keys()
+            self.stdout.write(f"rows_written={written} ambiguous_flags_changed={flipped}")
+
+        keys = set(
+            FranchiseLoginKey.objects.filter(ambiguous=True)
+            .exclude(kind=FranchiseLoginKeyKind.STEM)
+            .values_list("key", flat=True)
+        )
+        shared: dict[str, dict[int, str]] = {}
+        rows = FranchiseLoginKey.objects.filter(key__in=keys).select_related("franchise").order_by("key", "franchise_id")
+        for row in rows:
+            shared.setdefault(row.key, {})[row.franchise_id] = f"{row.franchise_id}:{row.franchise.slug} ({row.kind})"
+        for key, centres in shared.items():
+            self.stdout.write(self.style.WARNING(f"{key} → {', '.join(centres.values())}"))
+        self.stdout.write(self.style.SUCCESS(f"ambiguous_keys={len(shared)}"))
@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Frozen copy of accounts.profile_access.franchise_login_key_rows and its helpers
+# as of this migration; later changes to the live login rules must not change
+# what this migration writes (rebuild_franchise_login_keys re-derives the index).
+def normalize_key(raw):
+    key = (raw or "").strip().lower()
+    for suffix in ("_new", "-new"):
+        if key.endswith(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+def compact_key(raw):
+    return "".join(ch for ch in normalize_key(raw) if ch.isalnum())
+
+
+def slug_login_key(slug):
+    s = (slug or "").strip().lower()
+    if "-timekid" in s:
+        s = s.split("-timekid", 1)[0]
+    s = s.split("-")[0] if s else ""
+    if s.startswith("tk") and len(s) > 2:
+        s = s[2:]
+    return normalize_key(s)
+
+
+def slug_segment_keys(slug):
+    s = (slug or "").strip().lower()
+    if "-timekid" in s:
+        s = s.split("-timekid", 1)[0]
+    if not s:
+        return []
+    keys = []
+    for raw in [s] + [p[2:] if p.startswith("tk") and len(p) > 2 else p for p in s.replace("_", "-").split("-") if p]:
+        for variant in (normalize_key(raw), compact_key(raw)):
+            if variant and variant not in keys:
+                keys.append(variant)
+    return keys
+
+
+def login_key_rows(slug, name):
+    rows = {(key, "segment") for key in slug_segment_keys(slug)}
+    full_compact = compact_key((slug or "").strip().lower().split("-timekid", 1)[0])
+    for key in (slug_login_key(slug), full_compact):
+        if not key:
+            continue
+        rows.add((key, "prefix"))
+        for end in range(1, len(key)):
+            rows.add((key[:end], "stem"))
+    name_key = compact_key(name)
+    if name_key:
+        rows.add((name_key, "name"))
+    return sorted(rows)
+
+
+def build_login_keys(apps, schema_editor):
+    Franchise = apps.get_model("franchises", "Franchise")
+    FranchiseLoginKey = apps.get_model("franchises", "FranchiseLoginKey")
+    rows = [
+        (key, kind, franchise_id)
+        for franchise_id, slug, name in Franchise.objects.values_list("id", "slug", "name").iterator()
+        for key, kind in login_key_rows(slug, name)
+    ]
+    owners = {}
+    for key, kind, franchise_id in rows:
+        owners.setdefault((key, "name" if kind == "name" else "slug"), set()).add(franchise_id)
+    shared = {pair for pair, ids in owners.items() if len(ids) > 1}
+    FranchiseLoginKey.objects.bulk_create(
+        [
+            FranchiseLoginKey(
+                franchise_id=franchise_id,
+                key=key,
+                kind=kind,
+                ambiguous=(key, "name" if kind == "name" else "slug") in shared,
+            )
+            for key, kind, franchise_id in rows
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('franchises', '0021_driveractivitylog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FranchiseLoginKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255)),
+                ('kind', models.CharField(choices=[('segment', 'Slug segment'), ('prefix', 'Slug prefix'), ('stem', 'Leading part of a slug prefix'), ('name', 'Compact centre name')], max_length=10)),
+                ('ambiguous', models.BooleanField(default=False)),
+                ('franchise', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='login_keys', to='franchises.franchise')),
+            ],
+            options={
+                'db_table': 'franchise_login_key',
+                'indexes': [models.Index(fields=['key', 'kind'], name='idx_franchise_login_key')],
+                'constraints': [models.UniqueConstraint(fields=('franchise', 'key', 'kind'), name='uniq_franchise_login_key')],
+            },
+        ),
+        migrations.RunPython(build_login_keys, reverse_code=migrations.RunPython.noop),
+    ]
@@ -187,6 +187,43 @@ class Franchise(models.Model):
         return f"{name} ({admin_label})"
 
 
+class FranchiseLoginKeyKind(models.TextChoices):
+    SEGMENT = "segment", "Slug segment"
+    PREFIX = "prefix", "Slug prefix"
+    STEM = "stem", "Leading part of a slug prefix"
+    NAME = "name", "Compact centre name"
+
+
+class FranchiseLoginKey(models.Model):
+    """
+    Precomputed centre-login keys per franchise (see ``accounts.profile_access``).
+
+    Rebuilt from the slug and name on every Franchise save so a centre login
+    resolves with one ``(key, kind) IN (...)`` lookup instead of slug scans.
+    ``stem`` rows hold every leading part of a ``prefix`` key, so "slug key starts
+    with the login key" is an exact match too. ``ambiguous`` marks keys shared by
+    more than one centre; logins that hit several centres resolve to none.
+    """
+
+    franchise = models.ForeignKey(Franchise, on_delete=models.CASCADE, related_name="login_keys")
+    key = models.CharField(max_length=255)
+    kind = models.CharField(max_length=10, choices=FranchiseLoginKeyKind.choices)
+    ambiguous = models.BooleanField(default=False)
+
+    class Meta:
+        db_table = "franchise_login_key"
+        constraints = [
+            models.UniqueConstraint(fields=["franchise", "key", "kind"], name="uniq_franchise_login_key"),
+        ]
+        indexes = [
+            models.Index(fields=["key", "kind"], name="idx_franchise_login_key"),
+        ]
+
+    def __str__(self) -> str:
+        flag = " (ambiguous)" if self.ambiguous else ""
+        return f"{self.key} [{self.kind}] → {self.franchise_id}{flag}"
+
+
 class ParentProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="parent_profile")
     franchise = models.ForeignKey(Franchise, on_delete=models.CASCADE, related_name="parents")
@@ -0,0 +1,38 @@
+"""Franchise signal handlers."""
+
+from __future__ import annotations
+
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Franchise
+
+logger = logging.getLogger(__name__)
+
+LOGIN_KEY_FIELDS = frozenset({"slug", "name"})
+
+
+@receiver(post_save, sender=Franchise)
+def refresh_login_keys_on_franchise_save(sender, instance: Franchise, raw: bool = False, update_fields=None, **kwargs) -> None:
+    """Keep the centre-login key index in step with the slug / name."""
+    if raw or (update_fields is not None and not LOGIN_KEY_FIELDS.intersection(update_fields)):
+        return
+    try:
+        from accounts.profile_access import refresh_franchise_login_keys
+
+        refresh_franchise_login_keys([instance])
+    except Exception:
+        logger.exception("Failed to refresh login keys for franchise id=%s", instance.pk)
+
+
+@receiver(post_delete, sender=Franchise)
+def reflag_login_keys_on_franchise_delete(sender, instance: Franchise, **kwargs) -> None:
+    """The deleted centre's keys cascade away; centres that shared them may no longer be ambiguous."""
+    try:
+        from accounts.profile_access import flag_ambiguous_login_keys, franchise_login_key_rows
+
+        flag_ambiguous_login_keys({key for key, _kind in franchise_login_key_rows(instance.slug, instance.name)})
+    except Exception:
+        logger.exception("Failed to re-flag login keys after deleting franchise id=%s", instance.pk)
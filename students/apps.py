@@ -5,3 +5,8 @@ class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
 
+    def ready(self):
+        # Drop stored parent identity links when users / profiles / students change,
+        # fan published rows out to the parent notification feed and keep the
+        # parent / centre inbox unread counters current.
+        from . import signals  # noqa: F401
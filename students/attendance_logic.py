@@ -10,7 +10,8 @@ from documents.holiday_entries import franchise_city_label, merge_holiday_entrie
 from documents.models import DocumentCategory, ParentDocument
 from documents.publish_targeting import document_matches_franchise
 
-from .models import AttendanceRecord, CentreAttendanceClosedDay, StudentProfile
+from .holiday_calendar import holidays_between
+from .models import AttendanceRecord, StudentProfile
 
 PRESENT_STATUSES = frozenset(
     {
@@ -100,34 +101,13 @@ def _merged_holiday_entries_for_franchise(franchise) -> list[dict]:
 
 
 def collect_holiday_map(franchise, start: date, end: date) -> dict[date, str]:
-    """Dates treated as holidays (weekends, CMS calendar, centre closed days)."""
-    labels: dict[date, str] = {}
-    centre_city = franchise_city_label(franchise) if franchise else ""
-
-    for entry in _merged_holiday_entries_for_franchise(franchise):
-        if not isinstance(entry, dict):
-            continue
-        if not _holiday_entry_applies(entry, centre_city):
-            continue
-        raw = str(entry.get("date") or "")[:10]
-        if len(raw) != 10:
-            continue
-        try:
-            year_i, mon_i, day_i = (int(raw[0:4]), int(raw[5:7]), int(raw[8:10]))
-            holiday_day = date(year_i, mon_i, day_i)
-        except (TypeError, ValueError):
-            continue
-        if start <= holiday_day <= end:
-            name = (entry.get("name") or entry.get("holiday") or "Holiday").strip() or "Holiday"
-            labels[holiday_day] = name
-
-    if franchise is not None:
-        for row in CentreAttendanceClosedDay.objects.filter(
-            franchise=franchise,
-            date__gte=start,
-            date__lte=end,
-        ).only("date", "label"):
-            labels[row.date] = (row.label or "Centre closed").strip() or "Centre closed"
+    """
+    Dates treated as holidays (weekends, CMS calendar, centre closed days).
+
+    CMS entries and closed days come from the compiled per-academic-year
+    calendar (``students.holiday_calendar``); weekends are added here.
+    """
+    labels = holidays_between(franchise, start, end)
 
     for day in iter_days(start, end):
         if is_weekend(day) and day not in labels:
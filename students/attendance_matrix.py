@@ -0,0 +1,150 @@
+"""
+Class × day attendance register for a centre month.
+
+``GET /students/franchise/attendance/matrix/?month=2026-10&class_name=Nursery``
+returns the class as parallel arrays instead of one JSON object per record::
+
+    {
+      "month": "2026-10", "days": 31,
+      "students": {"ids": [...], "names": [...], "roll_numbers": [...]},
+      "statuses": ["PPLH-A...", ...],     # one string per student, one code per day
+      "holiday_days": [2, 4, ...], "holiday_labels": ["Gandhi Jayanti", "Sunday", ...],
+      "totals": {"present": [...], "absent": [...], "unmarked": [...]},
+      "working_days": 22, "codes": {"P": "PRESENT", ...}
+    }
+
+Students and their marks for the month come from one query (students LEFT JOIN
+the month's attendance rows); holiday columns (weekends, CMS calendar, centre
+closed days) come from the compiled holiday calendar and are applied
+server-side, matching ``attendance_logic.resolve_day_status`` (a holiday beats
+any mark).
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from types import SimpleNamespace
+
+from django.db.models import FilteredRelation, Q
+
+from .attendance_logic import collect_holiday_map, iter_days
+from .class_labels import class_key
+from .models import AttendanceRecord, StudentProfile
+
+Status = AttendanceRecord.Status
+
+STATUS_CODES = {
+    Status.PRESENT: "P",
+    Status.LATE: "L",
+    Status.ABSENT: "A",
+    Status.EXCUSED: "E",
+    Status.HOLIDAY: "H",
+}
+HOLIDAY_CODE = "H"
+UNMARKED_CODE = "-"
+CODES = {
+    **{code: str(value) for value, code in STATUS_CODES.items()},
+    UNMARKED_CODE: "UNMARKED",
+}
+PRESENT_CODES = frozenset("PL")
+ABSENT_CODES = frozenset("AE")
+
+
+def class_month_rows(franchise, class_name: str, start: date, end: date) -> list[tuple]:
+    """``(id, first_name, last_name, roll_number, class_name, Year, date, status)``, one query."""
+    target_key = class_key(class_name)
+    if franchise is None or not target_key:
+        return []
+    return list(
+        StudentProfile.objects.filter(parent__franchise=franchise, is_active=True, class_key=target_key)
+        .annotate(
+            month_marks=FilteredRelation(
+                "attendance_records",
+                condition=Q(attendance_records__date__gte=start, attendance_records__date__lte=end),
+            )
+        )
+        .order_by("first_name", "last_name", "id")
+        .values_list(
+            "id",
+            "first_name",
+            "last_name",
+            "roll_number",
+            "class_name",
+            "Year",
+            "month_marks__date",
+            "month_marks__status",
+        )
+    )
+
+
+def build_matrix(rows, start: date, end: date, holiday_map: dict[date, str], *, include=None) -> dict:
+    """
+    Matrix payload from ``class_month_rows`` output.
+
+    ``include(student)`` (an object with ``class_name`` / ``Year``) drops
+    students outside the selected academic year.
+    """
+    days = list(iter_days(start, end))
+    holiday_columns = {index for index, day in enumerate(days) if day in holiday_map}
+
+    students: dict[int, dict] = {}
+    for student_id, first, last, roll, class_name, year, mark_date, mark_status in rows:
+        student = students.get(student_id)
+        if student is None:
+            student = students[student_id] = {
+                "name": f"{(first or '').strip()} {(last or '').strip()}".strip() or "(no name)",
+                "roll_number": roll or "",
+                "class_name": class_name,
+                "Year": year,
+                "cells": [UNMARKED_CODE] * len(days),
+            }
+        if mark_date is not None and start <= mark_date <= end:
+            student["cells"][(mark_date - start).days] = STATUS_CODES.get(mark_status, UNMARKED_CODE)
+
+    ids, names, roll_numbers, statuses = [], [], [], []
+    present, absent, unmarked = [], [], []
+    for student_id, student in students.items():
+        roster_row = SimpleNamespace(class_name=student["class_name"], Year=student["Year"])
+        if include is not None and not include(roster_row):
+            continue
+        cells = student["cells"]
+        for index in holiday_columns:
+            cells[index] = HOLIDAY_CODE
+        ids.append(student_id)
+        names.append(student["name"])
+        roll_numbers.append(student["roll_number"])
+        statuses.append("".join(cells))
+        present.append(sum(code in PRESENT_CODES for code in cells))
+        absent.append(sum(code in ABSENT_CODES for code in cells))
+        unmarked.append(cells.count(UNMARKED_CODE))
+
+    holidays = sorted((day, label) for day, label in holiday_map.items() if start <= day <= end)
+    return {
+        "month": start.strftime("%Y-%m"),
+        "start": start.isoformat(),
+        "days": len(days),
+        "students": {"ids": ids, "names": names, "roll_numbers": roll_numbers},
+        "statuses": statuses,
+        "holiday_days": [day.day for day, _ in holidays],
+        "holiday_labels": [label for _, label in holidays],
+        "totals": {"present": present, "absent": absent, "unmarked": unmarked},
+        "working_days": len(days) - len(holiday_columns),
+        "codes": CODES,
+    }
+
+
+def class_month_matrix(franchise, class_name: str, start: date, end: date, academic_year: str = "") -> dict:
+    from .portal_views import _student_matches_academic_year_filter
+
+    rows = class_month_rows(franchise, class_name, start, end)
+    holiday_map = collect_holiday_map(franchise, start, end) if franchise is not None else {}
+    payload = build_matrix(
+        rows,
+        start,
+        end,
+        holiday_map,
+        include=lambda student: _student_matches_academic_year_filter(student, academic_year),
+    )
+    payload["class_name"] = class_name
+    payload["academic_year"] = academic_year
+    return payload
@@ -0,0 +1,245 @@
+"""
+Bulk attendance upsert for ``POST /students/franchise/attendance/bulk/``.
+
+Marks (student, date, status, note) can be any mix of dates and classes: a
+day's register from the app (JSON ``records``) or a whole term back-filled from
+a CSV / XLSX upload (``file``). They are written ``UPSERT_CHUNK_SIZE`` at a
+time. Each chunk loads its existing rows in one query to tell created from
+updated from unchanged rows. It then writes only the new / changed ones with
+one native upsert (``INSERT … ON CONFLICT (student_id, date) DO UPDATE``), in
+its own transaction so a term upload never holds locks for the whole file;
+re-running an upload is idempotent.
+
+Upload columns (header row, case-insensitive): ``student_id`` or ``idcardno``,
+``date`` (YYYY-MM-DD or DD-MM-YYYY / DD/MM/YYYY), ``status`` (Present / Absent /
+Holiday or P / A / H) and optional ``note``. Rows that cannot be used are
+skipped and reported with their line number instead of failing the upload.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from datetime import date, datetime
+from typing import Iterable, NamedTuple
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Trim
+from django.utils.dateparse import parse_date
+
+from .change_stamps import students_changed
+from .models import AttendanceRecord, ParentNotification, StudentProfile
+from .notification_feed import schedule_queryset_sync
+
+Status = AttendanceRecord.Status
+
+UPSERT_CHUNK_SIZE = 1000
+MAX_UPLOAD_ROWS = 50_000
+MAX_REPORTED_ERRORS = 50
+
+STATUS_ALIASES = {
+    "present": Status.PRESENT,
+    "p": Status.PRESENT,
+    "absent": Status.ABSENT,
+    "a": Status.ABSENT,
+    "holiday": Status.HOLIDAY,
+    "h": Status.HOLIDAY,
+}
+STUDENT_ID_COLUMNS = ("student_id", "student")
+ID_CARD_COLUMNS = ("idcardno", "id_card_no")
+
+
+class Mark(NamedTuple):
+    student_id: int
+    date: date
+    status: str
+    note: str
+
+
+class UploadError(ValueError):
+    """The upload cannot be read at all (message is returned as the API ``detail``)."""
+
+
+# ----- Uploads -----
+
+
+def _csv_rows(upload) -> list[dict]:
+    try:
+        text = upload.read().decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise UploadError("CSV must be UTF-8 encoded.") from exc
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def _xlsx_rows(upload) -> list[dict]:
+    try:
+        import openpyxl
+    except ImportError as exc:
+        raise UploadError("XLSX uploads need openpyxl installed on the server; upload a CSV instead.") from exc
+    try:
+        book = openpyxl.load_workbook(upload, read_only=True, data_only=True)
+    except Exception as exc:
+        raise UploadError("Could not read the XLSX file.") from exc
+    try:
+        rows = book.active.iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        keys = [str(cell or "").strip() for cell in header]
+        return [dict(zip(keys, values)) for values in rows if any(value not in (None, "") for value in values)]
+    finally:
+        book.close()
+
+
+def read_upload(upload) -> list[dict]:
+    """Header-keyed rows (lower-case keys) from a ``.csv`` / ``.xlsx`` upload."""
+    name = (getattr(upload, "name", "") or "").lower()
+    if name.endswith(".xlsx"):
+        rows = _xlsx_rows(upload)
+    elif name.endswith(".csv") or not name.rpartition(".")[1]:
+        rows = _csv_rows(upload)
+    else:
+        raise UploadError("Upload a .csv or .xlsx file.")
+    if len(rows) > MAX_UPLOAD_ROWS:
+        raise UploadError(f"At most {MAX_UPLOAD_ROWS} rows per upload; split the file.")
+    return [{str(key or "").strip().lower(): value for key, value in row.items()} for row in rows]
+
+
+def _cell(row: dict, names: Iterable[str]) -> str:
+    for name in names:
+        value = row.get(name)
+        if value not in (None, ""):
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            return str(value).strip()
+    return ""
+
+
+def _parse_day(value) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    raw = str(value or "").strip()[:10]
+    try:
+        parsed = parse_date(raw)
+    except ValueError:
+        return None
+    if parsed is not None:
+        return parsed
+    for fmt in ("%d-%m-%Y", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def resolve_upload_rows(franchise, rows: list[dict]) -> tuple[list[Mark], list[dict]]:
+    """
+    ``(marks, errors)`` for uploaded rows at ``franchise``.
+
+    Students are matched by ``student_id`` or ``idcardno`` (whitespace-trimmed
+    on both sides) among the centre's active children in one query; ``errors``
+    hold ``{"line", "detail"}``.
+    """
+    ids = {int(v) for v in (_cell(row, STUDENT_ID_COLUMNS) for row in rows) if v.isdigit()}
+    cards = {v for v in (_cell(row, ID_CARD_COLUMNS) for row in rows) if v}
+    known_ids: set[int] = set()
+    by_card: dict[str, int] = {}
+    if ids or cards:
+        # Imported id cards often carry padding (" TK-9 "); compare trimmed values in SQL.
+        for student_id, card in (
+            StudentProfile.objects.annotate(card=Trim("Idcardno"))
+            .filter(Q(pk__in=ids) | Q(card__in=cards), parent__franchise=franchise, is_active=True)
+            .values_list("id", "card")
+        ):
+            known_ids.add(student_id)
+            if card:
+                by_card[card] = student_id
+
+    marks: list[Mark] = []
+    errors: list[dict] = []
+    for line, row in enumerate(rows, start=2):
+        raw_id, card = _cell(row, STUDENT_ID_COLUMNS), _cell(row, ID_CARD_COLUMNS)
+        if raw_id.isdigit():
+            student_id = int(raw_id) if int(raw_id) in known_ids else None
+        else:
+            student_id = by_card.get(card)
+        day = _parse_day(row.get("date"))
+        status_value = STATUS_ALIASES.get(_cell(row, ("status",)).lower())
+        if student_id is None and not (raw_id or card):
+            detail = "student_id or idcardno is required."
+        elif student_id is None:
+            detail = "Student is not enrolled at your centre."
+        elif day is None:
+            detail = "Invalid date."
+        elif status_value is None:
+            detail = "Status must be Present, Absent, or Holiday."
+        else:
+            marks.append(Mark(student_id, day, status_value, _cell(row, ("note",))[:255]))
+            continue
+        errors.append({"line": line, "detail": detail})
+    return marks, errors
+
+
+# ----- Upsert -----
+
+
+def _chunks(items: list, size: int):
+    for index in range(0, len(items), size):
+        yield items[index : index + size]
+
+
+def _upsert_chunk(marks: list[Mark]) -> tuple[int, int, int]:
+    existing = {
+        (student_id, day): (status_value, note)
+        for student_id, day, status_value, note in AttendanceRecord.objects.filter(
+            student_id__in={mark.student_id for mark in marks},
+            date__in={mark.date for mark in marks},
+        ).values_list("student_id", "date", "status", "note")
+    }
+    created = updated = 0
+    to_write: list[AttendanceRecord] = []
+    for mark in marks:
+        current = existing.get((mark.student_id, mark.date))
+        if current == (mark.status, mark.note):
+            continue
+        if current is None:
+            created += 1
+        else:
+            updated += 1
+        to_write.append(
+            AttendanceRecord(student_id=mark.student_id, date=mark.date, status=mark.status, note=mark.note)
+        )
+    if to_write:
+        with transaction.atomic():
+            AttendanceRecord.objects.bulk_create(
+                to_write,
+                update_conflicts=True,
+                unique_fields=["student", "date"],
+                update_fields=["status", "note", "updated_at"],
+            )
+            # Bulk writes skip post_save; fan the marks out to parent feeds explicitly.
+            schedule_queryset_sync(
+                ParentNotification.Source.ATTENDANCE,
+                AttendanceRecord.objects.filter(
+                    student_id__in={row.student_id for row in to_write},
+                    date__in={row.date for row in to_write},
+                ),
+            )
+            students_changed({row.student_id for row in to_write})
+    return created, updated, len(marks) - len(to_write)
+
+
+def upsert_marks(marks: Iterable[Mark]) -> dict[str, int]:
+    """Create / update ``marks``; counts of ``created``, ``updated`` and ``skipped`` (unchanged / repeated)."""
+    marks = list(marks)
+    # Last mark wins for a repeated (student, date); ON CONFLICT cannot touch one row twice per statement.
+    latest = list({(mark.student_id, mark.date): mark for mark in marks}.values())
+    counts = {"created": 0, "updated": 0, "skipped": len(marks) - len(latest)}
+    for chunk in _chunks(latest, UPSERT_CHUNK_SIZE):
+        created, updated, unchanged = _upsert_chunk(chunk)
+        counts["created"] += created
+        counts["updated"] += updated
+        counts["skipped"] += unchanged
+    return counts
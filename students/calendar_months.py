@@ -0,0 +1,215 @@
+"""
+Month buckets for the parent calendar / attendance payload.
+
+``GET /students/parent/calendar-attendance/?month=2026-10`` (or
+``?from_month=2026-09&to_month=2026-11``) builds only the months the calendar
+shows. Each month is one bucket keyed ``(centre, class_key, student, YYYY-MM)``
+holding that month's calendar items (events, homework, announcements,
+newsletters, parental tips, holidays), attendance rows and summary.
+
+Only rows dated in the month are queried. Buckets are cached under the global,
+centre and parent change stamps (``students.change_stamps``), which the
+signals on every contributing model bump, so a write invalidates them on the
+next read. ``PARENT_CALENDAR_CACHE_SECONDS`` only bounds memory.
+"""
+
+from __future__ import annotations
+
+from django.db import OperationalError, ProgrammingError
+from django.db.models import Q
+
+from common.env import int_setting
+
+from .attendance_logic import build_summaries_for_student, collect_holiday_map, holiday_dates_payload, month_bounds
+from .change_stamps import Scope, cached_payload, current_stamps, stamped_cache_key
+from .class_labels import class_key
+from .models import AttendanceRecord, StudentProfile
+from .portal_schedule import portal_today
+
+MAX_MONTHS = 12
+BUCKET_SCOPES = (Scope.GLOBAL, Scope.CENTRE, Scope.PARENT)
+
+
+def _month_index(month: str) -> int:
+    return int(month[:4]) * 12 + int(month[5:7]) - 1
+
+
+def _month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def parse_month_range(params) -> list[str] | None:
+    """
+    ``?month=`` or ``?from_month=`` / ``?to_month=`` → ``YYYY-MM`` list; ``None`` when absent.
+
+    Raises ``ValueError`` (message for the API) for malformed or oversized ranges.
+    """
+    single = (params.get("month") or "").strip()
+    first = (params.get("from_month") or single).strip()
+    last = (params.get("to_month") or single or first).strip()
+    if not first and not last:
+        return None
+    first = first or last
+    for value in (first, last):
+        if month_bounds(value)[0] is None:
+            raise ValueError(f"Invalid month {value!r}; use YYYY-MM.")
+    start, end = _month_index(first), _month_index(last)
+    if end < start:
+        raise ValueError("to_month is before from_month.")
+    if end - start + 1 > MAX_MONTHS:
+        raise ValueError(f"At most {MAX_MONTHS} months per request.")
+    return [_month_label(index) for index in range(start, end + 1)]
+
+
+def cache_seconds() -> int:
+    return max(0, int_setting("PARENT_CALENDAR_CACHE_SECONDS", 0))
+
+
+def _in_month(item: dict, month: str) -> bool:
+    start = str(item.get("date") or "")[:7]
+    end = str(item.get("end_date") or start)[:7]
+    return bool(start) and start <= month <= end
+
+
+def build_month_bucket(request, pp, centre, focus, month: str) -> dict:
+    """One month of calendar items, attendance rows and summary (uncached)."""
+    from events.serializers import EventSerializer
+
+    from .portal_views import (
+        _build_parent_calendar_items,
+        _calendar_datetime_window,
+        _parent_calendar_querysets,
+        _parent_newsletter_calendar_items,
+        _parent_parental_tips_calendar_items,
+    )
+    from .serializers import AnnouncementSerializer, AttendanceRecordSerializer, HomeworkAssignmentSerializer
+
+    start, end = month_bounds(month)
+    events_qs, homework_qs, announcements_qs = _parent_calendar_querysets(request, pp, centre, focus)
+    events_qs = events_qs.filter(start_date__lte=end).filter(
+        Q(end_date__gte=start) | Q(end_date__isnull=True, start_date__gte=start)
+    )
+    homework_qs = homework_qs.filter(assigned_date__range=(start, end))
+    announcements_qs = announcements_qs.filter(published_at__range=_calendar_datetime_window(start, end))
+
+    ctx = {"request": request}
+    items = _build_parent_calendar_items(
+        EventSerializer(events_qs, many=True, context={**ctx, "omit_video_links": True}).data,
+        HomeworkAssignmentSerializer(homework_qs, many=True, context=ctx).data,
+        AnnouncementSerializer(announcements_qs, many=True, context=ctx).data,
+    )
+    items.extend(_parent_newsletter_calendar_items(request, focus, start=start, end=end))
+    items.extend(_parent_parental_tips_calendar_items(request, focus, start=start, end=end))
+    holiday_map = collect_holiday_map(centre, start, end) if centre is not None else {}
+    for holiday_day, label in sorted(holiday_map.items()):
+        items.append(
+            {
+                "id": f"holiday-{holiday_day.isoformat()}",
+                "type": "holiday",
+                "title": label,
+                "date": holiday_day.isoformat(),
+                "detail": "Holiday",
+                "source_id": None,
+            }
+        )
+    items = [item for item in items if _in_month(item, month)]
+    items.sort(key=lambda row: (row["date"], row["type"], row["title"].lower()))
+
+    attendance_qs = AttendanceRecord.objects.filter(
+        student__parent=pp, student__is_active=True, date__range=(start, end)
+    ).select_related("student").order_by("-date", "student_id")
+    if focus is not None:
+        attendance_qs = attendance_qs.filter(student_id=focus.pk)
+
+    summary = None
+    if focus is not None and centre is not None:
+        summary = build_summaries_for_student(focus, centre, months=[month]).get(month)
+    return {
+        "month": month,
+        "calendar_items": items,
+        "attendance": AttendanceRecordSerializer(attendance_qs, many=True).data,
+        "attendance_summary": summary,
+        "holiday_dates": holiday_dates_payload(holiday_map),
+    }
+
+
+def bucket_cache_key(request, pp, centre, focus, month: str, stamps: dict[str, int]) -> str:
+    """Bucket ``(centre, class_key, student, month)``; the class key is hashed (it holds spaces)."""
+    parts = [
+        class_key(focus.class_name) if focus else "",
+        request.user.pk,
+        pp.pk,
+        # Serializers build absolute media URLs; scheduled rows go live by day.
+        request.build_absolute_uri("/"),
+        portal_today().isoformat(),
+    ]
+    prefix = f"parent-calendar:{centre.pk if centre else 0}:{focus.pk if focus else 0}:{month}"
+    return stamped_cache_key(prefix, parts, stamps, BUCKET_SCOPES)
+
+
+def _lists(request, focus) -> dict:
+    from .portal_views import _parent_holiday_lists_payload, _parent_parental_tips_payload
+
+    return {
+        "holiday_lists": _parent_holiday_lists_payload(request, focus),
+        "parental_tips": _parent_parental_tips_payload(request, focus),
+    }
+
+
+def calendar_months_payload(request, pp, centre, *, focus, months: list[str]) -> dict:
+    """``_parent_calendar_attendance_payload`` shape for ``months`` (``response_mode="months"``)."""
+    ttl = cache_seconds()
+    try:
+        stamps = current_stamps(pp.pk, centre.pk if centre else None)
+    except (ProgrammingError, OperationalError):
+        stamps, ttl = {}, 0
+
+    buckets = [
+        cached_payload(
+            bucket_cache_key(request, pp, centre, focus, month, stamps),
+            ttl,
+            lambda month=month: build_month_bucket(request, pp, centre, focus, month),
+        )
+        for month in months
+    ]
+    lists = cached_payload(
+        bucket_cache_key(request, pp, centre, focus, "lists", stamps), ttl, lambda: _lists(request, focus)
+    )
+
+    calendar_items = [item for bucket in buckets for item in bucket["calendar_items"]]
+    # Multi-day events sit in every month they span; keep one row each.
+    calendar_items = list({(item["id"], item["date"]): item for item in calendar_items}.values())
+    calendar_items.sort(key=lambda row: (row["date"], row["type"], row["title"].lower()))
+    attendance = [row for bucket in reversed(buckets) for row in bucket["attendance"]]
+    by_month = {bucket["month"]: bucket["attendance_summary"] for bucket in buckets if bucket["attendance_summary"]}
+    today_month = portal_today().strftime("%Y-%m")
+    summary_month = today_month if today_month in months else months[-1]
+
+    student_block = None
+    if focus is not None:
+        student_block = {"id": focus.pk, "name": focus.full_name, "class_name": (focus.class_name or "").strip()}
+    payload = {
+        "student": student_block,
+        "selected_date": None,
+        "response_mode": "months",
+        "months": months,
+        "calendar_items": calendar_items,
+        "calendar_events": [],
+        "homework": [],
+        "announcements": [],
+        "attendance": attendance,
+        "attendance_count": len(attendance),
+        "attendance_for_date": None,
+        "attendance_summary": by_month.get(summary_month),
+        "attendance_summary_by_month": by_month or None,
+        "holiday_dates": [row for bucket in buckets for row in bucket["holiday_dates"]],
+        "holiday_lists": lists["holiday_lists"],
+        "parental_tips": lists["parental_tips"],
+        "resolved_attendance": None,
+        "student_id": focus.pk if focus else None,
+        "student_name": focus.full_name if focus else "",
+        "class_name": ((focus.class_name or "").strip() if focus else ""),
+    }
+    if focus is None and StudentProfile.objects.filter(parent=pp, is_active=True).count() > 1:
+        payload["requires_student"] = True
+    return payload
@@ -0,0 +1,257 @@
+"""
+Change stamps and ETags for parent-app read endpoints.
+
+Each write that can change what a parent sees bumps a stamp after commit
+(``students.signals`` for model saves / deletes, ``notification_feed`` for
+feed fan-out, views for bulk writes):
+
+- centre stamp — the centre's announcements, homework, activities, events,
+  achievements, routes, closed days and centre documents;
+- parent stamp — the family's children, attendance, fees, homework
+  submissions and transport assignments;
+- feed stamp — the family's notification entries and read marks (kept apart
+  so fan-out of centre content does not invalidate fee / child data);
+- global stamp — head-office (no-centre) parent documents.
+
+``parent_etag`` hashes the four stamps with the endpoint, login, query string
+and portal date (scheduled rows go live by day), so an unchanged family gets
+the same tag. ``ParentETagMixin`` / ``conditional_parent_get`` answer a
+matching ``If-None-Match`` with ``304 Not Modified`` before any payload is built.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from functools import wraps
+from typing import Iterable
+
+from django.core.cache import cache
+from django.db import OperationalError, ProgrammingError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import PortalChangeStamp, StudentProfile
+from .portal_schedule import portal_today
+
+logger = logging.getLogger(__name__)
+
+Scope = PortalChangeStamp.Scope
+
+ETAG_CACHE_CONTROL = "private, no-cache"
+# Scopes hashed into parent ETags (``holidays`` only versions the holiday calendar cache).
+ETAG_SCOPES = (Scope.GLOBAL, Scope.CENTRE, Scope.PARENT, Scope.FEED)
+
+
+# ----- Writes -----
+
+
+def _bump_now(scope: str, owner_ids: Iterable[int]) -> None:
+    owner_ids = set(owner_ids)
+    if not owner_ids:
+        return
+    stamps = PortalChangeStamp.objects.filter(scope=scope)
+    now = timezone.now()
+    stamps.filter(owner_id__in=owner_ids).update(version=F("version") + 1, changed_at=now)
+    missing = owner_ids - set(stamps.filter(owner_id__in=owner_ids).values_list("owner_id", flat=True))
+    if missing:
+        PortalChangeStamp.objects.bulk_create(
+            [PortalChangeStamp(scope=scope, owner_id=owner_id) for owner_id in missing],
+            ignore_conflicts=True,
+        )
+        # A concurrent writer may have created the row first; bump again so neither change is lost.
+        stamps.filter(owner_id__in=missing).update(version=F("version") + 1, changed_at=now)
+
+
+def _bump(scope: str, owner_ids: Iterable[int]) -> None:
+    """Bump after commit so a reader never pairs a new stamp with old rows."""
+    owner_ids = {int(owner_id) for owner_id in owner_ids if owner_id is not None}
+    if not owner_ids:
+        return
+
+    def run() -> None:
+        try:
+            _bump_now(scope, owner_ids)
+        except Exception:
+            logger.exception("Failed to bump %s change stamps %s", scope, sorted(owner_ids))
+
+    transaction.on_commit(run)
+
+
+def centres_changed(franchise_ids: Iterable[int | None]) -> None:
+    _bump(Scope.CENTRE, franchise_ids)
+
+
+def parents_changed(parent_ids: Iterable[int | None]) -> None:
+    _bump(Scope.PARENT, parent_ids)
+
+
+def feeds_changed(parent_ids: Iterable[int | None]) -> None:
+    _bump(Scope.FEED, parent_ids)
+
+
+def students_changed(student_ids: Iterable[int | None]) -> None:
+    """Bump the parents of these children (one query)."""
+    student_ids = {sid for sid in student_ids if sid is not None}
+    if student_ids:
+        parents_changed(
+            StudentProfile.objects.filter(pk__in=student_ids, parent_id__isnull=False)
+            .values_list("parent_id", flat=True)
+            .distinct()
+        )
+
+
+def global_changed() -> None:
+    _bump(Scope.GLOBAL, [0])
+
+
+def holiday_calendars_changed(owner_ids: Iterable[int | None]) -> None:
+    """Move holiday calendar generations (franchise pks; 0 = every centre)."""
+    _bump(Scope.HOLIDAYS, owner_ids)
+
+
+# ----- Reads -----
+
+
+def current_stamps(parent_id: int | None, franchise_id: int | None) -> dict[str, int]:
+    """Version per scope (global, centre, parent, feed) in one query; 0 for a stamp never bumped."""
+    q = Q(scope=Scope.GLOBAL, owner_id=0)
+    if franchise_id:
+        q |= Q(scope=Scope.CENTRE, owner_id=franchise_id)
+    if parent_id:
+        q |= Q(scope__in=[Scope.PARENT, Scope.FEED], owner_id=parent_id)
+    versions = dict(PortalChangeStamp.objects.filter(q).values_list("scope", "version"))
+    return {scope: versions.get(scope, 0) for scope in ETAG_SCOPES}
+
+
+def stamped_cache_key(prefix: str, parts: Iterable, stamps: dict[str, int], scopes: Iterable[str]) -> str:
+    """Cache key for data built from ``scopes``; bumping any of those stamps moves it."""
+    values = [*parts, *(f"{scope}{stamps.get(scope, 0)}" for scope in scopes)]
+    digest = hashlib.sha1("|".join(str(value) for value in values).encode()).hexdigest()
+    return f"{prefix}:{digest}"
+
+
+def cached_payload(key: str, ttl: int, build):
+    """``build()`` as plain JSON types, cached under a stamped ``key`` for at most ``ttl`` seconds."""
+    if not ttl:
+        return build()
+    try:
+        cached = cache.get(key)
+    except Exception:
+        logger.exception("Portal payload cache read failed")
+        cached = None
+    if cached is not None:
+        return cached
+    # Serializer ReturnDict / ReturnList keep a serializer reference and do not pickle cleanly.
+    data = json.loads(json.dumps(build(), cls=JSONEncoder))
+    try:
+        cache.set(key, data, ttl)
+    except Exception:
+        logger.exception("Portal payload cache write failed")
+    return data
+
+
+def parent_etag(request, namespace: str) -> str | None:
+    """Weak ETag for a parent GET; ``None`` when the stamps cannot be read."""
+    from accounts.profile_access import resolved_parent_profile_for_user
+
+    profile = resolved_parent_profile_for_user(request.user)
+    parent_id = profile.pk if profile else 0
+    # Stored centre (effective_franchise_for_parent keeps it current); a change alters the tag.
+    franchise_id = (profile.franchise_id if profile else 0) or 0
+    try:
+        stamps = current_stamps(parent_id, franchise_id)
+    except (ProgrammingError, OperationalError):
+        return None
+    params = getattr(request, "query_params", None) or request.GET
+    query = "&".join(f"{key}={value}" for key in sorted(params) for value in params.getlist(key))
+    parts = [
+        namespace,
+        request.get_full_path().partition("?")[0],
+        request.user.pk,
+        parent_id,
+        franchise_id,
+        portal_today().isoformat(),
+        *(f"{scope}{version}" for scope, version in sorted(stamps.items())),
+        query,
+    ]
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def _with_etag(response, etag: str):
+    response["ETag"] = etag
+    response["Cache-Control"] = ETAG_CACHE_CONTROL
+    response["Vary"] = "Authorization"
+    return response
+
+
+class NotModified(Exception):
+    """Raised once the request's ETag matches; answered with an empty ``304``."""
+
+
+class ParentETagMixin:
+    """
+    Conditional GET for parent DRF views.
+
+    The ETag is checked after authentication / permissions (``initial``) and
+    before the handler runs, so a ``304`` never builds the payload.
+    """
+
+    etag_namespace = ""
+    _etag: str | None = None
+
+    def etag_enabled(self, request) -> bool:
+        return True
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._etag = None
+        if request.method in ("GET", "HEAD") and self.etag_enabled(request):
+            self._etag = parent_etag(request, self.etag_namespace or type(self).__name__)
+            if self._etag and etag_matches(request, self._etag):
+                raise NotModified
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self._etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            _with_etag(response, self._etag)
+        return response
+
+
+def conditional_parent_get(namespace: str):
+    """ETag / ``304`` for ``@api_view`` functions (apply below ``@permission_classes``)."""
+
+    def decorator(view):
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            etag = parent_etag(request, namespace) if request.method in ("GET", "HEAD") else None
+            if etag and etag_matches(request, etag):
+                return _with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+            response = view(request, *args, **kwargs)
+            if etag and response.status_code == status.HTTP_200_OK:
+                _with_etag(response, etag)
+            return response
+
+        return wrapped
+
+    return decorator
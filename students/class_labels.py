@@ -0,0 +1,147 @@
+"""
+Portal class labels: canonical names for legacy / import class strings.
+
+``class_key`` folds a class string to the value stored in the ``class_key``
+column of students and class-targeted content (homework, daily activities,
+announcements, events): the canonical portal label when one applies, else the
+string itself, lowercased either way. Two class strings match under
+``_class_label_matches`` exactly when their keys are equal (up to
+``CLASS_KEY_MAX_LENGTH``), so visibility filters are indexed
+``class_key IN (...)`` lookups instead of Python loops over rows. A legacy year
+suffix only folds away for canonical classes ("PP1 25-26" is PP-1); for any
+other label "Grade 1 25-26" and "Grade 1" stay different classes.
+"""
+
+from __future__ import annotations
+
+import re
+
+HOMEWORK_CLASS_LABELS = (
+    "Play Group",
+    "Nursery",
+    "PP-1 / Junior KG / LKG",
+    "PP-2 / Senior KG / UKG",
+    "Summer Programs / Day Care",
+)
+
+CLASS_KEY_MAX_LENGTH = 120
+
+_LEGACY_CLASS_YEAR_SUFFIX = re.compile(r"\s+\d{2}-\d{2}$")
+
+
+def _strip_legacy_class_year(class_name: str) -> str:
+    return _LEGACY_CLASS_YEAR_SUFFIX.sub("", (class_name or "").strip())
+
+
+def _canonical_class_label(class_name: str) -> str | None:
+    """Map legacy/import class strings (e.g. ``PP1 25-26``) to portal class labels."""
+    raw = (class_name or "").strip()
+    if not raw:
+        return None
+    if raw in HOMEWORK_CLASS_LABELS:
+        return raw
+
+    core = _strip_legacy_class_year(raw)
+    norm = core.lower().replace("_", " ").replace("-", " ").strip()
+    compact = re.sub(r"[^a-z0-9]", "", norm)
+
+    if norm.startswith("play group") or compact.startswith("playgroup"):
+        return "Play Group"
+    if norm.startswith("nursery") or norm.startswith("refresher course nur"):
+        return "Nursery"
+    if re.search(r"pp\s*1", norm) or compact.startswith("pp1") or norm in ("junior kg", "lkg"):
+        return "PP-1 / Junior KG / LKG"
+    if re.search(r"pp\s*2", norm) or compact.startswith("pp2") or norm in ("senior kg", "ukg"):
+        return "PP-2 / Senior KG / UKG"
+    if (
+        norm.startswith("summer camp")
+        or norm.startswith("summer program")
+        or "day care" in norm
+        or "daycare" in norm
+    ):
+        return "Summer Programs / Day Care"
+
+    core_lower = core.lower()
+    for label in HOMEWORK_CLASS_LABELS:
+        label_lower = label.lower()
+        if label_lower in core_lower or core_lower in label_lower:
+            return label
+    return None
+
+
+def normalize_portal_class_name(class_name: str) -> str:
+    """Store franchise portal class targets using canonical labels when possible."""
+    raw = (class_name or "").strip()
+    if not raw:
+        return ""
+    return _canonical_class_label(raw) or raw
+
+
+def _class_label_matches(student_class: str, target_class: str) -> bool:
+    """True when a child's class should receive centre content aimed at target_class."""
+    sc = (student_class or "").strip()
+    tc = (target_class or "").strip()
+    if not sc or not tc:
+        return False
+
+    sc_canon = _canonical_class_label(sc) or sc
+    tc_canon = _canonical_class_label(tc) or tc
+    if sc_canon == tc_canon:
+        return True
+    if sc_canon == tc or tc_canon == sc:
+        return True
+    if sc.lower() == tc.lower():
+        return True
+    return False
+
+
+def class_key(class_name: str | None) -> str:
+    """
+    Canonical match key for a class string; ``""`` means "all classes".
+
+    Canonical portal label when one applies, else the trimmed string —
+    lowercased either way.
+    """
+    raw = (class_name or "").strip()
+    if not raw:
+        return ""
+    label = _canonical_class_label(raw) or raw
+    return label.lower()[:CLASS_KEY_MAX_LENGTH]
+
+
+class ClassKeyMixin:
+    """Model mixin: recompute ``class_key`` from ``class_name`` on every save."""
+
+    def save(self, *args, **kwargs):
+        self.class_key = class_key(self.class_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "class_name" in update_fields and "class_key" not in update_fields:
+            kwargs["update_fields"] = [*update_fields, "class_key"]
+        super().save(*args, **kwargs)
+
+
+def backfill_class_keys(model, *, batch_size: int = 1000, only_missing: bool = False) -> int:
+    """
+    Recompute ``class_key`` for every row of ``model`` whose stored key is stale.
+
+    Works with historical models inside migrations. Returns the number of rows updated.
+    """
+    qs = model._default_manager.exclude(class_name="").order_by("pk")
+    if only_missing:
+        qs = qs.filter(class_key="")
+    stale = []
+    updated = 0
+    for row in qs.only("pk", "class_name", "class_key").iterator(chunk_size=batch_size):
+        key = class_key(row.class_name)
+        if row.class_key == key:
+            continue
+        row.class_key = key
+        stale.append(row)
+        if len(stale) >= batch_size:
+            model._default_manager.bulk_update(stale, ["class_key"])
+            updated += len(stale)
+            stale = []
+    if stale:
+        model._default_manager.bulk_update(stale, ["class_key"])
+        updated += len(stale)
+    return updated
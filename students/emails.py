@@ -11,6 +11,8 @@ from django.utils import timezone
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
+from common.sendgrid_email import send_sendgrid_batch, sendgrid_api_key
+
 if TYPE_CHECKING:
     from students.models import Announcement
 
@@ -32,7 +34,7 @@ def _parent_notification_email(parent_profile) -> str:
 def notify_parents_new_announcement(announcement: Announcement) -> int:
     """
     Email each parent at this franchise (except those with notifications_muted).
-    Returns number of successfully queued SendGrid sends (202).
+    Returns how many parents were in SendGrid requests that were accepted (202).
     """
     from students.portal_views import parent_profiles_for_announcement
 
@@ -48,8 +50,7 @@ def notify_parents_new_announcement(announcement: Announcement) -> int:
     if announcement.published_at and announcement.published_at > timezone.now():
         return 0
 
-    api_key = getattr(settings, "SENDGRID_API_KEY", None) or ""
-    if not api_key.strip():
+    if not sendgrid_api_key():
         logger.warning("SENDGRID_API_KEY not set; skipping parent announcement emails")
         return 0
 
@@ -93,34 +94,13 @@ def notify_parents_new_announcement(announcement: Announcement) -> int:
     </html>
     """
 
-    sent = 0
-    seen: set[str] = set()
-    sg = SendGridAPIClient(api_key)
-
-    for pp in parents:
-        addr = _parent_notification_email(pp)
-        if not addr or addr.lower() in seen:
-            continue
-        seen.add(addr.lower())
-        subject = f"{franchise_name}: {announcement.title}"
-        try:
-            message = Mail(
-                from_email=from_email,
-                to_emails=addr,
-                subject=subject,
-                html_content=html_content,
-            )
-            response = sg.send(message)
-            if response.status_code == 202:
-                sent += 1
-            else:
-                logger.warning(
-                    "SendGrid status %s sending announcement to %s",
-                    response.status_code,
-                    addr,
-                )
-        except Exception:
-            logger.exception("Failed to send announcement email to %s", addr)
+    # One personalization per parent (privacy), ≤1,000 parents per SendGrid call.
+    sent = send_sendgrid_batch(
+        to_emails=(_parent_notification_email(pp) for pp in parents.select_related("user")),
+        subject=f"{franchise_name}: {announcement.title}",
+        html_content=html_content,
+        from_email=from_email,
+    )
 
     logger.info(
         "Announcement id=%s: emailed %s parent(s) (franchise=%s)",
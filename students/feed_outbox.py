@@ -0,0 +1,253 @@
+"""Outbox for the parent notification feed fan-out.
+
+Saving a feed source (announcement, homework, event, …) or changing a child /
+parent profile used to compute the audience and write ``ParentNotification``
+rows in the request thread's ``on_commit``; a centre-wide announcement meant
+one write per parent before the response returned. Now the request only
+inserts a ``ParentFeedJob`` in its own transaction (``enqueue_rows`` /
+``enqueue_parent``), so the job commits — or rolls back — with the change.
+``drain_jobs`` claims due jobs (``SELECT … FOR UPDATE SKIP LOCKED``), merges
+repeats of the same source / parent and runs ``notification_feed`` on them;
+failures are retried with exponential backoff up to
+``PARENT_FEED_OUTBOX_MAX_ATTEMPTS``.
+
+    python manage.py sync_parent_feeds            # drain now (cron)
+    python manage.py sync_parent_feeds --stats
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import timedelta
+from typing import Any, Iterable
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from common.env import int_setting
+
+from .models import ParentFeedJob
+
+logger = logging.getLogger(__name__)
+
+Status = ParentFeedJob.Status
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 30
+MAX_BACKOFF_SECONDS = 3600
+# Source ids per job; matches notification_feed.SYNC_CHUNK.
+IDS_PER_JOB = 500
+# A job left ``running`` this long belongs to a crashed drainer.
+RUNNING_STALE_SECONDS = 900
+
+_drain_lock = threading.Lock()
+_drain_again = threading.Event()
+
+
+def outbox_batch_size() -> int:
+    return max(1, min(500, int_setting("PARENT_FEED_OUTBOX_BATCH_SIZE", DEFAULT_BATCH_SIZE)))
+
+
+def max_attempts() -> int:
+    return max(1, int_setting("PARENT_FEED_OUTBOX_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+
+def backoff_seconds(attempts: int) -> int:
+    """Delay before retry number ``attempts`` + 1: 30s · 2^(attempts-1), capped at 1h."""
+    return min(MAX_BACKOFF_SECONDS, DEFAULT_BACKOFF_SECONDS * (2 ** max(0, attempts - 1)))
+
+
+# --- enqueue ---------------------------------------------------------------
+
+
+def enqueue_rows(source: str, source_ids: Iterable[int]) -> int:
+    """Queue a feed sync for ``source`` rows and kick a drain after commit; returns jobs written."""
+    ids = sorted({int(pk) for pk in source_ids if pk is not None})
+    if not source or not ids:
+        return 0
+    now = timezone.now()
+    jobs = [
+        ParentFeedJob(source=source, source_ids=ids[start : start + IDS_PER_JOB], next_attempt_at=now)
+        for start in range(0, len(ids), IDS_PER_JOB)
+    ]
+    ParentFeedJob.objects.bulk_create(jobs)
+    transaction.on_commit(kick_drain)
+    return len(jobs)
+
+
+def enqueue_parent(parent_id, sources: Iterable[str] | None = None) -> int:
+    """Queue a rebuild of one parent's feed (``sources`` only, else all of them)."""
+    if parent_id is None:
+        return 0
+    ParentFeedJob.objects.create(
+        parent_id=parent_id,
+        sources=sorted(set(sources)) if sources is not None else [],
+        next_attempt_at=timezone.now(),
+    )
+    transaction.on_commit(kick_drain)
+    return 1
+
+
+# --- drain -----------------------------------------------------------------
+
+
+def _claim_due(limit: int) -> list[ParentFeedJob]:
+    now = timezone.now()
+    stale = now - timedelta(seconds=RUNNING_STALE_SECONDS)
+    with transaction.atomic():
+        ids = list(
+            ParentFeedJob.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status=Status.PENDING, next_attempt_at__lte=now)
+                | Q(status=Status.RUNNING, next_attempt_at__lt=stale)
+            )
+            .order_by("next_attempt_at", "id")
+            .values_list("pk", flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        ParentFeedJob.objects.filter(pk__in=ids).update(
+            status=Status.RUNNING,
+            attempts=F("attempts") + 1,
+            next_attempt_at=now,
+        )
+    return list(ParentFeedJob.objects.filter(pk__in=ids).order_by("next_attempt_at", "id"))
+
+
+def _merge(jobs: list[ParentFeedJob]) -> list[tuple[list[ParentFeedJob], dict[str, Any]]]:
+    """Group claimed jobs into units of work: one per source (union of ids) and one per parent."""
+    by_source: dict[str, tuple[list[ParentFeedJob], set[int]]] = {}
+    by_parent: dict[int, tuple[list[ParentFeedJob], set[str] | None]] = {}
+    for job in jobs:
+        if job.parent_id:
+            members, sources = by_parent.get(job.parent_id, ([], set()))
+            members.append(job)
+            # An empty list means every source; it absorbs narrower rebuilds.
+            if sources is None or not job.sources:
+                sources = None
+            else:
+                sources |= set(job.sources)
+            by_parent[job.parent_id] = (members, sources)
+        else:
+            members, ids = by_source.setdefault(job.source, ([], set()))
+            members.append(job)
+            ids.update(job.source_ids or [])
+    units = [(members, {"source": source, "ids": sorted(ids)}) for source, (members, ids) in by_source.items()]
+    units += [
+        (members, {"parent_id": parent_id, "sources": sorted(sources) if sources is not None else None})
+        for parent_id, (members, sources) in by_parent.items()
+    ]
+    return units
+
+
+def _run(unit: dict[str, Any], audience) -> None:
+    from . import notification_feed
+
+    if "parent_id" in unit:
+        notification_feed.rebuild_parent_feed(unit["parent_id"], unit["sources"])
+        return
+    source = unit["source"]
+    model = notification_feed.source_models()[source]
+    objs = list(model._default_manager.filter(pk__in=unit["ids"]).order_by("pk"))
+    notification_feed.sync_objects(source, objs, audience)
+    # Rows deleted before the job ran: retract whatever the delete signal missed.
+    for pk in set(unit["ids"]) - {obj.pk for obj in objs}:
+        notification_feed.retract(source, pk)
+
+
+def _finish(jobs: list[ParentFeedJob], error: str = "") -> str:
+    if not error:
+        ParentFeedJob.objects.filter(pk__in=[job.pk for job in jobs]).delete()
+        return "done"
+    now = timezone.now()
+    limit = max_attempts()
+    outcome = "retry"
+    for job in jobs:
+        job.last_error = error[:2000]
+        if job.attempts >= limit:
+            job.status = Status.FAILED
+            outcome = "failed"
+        else:
+            job.status = Status.PENDING
+            job.next_attempt_at = now + timedelta(seconds=backoff_seconds(job.attempts))
+    ParentFeedJob.objects.bulk_update(jobs, ["status", "next_attempt_at", "last_error"])
+    return outcome
+
+
+def drain_jobs(*, batch_size: int | None = None, max_batches: int | None = None) -> dict[str, int]:
+    """Run every due job; returns counts of claimed jobs and of merged units by outcome."""
+    from .notification_feed import FeedAudience
+
+    batch_size = batch_size or outbox_batch_size()
+    summary = {"batches": 0, "jobs": 0, "done": 0, "retry": 0, "failed": 0}
+    while max_batches is None or summary["batches"] < max_batches:
+        jobs = _claim_due(batch_size)
+        if not jobs:
+            break
+        summary["batches"] += 1
+        summary["jobs"] += len(jobs)
+        # Centre audiences are looked up once per batch.
+        audience = FeedAudience()
+        for members, unit in _merge(jobs):
+            try:
+                _run(unit, audience)
+                error = ""
+            except Exception as exc:
+                logger.exception("Parent feed job failed: %s", unit)
+                error = str(exc) or exc.__class__.__name__
+            summary[_finish(members, error)] += 1
+        if len(jobs) < batch_size:
+            break
+    return summary
+
+
+def _drain_in_background() -> None:
+    if not _drain_lock.acquire(blocking=False):
+        return
+    try:
+        close_old_connections()
+        while _drain_again.is_set():
+            _drain_again.clear()
+            try:
+                summary = drain_jobs()
+                if summary.get("jobs"):
+                    logger.info("Parent feed outbox drained: %s", summary)
+            except Exception:
+                logger.exception("Parent feed outbox drain failed")
+    finally:
+        connection.close()
+        _drain_lock.release()
+
+
+def kick_drain() -> None:
+    """Run due feed jobs soon in this process; concurrent kicks share one drainer thread."""
+    if not getattr(settings, "PARENT_FEED_OUTBOX_AUTO_DRAIN", True):
+        # Left for the next explicit drain (cron, tests).
+        return
+    _drain_again.set()
+    if _drain_lock.locked():
+        return
+    thread = threading.Thread(target=_drain_in_background, name="parent-feed-drain", daemon=True)
+    thread.start()
+
+
+def replay_failed(*, ids: list[int] | None = None) -> int:
+    """Reset given-up jobs so the next drain retries them from attempt one."""
+    qs = ParentFeedJob.objects.filter(status=Status.FAILED)
+    if ids:
+        qs = qs.filter(pk__in=ids)
+    return qs.update(status=Status.PENDING, attempts=0, next_attempt_at=timezone.now(), last_error="")
+
+
+def outbox_metrics() -> dict[str, Any]:
+    """Per-status job counts plus the age of the oldest pending job (seconds)."""
+    counts: dict[str, Any] = {choice: 0 for choice in Status.values}
+    for row in ParentFeedJob.objects.order_by().values("status").annotate(n=Count("id")):
+        counts[row["status"]] = row["n"]
+    oldest = ParentFeedJob.objects.filter(status=Status.PENDING).aggregate(oldest=Min("created_at"))["oldest"]
+    counts["oldest_pending_seconds"] = int((timezone.now() - oldest).total_seconds()) if oldest else None
+    return counts
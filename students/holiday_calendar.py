@@ -0,0 +1,192 @@
+"""
+Compiled holiday calendar per centre and academic year.
+
+``collect_holiday_map`` used to load every active HOLIDAY_LISTS document, run
+``document_matches_franchise`` on each and parse their JSON entries on every
+attendance list, calendar month and ``day_is_holiday`` check. Instead each
+``(centre, academic year)`` is compiled once into a ``{"YYYY-MM-DD": label}``
+map (CMS holidays for the centre's city, then centre closed days) and kept in
+the shared cache; readers slice it with dictionary lookups. Weekends are not
+stored, ``collect_holiday_map`` fills them in.
+
+Keys carry two generations, one for all centres and one per centre, kept as
+``holidays`` ``PortalChangeStamp`` rows so a cache eviction or flush cannot
+lose them (only the compiled maps live in the cache). ``students.signals``
+bumps them after commit when a HOLIDAY_LISTS document (head-office → every
+centre, centre document → that centre), a closed day or the centre row (its
+city / state pick the entries) changes, so the next read recompiles.
+``HOLIDAY_CALENDAR_CACHE_SECONDS`` bounds staleness for writes that skip
+signals (queryset ``.update()``); ``rebuild_holiday_calendars`` recompiles on
+demand.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import Iterable
+
+from django.core.cache import cache
+
+from common.env import int_setting
+
+logger = logging.getLogger(__name__)
+
+# Academic years run June → May ("AY 2026-27" = 2026-06-01 … 2027-05-31).
+ACADEMIC_YEAR_START_MONTH = 6
+
+CACHE_PREFIX = "holiday-calendar"
+# ``holidays`` stamp owner for head-office changes that reach every centre.
+ALL_CENTRES = 0
+
+
+def academic_year_of(day: date) -> int:
+    """Start year of the academic year ``day`` falls in."""
+    return day.year if day.month >= ACADEMIC_YEAR_START_MONTH else day.year - 1
+
+
+def academic_year_bounds(start_year: int) -> tuple[date, date]:
+    start = date(start_year, ACADEMIC_YEAR_START_MONTH, 1)
+    next_start = date(start_year + 1, ACADEMIC_YEAR_START_MONTH, 1)
+    return start, date.fromordinal(next_start.toordinal() - 1)
+
+
+def academic_year_label(start_year: int) -> str:
+    """``2026`` → ``"AY 2026-27"`` (the ParentDocument.academic_year format)."""
+    return f"AY {start_year}-{(start_year + 1) % 100:02d}"
+
+
+def cache_seconds() -> int:
+    return max(0, int_setting("HOLIDAY_CALENDAR_CACHE_SECONDS", 0))
+
+
+# ----- Compilation -----
+
+
+def _entry_day(entry) -> date | None:
+    if not isinstance(entry, dict):
+        return None
+    raw = str(entry.get("date") or "")[:10]
+    if len(raw) != 10:
+        return None
+    try:
+        return date(int(raw[0:4]), int(raw[5:7]), int(raw[8:10]))
+    except (TypeError, ValueError):
+        return None
+
+
+def compile_years(franchise, start_years: Iterable[int]) -> dict[int, dict[str, str]]:
+    """``{start_year: {"YYYY-MM-DD": label}}`` from the database (documents loaded once)."""
+    from documents.holiday_entries import franchise_city_label
+
+    from .attendance_logic import _holiday_entry_applies, _merged_holiday_entries_for_franchise
+    from .models import CentreAttendanceClosedDay
+
+    years = {year: academic_year_bounds(year) for year in set(start_years)}
+    compiled: dict[int, dict[str, str]] = {year: {} for year in years}
+    if franchise is None or not years:
+        return compiled
+
+    def bucket(day: date) -> dict[str, str] | None:
+        return compiled.get(academic_year_of(day))
+
+    centre_city = franchise_city_label(franchise)
+    for entry in _merged_holiday_entries_for_franchise(franchise):
+        day = _entry_day(entry)
+        if day is None or not _holiday_entry_applies(entry, centre_city):
+            continue
+        labels = bucket(day)
+        if labels is not None:
+            name = (entry.get("name") or entry.get("holiday") or "Holiday").strip() or "Holiday"
+            labels[day.isoformat()] = name
+
+    first = min(start for start, _ in years.values())
+    last = max(end for _, end in years.values())
+    for row in CentreAttendanceClosedDay.objects.filter(
+        franchise=franchise,
+        date__gte=first,
+        date__lte=last,
+    ).only("date", "label"):
+        labels = bucket(row.date)
+        if labels is not None:
+            labels[row.date.isoformat()] = (row.label or "Centre closed").strip() or "Centre closed"
+    return compiled
+
+
+# ----- Shared cache -----
+
+
+def _generations(franchise_id: int) -> tuple[int, int]:
+    """``(all centres, this centre)`` holiday stamp versions in one query; 0 for a stamp never bumped."""
+    from .models import PortalChangeStamp
+
+    versions = dict(
+        PortalChangeStamp.objects.filter(
+            scope=PortalChangeStamp.Scope.HOLIDAYS, owner_id__in=[ALL_CENTRES, franchise_id]
+        ).values_list("owner_id", "version")
+    )
+    return versions.get(ALL_CENTRES, 0), versions.get(franchise_id, 0)
+
+
+def _calendar_key(franchise_id: int, start_year: int, generations: tuple[int, int]) -> str:
+    return f"{CACHE_PREFIX}:{franchise_id}:{start_year}:{generations[0]}:{generations[1]}"
+
+
+def holidays_for_years(franchise, start_years: Iterable[int]) -> dict[int, dict[str, str]]:
+    """Compiled calendars for ``start_years``, from the shared cache when possible."""
+    start_years = sorted(set(start_years))
+    ttl = cache_seconds()
+    if franchise is None or not ttl:
+        return compile_years(franchise, start_years)
+    try:
+        generations = _generations(franchise.pk)
+        keys = {year: _calendar_key(franchise.pk, year, generations) for year in start_years}
+        cached = cache.get_many(list(keys.values()))
+    except Exception:
+        logger.exception("Holiday calendar cache read failed")
+        return compile_years(franchise, start_years)
+
+    result = {year: cached[key] for year, key in keys.items() if key in cached}
+    missing = [year for year in start_years if year not in result]
+    if missing:
+        compiled = compile_years(franchise, missing)
+        result.update(compiled)
+        try:
+            cache.set_many({keys[year]: labels for year, labels in compiled.items()}, ttl)
+        except Exception:
+            logger.exception("Holiday calendar cache write failed")
+    return result
+
+
+def holidays_between(franchise, start: date, end: date) -> dict[date, str]:
+    """CMS holidays and centre closed days in ``start``…``end`` (no weekends)."""
+    if franchise is None or end < start:
+        return {}
+    calendars = holidays_for_years(franchise, range(academic_year_of(start), academic_year_of(end) + 1))
+    if start == end:
+        label = calendars.get(academic_year_of(start), {}).get(start.isoformat())
+        return {start: label} if label is not None else {}
+    first, last = start.isoformat(), end.isoformat()
+    return {
+        date.fromisoformat(day): label
+        for labels in calendars.values()
+        for day, label in labels.items()
+        if first <= day <= last
+    }
+
+
+# ----- Invalidation -----
+
+
+def centres_changed(franchise_ids: Iterable[int | None]) -> None:
+    """Recompile these centres' calendars on next read (after commit)."""
+    from .change_stamps import holiday_calendars_changed
+
+    holiday_calendars_changed(fid for fid in franchise_ids if fid)
+
+
+def all_centres_changed() -> None:
+    """A head-office holiday list changed: recompile every centre on next read (after commit)."""
+    from .change_stamps import holiday_calendars_changed
+
+    holiday_calendars_changed([ALL_CENTRES])
@@ -0,0 +1,308 @@
+"""
+Maintained unread counters for the parent and centre inboxes.
+
+Badge reads (``parent_unread_count`` / ``franchise_unread_count``) are one
+primary-key lookup. Writers adjust the stored number with ``F()`` updates:
+
+- parent feed entries added / removed by ``students.notification_feed`` and
+  marked read by ``ParentNotificationReadView`` (counted as the default feed
+  lists them: focus-source entries of the counter's ``focus_student`` only);
+- head-office campaigns published to a centre, driver activity logged, and
+  items marked read by ``FranchiseNotificationReadView``.
+
+Changes that are awkward to count exactly (edits that move an item's
+visibility, ticket reminders, scheduled rows going live, parental tips leaving
+the 30-day window) set ``recount_at``; the next read at or after that time
+recounts that one inbox. Missing counter rows are created by a recount on
+first read, and a read with a different focus child recounts too. ``manage.py reconcile_inbox_counters`` recounts everything and
+reports drift.
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from django.db.models import Count, F, Min, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import (
+    FranchiseInboxCounter,
+    FranchiseNotificationRead,
+    ParentInboxCounter,
+    ParentNotification,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _bump(model, pk_field: str, deltas: dict[int, int]) -> None:
+    """Apply per-owner deltas to existing counter rows (absent rows recount on first read)."""
+    by_delta: dict[int, list[int]] = {}
+    for owner_id, delta in deltas.items():
+        if delta:
+            by_delta.setdefault(delta, []).append(owner_id)
+    for delta, owner_ids in by_delta.items():
+        model.objects.filter(**{f"{pk_field}__in": owner_ids}).update(unread=Greatest(F("unread") + delta, 0))
+
+
+def _schedule(model, pk_field: str, owner_ids: Iterable[int], when: datetime) -> None:
+    """Ask for a recount at ``when`` unless one is already due earlier."""
+    owner_ids = list(owner_ids)
+    if not owner_ids:
+        return
+    model.objects.filter(**{f"{pk_field}__in": owner_ids}).filter(
+        Q(recount_at__isnull=True) | Q(recount_at__gt=when)
+    ).update(recount_at=when)
+
+
+# ----- Parent inbox -----
+
+
+def _parent_counts(row: ParentNotification, now: datetime, focus_student_id: int | None = None) -> bool:
+    """Whether ``row`` is in the parent badge right now."""
+    from .notification_feed import PARENTAL_TIP_WINDOW, Source, in_focus
+
+    if row.read_at is not None or not in_focus(row, focus_student_id):
+        return False
+    if row.visible_from is not None and row.visible_from > now:
+        return False
+    if row.source == Source.PARENTAL_TIP and row.published_at < now - PARENTAL_TIP_WINDOW:
+        return False
+    return True
+
+
+def _parent_change_at(row: ParentNotification, now: datetime) -> datetime | None:
+    """When an unread ``row`` enters or leaves the badge without being written."""
+    from .notification_feed import PARENTAL_TIP_WINDOW, Source
+
+    if row.read_at is not None:
+        return None
+    if row.visible_from is not None and row.visible_from > now:
+        return row.visible_from
+    if row.source == Source.PARENTAL_TIP:
+        expires = row.published_at + PARENTAL_TIP_WINDOW
+        return expires if expires > now else None
+    return None
+
+
+def parent_feed_changed(added=(), removed=(), changed_parent_ids: Iterable[int] = ()) -> None:
+    """Adjust parent counters for feed entries written by ``notification_feed``."""
+    now = timezone.now()
+    rows = [(r, 1) for r in added] + [(r, -1) for r in removed]
+    deltas: dict[int, int] = {}
+    wake: dict[datetime, set[int]] = {}
+    try:
+        focus = _focus_students({row.parent_id for row, _sign in rows})
+        for row, sign in rows:
+            if _parent_counts(row, now, focus.get(row.parent_id)):
+                deltas[row.parent_id] = deltas.get(row.parent_id, 0) + sign
+            if sign > 0:
+                when = _parent_change_at(row, now)
+                if when is not None:
+                    wake.setdefault(when, set()).add(row.parent_id)
+        _bump(ParentInboxCounter, "parent_id", deltas)
+        for when, parent_ids in wake.items():
+            _schedule(ParentInboxCounter, "parent_id", parent_ids, when)
+        _schedule(ParentInboxCounter, "parent_id", set(changed_parent_ids), now)
+    except Exception:
+        logger.exception("Failed to adjust parent inbox counters")
+
+
+def _focus_students(parent_ids: Iterable[int]) -> dict[int, int | None]:
+    """``{parent_id: focus_student_id}`` for parents with a counter row."""
+    parent_ids = set(parent_ids)
+    if not parent_ids:
+        return {}
+    return dict(
+        ParentInboxCounter.objects.filter(parent_id__in=parent_ids).values_list("parent_id", "focus_student_id")
+    )
+
+
+def parent_entry_read(row: ParentNotification, now: datetime | None = None) -> None:
+    """One entry went from unread to read (``row`` as it was before the read)."""
+    focus = _focus_students([row.parent_id])
+    if row.parent_id in focus and _parent_counts(row, now or timezone.now(), focus[row.parent_id]):
+        _bump(ParentInboxCounter, "parent_id", {row.parent_id: -1})
+
+
+def recount_parent(parent_id: int, focus_student_id: int | None = None) -> ParentInboxCounter:
+    from .notification_feed import PARENTAL_TIP_WINDOW, Source, focus_q, visible_feed_q
+
+    now = timezone.now()
+    unread = ParentNotification.objects.filter(parent_id=parent_id, read_at__isnull=True)
+    count = unread.filter(visible_feed_q(now=now), focus_q(focus_student_id)).count()
+    next_change = unread.aggregate(
+        scheduled=Min("visible_from", filter=Q(visible_from__gt=now)),
+        tip=Min(
+            "published_at",
+            filter=Q(source=Source.PARENTAL_TIP, published_at__gte=now - PARENTAL_TIP_WINDOW),
+        ),
+    )
+    candidates = [next_change["scheduled"]]
+    if next_change["tip"] is not None:
+        candidates.append(next_change["tip"] + PARENTAL_TIP_WINDOW)
+    recount_at = min((c for c in candidates if c is not None), default=None)
+    counter, _created = ParentInboxCounter.objects.update_or_create(
+        parent_id=parent_id,
+        defaults={
+            "focus_student_id": focus_student_id,
+            "unread": count,
+            "recount_at": recount_at,
+            "reconciled_at": now,
+        },
+    )
+    return counter
+
+
+def parent_unread_count(parent_id: int, focus_student_id: int | None = None) -> int:
+    """
+    Badge number for a parent: stored counter, recounted when due.
+
+    ``focus_student_id`` is the child the default feed falls back to; the
+    counter is recounted when it was kept for another child.
+    """
+    counter = ParentInboxCounter.objects.filter(parent_id=parent_id).first()
+    if (
+        counter is None
+        or counter.focus_student_id != focus_student_id
+        or (counter.recount_at is not None and counter.recount_at <= timezone.now())
+    ):
+        counter = recount_parent(parent_id, focus_student_id)
+    return counter.unread
+
+
+# ----- Centre inbox -----
+
+
+def count_franchise_unread(franchise) -> int:
+    """Unread centre inbox items, counted in SQL (reconcile / recount path)."""
+    from franchises.models import DriverActivityLog
+
+    from .portal_views import _franchise_ho_inbox_announcement_qs, _franchise_support_ticket_reminder_qs
+
+    read = FranchiseNotificationRead.objects.filter(franchise=franchise)
+
+    def unread(qs, source: str) -> int:
+        prefix = f"{source}-"
+        read_ids = [
+            int(key[len(prefix):])
+            for key in read.filter(notification_key__startswith=prefix).values_list("notification_key", flat=True)
+            if key[len(prefix):].isdigit()
+        ]
+        return qs.order_by().exclude(pk__in=read_ids).count()
+
+    return (
+        unread(_franchise_ho_inbox_announcement_qs(franchise), "head_office")
+        + unread(_franchise_support_ticket_reminder_qs(franchise), "support_ticket")
+        + unread(DriverActivityLog.objects.filter(driver__franchise=franchise), "driver_activity")
+    )
+
+
+def recount_franchise(franchise) -> FranchiseInboxCounter:
+    from .models import Announcement
+
+    now = timezone.now()
+    scheduled = (
+        Announcement.objects.filter(
+            franchise=franchise,
+            is_active=True,
+            visible_to_centres=True,
+            campaign_id__isnull=False,
+            published_at__gt=now,
+        ).aggregate(first=Min("published_at"))["first"]
+    )
+    counter, _created = FranchiseInboxCounter.objects.update_or_create(
+        franchise_id=franchise.pk,
+        defaults={"unread": count_franchise_unread(franchise), "recount_at": scheduled, "reconciled_at": now},
+    )
+    return counter
+
+
+def franchise_unread_count(franchise) -> int:
+    """Badge number for a centre: stored counter, recounted when due."""
+    counter = FranchiseInboxCounter.objects.filter(franchise_id=franchise.pk).first()
+    if counter is None or (counter.recount_at is not None and counter.recount_at <= timezone.now()):
+        counter = recount_franchise(franchise)
+    return counter.unread
+
+
+def franchise_inbox_added(franchise_id, when: datetime | None = None) -> None:
+    """A new unread item reached a centre inbox (visible from ``when``, default now)."""
+    if franchise_id is None:
+        return
+    try:
+        if when is not None and when > timezone.now():
+            _schedule(FranchiseInboxCounter, "franchise_id", [franchise_id], when)
+        else:
+            _bump(FranchiseInboxCounter, "franchise_id", {franchise_id: 1})
+    except Exception:
+        logger.exception("Failed to adjust centre inbox counter %s", franchise_id)
+
+
+def franchise_inbox_read(franchise_id) -> None:
+    _bump(FranchiseInboxCounter, "franchise_id", {franchise_id: -1})
+
+
+def franchise_inbox_changed(franchise_ids: Iterable[int]) -> None:
+    """Recount these centres on their next read."""
+    try:
+        _schedule(FranchiseInboxCounter, "franchise_id", {f for f in franchise_ids if f}, timezone.now())
+    except Exception:
+        logger.exception("Failed to schedule centre inbox recount")
+
+
+# ----- Reconcile -----
+
+
+def reconcile_parents(parent_ids: Iterable[int] | None = None) -> dict[str, int]:
+    """Recount parent counters that disagree with the feed; returns ``{"checked", "drifted", "created"}``."""
+    from franchises.models import ParentProfile
+
+    from .notification_feed import focus_q, visible_feed_q
+
+    now = timezone.now()
+    profiles = ParentProfile.objects.all()
+    if parent_ids is not None:
+        profiles = profiles.filter(pk__in=list(parent_ids))
+    focus = F("parent__inbox_counter__focus_student_id")
+    actual = dict(
+        ParentNotification.objects.filter(parent__in=profiles, read_at__isnull=True)
+        .filter(visible_feed_q(now=now))
+        .filter(Q(parent__inbox_counter__focus_student_id__isnull=True) | focus_q(focus))
+        .values("parent_id")
+        .annotate(n=Count("id"))
+        .values_list("parent_id", "n")
+    )
+    stored = {
+        parent_id: (unread, focus_student_id)
+        for parent_id, unread, focus_student_id in ParentInboxCounter.objects.filter(parent__in=profiles).values_list(
+            "parent_id", "unread", "focus_student_id"
+        )
+    }
+    drifted = {pid for pid, (unread, _focus) in stored.items() if actual.get(pid, 0) != unread}
+    created = set(actual) - set(stored)
+    for parent_id in sorted(drifted | created):
+        recount_parent(parent_id, stored.get(parent_id, (0, None))[1])
+    return {"checked": len(set(actual) | set(stored)), "drifted": len(drifted), "created": len(created)}
+
+
+def reconcile_franchises(franchise_ids: Iterable[int] | None = None) -> dict[str, int]:
+    """Recount every centre counter; returns ``{"checked", "drifted", "created"}``."""
+    from franchises.models import Franchise
+
+    franchises = Franchise.objects.all().order_by("pk")
+    if franchise_ids is not None:
+        franchises = franchises.filter(pk__in=list(franchise_ids))
+    stored = dict(FranchiseInboxCounter.objects.values_list("franchise_id", "unread"))
+    checked = drifted = created = 0
+    for franchise in franchises.iterator():
+        counter = recount_franchise(franchise)
+        checked += 1
+        if franchise.pk not in stored:
+            created += 1
+        elif stored[franchise.pk] != counter.unread:
+            drifted += 1
+    return {"checked": checked, "drifted": drifted, "created": created}
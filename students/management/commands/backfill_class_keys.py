@@ -0,0 +1,47 @@
+"""
+Recompute stored class_key values from class_name.
+
+  python manage.py backfill_class_keys                 # every class-targeted model
+  python manage.py backfill_class_keys --missing-only  # only rows with an empty key
+  python manage.py backfill_class_keys --model events.Event
+
+Keys are set on every Model.save(); run this after queryset .update() /
+bulk_create writes to class_name, or after changing students.class_labels.
+Safe to re-run — only rows whose key differs are written.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from students.class_labels import backfill_class_keys
+
+CLASS_KEY_MODELS = (
+    "students.StudentProfile",
+    "students.HomeworkAssignment",
+    "students.DailyActivity",
+    "students.Announcement",
+    "events.Event",
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute class_key for students, homework, daily activities, announcements and events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", action="append", default=[], help=f"Only these: {', '.join(CLASS_KEY_MODELS)}.")
+        parser.add_argument("--missing-only", action="store_true", help="Skip rows that already have a key.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        labels = options["model"] or list(CLASS_KEY_MODELS)
+        unknown = sorted(set(labels) - set(CLASS_KEY_MODELS))
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+        for label in labels:
+            updated = backfill_class_keys(
+                apps.get_model(label),
+                batch_size=max(1, options["batch_size"]),
+                only_missing=options["missing_only"],
+            )
+            self.stdout.write(f"{label}: updated={updated}")
+        self.stdout.write(self.style.SUCCESS("class keys up to date"))
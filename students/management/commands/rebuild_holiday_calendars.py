@@ -0,0 +1,43 @@
+"""
+Recompile the cached centre holiday calendars (students.holiday_calendar).
+
+  python manage.py rebuild_holiday_calendars                     # every active centre, current academic year
+  python manage.py rebuild_holiday_calendars --franchise-id 12 --year 2026 --year 2027
+
+Holiday-list, closed-day and centre saves already invalidate the calendars; run
+this after imports or queryset .update() on those rows, or to warm the cache
+after a deploy. Safe to re-run.
+"""
+
+from django.core.management.base import BaseCommand
+
+from franchises.models import Franchise
+from students import holiday_calendar
+from students.portal_schedule import portal_today
+
+
+class Command(BaseCommand):
+    help = "Invalidate and recompile centre holiday calendars for one or more academic years."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--franchise-id", type=int, action="append", default=[], help="Only these centres.")
+        parser.add_argument(
+            "--year", type=int, action="append", default=[], help="Academic year start (2026 = AY 2026-27)."
+        )
+
+    def handle(self, *args, **options):
+        years = options["year"] or [holiday_calendar.academic_year_of(portal_today())]
+        centres = Franchise.objects.filter(is_active=True).order_by("pk")
+        if options["franchise_id"]:
+            centres = Franchise.objects.filter(pk__in=options["franchise_id"]).order_by("pk")
+            holiday_calendar.centres_changed(options["franchise_id"])
+        else:
+            holiday_calendar.all_centres_changed()
+
+        for centre in centres:
+            calendars = holiday_calendar.holidays_for_years(centre, years)
+            counts = " ".join(
+                f"{holiday_calendar.academic_year_label(year)}={len(labels)}" for year, labels in sorted(calendars.items())
+            )
+            self.stdout.write(f"centre {centre.pk}: {counts}")
+        self.stdout.write(self.style.SUCCESS("done"))
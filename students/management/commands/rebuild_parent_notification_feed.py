@@ -0,0 +1,58 @@
+"""
+Populate / repair the parent notification feed (students.ParentNotification).
+
+  python manage.py rebuild_parent_notification_feed                      # every source, every parent
+  python manage.py rebuild_parent_notification_feed --source homework --source event
+  python manage.py rebuild_parent_notification_feed --parent-id 42       # one family's feed
+
+Fans every published source row out to its audience exactly as a save would,
+carrying read state over from ParentNotificationRead, and deletes entries whose
+source row is gone or unpublished. Run once after migrating, and after bulk
+writes that skip model signals (queryset .update(), imports). Safe to re-run.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students import notification_feed
+from students.models import ParentNotification
+
+Source = ParentNotification.Source
+
+
+class Command(BaseCommand):
+    help = "Fan published announcements, homework, fees, routes, events, achievements, attendance and tips out to parent feeds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--source", action="append", default=[], help=f"Only these: {', '.join(Source.values)}.")
+        parser.add_argument("--parent-id", type=int, action="append", default=[], help="Only these parent profiles.")
+
+    def handle(self, *args, **options):
+        sources = options["source"] or list(Source.values)
+        unknown = sorted(set(sources) - set(Source.values))
+        if unknown:
+            raise CommandError(f"Unknown source(s): {', '.join(unknown)}")
+
+        if options["parent_id"]:
+            for parent_id in options["parent_id"]:
+                counts = notification_feed.rebuild_parent_feed(parent_id, sources)
+                self.stdout.write(f"parent {parent_id}: {_fmt(counts)}")
+            self.stdout.write(self.style.SUCCESS("done"))
+            return
+
+        models = notification_feed.source_models()
+        audience = notification_feed.FeedAudience()
+        for source in sources:
+            model = models[source]
+            counts = notification_feed.sync_queryset(source, model._default_manager.all(), audience)
+            gone = (
+                ParentNotification.objects.filter(source=source)
+                .exclude(source_id__in=model._default_manager.values("pk"))
+                .delete()[0]
+            )
+            counts["deleted"] += gone
+            self.stdout.write(f"{source}: {_fmt(counts)}")
+        self.stdout.write(self.style.SUCCESS("done"))
+
+
+def _fmt(counts: dict[str, int]) -> str:
+    return " ".join(f"{name}={value}" for name, value in counts.items())
@@ -0,0 +1,40 @@
+"""
+Recount the parent / centre inbox unread counters and report drift.
+
+  python manage.py reconcile_inbox_counters                 # parents and centres
+  python manage.py reconcile_inbox_counters --parents-only
+  python manage.py reconcile_inbox_counters --franchise-id 12 --centres-only
+
+Counters are adjusted as notifications are published and read; this recounts
+from ParentNotification / the centre inbox querysets and fixes any that drifted
+(queryset .update() / bulk writes, failed signal handlers). Schedule it nightly.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.inbox_counters import reconcile_franchises, reconcile_parents
+
+
+class Command(BaseCommand):
+    help = "Recount parent and centre inbox unread counters and report how many had drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--parents-only", action="store_true")
+        parser.add_argument("--centres-only", action="store_true")
+        parser.add_argument("--parent-id", type=int, action="append", default=[], help="Only these parent profiles.")
+        parser.add_argument("--franchise-id", type=int, action="append", default=[], help="Only these centres.")
+
+    def handle(self, *args, **options):
+        if options["parents_only"] and options["centres_only"]:
+            raise CommandError("--parents-only and --centres-only are mutually exclusive.")
+        if not options["centres_only"]:
+            result = reconcile_parents(options["parent_id"] or None)
+            self.stdout.write(f"parents: {_fmt(result)}")
+        if not options["parents_only"]:
+            result = reconcile_franchises(options["franchise_id"] or None)
+            self.stdout.write(f"centres: {_fmt(result)}")
+        self.stdout.write(self.style.SUCCESS("done"))
+
+
+def _fmt(counts: dict[str, int]) -> str:
+    return " ".join(f"{name}={value}" for name, value in counts.items())
@@ -3,6 +3,7 @@ from datetime import date, timedelta
 from django.core.management.base import BaseCommand
 
 from franchises.models import Franchise
+from students.class_labels import class_key
 from students.models import HomeworkAssignment
 
 CLASS_LABELS = [
@@ -228,6 +229,9 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("No new homework to create."))
             return
 
+        # bulk_create skips Model.save(), so fill the match key here.
+        for row in to_create:
+            row.class_key = class_key(row.class_name)
         created = HomeworkAssignment.objects.bulk_create(to_create, batch_size=500)
         if daily_full_year:
             mode = f"{per_date}/day × 365 days × all {len(CLASS_LABELS)} classes"
@@ -0,0 +1,43 @@
+"""
+Drain / replay the parent feed outbox (parent_feed_job).
+
+  python manage.py sync_parent_feeds                  # run every due fan-out job
+  python manage.py sync_parent_feeds --stats
+  python manage.py sync_parent_feeds --replay-failed [--id 42 --id 43]
+
+Web processes drain on their own right after each save commits; run this from
+cron so retries (and jobs queued by a process that exited) are picked up.
+"""
+
+from django.core.management.base import BaseCommand
+
+from students.feed_outbox import drain_jobs, outbox_metrics, replay_failed
+
+
+class Command(BaseCommand):
+    help = "Write queued parent notification feed fan-outs and parent feed rebuilds."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-batches", type=int, default=0, help="Stop after N claimed batches.")
+        parser.add_argument(
+            "--replay-failed",
+            action="store_true",
+            help="Retry jobs that exhausted their attempts (optionally only --id).",
+        )
+        parser.add_argument("--id", type=int, action="append", default=[], help="Job id for --replay-failed.")
+        parser.add_argument("--stats", action="store_true", help="Print outbox status counts only.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self._write_metrics()
+            return
+        if options["replay_failed"]:
+            reset = replay_failed(ids=options["id"] or None)
+            self.stdout.write(f"Replaying {reset} failed job(s).")
+        summary = drain_jobs(max_batches=options["max_batches"] or None)
+        self.stdout.write(self.style.SUCCESS(" ".join(f"{key}={value}" for key, value in summary.items())))
+        self._write_metrics()
+
+    def _write_metrics(self):
+        metrics = outbox_metrics()
+        self.stdout.write(" ".join(f"{key}={value}" for key, value in metrics.items()))
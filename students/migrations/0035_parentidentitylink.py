@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_correct_kerala_crm_roles'),
+        ('franchises', '0021_driveractivitylog'),
+        ('students', '0034_homeworksubmissionimage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParentIdentityLink',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='parent_identity_link', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('student_ids', models.JSONField(blank=True, default=list)),
+                ('resolved_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('parent_profile', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='identity_links', to='franchises.parentprofile')),
+                ('primary_student', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='students.studentprofile')),
+            ],
+        ),
+    ]
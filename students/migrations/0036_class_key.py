@@ -0,0 +1,105 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:02
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of students.class_labels.class_key as of this migration; later
+# changes to the live label rules must not change what this migration writes.
+CLASS_LABELS = (
+    "Play Group",
+    "Nursery",
+    "PP-1 / Junior KG / LKG",
+    "PP-2 / Senior KG / UKG",
+    "Summer Programs / Day Care",
+)
+LEGACY_CLASS_YEAR_SUFFIX = re.compile(r"\s+\d{2}-\d{2}$")
+
+
+def canonical_class_label(raw):
+    if raw in CLASS_LABELS:
+        return raw
+    core = LEGACY_CLASS_YEAR_SUFFIX.sub("", raw)
+    norm = core.lower().replace("_", " ").replace("-", " ").strip()
+    compact = re.sub(r"[^a-z0-9]", "", norm)
+    if norm.startswith("play group") or compact.startswith("playgroup"):
+        return "Play Group"
+    if norm.startswith("nursery") or norm.startswith("refresher course nur"):
+        return "Nursery"
+    if re.search(r"pp\s*1", norm) or compact.startswith("pp1") or norm in ("junior kg", "lkg"):
+        return "PP-1 / Junior KG / LKG"
+    if re.search(r"pp\s*2", norm) or compact.startswith("pp2") or norm in ("senior kg", "ukg"):
+        return "PP-2 / Senior KG / UKG"
+    if norm.startswith("summer camp") or norm.startswith("summer program") or "day care" in norm or "daycare" in norm:
+        return "Summer Programs / Day Care"
+    core_lower = core.lower()
+    for label in CLASS_LABELS:
+        if label.lower() in core_lower or core_lower in label.lower():
+            return label
+    return None
+
+
+def class_key(class_name):
+    raw = (class_name or "").strip()
+    if not raw:
+        return ""
+    return (canonical_class_label(raw) or raw).lower()[:120]
+
+
+def backfill(model):
+    stale = []
+    for row in model.objects.exclude(class_name="").only("pk", "class_name", "class_key").iterator(chunk_size=1000):
+        key = class_key(row.class_name)
+        if row.class_key != key:
+            row.class_key = key
+            stale.append(row)
+    model.objects.bulk_update(stale, ["class_key"], batch_size=1000)
+
+
+def fill_class_keys(apps, schema_editor):
+    for name in ("Announcement", "DailyActivity", "HomeworkAssignment", "StudentProfile"):
+        backfill(apps.get_model("students", name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('franchises', '0022_franchiseloginkey'),
+        ('students', '0035_parentidentitylink'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='class_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Canonical form of class_name (students.class_labels.class_key); set on save.', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='dailyactivity',
+            name='class_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Canonical form of class_name (students.class_labels.class_key); set on save.', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='homeworkassignment',
+            name='class_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Canonical form of class_name (students.class_labels.class_key); set on save.', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='class_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, help_text='Canonical form of class_name (students.class_labels.class_key); set on save.', max_length=120),
+        ),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['franchise', 'class_key'], name='idx_announce_franchise_ckey'),
+        ),
+        migrations.AddIndex(
+            model_name='dailyactivity',
+            index=models.Index(fields=['franchise', 'class_key'], name='idx_activity_franchise_ckey'),
+        ),
+        migrations.AddIndex(
+            model_name='homeworkassignment',
+            index=models.Index(fields=['franchise', 'class_key'], name='idx_homework_franchise_ckey'),
+        ),
+        migrations.RunPython(fill_class_keys, reverse_code=migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('franchises', '0022_franchiseloginkey'),
+        ('students', '0036_class_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParentNotification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('announcement', 'Announcement'), ('homework', 'Homework'), ('fees', 'Fees'), ('transport', 'Transport'), ('event', 'Event'), ('achievement', 'Achievement'), ('attendance', 'Attendance'), ('parental_tip', 'Parental tip')], max_length=20)),
+                ('source_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+                ('class_name', models.CharField(blank=True, default='', max_length=255)),
+                ('action_path', models.CharField(blank=True, default='', max_length=255)),
+                ('published_at', models.DateTimeField(help_text='Feed order; midnight IST for date-only sources.')),
+                ('published_on', models.DateField(blank=True, help_text='Shown instead of published_at when set.', null=True)),
+                ('visible_from', models.DateTimeField(blank=True, help_text='Hidden until then (scheduled rows).', null=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('parent', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_feed', to='franchises.parentprofile')),
+                ('student', models.ForeignKey(blank=True, help_text='The one child this entry is about; empty = family / centre-wide.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='students.studentprofile')),
+            ],
+            options={
+                'ordering': ['-published_at', '-id'],
+                'indexes': [models.Index(fields=['parent', '-published_at', '-id'], name='idx_parent_notification_feed'), models.Index(fields=['source', 'source_id'], name='idx_parent_notification_src')],
+                'constraints': [models.UniqueConstraint(fields=('parent', 'source', 'source_id'), name='uniq_parent_notification_source')],
+            },
+        ),
+    ]
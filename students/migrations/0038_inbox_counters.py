@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('franchises', '0022_franchiseloginkey'),
+        ('students', '0037_parentnotification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FranchiseInboxCounter',
+            fields=[
+                ('franchise', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox_counter', serialize=False, to='franchises.franchise')),
+                ('unread', models.PositiveIntegerField(default=0)),
+                ('recount_at', models.DateTimeField(blank=True, null=True)),
+                ('reconciled_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ParentInboxCounter',
+            fields=[
+                ('parent', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='inbox_counter', serialize=False, to='franchises.parentprofile')),
+                ('unread', models.PositiveIntegerField(default=0)),
+                ('recount_at', models.DateTimeField(blank=True, null=True)),
+                ('reconciled_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
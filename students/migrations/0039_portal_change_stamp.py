@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0038_inbox_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PortalChangeStamp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('global', 'Head office'), ('centre', 'Centre'), ('parent', 'Parent')], max_length=10)),
+                ('owner_id', models.PositiveBigIntegerField(default=0)),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'owner_id'), name='uniq_portal_change_stamp')],
+            },
+        ),
+    ]
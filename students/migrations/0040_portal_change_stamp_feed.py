@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0039_portal_change_stamp'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='portalchangestamp',
+            name='scope',
+            field=models.CharField(choices=[('global', 'Head office'), ('centre', 'Centre'), ('parent', 'Parent'), ('feed', 'Parent notification feed')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0040_portal_change_stamp_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ParentFeedJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(blank=True, choices=[('announcement', 'Announcement'), ('homework', 'Homework'), ('fees', 'Fees'), ('transport', 'Transport'), ('event', 'Event'), ('achievement', 'Achievement'), ('attendance', 'Attendance'), ('parental_tip', 'Parental tip')], default='', help_text='Source of ``source_ids``; empty for a parent rebuild.', max_length=20)),
+                ('source_ids', models.JSONField(blank=True, default=list)),
+                ('parent_id', models.PositiveBigIntegerField(blank=True, help_text='Parent whose feed is rebuilt.', null=True)),
+                ('sources', models.JSONField(blank=True, default=list, help_text='Sources to rebuild for the parent; empty = all.')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('next_attempt_at', models.DateTimeField()),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'parent_feed_job',
+                'ordering': ['next_attempt_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='idx_parent_feed_job_due')],
+            },
+        ),
+    ]
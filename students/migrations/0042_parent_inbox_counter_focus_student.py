@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0041_parent_feed_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parentinboxcounter',
+            name='focus_student',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='students.studentprofile'),
+        ),
+    ]
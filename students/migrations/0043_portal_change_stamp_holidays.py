@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0042_parent_inbox_counter_focus_student'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='portalchangestamp',
+            name='scope',
+            field=models.CharField(choices=[('global', 'Head office'), ('centre', 'Centre'), ('parent', 'Parent'), ('feed', 'Parent notification feed'), ('holidays', 'Holiday calendar')], max_length=10),
+        ),
+    ]
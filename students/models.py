@@ -1,15 +1,22 @@
 import uuid
 
+from django.conf import settings
 from django.db import models
 from django.utils import timezone
 from django.core.validators import RegexValidator
 
+from enquiries.change_tracking import ChangeTrackingMixin
 from franchises.models import DriverProfile, Franchise, ParentProfile
 
+from .class_labels import CLASS_KEY_MAX_LENGTH, ClassKeyMixin
 
-class StudentProfile(models.Model):
+
+class StudentProfile(ChangeTrackingMixin, ClassKeyMixin, models.Model):
     """Student profile linked to parent"""
 
+    # Read by students.signals (feed rebuilds, change stamps) through ChangeTrackingMixin.
+    tracked_fields = ("parent", "is_active", "class_name")
+
     class Gender(models.TextChoices):
         MALE = "M", "Male"
         FEMALE = "F", "Female"
@@ -18,6 +25,14 @@ class StudentProfile(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     class_name = models.CharField(max_length=50, help_text="e.g., KG-2")
+    class_key = models.CharField(
+        max_length=CLASS_KEY_MAX_LENGTH,
+        blank=True,
+        default="",
+        editable=False,
+        db_index=True,
+        help_text="Canonical form of class_name (students.class_labels.class_key); set on save.",
+    )
     section = models.CharField(max_length=50, blank=True, default="")
     gender = models.CharField(
         max_length=1,
@@ -136,7 +151,7 @@ class StudentAchievement(models.Model):
         return f"{t} ({who})"
 
 
-class HomeworkAssignment(models.Model):
+class HomeworkAssignment(ClassKeyMixin, models.Model):
     """Date-wise homework; optional per-student or per-class or whole centre."""
 
     class AttachmentKind(models.TextChoices):
@@ -156,6 +171,13 @@ class HomeworkAssignment(models.Model):
         blank=True,
         help_text="Must match StudentProfile.class_name when student is empty. Empty = all classes at centre.",
     )
+    class_key = models.CharField(
+        max_length=CLASS_KEY_MAX_LENGTH,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Canonical form of class_name (students.class_labels.class_key); set on save.",
+    )
     assigned_date = models.DateField()
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
@@ -169,6 +191,7 @@ class HomeworkAssignment(models.Model):
         ordering = ["-assigned_date", "-created_at"]
         verbose_name = "Homework assignment"
         verbose_name_plural = "Homework assignments"
+        indexes = [models.Index(fields=["franchise", "class_key"], name="idx_homework_franchise_ckey")]
 
     def __str__(self) -> str:
         t = (self.title or "").strip() or "(untitled)"
@@ -209,7 +232,7 @@ class HomeworkSubmissionImage(models.Model):
 
 
 
-class DailyActivity(models.Model):
+class DailyActivity(ClassKeyMixin, models.Model):
     """Daily activities conducted for each class at a center"""
 
     franchise = models.ForeignKey(Franchise, on_delete=models.CASCADE, related_name="daily_activities")
@@ -218,6 +241,13 @@ class DailyActivity(models.Model):
         blank=True,
         help_text="Must match StudentProfile.class_name. Empty = all classes at centre.",
     )
+    class_key = models.CharField(
+        max_length=CLASS_KEY_MAX_LENGTH,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Canonical form of class_name (students.class_labels.class_key); set on save.",
+    )
     activity_date = models.DateField()
     description = models.TextField(help_text="Short description/brief of the activities conducted.")
     created_at = models.DateTimeField(auto_now_add=True)
@@ -227,6 +257,7 @@ class DailyActivity(models.Model):
         ordering = ["-activity_date", "class_name"]
         verbose_name = "Daily activity"
         verbose_name_plural = "Daily activities"
+        indexes = [models.Index(fields=["franchise", "class_key"], name="idx_activity_franchise_ckey")]
         constraints = [
             models.UniqueConstraint(
                 fields=["franchise", "class_name", "activity_date"],
@@ -297,7 +328,7 @@ class AnnouncementCampaign(models.Model):
         return (self.title or "").strip() or "(untitled campaign)"
 
 
-class Announcement(models.Model):
+class Announcement(ClassKeyMixin, models.Model):
     campaign = models.ForeignKey(
         AnnouncementCampaign,
         on_delete=models.CASCADE,
@@ -322,6 +353,13 @@ class Announcement(models.Model):
         default="",
         help_text="When student is empty, limits to parents with a child in this class. Empty = all parents.",
     )
+    class_key = models.CharField(
+        max_length=CLASS_KEY_MAX_LENGTH,
+        blank=True,
+        default="",
+        editable=False,
+        help_text="Canonical form of class_name (students.class_labels.class_key); set on save.",
+    )
     visible_to_parents = models.BooleanField(default=True)
     visible_to_centres = models.BooleanField(default=True)
     published_at = models.DateTimeField(default=timezone.now)
@@ -338,6 +376,7 @@ class Announcement(models.Model):
         ordering = ["-published_at", "-created_at"]
         verbose_name = "Announcement"
         verbose_name_plural = "Announcements"
+        indexes = [models.Index(fields=["franchise", "class_key"], name="idx_announce_franchise_ckey")]
 
     def __str__(self) -> str:
         t = (self.title or "").strip() or "(untitled)"
@@ -709,3 +748,216 @@ class FranchiseNotificationRead(models.Model):
 
     def __str__(self) -> str:
         return f"{self.franchise_id}:{self.notification_key}"
+
+
+class ParentIdentityLink(models.Model):
+    """
+    Stored parent login → ``ParentProfile`` → children resolution.
+
+    Written by ``accounts.profile_access.refresh_parent_identity_link`` (at login,
+    on first portal request and from ``rebuild_parent_identity_links``); deleted by
+    signals when the user, profile or a linked student changes so the next request
+    resolves it again.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="parent_identity_link",
+    )
+    parent_profile = models.ForeignKey(
+        ParentProfile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="identity_links",
+    )
+    primary_student = models.ForeignKey(
+        StudentProfile,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    student_ids = models.JSONField(default=list, blank=True)
+    resolved_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.user_id}:{self.parent_profile_id}:{self.student_ids}"
+
+
+class ParentNotification(models.Model):
+    """
+    One parent's notification feed entry for a published source row.
+
+    Fanned out per audience by ``students.notification_feed`` when the source
+    (announcement, homework, fee, route, event, achievement, attendance, parental
+    tip) is saved; ``ParentNotificationsView`` pages through this table only.
+    """
+
+    class Source(models.TextChoices):
+        ANNOUNCEMENT = "announcement", "Announcement"
+        HOMEWORK = "homework", "Homework"
+        FEES = "fees", "Fees"
+        TRANSPORT = "transport", "Transport"
+        EVENT = "event", "Event"
+        ACHIEVEMENT = "achievement", "Achievement"
+        ATTENDANCE = "attendance", "Attendance"
+        PARENTAL_TIP = "parental_tip", "Parental tip"
+
+    parent = models.ForeignKey(ParentProfile, on_delete=models.CASCADE, related_name="notification_feed")
+    student = models.ForeignKey(
+        StudentProfile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="+",
+        help_text="The one child this entry is about; empty = family / centre-wide.",
+    )
+    source = models.CharField(max_length=20, choices=Source.choices)
+    source_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default="")
+    class_name = models.CharField(max_length=255, blank=True, default="")
+    action_path = models.CharField(max_length=255, blank=True, default="")
+    published_at = models.DateTimeField(help_text="Feed order; midnight IST for date-only sources.")
+    published_on = models.DateField(null=True, blank=True, help_text="Shown instead of published_at when set.")
+    visible_from = models.DateTimeField(null=True, blank=True, help_text="Hidden until then (scheduled rows).")
+    read_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-published_at", "-id"]
+        constraints = [
+            models.UniqueConstraint(fields=["parent", "source", "source_id"], name="uniq_parent_notification_source"),
+        ]
+        indexes = [
+            models.Index(fields=["parent", "-published_at", "-id"], name="idx_parent_notification_feed"),
+            models.Index(fields=["source", "source_id"], name="idx_parent_notification_src"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.parent_id}:{self.source}-{self.source_id}"
+
+    @property
+    def notification_key(self) -> str:
+        return f"{self.source}-{self.source_id}"
+
+
+class ParentFeedJob(models.Model):
+    """
+    Queued parent-feed fan-out (``students.feed_outbox``).
+
+    Source saves and child / profile changes insert a job in their own
+    transaction; a background drainer (or ``manage.py sync_parent_feeds``)
+    writes the ``ParentNotification`` rows off the request thread. Finished jobs
+    are deleted; failed ones keep their error until replayed.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        RUNNING = "running", "Running"
+        FAILED = "failed", "Failed"
+
+    source = models.CharField(
+        max_length=20,
+        choices=ParentNotification.Source.choices,
+        blank=True,
+        default="",
+        help_text="Source of ``source_ids``; empty for a parent rebuild.",
+    )
+    source_ids = models.JSONField(default=list, blank=True)
+    parent_id = models.PositiveBigIntegerField(null=True, blank=True, help_text="Parent whose feed is rebuilt.")
+    sources = models.JSONField(default=list, blank=True, help_text="Sources to rebuild for the parent; empty = all.")
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    last_error = models.TextField(blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "parent_feed_job"
+        ordering = ["next_attempt_at", "id"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="idx_parent_feed_job_due"),
+        ]
+
+    def __str__(self) -> str:
+        target = f"parent {self.parent_id}" if self.parent_id else f"{self.source} x{len(self.source_ids or [])}"
+        return f"feed job {self.pk}: {target} ({self.status})"
+
+
+class ParentInboxCounter(models.Model):
+    """
+    Maintained unread count for a parent's notification feed (badge polling).
+
+    Adjusted by ``students.inbox_counters`` as feed entries are added, removed
+    and read; ``recount_at`` schedules a recount for changes no write announces
+    (scheduled rows becoming visible, parental tips ageing out, edits).
+    Counts what the default feed lists: homework / events / attendance of
+    ``focus_student`` only (the child the feed falls back to without ``?student=``).
+    """
+
+    parent = models.OneToOneField(
+        ParentProfile, on_delete=models.CASCADE, primary_key=True, related_name="inbox_counter"
+    )
+    focus_student = models.ForeignKey(
+        StudentProfile, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    unread = models.PositiveIntegerField(default=0)
+    recount_at = models.DateTimeField(null=True, blank=True)
+    reconciled_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.parent_id}: {self.unread} unread"
+
+
+class FranchiseInboxCounter(models.Model):
+    """Maintained unread count for a centre's inbox (HO campaigns, ticket reminders, driver activity)."""
+
+    franchise = models.OneToOneField(
+        Franchise, on_delete=models.CASCADE, primary_key=True, related_name="inbox_counter"
+    )
+    unread = models.PositiveIntegerField(default=0)
+    recount_at = models.DateTimeField(null=True, blank=True)
+    reconciled_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.franchise_id}: {self.unread} unread"
+
+
+class PortalChangeStamp(models.Model):
+    """
+    Version of the parent-app read data for one scope (ETag source).
+
+    ``students.change_stamps`` bumps a centre's stamp when its announcements,
+    homework, events, documents or closed days change, a parent's stamp when
+    their children, fees or attendance change, a parent's feed stamp when their
+    notification entries or read marks change, and the global stamp for
+    head-office documents. Parent GET endpoints hash the stamps into their ETag.
+    ``holidays`` stamps are the generations of the compiled holiday calendars
+    (``students.holiday_calendar``; owner 0 = every centre).
+    """
+
+    class Scope(models.TextChoices):
+        GLOBAL = "global", "Head office"
+        CENTRE = "centre", "Centre"
+        PARENT = "parent", "Parent"
+        FEED = "feed", "Parent notification feed"
+        HOLIDAYS = "holidays", "Holiday calendar"
+
+    scope = models.CharField(max_length=10, choices=Scope.choices)
+    # Franchise / ParentProfile pk (feed: parent pk); 0 for the global stamp.
+    owner_id = models.PositiveBigIntegerField(default=0)
+    version = models.PositiveBigIntegerField(default=1)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["scope", "owner_id"], name="uniq_portal_change_stamp"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.scope}:{self.owner_id} v{self.version}"
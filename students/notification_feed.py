@@ -0,0 +1,639 @@
+"""
+Fan-out-on-write parent notification feed (``students.ParentNotification``).
+
+Each publishable source row (announcement, homework, fee, transport route,
+event, achievement, attendance mark, parental tip) is copied into one feed row
+per parent in its audience after it is saved: ``students.signals`` queue a
+``ParentFeedJob`` and ``students.feed_outbox`` runs ``sync_objects`` off the
+request thread. Deleting or unpublishing a row removes its entries.
+``ParentNotificationsView`` then reads a single indexed table with cursor
+pagination instead of nine querysets.
+
+Audience rules mirror the old read path:
+
+- a parent is "at" a centre when their profile points at it or an active
+  child's imported ``Centre`` names it (so an imported family can be at two
+  centres); syncs and per-parent rebuilds both use this rule;
+- centre content (announcements, homework, events, achievements) goes to the
+  parents at that centre (one SQL query), narrowed to parents with a child
+  whose ``class_key`` matches when the row targets a class, or to one child's
+  parent;
+- fees / attendance go to the child's parent; routes to parents of children
+  with an active assignment; parental tips to parents at every centre the
+  document's publish scope matches.
+
+``student`` is set when an entry concerns exactly one of the parent's
+children, so ``?student=`` filtering works without re-deriving the audience.
+Child class / centre changes rebuild that parent's feed; queryset ``.update()``
+and ``bulk_create`` writes need ``schedule_queryset_sync`` (queued) or
+``manage.py rebuild_parent_notification_feed``.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import logging
+from datetime import date, datetime, time, timedelta
+from itertools import islice
+from typing import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import change_stamps, inbox_counters
+from .class_labels import class_key
+from .models import (
+    Announcement,
+    AttendanceRecord,
+    FeeRecord,
+    HomeworkAssignment,
+    ParentNotification,
+    ParentNotificationRead,
+    StudentAchievement,
+    StudentProfile,
+    StudentTransportAssignment,
+    TransportRoute,
+)
+from .portal_schedule import PORTAL_TZ
+
+logger = logging.getLogger(__name__)
+
+Source = ParentNotification.Source
+
+# Without ?student= these follow the primary / only child (as the old per-source
+# querysets did); the rest show the whole family's entries.
+FOCUS_SOURCES = (Source.HOMEWORK, Source.EVENT, Source.ATTENDANCE)
+# Parental tips drop out of the feed this long after their last update.
+PARENTAL_TIP_WINDOW = timedelta(days=30)
+# Read entries stay listed this long after being read.
+READ_VISIBLE_FOR = timedelta(days=1)
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+SYNC_CHUNK = 500
+
+FEED_FIELDS = ("student_id", "title", "body", "class_name", "action_path", "published_at", "published_on", "visible_from")
+
+
+def source_models():
+    from documents.models import ParentDocument
+    from events.models import Event
+
+    return {
+        Source.ANNOUNCEMENT: Announcement,
+        Source.HOMEWORK: HomeworkAssignment,
+        Source.FEES: FeeRecord,
+        Source.TRANSPORT: TransportRoute,
+        Source.EVENT: Event,
+        Source.ACHIEVEMENT: StudentAchievement,
+        Source.ATTENDANCE: AttendanceRecord,
+        Source.PARENTAL_TIP: ParentDocument,
+    }
+
+
+def source_for_model(model) -> str | None:
+    for source, source_model in source_models().items():
+        if source_model is model:
+            return source
+    return None
+
+
+def _day_start(value: date) -> datetime:
+    return datetime.combine(value, time.min, tzinfo=PORTAL_TZ)
+
+
+def _text(value, limit: int | None = None) -> str:
+    text = (value or "").strip()
+    return text[:limit] if limit else text
+
+
+def _class_label(obj) -> str:
+    """Target class, else the targeted child's class (as the old feed labelled it)."""
+    label = _text(obj.class_name, 255)
+    if label or not obj.student_id:
+        return label
+    name = StudentProfile.objects.filter(pk=obj.student_id).values_list("class_name", flat=True).first()
+    return _text(name, 255)
+
+
+# ----- Entry content -----
+
+
+def _content(source: str, obj) -> dict | None:
+    """Feed fields shared by every recipient, or ``None`` when ``obj`` is not published to parents."""
+    if source == Source.ANNOUNCEMENT:
+        if not (obj.is_active and obj.visible_to_parents):
+            return None
+        return {
+            "title": _text(obj.title, 255) or "Announcement",
+            "body": obj.body or "",
+            "class_name": _class_label(obj),
+            "published_at": obj.published_at,
+            "visible_from": obj.published_at,
+        }
+    if source == Source.HOMEWORK:
+        start = _day_start(obj.assigned_date)
+        return {
+            "title": _text(obj.title, 255) or "Homework posted",
+            "body": obj.description or "",
+            "class_name": _class_label(obj),
+            "published_at": start,
+            "published_on": obj.assigned_date,
+            "visible_from": start,
+        }
+    if source == Source.FEES:
+        return {
+            "title": _text(obj.title, 255) or "Fee update",
+            "body": obj.notes or "",
+            "published_at": _day_start(obj.due_date),
+            "published_on": obj.due_date,
+        }
+    if source == Source.TRANSPORT:
+        body = getattr(obj, "description", None) or getattr(obj, "tracking_note", None) or ""
+        return {
+            "title": _text(obj.route_name, 255) or "Transport update",
+            "body": body,
+            "published_at": obj.updated_at or obj.created_at or timezone.now(),
+        }
+    if source == Source.EVENT:
+        from events.calendar_filters import SHOWCASE_PLACEHOLDER_DESCRIPTION
+        from events.video_links import strip_event_video_links
+
+        if (obj.location or "").strip().lower() == "showcase" or obj.description == SHOWCASE_PLACEHOLDER_DESCRIPTION:
+            return None
+        day = obj.start_date or obj.end_date
+        return {
+            "title": _text(obj.title, 255) or "New event",
+            "body": strip_event_video_links(obj.description) or "",
+            "published_at": _day_start(day),
+            "published_on": day,
+        }
+    if source == Source.ACHIEVEMENT:
+        day = obj.achieved_date
+        return {
+            "title": _text(obj.title, 255) or "Achievement update",
+            "body": obj.notes or "",
+            "published_at": _day_start(day) if day else obj.created_at,
+            "published_on": day,
+        }
+    if source == Source.ATTENDANCE:
+        return {
+            "title": f"Attendance: {obj.status or 'Updated'}",
+            "body": obj.note or "",
+            "published_at": _day_start(obj.date),
+            "published_on": obj.date,
+        }
+    if source == Source.PARENTAL_TIP:
+        from documents.models import DocumentCategory
+        from documents.parent_document_media import parent_document_matches_category_media
+
+        if not obj.is_active or obj.category != DocumentCategory.PARENTING_TIPS:
+            return None
+        if not parent_document_matches_category_media(obj):
+            return None
+        targets = [str(c).strip() for c in (obj.target_class_names or []) if str(c).strip()]
+        return {
+            "title": _text(obj.title, 255) or "New parental tip",
+            "body": (obj.description or "").strip(),
+            "class_name": ", ".join(targets)[:255],
+            "action_path": "/dashboard/parent/parental-tips",
+            "published_at": obj.updated_at or obj.created_at or timezone.now(),
+        }
+    raise ValueError(f"Unknown notification source {source!r}")
+
+
+# ----- Audiences -----
+
+
+class FeedAudience:
+    """
+    Memoised audience lookups for one sync or rebuild.
+
+    With ``parent_ids`` only those parents are considered (per-parent rebuilds)
+    and their centres come from ``parent_centre_ids``; otherwise centre
+    audiences come from ``_centre_parent_ids``. Both apply one rule, so a
+    rebuild keeps exactly the entries a sync writes.
+    """
+
+    def __init__(self, parent_ids: Iterable[int] | None = None):
+        self.only = set(parent_ids) if parent_ids is not None else None
+        self._centre_parents: dict[frozenset[int], set[int]] = {}
+        self._parent_centres: dict[int, set[int]] = {}
+        self._centre_index: dict[str, set[int]] | None = None
+        self._children: dict[int, list[tuple[int, str]]] = {}
+        self._franchises = None
+
+    def allows(self, parent_id) -> bool:
+        return parent_id is not None and (self.only is None or parent_id in self.only)
+
+    def parent_centre_ids(self, parent_id: int) -> set[int]:
+        """Centres ``parent_id`` belongs to under the same rule as ``_centre_parent_ids``."""
+        if parent_id not in self._parent_centres:
+            from accounts.profile_access import legacy_centre_keys
+            from franchises.models import ParentProfile
+
+            if self._centre_index is None:
+                self._centre_index = {}
+                for franchise in self.franchises():
+                    for key in legacy_centre_keys(franchise):
+                        self._centre_index.setdefault(key, set()).add(franchise.pk)
+            centres = set(
+                ParentProfile.objects.filter(pk=parent_id, franchise_id__isnull=False).values_list(
+                    "franchise_id", flat=True
+                )
+            )
+            legacy = StudentProfile.objects.filter(parent_id=parent_id, is_active=True).values_list("Centre", flat=True)
+            for centre in legacy:
+                centres |= self._centre_index.get((centre or "").lower(), set())
+            self._parent_centres[parent_id] = centres
+        return self._parent_centres[parent_id]
+
+    def centre_parent_ids(self, franchise_ids: Iterable[int]) -> set[int]:
+        franchise_ids = frozenset(pk for pk in franchise_ids if pk is not None)
+        if not franchise_ids:
+            return set()
+        if franchise_ids not in self._centre_parents:
+            if self.only is not None:
+                ids = {pid for pid in self.only if self.parent_centre_ids(pid) & franchise_ids}
+            else:
+                ids = _centre_parent_ids(franchise_ids)
+            self._centre_parents[franchise_ids] = ids
+        return self._centre_parents[franchise_ids]
+
+    def children(self, parent_ids: Iterable[int]) -> dict[int, list[tuple[int, str]]]:
+        """Active ``(student_id, class_key)`` pairs per parent."""
+        wanted = set(parent_ids)
+        missing = wanted - set(self._children)
+        if missing:
+            for pid in missing:
+                self._children[pid] = []
+            for sid, pid, name, key in (
+                StudentProfile.objects.filter(parent_id__in=missing, is_active=True)
+                .order_by("id")
+                .values_list("id", "parent_id", "class_name", "class_key")
+                .iterator()
+            ):
+                self._children[pid].append((sid, key or class_key(name)))
+        return {pid: self._children[pid] for pid in wanted}
+
+    def franchises(self):
+        if self._franchises is None:
+            from franchises.models import Franchise
+
+            self._franchises = list(Franchise.objects.all())
+        return self._franchises
+
+    def class_audience(self, parent_ids: set[int], keys: set[str]) -> dict[int, int | None]:
+        """Parents with a child in one of ``keys`` (all of ``parent_ids`` when ``keys`` is empty)."""
+        parent_ids = {pid for pid in parent_ids if self.allows(pid)}
+        if not keys:
+            return {pid: None for pid in parent_ids}
+        out: dict[int, int | None] = {}
+        for pid, kids in self.children(parent_ids).items():
+            matched = [sid for sid, key in kids if key in keys]
+            if matched:
+                out[pid] = matched[0] if len(matched) == 1 else None
+        return out
+
+    def student_audience(self, student_id) -> dict[int, int | None]:
+        row = StudentProfile.objects.filter(pk=student_id, is_active=True).values_list("parent_id", flat=True).first()
+        return {row: student_id} if self.allows(row) else {}
+
+    def students_audience(self, student_ids: Iterable[int]) -> dict[int, int | None]:
+        per_parent: dict[int, list[int]] = {}
+        for sid, pid in StudentProfile.objects.filter(pk__in=list(student_ids), is_active=True).values_list(
+            "id", "parent_id"
+        ):
+            if self.allows(pid):
+                per_parent.setdefault(pid, []).append(sid)
+        return {pid: (sids[0] if len(sids) == 1 else None) for pid, sids in per_parent.items()}
+
+
+def _centre_parent_ids(franchise_ids: Iterable[int]) -> set[int]:
+    """
+    Parents at any of ``franchise_ids`` (one query).
+
+    A parent is at a centre when their profile points at it or an active child
+    was imported under its name (``legacy_centre_keys``); the per-parent side
+    of the same rule is ``FeedAudience.parent_centre_ids``.
+    """
+    from accounts.profile_access import legacy_centre_keys
+    from franchises.models import Franchise, ParentProfile
+
+    franchises = list(Franchise.objects.filter(pk__in=list(franchise_ids)).only("id", "name", "slug"))
+    if not franchises:
+        return set()
+    keys = set().union(*(legacy_centre_keys(franchise) for franchise in franchises))
+    q = Q(franchise_id__in=[franchise.pk for franchise in franchises])
+    if keys:
+        q |= Q(
+            pk__in=StudentProfile.objects.annotate(centre_lc=Lower("Centre"))
+            .filter(centre_lc__in=keys, is_active=True, parent_id__isnull=False)
+            .values("parent_id")
+        )
+    return set(ParentProfile.objects.filter(q).values_list("pk", flat=True))
+
+
+def _audience(source: str, obj, aud: FeedAudience) -> dict[int, int | None]:
+    """``{parent_id: student_id or None}`` for a published ``obj``."""
+    if source in (Source.ANNOUNCEMENT, Source.HOMEWORK, Source.EVENT, Source.ACHIEVEMENT):
+        if getattr(obj, "student_id", None):
+            return aud.student_audience(obj.student_id)
+        key = class_key(getattr(obj, "class_name", ""))
+        return aud.class_audience(aud.centre_parent_ids([obj.franchise_id]), {key} if key else set())
+    if source in (Source.FEES, Source.ATTENDANCE):
+        return aud.student_audience(obj.student_id)
+    if source == Source.TRANSPORT:
+        student_ids = StudentTransportAssignment.objects.filter(route_id=obj.pk, is_active=True).values_list(
+            "student_id", flat=True
+        )
+        return aud.students_audience(student_ids)
+    if source == Source.PARENTAL_TIP:
+        return _tip_audience(obj, aud)
+    raise ValueError(f"Unknown notification source {source!r}")
+
+
+def _tip_audience(doc, aud: FeedAudience) -> dict[int, int | None]:
+    from documents.publish_targeting import document_matches_franchise
+
+    if doc.franchise_id:
+        centre_ids = {doc.franchise_id}
+    else:
+        centre_ids = {f.pk for f in aud.franchises() if document_matches_franchise(doc, f)}
+    keys = {class_key(c) for c in (doc.target_class_names or []) if class_key(c)}
+    return aud.class_audience(aud.centre_parent_ids(centre_ids), keys)
+
+
+# ----- Writes -----
+
+
+def sync_objects(source: str, objs, audience: FeedAudience | None = None) -> dict[str, int]:
+    """
+    Make the feed match ``objs`` (all of one ``source``): create, update or delete entries.
+
+    With a restricted ``audience`` only those parents' entries are touched.
+    """
+    aud = audience or FeedAudience()
+    counts = {"created": 0, "updated": 0, "deleted": 0}
+    objs = iter(objs)
+    while chunk := list(islice(objs, SYNC_CHUNK)):
+        existing_qs = ParentNotification.objects.filter(source=source, source_id__in=[o.pk for o in chunk])
+        if aud.only is not None:
+            existing_qs = existing_qs.filter(parent_id__in=aud.only)
+        existing: dict[tuple[int, int], ParentNotification] = {
+            (row.source_id, row.parent_id): row for row in existing_qs
+        }
+
+        to_create: list[ParentNotification] = []
+        to_update: list[ParentNotification] = []
+        moved: set[int] = set()
+        keep: set[tuple[int, int]] = set()
+        for obj in chunk:
+            content = _content(source, obj)
+            if content is None:
+                continue
+            for parent_id, student_id in _audience(source, obj, aud).items():
+                values = {
+                    "student_id": student_id,
+                    "title": content["title"],
+                    "body": content.get("body", ""),
+                    "class_name": content.get("class_name", ""),
+                    "action_path": content.get("action_path", ""),
+                    "published_at": content["published_at"],
+                    "published_on": content.get("published_on"),
+                    "visible_from": content.get("visible_from"),
+                }
+                row = existing.get((obj.pk, parent_id))
+                keep.add((obj.pk, parent_id))
+                if row is None:
+                    to_create.append(ParentNotification(parent_id=parent_id, source=source, source_id=obj.pk, **values))
+                elif any(getattr(row, name) != value for name, value in values.items()):
+                    if row.read_at is None and (
+                        row.published_at != values["published_at"]
+                        or row.visible_from != values["visible_from"]
+                        or row.student_id != values["student_id"]
+                    ):
+                        moved.add(parent_id)
+                    for name, value in values.items():
+                        setattr(row, name, value)
+                    to_update.append(row)
+
+        stale = [row for pair, row in existing.items() if pair not in keep]
+        if stale:
+            counts["deleted"] += ParentNotification.objects.filter(pk__in=[row.pk for row in stale]).delete()[0]
+        if to_update:
+            ParentNotification.objects.bulk_update(to_update, [*FEED_FIELDS, "updated_at"], batch_size=1000)
+            counts["updated"] += len(to_update)
+        added: list[ParentNotification] = []
+        if to_create:
+            _carry_read_state(source, to_create)
+            added, raced = _insert_entries(to_create)
+            moved |= raced
+            counts["created"] += len(to_create)
+        inbox_counters.parent_feed_changed(added=added, removed=stale, changed_parent_ids=moved)
+        change_stamps.feeds_changed({row.parent_id for row in [*to_create, *to_update, *stale]})
+    return counts
+
+
+def _insert_entries(rows: list[ParentNotification]) -> tuple[list[ParentNotification], set[int]]:
+    """
+    Insert new entries; returns ``(rows to count, parent ids to recount)``.
+
+    A concurrent sync can write the same ``(source, source_id, parent)`` first;
+    the plain insert then fails as a whole and is retried with
+    ``ignore_conflicts``, which does not say which rows landed, so those
+    parents are recounted instead of bumped.
+    """
+    try:
+        with transaction.atomic():
+            ParentNotification.objects.bulk_create(rows, batch_size=1000)
+        return rows, set()
+    except IntegrityError:
+        ParentNotification.objects.bulk_create(rows, batch_size=1000, ignore_conflicts=True)
+        return [], {row.parent_id for row in rows}
+
+
+def _carry_read_state(source: str, rows: list[ParentNotification]) -> None:
+    """New entries for items a parent already read (legacy read table) start read."""
+    keys = {f"{source}-{row.source_id}" for row in rows}
+    read = {
+        (parent_id, key): read_at
+        for parent_id, key, read_at in ParentNotificationRead.objects.filter(notification_key__in=keys).values_list(
+            "parent_id", "notification_key", "read_at"
+        )
+    }
+    if not read:
+        return
+    for row in rows:
+        row.read_at = read.get((row.parent_id, f"{source}-{row.source_id}"))
+
+
+def retract(source: str, source_id) -> int:
+    """Remove every feed entry for a deleted source row."""
+    rows = list(ParentNotification.objects.filter(source=source, source_id=source_id))
+    if not rows:
+        return 0
+    deleted = ParentNotification.objects.filter(pk__in=[row.pk for row in rows]).delete()[0]
+    inbox_counters.parent_feed_changed(removed=rows)
+    change_stamps.feeds_changed({row.parent_id for row in rows})
+    return deleted
+
+
+def sync_queryset(source: str, queryset, audience: FeedAudience | None = None) -> dict[str, int]:
+    """``sync_objects`` over a queryset (use after bulk writes that skip signals)."""
+    return sync_objects(source, queryset.order_by("pk").iterator(chunk_size=SYNC_CHUNK), audience)
+
+
+def schedule_sync(source: str, pk) -> None:
+    """Queue a feed sync for one saved source row (signal handlers); runs in ``feed_outbox``."""
+    from .feed_outbox import enqueue_rows
+
+    enqueue_rows(source, [pk])
+
+
+def schedule_queryset_sync(source: str, queryset) -> None:
+    """Queue ``sync_objects`` for a queryset's rows — for views that ``bulk_create`` / ``bulk_update`` source rows."""
+    from .feed_outbox import enqueue_rows
+
+    enqueue_rows(source, queryset.values_list("pk", flat=True))
+
+
+def schedule_parent_rebuild(parent_id, sources: Iterable[str] | None = None) -> None:
+    """Queue a rebuild of one parent's feed (child / centre changes)."""
+    from .feed_outbox import enqueue_parent
+
+    enqueue_parent(parent_id, sources)
+
+
+def _parent_candidates(source: str, parent_id: int, aud: FeedAudience):
+    """Source rows that could reach ``parent_id`` (superset; the audience narrows it)."""
+    models = source_models()
+    model = models[source]
+    if source in (Source.FEES, Source.ATTENDANCE):
+        return model.objects.filter(student__parent_id=parent_id)
+    if source == Source.TRANSPORT:
+        assigned = StudentTransportAssignment.objects.filter(student__parent_id=parent_id).values("route_id")
+        return model.objects.filter(pk__in=assigned)
+    if source == Source.PARENTAL_TIP:
+        from documents.models import DocumentCategory
+
+        return model.objects.filter(
+            category=DocumentCategory.PARENTING_TIPS,
+            is_active=True,
+            updated_at__gte=timezone.now() - PARENTAL_TIP_WINDOW,
+        )
+    return model.objects.filter(franchise_id__in=aud.parent_centre_ids(parent_id))
+
+
+def rebuild_parent_feed(parent_id: int, sources: Iterable[str] | None = None) -> dict[str, int]:
+    """Recompute one parent's entries (their children or centre changed)."""
+    aud = FeedAudience([parent_id])
+    totals = {"created": 0, "updated": 0, "deleted": 0}
+    for source in sources or Source.values:
+        candidates = _parent_candidates(source, parent_id, aud)
+        counts = sync_queryset(source, candidates, aud)
+        seen = candidates.values("pk")
+        gone = list(ParentNotification.objects.filter(parent_id=parent_id, source=source).exclude(source_id__in=seen))
+        if gone:
+            counts["deleted"] += ParentNotification.objects.filter(pk__in=[row.pk for row in gone]).delete()[0]
+            inbox_counters.parent_feed_changed(removed=gone)
+            change_stamps.feeds_changed([parent_id])
+        for name, value in counts.items():
+            totals[name] += value
+    return totals
+
+
+def mark_read(parent_id: int, notification_key: str, read_at=None) -> int:
+    """Stamp ``read_at`` on the feed entry behind a ``<source>-<id>`` key."""
+    source, _, raw_id = (notification_key or "").rpartition("-")
+    if source not in Source.values or not raw_id.isdigit():
+        return 0
+    unread = ParentNotification.objects.filter(
+        parent_id=parent_id, source=source, source_id=int(raw_id), read_at__isnull=True
+    )
+    row = unread.first()
+    if row is None:
+        return 0
+    updated = unread.update(read_at=read_at or timezone.now())
+    if updated:
+        inbox_counters.parent_entry_read(row)
+        change_stamps.feeds_changed([parent_id])
+    return updated
+
+
+# ----- Reads -----
+
+
+def encode_cursor(row: ParentNotification) -> str:
+    raw = f"{row.published_at.isoformat()}|{row.pk}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int] | None:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        stamp, _, pk = raw.rpartition("|")
+        when = parse_datetime(stamp)
+        if when is None:
+            return None
+        return when, int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def visible_feed_q(*, student=None, default_student=None, now=None) -> Q:
+    """Entries a parent should see now, optionally narrowed to one child."""
+    now = now or timezone.now()
+    q = Q(visible_from__isnull=True) | Q(visible_from__lte=now)
+    q &= Q(read_at__isnull=True) | Q(read_at__gte=now - READ_VISIBLE_FOR)
+    q &= ~Q(source=Source.PARENTAL_TIP) | Q(published_at__gte=now - PARENTAL_TIP_WINDOW)
+    if student is not None:
+        q &= Q(student__isnull=True) | Q(student_id=student.pk)
+    elif default_student is not None:
+        q &= focus_q(default_student.pk)
+    return q
+
+
+def focus_q(student_id) -> Q:
+    """Default-feed narrowing: focus-source entries of ``student_id`` only, family / centre-wide ones always."""
+    return ~Q(source__in=FOCUS_SOURCES) | Q(student__isnull=True) | Q(student_id=student_id)
+
+
+def in_focus(row: ParentNotification, student_id) -> bool:
+    """``focus_q`` for one loaded row (``student_id`` None: no focus child, every entry)."""
+    return student_id is None or row.source not in FOCUS_SOURCES or row.student_id in (None, student_id)
+
+
+def page(queryset, *, cursor: str = "", limit: int = PAGE_SIZE):
+    """``(rows, next_cursor)`` newest first, keyset-paginated on ``(published_at, id)``."""
+    limit = max(1, min(MAX_PAGE_SIZE, limit))
+    queryset = queryset.order_by("-published_at", "-id")
+    position = decode_cursor(cursor) if cursor else None
+    if position is not None:
+        when, pk = position
+        queryset = queryset.filter(Q(published_at__lt=when) | Q(published_at=when, id__lt=pk))
+    rows = list(queryset[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def entry_payload(row: ParentNotification) -> dict:
+    data = {
+        "id": row.notification_key,
+        "source": row.source,
+        "source_id": row.source_id,
+        "title": row.title,
+        "body": row.body,
+        "published_at": row.published_on or row.published_at,
+        "read": row.read_at is not None,
+        "read_at": row.read_at,
+    }
+    if row.source in (Source.ANNOUNCEMENT, Source.HOMEWORK, Source.PARENTAL_TIP):
+        data["class_name"] = row.class_name or (None if row.source == Source.PARENTAL_TIP else "")
+    if row.action_path:
+        data["action_path"] = row.action_path
+    return data
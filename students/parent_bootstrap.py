@@ -0,0 +1,176 @@
+"""
+First-screen payload for the parent app (``GET /students/parent/bootstrap/``).
+
+The app used to open with five calls (dashboard, children, notifications, fee
+summary, calendar), each re-resolving the parent profile, centre and focus
+child. ``bootstrap_payload`` resolves them once and assembles the requested
+sections (``?sections=students,fees``; default all).
+
+Each section is cached on its own under a key built from the change stamps it
+depends on (``students.change_stamps``): publishing homework drops the
+calendar and notifications but keeps fees; marking a notification read drops
+only notifications. The cache TTL
+(``PARENT_BOOTSTRAP_CACHE_SECONDS``) only bounds memory. Sections that need a
+centre are ``null`` for a parent without one.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+from django.db import OperationalError, ProgrammingError
+
+from common.env import int_setting
+
+from .change_stamps import Scope, cached_payload, current_stamps, stamped_cache_key
+from .portal_schedule import portal_today
+
+
+@dataclass
+class BootstrapContext:
+    request: object
+    profile: object
+    centre: object
+    focus: object
+    explicit: object
+    stamps: dict[str, int]
+
+
+@dataclass(frozen=True)
+class Section:
+    build: Callable[[BootstrapContext], object]
+    scopes: tuple[str, ...]
+    cacheable: Callable[[], bool] = lambda: True
+
+
+def _dashboard(ctx: BootstrapContext):
+    from .views import parent_dashboard_payload
+
+    if ctx.profile.franchise_id is None:
+        return None
+    return parent_dashboard_payload(ctx.request, ctx.profile)
+
+
+def _students(ctx: BootstrapContext):
+    from .models import StudentProfile
+    from .serializers import StudentProfileSerializer
+
+    students = StudentProfile.objects.filter(parent=ctx.profile, is_active=True).select_related(
+        "parent", "parent__user", "parent__franchise"
+    )
+    return StudentProfileSerializer(students, many=True, context={"request": ctx.request}).data
+
+
+def _notifications(ctx: BootstrapContext):
+    from .portal_views import _parent_notifications_payload
+
+    default = None if ctx.explicit is not None else ctx.focus
+    return _parent_notifications_payload(ctx.request, ctx.profile, explicit=ctx.explicit, default=default)
+
+
+def _fees(ctx: BootstrapContext):
+    from .portal_views import _parent_fee_summary_payload
+
+    return _parent_fee_summary_payload(ctx.request, ctx.profile)
+
+
+def _fees_cacheable() -> bool:
+    # Legacy TiKES rows change outside Django; no stamp tracks them.
+    from .legacy_fee_service import legacy_fee_db_configured
+
+    return not legacy_fee_db_configured()
+
+
+def _calendar(ctx: BootstrapContext):
+    from .calendar_months import parse_month_range
+    from .portal_views import _parent_calendar_attendance_payload, _selected_date_from_request
+
+    if ctx.centre is None:
+        return None
+    # ParentBootstrapView has already rejected malformed ranges with a 400.
+    return _parent_calendar_attendance_payload(
+        ctx.request,
+        ctx.profile,
+        ctx.centre,
+        focus=ctx.focus,
+        selected_date=_selected_date_from_request(ctx.request),
+        months=parse_month_range(ctx.request.query_params),
+    )
+
+
+SECTIONS: dict[str, Section] = {
+    "dashboard": Section(_dashboard, (Scope.CENTRE, Scope.PARENT)),
+    "students": Section(_students, (Scope.CENTRE, Scope.PARENT)),
+    "notifications": Section(_notifications, (Scope.FEED,)),
+    "fees": Section(_fees, (Scope.PARENT,), _fees_cacheable),
+    "calendar": Section(_calendar, (Scope.GLOBAL, Scope.CENTRE, Scope.PARENT)),
+}
+
+
+def parse_sections(raw: str | None) -> tuple[list[str], list[str]]:
+    """``(sections, unknown)`` from a comma-separated ``?sections=``; empty means all."""
+    names = [name.strip().lower() for name in (raw or "").split(",") if name.strip()]
+    if not names:
+        return list(SECTIONS), []
+    unknown = [name for name in names if name not in SECTIONS]
+    return list(dict.fromkeys(name for name in names if name in SECTIONS)), unknown
+
+
+def cache_seconds() -> int:
+    return max(0, int_setting("PARENT_BOOTSTRAP_CACHE_SECONDS", 0))
+
+
+def section_cache_key(name: str, ctx: BootstrapContext) -> str:
+    request = ctx.request
+    params = request.query_params
+    query = "&".join(
+        f"{key}={value}" for key in sorted(params) if key != "sections" for value in params.getlist(key)
+    )
+    parts = [
+        request.user.pk,
+        ctx.profile.pk,
+        ctx.centre.pk if ctx.centre else 0,
+        ctx.focus.pk if ctx.focus else 0,
+        ctx.explicit is not None,
+        # Serializers build absolute media URLs.
+        request.build_absolute_uri("/"),
+        portal_today().isoformat(),
+        query,
+    ]
+    return stamped_cache_key(f"parent-bootstrap:{name}", parts, ctx.stamps, SECTIONS[name].scopes)
+
+
+def _build_section(name: str, ctx: BootstrapContext, ttl: int):
+    section = SECTIONS[name]
+    if not section.cacheable():
+        ttl = 0
+    return cached_payload(section_cache_key(name, ctx), ttl, lambda: section.build(ctx))
+
+
+def bootstrap_payload(request, profile, sections: list[str]) -> dict:
+    """Resolve centre / focus child / stamps once and assemble ``sections``."""
+    from .portal_views import _parent_centre, _parent_focus_student, _parent_student_from_request
+
+    centre = _parent_centre(profile)
+    explicit = _parent_student_from_request(request, profile)
+    focus = explicit if explicit is not None else _parent_focus_student(request, profile)
+    ttl = cache_seconds()
+    try:
+        stamps = current_stamps(profile.pk, centre.pk if centre else None)
+    except (ProgrammingError, OperationalError):
+        # Stamp table not migrated yet: build every section fresh.
+        stamps, ttl = {}, 0
+    ctx = BootstrapContext(
+        request=request,
+        profile=profile,
+        centre=centre,
+        focus=focus,
+        explicit=explicit,
+        stamps=stamps,
+    )
+    return {
+        "student_id": focus.pk if focus else None,
+        "centre_id": centre.pk if centre else None,
+        "sections": {name: _build_section(name, ctx, ttl) for name in sections},
+    }
@@ -7,7 +7,7 @@ from franchises.serializers import DriverProfileSerializer, DriverCreateSerializ
 import re
 import threading
 import json
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
 
 from django.db import transaction
 from django.shortcuts import get_object_or_404
@@ -34,9 +34,7 @@ from accounts.profile_access import (
     user_owns_legacy_student,
 )
 from events.calendar_filters import exclude_showcase_placeholder_events
-from events.models import Event
 from events.serializers import EventSerializer
-from events.video_links import strip_event_video_links
 from events.visibility import parent_events_queryset
 
 from .models import (
@@ -52,8 +50,8 @@ from .models import (
     HomeworkSubmission,
     HomeworkSubmissionImage,
     ParentFeePayment,
+    ParentNotification,
     ParentNotificationRead,
-    StudentAchievement,
     StudentProfile,
     StudentTransportAssignment,
     StudentTripStatus,
@@ -62,7 +60,18 @@ from .models import (
     TransportTrip,
     TransportTripLocation,
 )
+from .class_labels import class_key
+# Re-exported: serializers and the events app import these from portal_views.
+from .class_labels import (  # noqa: F401
+    HOMEWORK_CLASS_LABELS,
+    _canonical_class_label,
+    _strip_legacy_class_year,
+    normalize_portal_class_name,
+)
+from .change_stamps import ParentETagMixin
+from .inbox_counters import franchise_inbox_read, franchise_unread_count, parent_unread_count
 from .portal_schedule import (
+    PORTAL_TZ,
     announcement_on_schedule_date_q,
     parent_visible_announcement_q,
     parent_visible_homework_q,
@@ -81,7 +90,6 @@ from .serializers import (
     HomeworkAssignmentSerializer,
     HomeworkSubmissionSerializer,
     DailyActivitySerializer,
-    ParentStudentAchievementSerializer,
     SupportTicketAdminSerializer,
     SupportTicketFranchiseSerializer,
     SupportTicketParentSerializer,
@@ -118,109 +126,21 @@ def _parent_transport_route_row(route, request, student_ids=None):
     return row
 
 
-HOMEWORK_CLASS_LABELS = (
-    "Play Group",
-    "Nursery",
-    "PP-1 / Junior KG / LKG",
-    "PP-2 / Senior KG / UKG",
-    "Summer Programs / Day Care",
-)
-
-_LEGACY_CLASS_YEAR_SUFFIX = re.compile(r"\s+\d{2}-\d{2}$")
-
-
-def _strip_legacy_class_year(class_name: str) -> str:
-    return _LEGACY_CLASS_YEAR_SUFFIX.sub("", (class_name or "").strip())
+def _student_class_key(student) -> str:
+    """Stored ``class_key`` for a child (computed on the fly for rows not yet backfilled)."""
+    return getattr(student, "class_key", "") or class_key(getattr(student, "class_name", ""))
 
 
-def _canonical_class_label(class_name: str) -> str | None:
-    """Map legacy/import class strings (e.g. ``PP1 25-26``) to portal class labels."""
-    raw = (class_name or "").strip()
-    if not raw:
-        return None
-    if raw in HOMEWORK_CLASS_LABELS:
-        return raw
-
-    core = _strip_legacy_class_year(raw)
-    norm = core.lower().replace("_", " ").replace("-", " ").strip()
-    compact = re.sub(r"[^a-z0-9]", "", norm)
-
-    if norm.startswith("play group") or compact.startswith("playgroup"):
-        return "Play Group"
-    if norm.startswith("nursery") or norm.startswith("refresher course nur"):
-        return "Nursery"
-    if re.search(r"pp\s*1", norm) or compact.startswith("pp1") or norm in ("junior kg", "lkg"):
-        return "PP-1 / Junior KG / LKG"
-    if re.search(r"pp\s*2", norm) or compact.startswith("pp2") or norm in ("senior kg", "ukg"):
-        return "PP-2 / Senior KG / UKG"
-    if (
-        norm.startswith("summer camp")
-        or norm.startswith("summer program")
-        or "day care" in norm
-        or "daycare" in norm
+def _parent_class_keys(parent_profile) -> set[str]:
+    """``class_key`` values of this parent's active children."""
+    keys: set[str] = set()
+    for name, key in StudentProfile.objects.filter(parent=parent_profile, is_active=True).values_list(
+        "class_name", "class_key"
     ):
-        return "Summer Programs / Day Care"
-
-    core_lower = core.lower()
-    for label in HOMEWORK_CLASS_LABELS:
-        label_lower = label.lower()
-        if label_lower in core_lower or core_lower in label_lower:
-            return label
-    return None
-
-
-def _parent_class_target_names(parent_profile) -> set[str]:
-    """Legacy and canonical class strings that should match centre-wide rows for this parent."""
-    names: set[str] = set()
-    for cn in StudentProfile.objects.filter(parent=parent_profile, is_active=True).values_list(
-        "class_name", flat=True
-    ):
-        cn = (cn or "").strip()
-        if not cn:
-            continue
-        names.add(cn)
-        stripped = _strip_legacy_class_year(cn)
-        if stripped:
-            names.add(stripped)
-        canon = _canonical_class_label(cn)
-        if canon:
-            names.add(canon)
-    return names
-
-
-def normalize_portal_class_name(class_name: str) -> str:
-    """Store franchise portal class targets using canonical labels when possible."""
-    raw = (class_name or "").strip()
-    if not raw:
-        return ""
-    return _canonical_class_label(raw) or raw
-
-
-def _matching_target_class_names(parent_profile) -> set[str]:
-    """
-    Announcement/homework ``class_name`` values visible to this parent.
-    Uses the same fuzzy rules as ``_class_label_matches`` (not exact DB equality).
-    """
-    names: set[str] = set()
-    for cn in _parent_class_target_names(parent_profile):
-        candidates: set[str] = {cn}
-        stripped = _strip_legacy_class_year(cn)
-        if stripped:
-            candidates.add(stripped)
-        canon = _canonical_class_label(cn)
-        if canon:
-            candidates.add(canon)
-        candidates.update(HOMEWORK_CLASS_LABELS)
-
-        for candidate in candidates:
-            candidate = (candidate or "").strip()
-            if not candidate:
-                continue
-            if _class_label_matches(cn, candidate):
-                names.add(candidate)
-            if _class_label_matches(candidate, cn):
-                names.add(candidate)
-    return {n for n in names if n}
+        key = key or class_key(name)
+        if key:
+            keys.add(key)
+    return keys
 
 
 def _student_ids_visible_to_parent(parent_profile, user=None) -> set[int]:
@@ -238,11 +158,12 @@ def _student_ids_visible_to_parent(parent_profile, user=None) -> set[int]:
 def _centre_class_visibility_q(parent_profile, user=None) -> Q:
     """Centre-wide or class-targeted rows visible to a parent (homework + announcements)."""
     vis = Q(student__isnull=True, class_name="")
-    for student_id in _student_ids_visible_to_parent(parent_profile, user=user):
-        vis |= Q(student_id=student_id)
-    matching_classes = _matching_target_class_names(parent_profile)
-    if matching_classes:
-        vis |= Q(student__isnull=True, class_name__in=matching_classes)
+    student_ids = _student_ids_visible_to_parent(parent_profile, user=user)
+    if student_ids:
+        vis |= Q(student_id__in=sorted(student_ids))
+    keys = _parent_class_keys(parent_profile)
+    if keys:
+        vis |= Q(student__isnull=True, class_key__in=sorted(keys))
     return vis
 
 
@@ -254,30 +175,12 @@ def _homework_visible_q(parent_profile, user=None):
 def _daily_activities_visible_q(parent_profile, user=None):
     """Centre-wide or class-targeted rows for daily activities."""
     vis = Q(class_name="")
-    matching_classes = _matching_target_class_names(parent_profile)
-    if matching_classes:
-        vis |= Q(class_name__in=matching_classes)
+    keys = _parent_class_keys(parent_profile)
+    if keys:
+        vis |= Q(class_key__in=sorted(keys))
     return vis
 
 
-def _class_label_matches(student_class: str, target_class: str) -> bool:
-    """True when a child's class should receive centre content aimed at target_class."""
-    sc = (student_class or "").strip()
-    tc = (target_class or "").strip()
-    if not sc or not tc:
-        return False
-
-    sc_canon = _canonical_class_label(sc) or sc
-    tc_canon = _canonical_class_label(tc) or tc
-    if sc_canon == tc_canon:
-        return True
-    if sc_canon == tc or tc_canon == sc:
-        return True
-    if sc.lower() == tc.lower():
-        return True
-    return False
-
-
 def _announcement_visible_q(parent_profile, user=None):
     """Centre-wide, class-targeted, or student-specific announcements for this parent."""
     return _centre_class_visibility_q(parent_profile, user=user)
@@ -302,16 +205,13 @@ def parent_profiles_for_announcement(announcement):
         return ParentProfile.objects.filter(pk=parent_id).select_related("user", "franchise")
 
     base = parents_at_franchise(announcement.franchise)
-    target_class = normalize_portal_class_name(announcement.class_name or "")
-    if target_class:
-        parent_ids: set[int] = set()
-        base_parent_ids = list(base.values_list("pk", flat=True))
-        for student in StudentProfile.objects.filter(
+    target_key = class_key(announcement.class_name)
+    if target_key:
+        parent_ids = StudentProfile.objects.filter(
             is_active=True,
-            parent_id__in=base_parent_ids,
-        ).only("parent_id", "class_name"):
-            if _class_label_matches(student.class_name, target_class):
-                parent_ids.add(student.parent_id)
+            parent_id__in=base.values("pk"),
+            class_key=target_key,
+        ).values("parent_id")
         return base.filter(pk__in=parent_ids)
     return base
 
@@ -414,50 +314,35 @@ def _parent_attendance_api_payload(
     return payload
 
 
-def _homework_row_visible_for_student(row, student) -> bool:
-    if row.student_id:
-        return row.student_id == student.pk
-    target_class = (row.class_name or "").strip()
-    if target_class:
-        return _class_label_matches(student.class_name, target_class)
-    return True
+def _student_targeted_q(student) -> Q:
+    """Rows for this child: their own, centre-wide, or aimed at their ``class_key``."""
+    vis = Q(student_id=student.pk) | Q(student__isnull=True, class_name="")
+    key = _student_class_key(student)
+    if key:
+        vis |= Q(student__isnull=True, class_key=key)
+    return vis
 
 
 def _filter_homework_queryset_for_student(queryset, student):
     if student is None:
         return queryset
-    ids = [row.pk for row in queryset if _homework_row_visible_for_student(row, student)]
-    return queryset.filter(pk__in=ids)
-
-
-def _daily_activity_row_visible_for_student(row, student) -> bool:
-    target_class = (row.class_name or "").strip()
-    if target_class:
-        return _class_label_matches(student.class_name, target_class)
-    return True
+    return queryset.filter(_student_targeted_q(student))
 
 
 def _filter_daily_activities_for_student(queryset, student):
     if student is None:
         return queryset
-    ids = [row.pk for row in queryset if _daily_activity_row_visible_for_student(row, student)]
-    return queryset.filter(pk__in=ids)
-
-
-def _announcement_row_visible_for_student(row, student) -> bool:
-    if getattr(row, "student_id", None):
-        return row.student_id == student.pk
-    target_class = (row.class_name or "").strip()
-    if target_class:
-        return _class_label_matches(student.class_name, target_class)
-    return True
+    vis = Q(class_name="")
+    key = _student_class_key(student)
+    if key:
+        vis |= Q(class_key=key)
+    return queryset.filter(vis)
 
 
 def _filter_announcements_for_student(queryset, student):
     if student is None:
         return queryset
-    ids = [row.pk for row in queryset if _announcement_row_visible_for_student(row, student)]
-    return queryset.filter(pk__in=ids)
+    return queryset.filter(_student_targeted_q(student))
 
 
 def _calendar_item_row(
@@ -555,24 +440,16 @@ def _build_parent_calendar_items(
     return items
 
 
-def _parent_parental_tips_notification_qs(request, pp, focus=None):
-    """Recent parental tips visible to this parent (for the notifications feed)."""
-    from documents.models import DocumentCategory
-    from documents.views import _parent_documents_visible_queryset
-
-    if not pp:
-        return []
-
-    qs = _parent_documents_visible_queryset(request.user, student=focus).filter(
-        category=DocumentCategory.PARENTING_TIPS,
+def _calendar_datetime_window(start: date, end: date) -> tuple[datetime, datetime]:
+    """Datetime bounds for a date range, a day wider each side (rows render in local time)."""
+    return (
+        datetime.combine(start - timedelta(days=1), time.min, tzinfo=PORTAL_TZ),
+        datetime.combine(end + timedelta(days=1), time.max, tzinfo=PORTAL_TZ),
     )
-    cutoff = timezone.now() - timedelta(days=30)
-    qs = qs.filter(Q(updated_at__gte=cutoff) | Q(created_at__gte=cutoff))
-    return list(qs.order_by("-updated_at", "-created_at")[:50])
 
 
-def _parent_parental_tips_calendar_items(request, focus) -> list[dict]:
-    """Parental tip rows for parent calendar (upload / update date)."""
+def _parent_parental_tips_calendar_items(request, focus, *, start=None, end=None) -> list[dict]:
+    """Parental tip rows for parent calendar (upload / update date); ``start``/``end`` narrow the query."""
     from documents.models import DocumentCategory
     from documents.serializers import ParentDocumentSerializer
     from documents.views import _parent_documents_visible_queryset
@@ -580,6 +457,8 @@ def _parent_parental_tips_calendar_items(request, focus) -> list[dict]:
     qs = _parent_documents_visible_queryset(request.user, student=focus).filter(
         category=DocumentCategory.PARENTING_TIPS,
     )
+    if start is not None and end is not None:
+        qs = qs.filter(updated_at__range=_calendar_datetime_window(start, end))
     rows = ParentDocumentSerializer(
         qs.order_by("-updated_at", "-created_at"),
         many=True,
@@ -642,7 +521,7 @@ def _parent_parental_tips_payload(request, focus) -> list[dict]:
     return [parent_document_mobile_row(row) for row in rows]
 
 
-def _parent_newsletter_calendar_items(request, focus) -> list[dict]:
+def _parent_newsletter_calendar_items(request, focus, *, start=None, end=None) -> list[dict]:
     """Newsletter rows for parent calendar (block date and upload date when they differ)."""
     from documents.models import DocumentCategory
     from documents.serializers import ParentDocumentSerializer
@@ -651,6 +530,8 @@ def _parent_newsletter_calendar_items(request, focus) -> list[dict]:
     qs = _parent_documents_visible_queryset(request.user, student=focus).filter(
         category__in=_parent_document_category_filter(DocumentCategory.CLASS_TIMETABLE)
     )
+    if start is not None and end is not None:
+        qs = qs.filter(Q(period_start__range=(start, end)) | Q(created_at__range=_calendar_datetime_window(start, end)))
     rows = ParentDocumentSerializer(
         qs.order_by("-period_start", "-created_at"),
         many=True,
@@ -719,19 +600,9 @@ def _selected_date_from_request(request) -> date | None:
     return parse_date(raw)
 
 
-def _parent_calendar_attendance_payload(
-    request,
-    pp,
-    centre,
-    *,
-    focus: StudentProfile | None,
-    selected_date: date | None = None,
-) -> dict:
-    """Calendar + attendance for one focused child (matches parent web calendar rules)."""
+def _parent_calendar_querysets(request, pp, centre, focus):
+    """Events, homework and announcements on the parent calendar for ``focus`` (all children when None)."""
     events_qs = exclude_showcase_placeholder_events(parent_events_queryset(pp, centre=centre, student=focus))
-    event_ctx = {"request": request, "omit_video_links": True}
-    events_data = EventSerializer(events_qs, many=True, context=event_ctx).data
-
     homework_qs = HomeworkAssignment.objects.none()
     announcements_qs = Announcement.objects.none()
     if centre:
@@ -754,6 +625,32 @@ def _parent_calendar_attendance_payload(
     if focus is not None:
         homework_qs = _filter_homework_queryset_for_student(homework_qs, focus)
         announcements_qs = _filter_announcements_for_student(announcements_qs, focus)
+    return events_qs, homework_qs, announcements_qs
+
+
+def _parent_calendar_attendance_payload(
+    request,
+    pp,
+    centre,
+    *,
+    focus: StudentProfile | None,
+    selected_date: date | None = None,
+    months: list[str] | None = None,
+) -> dict:
+    """
+    Calendar + attendance for one focused child (matches parent web calendar rules).
+
+    With ``months`` (``YYYY-MM`` list) and no ``selected_date`` only those months
+    are built, from cached month buckets (``students.calendar_months``).
+    """
+    if months and selected_date is None:
+        from .calendar_months import calendar_months_payload
+
+        return calendar_months_payload(request, pp, centre, focus=focus, months=months)
+
+    events_qs, homework_qs, announcements_qs = _parent_calendar_querysets(request, pp, centre, focus)
+    event_ctx = {"request": request, "omit_video_links": True}
+    events_data = EventSerializer(events_qs, many=True, context=event_ctx).data
 
     hw_ctx = {"request": request}
     homework_data = HomeworkAssignmentSerializer(homework_qs, many=True, context=hw_ctx).data
@@ -884,7 +781,7 @@ def _parent_calendar_attendance_payload(
 # ----- Parent (read-only / limited write) -----
 
 
-class ParentHomeworkListView(generics.ListAPIView):
+class ParentHomeworkListView(ParentETagMixin, generics.ListAPIView):
     permission_classes = [IsParentUser]
     serializer_class = HomeworkAssignmentSerializer
     pagination_class = None
@@ -968,19 +865,7 @@ def _announcement_notification_rows(rows, read_map=None):
     return notifications
 
 
-def _notification_class_label(*, class_name="", student=None) -> str:
-    label = (class_name or "").strip()
-    if label:
-        return label
-    if student is not None:
-        try:
-            return (student.class_name or "").strip()
-        except Exception:
-            return ""
-    return ""
-
-
-class ParentAnnouncementListView(generics.ListAPIView):
+class ParentAnnouncementListView(ParentETagMixin, generics.ListAPIView):
     permission_classes = [IsParentUser]
     serializer_class = AnnouncementSerializer
     pagination_class = None
@@ -1063,7 +948,7 @@ class ParentAttendanceListView(generics.ListAPIView):
         return Response(payload)
 
 
-class ParentCalendarAttendanceView(APIView):
+class ParentCalendarAttendanceView(ParentETagMixin, APIView):
     """
     Combined parent payload for calendar + attendance for **one focused child**.
 
@@ -1076,6 +961,9 @@ class ParentCalendarAttendanceView(APIView):
 
     Prefer ``calendar_items[]`` for the day/month UI; use ``calendar_events`` / ``homework``
     when you need full event media or homework attachments.
+
+    Pass ``?month=YYYY-MM`` or ``?from_month=`` / ``?to_month=`` (up to 12 months) to load
+    only the months on screen (``response_mode: "months"``); ``?date=`` takes precedence.
     """
 
     permission_classes = [IsParentUser]
@@ -1107,11 +995,17 @@ class ParentCalendarAttendanceView(APIView):
                 }
             )
 
+        from .calendar_months import parse_month_range
+
+        try:
+            months = parse_month_range(request.query_params)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
         focus = _parent_focus_student(request, pp)
         selected_date = _selected_date_from_request(request)
         return Response(
             _parent_calendar_attendance_payload(
-                request, pp, centre, focus=focus, selected_date=selected_date
+                request, pp, centre, focus=focus, selected_date=selected_date, months=months
             )
         )
 
@@ -1132,124 +1026,134 @@ class ParentFeeListView(generics.ListAPIView):
         )
 
 
-class ParentFeeSummaryView(APIView):
-    """Parent fee view — legacy TiKES MySQL when configured, else centre-entered FeeRecord rows."""
-
-    permission_classes = [IsParentUser]
+def _parent_fee_summary_payload(request, pp) -> dict:
+    """Fee summary for ``?student=`` or the login's primary child (legacy TiKES when configured)."""
+    from accounts.profile_access import primary_student_for_parent_user
+    from students.fee_summary import build_fee_summary_from_records
+    from students.legacy_fee_service import fetch_legacy_fee_summary, legacy_fee_db_configured
+
+    def empty_summary(*, id_card_no: str = "", lookup_message: str = "") -> dict:
+        payload: dict = {
+            "source": "empty",
+            "student": {},
+            "alerts": {"dropped_out": False, "drop_reason": "", "refund_done": False},
+            "lines": [],
+            "totals": {
+                "total_fee": 0,
+                "discount": 0,
+                "net_payable": 0,
+                "amount_paid": 0,
+                "balance": 0,
+            },
+            "payments": [],
+            "legacy_configured": legacy_fee_db_configured(),
+        }
+        if id_card_no:
+            payload["lookup_id_card"] = id_card_no
+        if lookup_message:
+            payload["lookup_message"] = lookup_message
+        return payload
 
-    def get(self, request):
-        from accounts.profile_access import primary_student_for_parent_user
-        from students.fee_summary import build_fee_summary_from_records
-        from students.legacy_fee_service import fetch_legacy_fee_summary, legacy_fee_db_configured
+    student_id = (request.query_params.get("student") or request.query_params.get("student_id") or "").strip()
+    student = None
 
-        def empty_summary(*, id_card_no: str = "", lookup_message: str = "") -> Response:
-            payload: dict = {
-                "source": "empty",
-                "student": {},
-                "alerts": {"dropped_out": False, "drop_reason": "", "refund_done": False},
-                "lines": [],
-                "totals": {
-                    "total_fee": 0,
-                    "discount": 0,
-                    "net_payable": 0,
-                    "amount_paid": 0,
-                    "balance": 0,
-                },
-                "payments": [],
-                "legacy_configured": legacy_fee_db_configured(),
-            }
-            if id_card_no:
-                payload["lookup_id_card"] = id_card_no
-            if lookup_message:
-                payload["lookup_message"] = lookup_message
-            return Response(payload)
+    if pp:
+        students_qs = StudentProfile.objects.filter(parent=pp, is_active=True).select_related(
+            "parent", "parent__franchise"
+        )
+        if student_id:
+            try:
+                sid = int(student_id)
+            except (TypeError, ValueError):
+                return empty_summary(lookup_message="Invalid student id.")
+            student = students_qs.filter(pk=sid).first()
+            if not student:
+                return empty_summary(lookup_message="Student not found for this parent account.")
 
-        pp = resolved_parent_profile_for_user(request.user)
-        student_id = (request.query_params.get("student") or request.query_params.get("student_id") or "").strip()
-        student = None
+    if not student and not student_id:
+        student, pp_from_primary = primary_student_for_parent_user(request.user)
+        if not pp:
+            pp = pp_from_primary
 
-        if pp:
-            students_qs = StudentProfile.objects.filter(parent=pp, is_active=True).select_related(
-                "parent", "parent__franchise"
+    id_card_no = ""
+    if student:
+        id_card_no = (student.Idcardno or "").strip() or (request.user.username or "").strip()
+    else:
+        id_card_no = (request.user.username or "").strip()
+
+    legacy_summary = None
+    legacy_lookup_error = ""
+    if id_card_no and legacy_fee_db_configured():
+        legacy_summary, legacy_lookup_error = fetch_legacy_fee_summary(id_card_no)
+
+    if not student:
+        if legacy_summary:
+            legacy_summary["legacy_configured"] = True
+            legacy_summary.setdefault("student", {})
+            parent_name = (legacy_summary["student"].get("parent_name") or "").strip()
+            if not parent_name:
+                parent_name = (request.user.full_name or "").strip()
+            legacy_summary["student"]["parent_name"] = parent_name
+            legacy_summary["lookup_id_card"] = id_card_no
+            return legacy_summary
+
+        msg = "No student is linked to this parent login."
+        if id_card_no and legacy_fee_db_configured() and legacy_lookup_error:
+            msg = (
+                f"No student profile found locally. TiKES lookup for ID card {id_card_no}: "
+                f"{legacy_lookup_error}"
             )
-            if student_id:
-                try:
-                    sid = int(student_id)
-                except (TypeError, ValueError):
-                    return empty_summary(lookup_message="Invalid student id.")
-                student = students_qs.filter(pk=sid).first()
-                if not student:
-                    return empty_summary(lookup_message="Student not found for this parent account.")
-
-        if not student and not student_id:
-            student, pp_from_primary = primary_student_for_parent_user(request.user)
-            if not pp:
-                pp = pp_from_primary
-
-        id_card_no = ""
-        if student:
-            id_card_no = (student.Idcardno or "").strip() or (request.user.username or "").strip()
-        else:
-            id_card_no = (request.user.username or "").strip()
+        return empty_summary(id_card_no=id_card_no, lookup_message=msg)
+
+    centre_name = ""
+    if pp and pp.franchise_id:
+        centre_name = (pp.franchise.name or "").strip()
+    if not centre_name:
+        centre_name = (student.Centre or "").strip()
+
+    if not id_card_no:
+        id_card_no = (request.user.username or "").strip()
+
+    summary = legacy_summary
+    if not summary:
+        summary = build_fee_summary_from_records(student, centre_name=centre_name)
+
+    summary["legacy_configured"] = legacy_fee_db_configured()
+    summary["student_id"] = student.id
+    summary.setdefault("student", {})
+    parent_name = (student.ParentName or "").strip()
+    if not parent_name and pp and getattr(pp, "user", None):
+        parent_name = (pp.user.full_name or "").strip()
+    if not parent_name:
+        parent_name = (request.user.full_name or "").strip()
+    summary["student"]["parent_name"] = parent_name
+    if id_card_no:
+        summary["lookup_id_card"] = id_card_no
+    if not summary.get("lines") and legacy_lookup_error:
+        summary["lookup_message"] = legacy_lookup_error
+    elif not summary.get("lines") and legacy_fee_db_configured() and id_card_no:
+        summary["lookup_message"] = (
+            f"TiKES is connected but fee_payment has no active records for ID card {id_card_no}."
+        )
+    from students.fee_summary import merge_centre_status_overrides
 
-        legacy_summary = None
-        legacy_lookup_error = ""
-        if id_card_no and legacy_fee_db_configured():
-            legacy_summary, legacy_lookup_error = fetch_legacy_fee_summary(id_card_no)
+    summary = merge_centre_status_overrides(student, summary)
+    return summary
 
-        if not student:
-            if legacy_summary:
-                legacy_summary["legacy_configured"] = True
-                legacy_summary.setdefault("student", {})
-                parent_name = (legacy_summary["student"].get("parent_name") or "").strip()
-                if not parent_name:
-                    parent_name = (request.user.full_name or "").strip()
-                legacy_summary["student"]["parent_name"] = parent_name
-                legacy_summary["lookup_id_card"] = id_card_no
-                return Response(legacy_summary)
-
-            msg = "No student is linked to this parent login."
-            if id_card_no and legacy_fee_db_configured() and legacy_lookup_error:
-                msg = (
-                    f"No student profile found locally. TiKES lookup for ID card {id_card_no}: "
-                    f"{legacy_lookup_error}"
-                )
-            return empty_summary(id_card_no=id_card_no, lookup_message=msg)
 
-        centre_name = ""
-        if pp and pp.franchise_id:
-            centre_name = (pp.franchise.name or "").strip()
-        if not centre_name:
-            centre_name = (student.Centre or "").strip()
+class ParentFeeSummaryView(ParentETagMixin, APIView):
+    """Parent fee view — legacy TiKES MySQL when configured, else centre-entered FeeRecord rows."""
 
-        if not id_card_no:
-            id_card_no = (request.user.username or "").strip()
+    permission_classes = [IsParentUser]
 
-        summary = legacy_summary
-        if not summary:
-            summary = build_fee_summary_from_records(student, centre_name=centre_name)
+    def etag_enabled(self, request) -> bool:
+        # Legacy TiKES rows change outside Django; no stamp tracks them.
+        from students.legacy_fee_service import legacy_fee_db_configured
 
-        summary["legacy_configured"] = legacy_fee_db_configured()
-        summary["student_id"] = student.id
-        summary.setdefault("student", {})
-        parent_name = (student.ParentName or "").strip()
-        if not parent_name and pp and getattr(pp, "user", None):
-            parent_name = (pp.user.full_name or "").strip()
-        if not parent_name:
-            parent_name = (request.user.full_name or "").strip()
-        summary["student"]["parent_name"] = parent_name
-        if id_card_no:
-            summary["lookup_id_card"] = id_card_no
-        if not summary.get("lines") and legacy_lookup_error:
-            summary["lookup_message"] = legacy_lookup_error
-        elif not summary.get("lines") and legacy_fee_db_configured() and id_card_no:
-            summary["lookup_message"] = (
-                f"TiKES is connected but fee_payment has no active records for ID card {id_card_no}."
-            )
-        from students.fee_summary import merge_centre_status_overrides
+        return not legacy_fee_db_configured()
 
-        summary = merge_centre_status_overrides(student, summary)
-        return Response(summary)
+    def get(self, request):
+        return Response(_parent_fee_summary_payload(request, resolved_parent_profile_for_user(request.user)))
 
 
 class ParentFeePaymentConfigView(APIView):
@@ -1654,275 +1558,60 @@ class ParentSupportTicketListCreateView(generics.ListCreateAPIView):
         serializer.save(parent=pp, student=student)
 
 
-class ParentNotificationsView(APIView):
-    """Single parent notifications payload with all parent-visible updates."""
-
-    permission_classes = [IsParentUser]
-
-    @staticmethod
-    def _notification_key(source: str, item_id: int) -> str:
-        return f"{source}-{item_id}"
-
-    def get(self, request):
-        pp = resolved_parent_profile_for_user(request.user)
-        centre = _parent_centre(pp)
-        if not pp:
-            return Response(
-                {
-                    "announcements": [],
-                    "homework": [],
-                    "fees": [],
-                    "transport": [],
-                    "events": [],
-                    "achievements": [],
-                    "attendance": [],
-                    "parental_tips": [],
-                    "notifications": [],
-                    "unread_count": 0,
-                }
-            )
+def _parent_notifications_payload(request, pp, *, explicit=None, default=None) -> dict:
+    """One page of the parent feed; ``explicit`` is a ``?student=`` child, ``default`` the focus fallback."""
+    from . import notification_feed
 
-        announcements_qs = (
-            Announcement.objects.filter(franchise=centre, is_active=True, visible_to_parents=True)
-            .filter(_announcement_visible_q(pp, user=request.user))
-            .filter(parent_visible_announcement_q())
-            .select_related("student")
-            .distinct()
-            .order_by("-published_at")
-        ) if centre else Announcement.objects.none()
-        homework_qs = (
-            HomeworkAssignment.objects.filter(franchise=centre)
-            .filter(_homework_visible_q(pp, user=request.user))
-            .filter(parent_visible_homework_q())
-            .select_related("student")
-            .distinct()
-            .order_by("-assigned_date", "-created_at")
-        ) if centre else HomeworkAssignment.objects.none()
-        fees_qs = (
-            FeeRecord.objects.filter(student__parent=pp, student__is_active=True)
-            .select_related("student")
-            .order_by("-due_date", "-created_at")
-        )
-        focus = _parent_student_from_request(request, pp)
-        transport_qs = _parent_transport_routes_queryset(pp, focus_student=focus)
-        event_focus = _parent_focus_student(request, pp)
-        events_qs = (
-            exclude_showcase_placeholder_events(
-                parent_events_queryset(pp, centre=centre, student=event_focus)
-            )
-            if centre
-            else Event.objects.none()
-        )
-        kids = StudentProfile.objects.filter(parent=pp, is_active=True)
-        achievements_qs = (
-            (
-                StudentAchievement.objects.filter(franchise=centre)
-                .filter(Q(student__in=kids) | Q(student__isnull=True))
-                .select_related("student")
-                .distinct()
-                .order_by("-achieved_date", "-created_at")
-            )
-            if centre
-            else StudentAchievement.objects.none()
-        )
-        attendance_qs = (
-            AttendanceRecord.objects.filter(student__parent=pp, student__is_active=True)
-            .select_related("student")
-            .order_by("-date", "student_id")
+    visible = ParentNotification.objects.filter(parent=pp).filter(
+        notification_feed.visible_feed_q(student=explicit, default_student=default)
+    )
+    try:
+        limit = int(request.query_params.get("limit") or notification_feed.PAGE_SIZE)
+    except (TypeError, ValueError):
+        limit = notification_feed.PAGE_SIZE
+    try:
+        rows, next_cursor = notification_feed.page(
+            visible, cursor=(request.query_params.get("cursor") or "").strip(), limit=limit
         )
+        if explicit is not None:
+            unread_count = visible.filter(read_at__isnull=True).count()
+        else:
+            unread_count = parent_unread_count(pp.pk, default.pk if default is not None else None)
+    except (ProgrammingError, OperationalError):
+        # Migration not applied yet; keep the app working with an empty feed.
+        rows, next_cursor, unread_count = [], None, 0
+
+    return {
+        "notifications": [notification_feed.entry_payload(row) for row in rows],
+        "unread_count": unread_count,
+        "next_cursor": next_cursor,
+    }
 
-        focus = _parent_student_from_request(request, pp)
-        attendance_focus = _parent_focus_student(request, pp)
-        homework_focus = _parent_focus_student(request, pp)
-        if focus is not None:
-            announcements_qs = _filter_announcements_for_student(announcements_qs, focus)
-            fees_qs = fees_qs.filter(student_id=focus.pk)
-            achievements_qs = achievements_qs.filter(Q(student__isnull=True) | Q(student_id=focus.pk))
-        if homework_focus is not None:
-            homework_qs = _filter_homework_queryset_for_student(homework_qs, homework_focus)
-        if attendance_focus is not None:
-            attendance_qs = attendance_qs.filter(student_id=attendance_focus.pk)
-
-        parental_tips_qs = _parent_parental_tips_notification_qs(request, pp, focus=focus)
-
-        try:
-            read_map = {
-                row["notification_key"]: row["read_at"]
-                for row in ParentNotificationRead.objects.filter(parent=pp).values("notification_key", "read_at")
-            }
-        except (ProgrammingError, OperationalError):
-            # Migration not applied yet; keep notifications working without read-state.
-            read_map = {}
-        hide_read_before = timezone.now() - timedelta(days=1)
-
-        notifications = []
-
-        for item in announcements_qs:
-            key = self._notification_key("announcement", item.id)
-            read_at = read_map.get(key)
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "announcement",
-                    "source_id": item.id,
-                    "title": item.title or "Announcement",
-                    "body": item.body or "",
-                    "class_name": _notification_class_label(class_name=item.class_name, student=item.student),
-                    "published_at": item.published_at,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                }
-            )
-
-        for item in homework_qs:
-            key = self._notification_key("homework", item.id)
-            read_at = read_map.get(key)
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "homework",
-                    "source_id": item.id,
-                    "title": item.title or "Homework posted",
-                    "body": item.description or "",
-                    "class_name": _notification_class_label(class_name=item.class_name, student=item.student),
-                    "published_at": item.assigned_date,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                }
-            )
-
-        for item in fees_qs:
-            key = self._notification_key("fees", item.id)
-            read_at = read_map.get(key)
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "fees",
-                    "source_id": item.id,
-                    "title": item.title or "Fee update",
-                    "body": item.notes or "",
-                    "published_at": item.due_date,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                }
-            )
-
-        for item in transport_qs:
-            key = self._notification_key("transport", item.id)
-            read_at = read_map.get(key)
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "transport",
-                    "source_id": item.id,
-                    "title": item.route_name or "Transport update",
-                    "body": getattr(item, 'description', None) or getattr(item, 'tracking_note', None) or "",
-                    "published_at": item.updated_at or item.created_at,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                }
-            )
-
-        for item in events_qs:
-            key = self._notification_key("event", item.id)
-            read_at = read_map.get(key)
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "event",
-                    "source_id": item.id,
-                    "title": item.title or "New event",
-                    "body": strip_event_video_links(item.description) or "",
-                    "published_at": item.start_date or item.end_date,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                }
-            )
 
-        for item in achievements_qs:
-            key = self._notification_key("achievement", item.id)
-            read_at = read_map.get(key)
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "achievement",
-                    "source_id": item.id,
-                    "title": item.title or "Achievement update",
-                    "body": item.notes or "",
-                    "published_at": item.achieved_date,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                }
-            )
+def _parent_badge_count(request, pp) -> int:
+    """Unread count matching the default feed (focus-source entries of the focus child only)."""
+    focus = _parent_focus_student(request, pp)
+    return parent_unread_count(pp.pk, focus.pk if focus is not None else None)
 
-        for item in attendance_qs:
-            key = self._notification_key("attendance", item.id)
-            read_at = read_map.get(key)
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "attendance",
-                    "source_id": item.id,
-                    "title": f"Attendance: {item.status or 'Updated'}",
-                    "body": item.note or "",
-                    "published_at": item.date,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                }
-            )
 
-        for item in parental_tips_qs:
-            key = self._notification_key("parental_tip", item.id)
-            read_at = read_map.get(key)
-            targets = [str(c).strip() for c in (item.target_class_names or []) if str(c).strip()]
-            class_label = ", ".join(targets) if targets else ""
-            notifications.append(
-                {
-                    "id": key,
-                    "source": "parental_tip",
-                    "source_id": item.id,
-                    "title": item.title or "New parental tip",
-                    "body": (item.description or "").strip(),
-                    "class_name": class_label or None,
-                    "published_at": item.updated_at or item.created_at,
-                    "read": read_at is not None,
-                    "read_at": read_at,
-                    "action_path": "/dashboard/parent/parental-tips",
-                }
-            )
+class ParentNotificationsView(ParentETagMixin, APIView):
+    """
+    Parent notification feed, newest first (``students.ParentNotification``).
 
-        notifications = [
-            n for n in notifications if (not n["read"]) or (n.get("read_at") and n["read_at"] >= hide_read_before)
-        ]
-        notifications.sort(
-            key=lambda x: (
-                x.get("published_at").isoformat() if hasattr(x.get("published_at"), "isoformat")
-                else str(x.get("published_at") or "")
-            ),
-            reverse=True,
-        )
-        unread_count = sum(1 for n in notifications if not n["read"])
+    ``?limit=`` (default 50, max 200) and ``?cursor=`` (``next_cursor`` of the
+    previous page); ``?student=`` narrows to one child's entries plus
+    family / centre-wide ones.
+    """
 
-        from documents.serializers import ParentDocumentSerializer
+    permission_classes = [IsParentUser]
 
-        return Response(
-            {
-                "announcements": AnnouncementSerializer(announcements_qs, many=True, context={"request": request}).data,
-                "homework": HomeworkAssignmentSerializer(homework_qs, many=True, context={"request": request}).data,
-                "fees": FeeRecordSerializer(fees_qs, many=True, context={"request": request}).data,
-                "transport": ParentTransportRouteSerializer(transport_qs, many=True, context={"request": request}).data,
-                "events": EventSerializer(events_qs, many=True, context={"request": request}).data,
-                "achievements": ParentStudentAchievementSerializer(achievements_qs, many=True, context={"request": request}).data,
-                "attendance": AttendanceRecordSerializer(attendance_qs, many=True, context={"request": request}).data,
-                "parental_tips": ParentDocumentSerializer(
-                    parental_tips_qs,
-                    many=True,
-                    context={"request": request, "merge_holiday_for_parent": True},
-                ).data,
-                "notifications": notifications,
-                "unread_count": unread_count,
-            }
-        )
+    def get(self, request):
+        pp = resolved_parent_profile_for_user(request.user)
+        if not pp:
+            return Response({"notifications": [], "unread_count": 0, "next_cursor": None})
+        explicit = _parent_student_from_request(request, pp)
+        default = None if explicit is not None else _parent_focus_student(request, pp)
+        return Response(_parent_notifications_payload(request, pp, explicit=explicit, default=default))
 
 
 class ParentNotificationReadView(APIView):
@@ -1960,22 +1649,78 @@ class ParentNotificationReadView(APIView):
             return Response({"detail": "notification_id is required"}, status=400)
 
         try:
-            ParentNotificationRead.objects.get_or_create(
+            read, _created = ParentNotificationRead.objects.get_or_create(
                 parent=pp,
                 notification_key=notification_id,
             )
+            from .notification_feed import mark_read
+
+            mark_read(pp.pk, notification_id, read.read_at)
         except (ProgrammingError, OperationalError):
             return Response({"ok": False, "detail": "Notification read table not ready"}, status=503)
-        unread_count = 0
         try:
-            payload = ParentNotificationsView().get(request).data
-            if isinstance(payload, dict):
-                unread_count = int(payload.get("unread_count", 0) or 0)
-        except Exception:
+            unread_count = _parent_badge_count(request, pp)
+        except (ProgrammingError, OperationalError):
             unread_count = 0
         return Response({"ok": True, "notification_id": notification_id, "unread_count": unread_count})
 
 
+class ParentNotificationUnreadCountView(APIView):
+    """Badge polling: the parent's maintained unread counter (what the default feed lists)."""
+
+    permission_classes = [IsParentUser]
+
+    def get(self, request):
+        pp = resolved_parent_profile_for_user(request.user)
+        if not pp:
+            return Response({"unread_count": 0})
+        try:
+            return Response({"unread_count": _parent_badge_count(request, pp)})
+        except (ProgrammingError, OperationalError):
+            return Response({"unread_count": 0})
+
+
+class ParentBootstrapView(ParentETagMixin, APIView):
+    """
+    Parent app start-up in one request: ``dashboard``, ``students``,
+    ``notifications``, ``fees`` and ``calendar`` sections.
+
+    ``?sections=students,fees`` limits the response; ``?student=`` focuses one
+    child as on the individual endpoints. Sections are cached independently
+    (``students.parent_bootstrap``).
+    """
+
+    permission_classes = [IsParentUser]
+
+    def etag_enabled(self, request) -> bool:
+        from .parent_bootstrap import SECTIONS, parse_sections
+
+        sections, _unknown = parse_sections(request.query_params.get("sections"))
+        return all(SECTIONS[name].cacheable() for name in sections)
+
+    def get(self, request):
+        from .parent_bootstrap import SECTIONS, bootstrap_payload, parse_sections
+
+        sections, unknown = parse_sections(request.query_params.get("sections"))
+        if unknown:
+            return Response(
+                {"detail": f"Unknown section(s): {', '.join(unknown)}", "sections": list(SECTIONS)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if "calendar" in sections:
+            from .calendar_months import parse_month_range
+
+            # Same 400 as ParentCalendarAttendanceView instead of silently sending every month.
+            try:
+                parse_month_range(request.query_params)
+            except ValueError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        pp = resolved_parent_profile_for_user(request.user)
+        if not pp:
+            return Response({"detail": "Parent profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(bootstrap_payload(request, pp, sections))
+
+
 # ----- Franchise (full CRUD) -----
 
 
@@ -2200,32 +1945,6 @@ def _franchise_support_ticket_reminder_qs(franchise):
     )
 
 
-def _franchise_inbox_unread_count(franchise, read_keys: set[str] | None = None) -> int:
-    if read_keys is None:
-        read_keys = set(
-            FranchiseNotificationRead.objects.filter(franchise=franchise).values_list(
-                "notification_key", flat=True
-            )
-        )
-
-    def _key(source: str, item_id: int) -> str:
-        return f"{source}-{item_id}"
-
-    unread = 0
-    for ann_id in _franchise_ho_inbox_announcement_qs(franchise).values_list("pk", flat=True):
-        if _key("head_office", ann_id) not in read_keys:
-            unread += 1
-    for ticket_id in _franchise_support_ticket_reminder_qs(franchise).values_list("pk", flat=True):
-        if _key("support_ticket", ticket_id) not in read_keys:
-            unread += 1
-
-    from franchises.models import DriverActivityLog
-    for log_id in DriverActivityLog.objects.filter(driver__franchise=franchise).values_list("pk", flat=True):
-        if _key("driver_activity", log_id) not in read_keys:
-            unread += 1
-    return unread
-
-
 class FranchiseNotificationsView(APIView):
     """Centre inbox: HO campaigns and support-ticket reminders from head office."""
 
@@ -2318,9 +2037,7 @@ class FranchiseNotificationsView(APIView):
             reverse=True,
         )
 
-        read_keys = set(read_map.keys())
-        unread_count = _franchise_inbox_unread_count(franchise, read_keys)
-        return Response({"notifications": notifications, "unread_count": unread_count})
+        return Response({"notifications": notifications, "unread_count": franchise_unread_count(franchise)})
 
 
 class FranchiseNotificationReadView(APIView):
@@ -2350,16 +2067,26 @@ class FranchiseNotificationReadView(APIView):
             return Response({"detail": "Notification not found"}, status=404)
 
         key = FranchiseNotificationsView._notification_key(source, pk)
-        FranchiseNotificationRead.objects.update_or_create(
+        _read, created = FranchiseNotificationRead.objects.update_or_create(
             franchise=franchise,
             notification_key=key,
             defaults={},
         )
-        read_keys = set(
-            FranchiseNotificationRead.objects.filter(franchise=franchise).values_list("notification_key", flat=True)
-        )
-        unread_count = _franchise_inbox_unread_count(franchise, read_keys)
-        return Response({"ok": True, "unread_count": unread_count})
+        if created:
+            franchise_inbox_read(franchise.pk)
+        return Response({"ok": True, "unread_count": franchise_unread_count(franchise)})
+
+
+class FranchiseNotificationUnreadCountView(APIView):
+    """Badge polling: the centre inbox's maintained unread counter."""
+
+    permission_classes = [IsFranchiseUser]
+
+    def get(self, request):
+        franchise = franchise_profile_for_user(request.user)
+        if not franchise:
+            return Response({"unread_count": 0})
+        return Response({"unread_count": franchise_unread_count(franchise)})
 
 
 @api_view(["GET"])
@@ -2435,15 +2162,13 @@ def _franchise_attendance_student_ids_for_class(
     franchise, class_name: str, academic_year: str = ""
 ) -> list[int]:
     """Student ids at this centre whose class + year match the attendance filters."""
-    target = (class_name or "").strip()
-    if not target:
+    target_key = class_key(class_name)
+    if not target_key:
         return []
     ids: list[int] = []
-    for student in StudentProfile.objects.filter(parent__franchise=franchise, is_active=True).only(
-        "id", "class_name", "Year"
-    ):
-        if not _class_label_matches(student.class_name, target):
-            continue
+    for student in StudentProfile.objects.filter(
+        parent__franchise=franchise, is_active=True, class_key=target_key
+    ).only("id", "class_name", "Year"):
         if not _student_matches_academic_year_filter(student, academic_year):
             continue
         ids.append(student.pk)
@@ -2584,58 +2309,56 @@ class FranchiseAttendanceListCreateView(generics.ListCreateAPIView):
 
 
 class FranchiseAttendanceBulkUpsertView(APIView):
-    """Save many attendance rows in one request (create or update by student+date)."""
+    """
+    Save many attendance rows in one request (create or update by student+date).
+
+    JSON ``{"records": [...]}`` from the register screen, or a multipart ``file``
+    (CSV / XLSX) to back-fill a term; any mix of dates and classes. See
+    ``students.attendance_upsert``.
+    """
 
     permission_classes = [IsFranchiseUser]
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
 
     def post(self, request):
-        serializer = FranchiseAttendanceBulkSerializer(
-            data=request.data,
-            context={"request": request},
+        from students.attendance_upsert import (
+            MAX_REPORTED_ERRORS,
+            Mark,
+            UploadError,
+            read_upload,
+            resolve_upload_rows,
+            upsert_marks,
         )
-        serializer.is_valid(raise_exception=True)
-        rows = serializer.validated_data["records"]
-        if not rows:
-            return Response({"saved": 0}, status=status.HTTP_200_OK)
-
-        student_ids = [row["student"].pk for row in rows]
-        dates = {row["date"] for row in rows}
-        existing_map: dict[tuple[int, object], AttendanceRecord] = {}
-        if len(dates) == 1:
-            only_date = next(iter(dates))
-            for record in AttendanceRecord.objects.filter(student_id__in=student_ids, date=only_date):
-                existing_map[(record.student_id, record.date)] = record
-
-        to_update: list[AttendanceRecord] = []
-        to_create: list[AttendanceRecord] = []
-        for row in rows:
-            student = row["student"]
-            date = row["date"]
-            status_value = row["status"]
-            note = row.get("note") or ""
-            key = (student.pk, date)
-            existing = existing_map.get(key)
-            if existing is not None:
-                existing.status = status_value
-                existing.note = note
-                to_update.append(existing)
-            else:
-                to_create.append(
-                    AttendanceRecord(
-                        student=student,
-                        date=date,
-                        status=status_value,
-                        note=note,
-                    )
-                )
 
-        with transaction.atomic():
-            if to_update:
-                AttendanceRecord.objects.bulk_update(to_update, ["status", "note"])
-            if to_create:
-                AttendanceRecord.objects.bulk_create(to_create, ignore_conflicts=True)
+        upload = request.FILES.get("file")
+        errors: list[dict] = []
+        if upload is not None:
+            franchise = franchise_profile_for_user(request.user)
+            if not franchise:
+                return Response({"detail": "Franchise profile not found"}, status=404)
+            try:
+                marks, errors = resolve_upload_rows(franchise, read_upload(upload))
+            except UploadError as exc:
+                return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            serializer = FranchiseAttendanceBulkSerializer(
+                data=request.data,
+                context={"request": request},
+            )
+            serializer.is_valid(raise_exception=True)
+            marks = [
+                Mark(row["student"].pk, row["date"], row["status"], row.get("note") or "")
+                for row in serializer.validated_data["records"]
+            ]
+        if not marks and not errors:
+            return Response({"saved": 0, "created": 0, "updated": 0, "skipped": 0}, status=status.HTTP_200_OK)
 
-        return Response({"saved": len(rows)}, status=status.HTTP_200_OK)
+        counts = upsert_marks(marks)
+        payload = {"saved": len(marks), **counts}
+        if upload is not None:
+            payload["skipped"] += len(errors)
+            payload["errors"] = errors[:MAX_REPORTED_ERRORS]
+        return Response(payload, status=status.HTTP_200_OK)
 
 
 class FranchiseAttendanceClearDateView(APIView):
@@ -2749,6 +2472,35 @@ class FranchiseAttendanceHolidaysView(APIView):
         )
 
 
+class FranchiseAttendanceMatrixView(APIView):
+    """
+    Class × day register for a month (``?month=YYYY-MM&class_name=...&academic_year=...``).
+
+    Compact arrays with holiday columns pre-applied; see ``students.attendance_matrix``.
+    """
+
+    permission_classes = [IsFranchiseUser]
+
+    def get(self, request):
+        from students.attendance_logic import month_bounds
+        from students.attendance_matrix import class_month_matrix
+
+        params = request.query_params
+        month_str = (params.get("month") or date.today().strftime("%Y-%m")).strip()
+        class_name = (params.get("class_name") or params.get("class") or "").strip()
+        academic_year = (params.get("academic_year") or params.get("year") or "").strip()
+        start, end = month_bounds(month_str)
+        if start is None or end is None:
+            return Response({"detail": "Invalid month. Use YYYY-MM."}, status=status.HTTP_400_BAD_REQUEST)
+        if not class_name:
+            return Response({"detail": "class_name is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        franchise = franchise_profile_for_user(request.user)
+        if not franchise:
+            return Response({"detail": "Franchise profile not found"}, status=404)
+        return Response(class_month_matrix(franchise, class_name, start, end, academic_year))
+
+
 class FranchiseFeeListCreateView(generics.ListCreateAPIView):
     permission_classes = [IsFranchiseUser]
     serializer_class = FeeRecordSerializer
@@ -0,0 +1,307 @@
+"""Student / parent signal handlers (identity links, notification feed, inbox counters, change stamps, holiday calendars)."""
+
+from __future__ import annotations
+
+import logging
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from documents.models import DocumentCategory, ParentDocument
+from events.models import Event
+from franchises.models import DriverActivityLog, DriverProfile, Franchise, ParentProfile
+
+from . import change_stamps, holiday_calendar, inbox_counters, notification_feed
+from .models import (
+    Announcement,
+    AttendanceRecord,
+    CentreAttendanceClosedDay,
+    DailyActivity,
+    FeeRecord,
+    Grade,
+    HomeworkAssignment,
+    HomeworkSubmission,
+    ParentFeePayment,
+    ParentIdentityLink,
+    ParentNotificationRead,
+    StudentAchievement,
+    StudentProfile,
+    StudentTransportAssignment,
+    SupportTicket,
+    TransportRoute,
+)
+
+logger = logging.getLogger(__name__)
+
+# Saves limited to other columns (photo, notes, contact enrichment, last_login)
+# cannot change which profile / children a parent login resolves to.
+USER_IDENTITY_FIELDS = frozenset({"email", "username", "role", "is_active"})
+PROFILE_IDENTITY_FIELDS = frozenset({"user", "user_id", "franchise", "franchise_id", "Emailid"})
+STUDENT_IDENTITY_FIELDS = frozenset(
+    {"parent", "parent_id", "is_active", "Idcardno", "roll_number", "Emailid", "Mobileno", "Centre", "City"}
+)
+
+PROFILE_CENTRE_FIELDS = frozenset({"franchise", "franchise_id"})
+# Child fields that decide which feed entries reach a parent.
+STUDENT_FEED_FIELDS = frozenset({"parent_id", "is_active", "class_name"})
+FEED_SOURCE_MODELS = (
+    Announcement,
+    HomeworkAssignment,
+    FeeRecord,
+    TransportRoute,
+    Event,
+    StudentAchievement,
+    AttendanceRecord,
+    ParentDocument,
+)
+# Parent-app ETag stamps: rows carrying franchise_id / student_id / parent_id.
+CENTRE_STAMP_MODELS = (
+    Announcement,
+    HomeworkAssignment,
+    DailyActivity,
+    Event,
+    StudentAchievement,
+    TransportRoute,
+    CentreAttendanceClosedDay,
+)
+STUDENT_STAMP_MODELS = (AttendanceRecord, FeeRecord, Grade, HomeworkSubmission, StudentTransportAssignment)
+PARENT_STAMP_MODELS = (ParentFeePayment,)
+
+
+def _touches(update_fields, fields: frozenset) -> bool:
+    return update_fields is None or bool(fields.intersection(update_fields))
+
+
+def _drop_links(q: Q) -> None:
+    try:
+        ParentIdentityLink.objects.filter(q).delete()
+    except Exception:
+        logger.exception("Failed to invalidate parent identity links")
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_identity_on_user_save(sender, instance, created: bool, raw: bool = False, update_fields=None, **kwargs) -> None:
+    if raw or created or not _touches(update_fields, USER_IDENTITY_FIELDS):
+        return
+    _drop_links(Q(user_id=instance.pk))
+
+
+@receiver(post_save, sender=ParentProfile)
+@receiver(post_delete, sender=ParentProfile)
+def invalidate_identity_on_profile_change(sender, instance: ParentProfile, raw: bool = False, update_fields=None, **kwargs) -> None:
+    if raw or not _touches(update_fields, PROFILE_IDENTITY_FIELDS):
+        return
+    _drop_links(Q(parent_profile_id=instance.pk) | Q(user_id=instance.user_id))
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_delete, sender=StudentProfile)
+def invalidate_identity_on_student_change(sender, instance: StudentProfile, raw: bool = False, update_fields=None, **kwargs) -> None:
+    if raw or not _touches(update_fields, STUDENT_IDENTITY_FIELDS):
+        return
+    q = Q(primary_student_id=instance.pk)
+    if instance.parent_id:
+        q |= Q(parent_profile_id=instance.parent_id)
+    if connection.features.supports_json_field_contains:
+        # Also the previous parent's links when the child moved between profiles.
+        q |= Q(student_ids__contains=[instance.pk])
+    _drop_links(q)
+
+
+# ----- Parent notification feed (fan-out on write) -----
+
+
+def sync_feed_on_source_save(sender, instance, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    notification_feed.schedule_sync(notification_feed.source_for_model(sender), instance.pk)
+
+
+def retract_feed_on_source_delete(sender, instance, **kwargs) -> None:
+    source = notification_feed.source_for_model(sender)
+    try:
+        notification_feed.retract(source, instance.pk)
+    except Exception:
+        logger.exception("Failed to retract %s-%s from parent feeds", source, instance.pk)
+
+
+for _model in FEED_SOURCE_MODELS:
+    post_save.connect(sync_feed_on_source_save, sender=_model, dispatch_uid=f"parent_feed_save_{_model.__name__}")
+    post_delete.connect(retract_feed_on_source_delete, sender=_model, dispatch_uid=f"parent_feed_delete_{_model.__name__}")
+
+
+@receiver(post_save, sender=StudentTransportAssignment)
+@receiver(post_delete, sender=StudentTransportAssignment)
+def rebuild_transport_feed_on_assignment_change(sender, instance, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    parent_id = StudentProfile.objects.filter(pk=instance.student_id).values_list("parent_id", flat=True).first()
+    notification_feed.schedule_parent_rebuild(parent_id, [notification_feed.Source.TRANSPORT])
+
+
+@receiver(post_save, sender=StudentProfile)
+def rebuild_feed_on_student_change(sender, instance: StudentProfile, created: bool, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    # Loaded-value snapshot (ChangeTrackingMixin) — untouched class / parent means no rebuild.
+    if not created and not STUDENT_FEED_FIELDS.intersection(instance.changed_fields()):
+        return
+    notification_feed.schedule_parent_rebuild(instance.parent_id)
+    previous_parent = instance.previous("parent")
+    if previous_parent and previous_parent != instance.parent_id:
+        notification_feed.schedule_parent_rebuild(previous_parent)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def rebuild_feed_on_student_delete(sender, instance: StudentProfile, **kwargs) -> None:
+    notification_feed.schedule_parent_rebuild(instance.parent_id)
+
+
+@receiver(post_save, sender=ParentProfile)
+def rebuild_feed_on_profile_centre_change(sender, instance: ParentProfile, created: bool, raw: bool = False, update_fields=None, **kwargs) -> None:
+    if raw or not (created or _touches(update_fields, PROFILE_CENTRE_FIELDS)):
+        return
+    notification_feed.schedule_parent_rebuild(instance.pk)
+
+
+# ----- Centre inbox counters -----
+
+
+@receiver(post_save, sender=Announcement)
+@receiver(post_delete, sender=Announcement)
+def count_head_office_campaign(sender, instance: Announcement, created: bool = False, raw: bool = False, **kwargs) -> None:
+    if raw or not instance.campaign_id:
+        return
+    if created and instance.is_active and instance.visible_to_centres:
+        inbox_counters.franchise_inbox_added(instance.franchise_id, instance.published_at)
+    elif not created:
+        # Edited / deleted campaign rows may enter or leave the inbox: recount on next read.
+        inbox_counters.franchise_inbox_changed([instance.franchise_id])
+
+
+@receiver(post_save, sender=SupportTicket)
+@receiver(post_delete, sender=SupportTicket)
+def recount_inbox_on_ticket_reminder(sender, instance: SupportTicket, raw: bool = False, **kwargs) -> None:
+    if raw or not instance.ho_reminded_at:
+        return
+    franchise_id = ParentProfile.objects.filter(pk=instance.parent_id).values_list("franchise_id", flat=True).first()
+    inbox_counters.franchise_inbox_changed([franchise_id])
+
+
+@receiver(post_save, sender=DriverActivityLog)
+@receiver(post_delete, sender=DriverActivityLog)
+def count_driver_activity(sender, instance: DriverActivityLog, created: bool = False, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    franchise_id = DriverProfile.objects.filter(pk=instance.driver_id).values_list("franchise_id", flat=True).first()
+    if created:
+        inbox_counters.franchise_inbox_added(franchise_id)
+    else:
+        inbox_counters.franchise_inbox_changed([franchise_id])
+
+
+# ----- Parent-app change stamps (ETags) -----
+
+
+def bump_centre_stamp(sender, instance, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    change_stamps.centres_changed([instance.franchise_id])
+
+
+def bump_student_parent_stamp(sender, instance, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    change_stamps.students_changed([instance.student_id])
+
+
+def bump_parent_stamp(sender, instance, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    change_stamps.parents_changed([instance.parent_id])
+
+
+for _handler, _models in (
+    (bump_centre_stamp, CENTRE_STAMP_MODELS),
+    (bump_student_parent_stamp, STUDENT_STAMP_MODELS),
+    (bump_parent_stamp, PARENT_STAMP_MODELS),
+):
+    for _model in _models:
+        post_save.connect(_handler, sender=_model, dispatch_uid=f"change_stamp_save_{_model.__name__}")
+        post_delete.connect(_handler, sender=_model, dispatch_uid=f"change_stamp_delete_{_model.__name__}")
+
+
+@receiver(post_save, sender=ParentDocument)
+@receiver(post_delete, sender=ParentDocument)
+def bump_document_stamp(sender, instance: ParentDocument, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    if instance.franchise_id:
+        change_stamps.centres_changed([instance.franchise_id])
+    else:
+        change_stamps.global_changed()
+
+
+@receiver(post_save, sender=ParentNotificationRead)
+@receiver(post_delete, sender=ParentNotificationRead)
+def bump_feed_stamp(sender, instance: ParentNotificationRead, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    change_stamps.feeds_changed([instance.parent_id])
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_delete, sender=StudentProfile)
+def bump_student_stamp(sender, instance: StudentProfile, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    # Also the previous parent when the child moved between profiles.
+    change_stamps.parents_changed([instance.parent_id, instance.previous("parent")])
+
+
+@receiver(post_save, sender=ParentProfile)
+@receiver(post_delete, sender=ParentProfile)
+def bump_profile_stamp(sender, instance: ParentProfile, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    change_stamps.parents_changed([instance.pk])
+
+
+@receiver(post_save, sender=Franchise)
+def bump_franchise_stamp(sender, instance: Franchise, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    change_stamps.centres_changed([instance.pk])
+
+
+# ----- Compiled holiday calendars -----
+
+
+@receiver(post_save, sender=ParentDocument)
+@receiver(post_delete, sender=ParentDocument)
+def invalidate_document_holidays(sender, instance: ParentDocument, raw: bool = False, **kwargs) -> None:
+    if raw or instance.category != DocumentCategory.HOLIDAY_LISTS:
+        return
+    if instance.franchise_id:
+        holiday_calendar.centres_changed([instance.franchise_id])
+    else:
+        holiday_calendar.all_centres_changed()
+
+
+@receiver(post_save, sender=CentreAttendanceClosedDay)
+@receiver(post_delete, sender=CentreAttendanceClosedDay)
+def invalidate_closed_day_holidays(sender, instance: CentreAttendanceClosedDay, raw: bool = False, **kwargs) -> None:
+    if raw:
+        return
+    holiday_calendar.centres_changed([instance.franchise_id])
+
+
+@receiver(post_save, sender=Franchise)
+def invalidate_franchise_holidays(sender, instance: Franchise, raw: bool = False, **kwargs) -> None:
+    # City / state decide which head-office entries apply to the centre.
+    if raw:
+        return
+    holiday_calendar.centres_changed([instance.pk])
@@ -0,0 +1,930 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from franchises.models import Franchise, ParentProfile
+from students import feed_outbox
+from students.models import (
+    Announcement,
+    AttendanceRecord,
+    HomeworkAssignment,
+    ParentFeedJob,
+    ParentInboxCounter,
+    ParentNotification,
+    PortalChangeStamp,
+    StudentProfile,
+)
+
+
+class ClassKeyTests(SimpleTestCase):
+    SAMPLES = (
+        "PP1 25-26",
+        "pp-1",
+        "LKG",
+        "PP-1 / Junior KG / LKG",
+        "Senior KG",
+        "UKG 24-25",
+        "Play Group",
+        "playgroup 25-26",
+        "Nursery",
+        "Refresher Course Nur",
+        "Day Care",
+        "Summer Camp 2025",
+        "Grade 1 25-26",
+        "Grade 1",
+        "grade 1",
+        "Foo 24-25",
+        "foo 25-26",
+        "FOO 24-25",
+    )
+
+    def test_key_agrees_with_label_matching(self):
+        from students.class_labels import _class_label_matches, class_key
+
+        for sc in self.SAMPLES:
+            for tc in self.SAMPLES:
+                with self.subTest(student=sc, target=tc):
+                    self.assertEqual(class_key(sc) == class_key(tc), _class_label_matches(sc, tc))
+
+    def test_key_folds_case_and_only_canonical_years(self):
+        from students.class_labels import class_key
+
+        self.assertEqual(class_key(""), "")
+        self.assertEqual(class_key("  "), "")
+        self.assertEqual(class_key("PP1 25-26"), "pp-1 / junior kg / lkg")
+        self.assertEqual(class_key(" Robotics 25-26 "), class_key("robotics 25-26"))
+        # Last year's content for a non-canonical class must not reach this year's children.
+        self.assertNotEqual(class_key("Grade 1 25-26"), class_key("Grade 1"))
+        self.assertNotEqual(class_key("Foo 24-25"), class_key("foo 25-26"))
+
+    def test_parent_documents_target_classes_by_key(self):
+        from documents.models import ParentDocument
+        from documents.publish_targeting import document_matches_parent
+
+        centre = SimpleNamespace(id=3)
+        parent = SimpleNamespace(franchise_id=3, franchise=centre)
+        doc = ParentDocument(franchise_id=3, target_class_names=["Grade 1 25-26", "LKG"])
+        for class_name, expected in (("Grade 1 25-26", True), ("Grade 1", False), ("PP1 24-25", True)):
+            with self.subTest(class_name=class_name):
+                student = SimpleNamespace(class_name=class_name, class_key="")
+                self.assertIs(document_matches_parent(doc, parent, student=student), expected)
+
+    def test_save_with_class_name_in_update_fields_writes_key(self):
+        from students.models import HomeworkAssignment
+
+        row = HomeworkAssignment(pk=5, class_name="UKG 24-25")
+        with patch("django.db.models.Model.save") as save:
+            row.save(update_fields=["class_name"])
+        self.assertEqual(row.class_key, "pp-2 / senior kg / ukg")
+        self.assertEqual(save.call_args.kwargs["update_fields"], ["class_name", "class_key"])
+        with patch("django.db.models.Model.save") as save:
+            row.save(update_fields=["title"])
+        self.assertEqual(save.call_args.kwargs["update_fields"], ["title"])
+
+    @staticmethod
+    def _leaves(q):
+        for child in q.children:
+            yield from ClassKeyTests._leaves(child) if hasattr(child, "children") else [child]
+
+    def test_student_filters_compare_stored_keys(self):
+        from events.visibility import filter_events_for_class_name, filter_events_for_student
+        from students import portal_views
+
+        qs = Mock()
+        student = SimpleNamespace(pk=9, class_name="LKG 25-26", class_key="pp-1 / junior kg / lkg")
+        portal_views._filter_homework_queryset_for_student(qs, student)
+        self.assertIn(("class_key", "pp-1 / junior kg / lkg"), list(self._leaves(qs.filter.call_args.args[0])))
+        filter_events_for_student(qs, SimpleNamespace(pk=9, class_name="Nursery", class_key=""))
+        self.assertIn(("class_key", "nursery"), list(self._leaves(qs.filter.call_args.args[0])))
+        filter_events_for_class_name(qs, "Junior KG")
+        self.assertIn(("class_key", "pp-1 / junior kg / lkg"), list(self._leaves(qs.filter.call_args.args[0])))
+
+
+@override_settings(PARENT_FEED_OUTBOX_AUTO_DRAIN=False)
+class ClassKeyMigrationTests(TestCase):
+    """The test database is built without migrations (DB_SKIP_MIGRATIONS); run their data steps directly."""
+
+    def test_backfill_steps_fill_stale_keys(self):
+        from importlib import import_module
+
+        from django.apps import apps
+
+        from events.models import Event
+
+        admin = User.objects.create_user(email="admin@x.in", password="x12345678", role="ADMIN")
+        centre = Franchise.objects.create(name="Kondapur", slug="kondapur-timekids", user=admin, admin=admin)
+        parent = ParentProfile.objects.create(
+            user=User.objects.create_user(email="p@x.in", password="x12345678", role="PARENT"), franchise=centre
+        )
+        student = StudentProfile.objects.create(parent=parent, first_name="A", last_name="B", class_name="PP1 25-26")
+        announcement = Announcement.objects.create(franchise=centre, title="t", class_name="Grade 1 25-26")
+        event = Event.objects.create(franchise=centre, title="t", start_date=date(2026, 1, 5), class_name="LKG")
+        for model in (StudentProfile, Announcement, Event):
+            model.objects.update(class_key="")
+
+        import_module("students.migrations.0036_class_key").fill_class_keys(apps, None)
+        import_module("events.migrations.0004_event_class_key").fill_class_keys(apps, None)
+
+        student.refresh_from_db()
+        announcement.refresh_from_db()
+        event.refresh_from_db()
+        self.assertEqual(student.class_key, "pp-1 / junior kg / lkg")
+        self.assertEqual(announcement.class_key, "grade 1 25-26")
+        self.assertEqual(event.class_key, "pp-1 / junior kg / lkg")
+
+
+class ParentNotificationFeedTests(SimpleTestCase):
+    def test_cursor_round_trip_and_garbage(self):
+        from students import notification_feed
+        from students.models import ParentNotification
+
+        when = timezone.now()
+        row = ParentNotification(pk=41, published_at=when)
+        self.assertEqual(notification_feed.decode_cursor(notification_feed.encode_cursor(row)), (when, 41))
+        for bad in ("", "!!", "bm90LWEtY3Vyc29y"):
+            self.assertIsNone(notification_feed.decode_cursor(bad))
+
+    def test_class_audience_names_the_child_only_when_one_matches(self):
+        from students.notification_feed import FeedAudience
+
+        aud = FeedAudience()
+        aud._children = {1: [(10, "nursery"), (11, "nursery")], 2: [(20, "nursery"), (21, "play group")], 3: [(30, "lkg")]}
+        self.assertEqual(aud.class_audience({1, 2, 3}, {"nursery"}), {1: None, 2: 20})
+        self.assertEqual(aud.class_audience({1, 3}, set()), {1: None, 3: None})
+        restricted = FeedAudience([2])
+        restricted._children = aud._children
+        self.assertEqual(restricted.class_audience({1, 2, 3}, {"nursery"}), {2: 20})
+
+    def test_unpublished_rows_have_no_entry(self):
+        from events.models import Event
+        from students.models import Announcement
+        from students.notification_feed import Source, _content
+
+        self.assertIsNone(_content(Source.ANNOUNCEMENT, Announcement(title="x", is_active=False)))
+        self.assertIsNone(_content(Source.EVENT, Event(title="x", start_date=date(2026, 1, 5), location="Showcase")))
+        entry = _content(Source.EVENT, Event(title="", start_date=date(2026, 1, 5)))
+        self.assertEqual((entry["title"], entry["published_on"]), ("New event", date(2026, 1, 5)))
+
+    def test_payload_keeps_legacy_shape(self):
+        from students.models import ParentNotification
+        from students.notification_feed import entry_payload
+
+        row = ParentNotification(
+            source="homework", source_id=7, title="Rhymes", published_at=timezone.now(),
+            published_on=date(2026, 1, 5), class_name="Nursery",
+        )
+        data = entry_payload(row)
+        self.assertEqual((data["id"], data["published_at"], data["read"]), ("homework-7", date(2026, 1, 5), False))
+        self.assertEqual(data["class_name"], "Nursery")
+        tip = entry_payload(ParentNotification(source="parental_tip", source_id=3, title="t", published_at=timezone.now(), action_path="/x"))
+        self.assertEqual((tip["class_name"], tip["action_path"]), (None, "/x"))
+        self.assertNotIn("class_name", entry_payload(ParentNotification(source="fees", source_id=1, title="f", published_at=timezone.now())))
+
+    def test_mark_read_ignores_unknown_keys(self):
+        from students import notification_feed
+
+        with patch("students.models.ParentNotification.objects") as objects, patch.object(
+            notification_feed.change_stamps, "feeds_changed"
+        ), patch.object(notification_feed.inbox_counters, "parent_entry_read"):
+            self.assertEqual(notification_feed.mark_read(1, "ticket-5"), 0)
+            self.assertEqual(notification_feed.mark_read(1, "homework-x"), 0)
+            objects.filter.assert_not_called()
+            notification_feed.mark_read(1, "parental_tip-9")
+        self.assertEqual(objects.filter.call_args.kwargs["source"], "parental_tip")
+        self.assertEqual(objects.filter.call_args.kwargs["source_id"], 9)
+
+
+class ParentFeedOutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@x.in", password="x12345678", role="ADMIN")
+        cls.centre = Franchise.objects.create(name="Kondapur", slug="kondapur-timekids", user=admin, admin=admin)
+        cls.parent = cls._parent("p@x.in", cls.centre)
+        cls.child = StudentProfile.objects.create(parent=cls.parent, first_name="A", last_name="B", class_name="Nursery")
+        # Imported family: the profile points at a stale centre, the child's legacy Centre column is current.
+        other_admin = User.objects.create_user(email="admin2@x.in", password="x12345678", role="ADMIN")
+        cls.stale_centre = Franchise.objects.create(
+            name="Madhapur", slug="madhapur-timekids", user=other_admin, admin=other_admin
+        )
+        cls.legacy = cls._parent("q@x.in", cls.stale_centre)
+        StudentProfile.objects.create(
+            parent=cls.legacy, first_name="C", last_name="D", class_name="Nursery", Centre="Kondapur"
+        )
+        cls.other_class = cls._parent("r@x.in", cls.centre)
+        StudentProfile.objects.create(parent=cls.other_class, first_name="E", last_name="F", class_name="LKG")
+        feed_outbox.drain_jobs()
+
+    @staticmethod
+    def _parent(email, centre):
+        user = User.objects.create_user(email=email, password="x12345678", role="PARENT")
+        return ParentProfile.objects.create(user=user, franchise=centre)
+
+    def test_source_save_queues_a_job_and_the_drain_fans_it_out(self):
+        announcement = Announcement.objects.create(franchise=self.centre, title="Sports day", class_name="Nursery")
+        # The request thread only wrote the job.
+        self.assertFalse(ParentNotification.objects.filter(source_id=announcement.pk).exists())
+        self.assertEqual(list(ParentFeedJob.objects.values_list("source", "source_ids")), [("announcement", [announcement.pk])])
+
+        summary = feed_outbox.drain_jobs()
+
+        self.assertEqual((summary["jobs"], summary["done"]), (1, 1))
+        self.assertFalse(ParentFeedJob.objects.exists())
+        rows = ParentNotification.objects.filter(source="announcement", source_id=announcement.pk)
+        self.assertEqual(
+            dict(rows.values_list("parent_id", "student_id")),
+            {self.parent.pk: self.child.pk, self.legacy.pk: self.legacy.students.get().pk},
+        )
+
+    def test_repeat_saves_merge_into_one_sync(self):
+        announcement = Announcement.objects.create(franchise=self.centre, title="v1")
+        announcement.title = "v2"
+        announcement.save()
+        with patch("students.notification_feed.sync_objects") as sync:
+            summary = feed_outbox.drain_jobs()
+        self.assertEqual((summary["jobs"], summary["done"]), (2, 1))
+        sync.assert_called_once()
+
+    def test_parent_rebuild_does_not_rewrite_the_profile_centre(self):
+        feed_outbox.enqueue_parent(self.legacy.pk)
+        feed_outbox.drain_jobs()
+        self.legacy.refresh_from_db()
+        self.assertEqual(self.legacy.franchise_id, self.stale_centre.pk)
+
+    def test_rebuild_keeps_what_a_sync_wrote_for_a_two_centre_family(self):
+        from students import notification_feed
+
+        announcement = Announcement.objects.create(franchise=self.stale_centre, title="Madhapur only")
+        feed_outbox.drain_jobs()
+        entries = ParentNotification.objects.filter(source="announcement", source_id=announcement.pk)
+        self.assertEqual(list(entries.values_list("parent_id", flat=True)), [self.legacy.pk])
+
+        counts = notification_feed.rebuild_parent_feed(self.legacy.pk)
+
+        self.assertEqual(counts["deleted"], 0)
+        self.assertEqual(list(entries.values_list("parent_id", flat=True)), [self.legacy.pk])
+
+    def test_tip_audiences_use_the_same_centre_rule(self):
+        from documents.models import DocumentCategory, ParentDocument
+        from students.notification_feed import FeedAudience, _tip_audience
+
+        tip = ParentDocument(franchise=self.centre, category=DocumentCategory.PARENTING_TIPS, title="Sleep")
+        everyone = _tip_audience(tip, FeedAudience())
+        self.assertEqual(set(everyone), {self.parent.pk, self.legacy.pk, self.other_class.pk})
+        self.assertEqual(_tip_audience(tip, FeedAudience([self.legacy.pk])), {self.legacy.pk: None})
+
+    def test_failed_job_is_retried_later(self):
+        feed_outbox.enqueue_rows("announcement", [1])
+        with patch("students.notification_feed.sync_objects", side_effect=RuntimeError("boom")), self.assertLogs(
+            "students.feed_outbox", "ERROR"
+        ):
+            summary = feed_outbox.drain_jobs()
+        self.assertEqual(summary["retry"], 1)
+        job = ParentFeedJob.objects.get()
+        self.assertEqual((job.status, job.attempts, job.last_error), (ParentFeedJob.Status.PENDING, 1, "boom"))
+        self.assertGreater(job.next_attempt_at, timezone.now())
+
+
+class InboxCounterTests(SimpleTestCase):
+    def _row(self, **kw):
+        from students.models import ParentNotification
+
+        values = {"parent_id": 1, "source": "homework", "source_id": 1, "published_at": timezone.now()}
+        values.update(kw)
+        return ParentNotification(**values)
+
+    def test_feed_changes_become_counter_deltas(self):
+        from students import inbox_counters
+
+        now = timezone.now()
+        later = now + timedelta(hours=2)
+        added = [
+            self._row(parent_id=1),
+            self._row(parent_id=1, source_id=2),
+            self._row(parent_id=2, read_at=now),
+            self._row(parent_id=3, visible_from=later),
+        ]
+        removed = [self._row(parent_id=1, source_id=9), self._row(parent_id=4, read_at=now)]
+        with patch.object(inbox_counters, "_bump") as bump, patch.object(
+            inbox_counters, "_schedule"
+        ) as schedule, patch.object(inbox_counters, "_focus_students", return_value={}):
+            inbox_counters.parent_feed_changed(added=added, removed=removed, changed_parent_ids={5})
+        self.assertEqual(bump.call_args.args[2], {1: 1})
+        woken = {(tuple(call.args[2]), call.args[3]) for call in schedule.call_args_list}
+        self.assertIn(((3,), later), woken)
+        self.assertIn(((5,), schedule.call_args_list[-1].args[3]), woken)
+
+    def test_old_parental_tips_are_not_counted(self):
+        from students import inbox_counters
+
+        now = timezone.now()
+        fresh = self._row(source="parental_tip", published_at=now - timedelta(days=2))
+        stale = self._row(source="parental_tip", published_at=now - timedelta(days=40))
+        self.assertTrue(inbox_counters._parent_counts(fresh, now))
+        self.assertFalse(inbox_counters._parent_counts(stale, now))
+        self.assertEqual(inbox_counters._parent_change_at(fresh, now), fresh.published_at + timedelta(days=30))
+
+    def test_other_childs_focus_entries_are_not_counted(self):
+        from students import inbox_counters
+
+        now = timezone.now()
+        self.assertTrue(inbox_counters._parent_counts(self._row(student_id=1), now, 1))
+        self.assertFalse(inbox_counters._parent_counts(self._row(student_id=2), now, 1))
+        self.assertTrue(inbox_counters._parent_counts(self._row(student_id=2), now, None))
+        self.assertTrue(inbox_counters._parent_counts(self._row(student_id=None), now, 1))
+        self.assertTrue(inbox_counters._parent_counts(self._row(source="fees", student_id=2), now, 1))
+
+    def test_badge_reads_stored_counter_until_recount_is_due(self):
+        from students import inbox_counters
+        from students.models import ParentInboxCounter
+
+        stored = ParentInboxCounter(parent_id=1, unread=4, recount_at=timezone.now() + timedelta(minutes=5))
+        with patch("students.models.ParentInboxCounter.objects") as objects, patch.object(
+            inbox_counters, "recount_parent"
+        ) as recount:
+            objects.filter.return_value.first.return_value = stored
+            self.assertEqual(inbox_counters.parent_unread_count(1), 4)
+            recount.assert_not_called()
+            recount.return_value = ParentInboxCounter(parent_id=1, unread=2, focus_student_id=9)
+            self.assertEqual(inbox_counters.parent_unread_count(1, 9), 2)
+            recount.assert_called_once_with(1, 9)
+            stored.recount_at = timezone.now() - timedelta(seconds=1)
+            recount.return_value = ParentInboxCounter(parent_id=1, unread=6)
+            self.assertEqual(inbox_counters.parent_unread_count(1), 6)
+
+
+class InboxCounterDatabaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@x.in", password="x12345678", role="ADMIN")
+        cls.centre = Franchise.objects.create(name="Kondapur", slug="kondapur-timekids", user=admin, admin=admin)
+        cls.user = User.objects.create_user(email="p@x.in", password="x12345678", role="PARENT")
+        cls.parent = ParentProfile.objects.create(user=cls.user, franchise=cls.centre)
+        cls.focus = StudentProfile.objects.create(
+            parent=cls.parent, first_name="A", last_name="B", class_name="Nursery", Idcardno="TK-1"
+        )
+        cls.sibling = StudentProfile.objects.create(parent=cls.parent, first_name="C", last_name="B", class_name="LKG")
+        for class_name in ("Nursery", "LKG"):
+            HomeworkAssignment.objects.create(
+                franchise=cls.centre, class_name=class_name, assigned_date=date(2026, 10, 1), title=class_name
+            )
+        Announcement.objects.create(franchise=cls.centre, title="Sports day")
+        feed_outbox.drain_jobs()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_badge_matches_the_default_feed(self):
+        feed = self.client.get("/api/students/parent/notifications/").json()
+        badge = self.client.get("/api/students/parent/notifications/unread-count/").json()
+        self.assertEqual(sorted(row["title"] for row in feed["notifications"]), ["Nursery", "Sports day"])
+        self.assertEqual(feed["unread_count"], 2)
+        self.assertEqual(badge["unread_count"], 2)
+        self.assertEqual(ParentInboxCounter.objects.get(parent=self.parent).focus_student_id, self.focus.pk)
+
+    def test_sibling_entries_do_not_move_the_counter(self):
+        self.client.get("/api/students/parent/notifications/unread-count/")
+        HomeworkAssignment.objects.create(
+            franchise=self.centre, class_name="LKG", assigned_date=date(2026, 10, 2), title="LKG 2"
+        )
+        HomeworkAssignment.objects.create(
+            franchise=self.centre, class_name="Nursery", assigned_date=date(2026, 10, 2), title="Nursery 2"
+        )
+        feed_outbox.drain_jobs()
+        self.assertEqual(ParentInboxCounter.objects.get(parent=self.parent).unread, 3)
+
+    def test_conflicting_insert_recounts_instead_of_bumping(self):
+        from students import notification_feed
+
+        self.client.get("/api/students/parent/notifications/unread-count/")
+
+        def concurrent_insert(source, rows):
+            # Another drainer writes the same entries between the existence check and the insert.
+            ParentNotification.objects.bulk_create(
+                ParentNotification(
+                    parent_id=row.parent_id,
+                    source=row.source,
+                    source_id=row.source_id,
+                    title=row.title,
+                    published_at=row.published_at,
+                )
+                for row in rows
+            )
+
+        Announcement.objects.create(franchise=self.centre, title="Picnic")
+        with patch.object(notification_feed, "_carry_read_state", side_effect=concurrent_insert):
+            feed_outbox.drain_jobs()
+        counter = ParentInboxCounter.objects.get(parent=self.parent)
+        self.assertEqual(counter.unread, 2)
+        self.assertIsNotNone(counter.recount_at)
+        badge = self.client.get("/api/students/parent/notifications/unread-count/").json()
+        self.assertEqual(badge["unread_count"], 3)
+
+
+class ParentETagTests(SimpleTestCase):
+    def _request(self, path="/api/students/parent/homework/?student=3", **headers):
+        request = RequestFactory().get(path, **headers)
+        request.user = SimpleNamespace(pk=7)
+        return request
+
+    def _etag(self, request, stamps=None, namespace="homework", franchise_id=5):
+        from students import change_stamps
+
+        profile = SimpleNamespace(pk=11, franchise_id=franchise_id)
+        with patch("accounts.profile_access.resolved_parent_profile_for_user", return_value=profile), patch.object(
+            change_stamps, "current_stamps", return_value=stamps or {"global": 1, "centre": 2, "parent": 3, "feed": 4}
+        ):
+            return change_stamps.parent_etag(request, namespace)
+
+    def test_etag_changes_with_stamps_query_and_centre(self):
+        base = self._etag(self._request())
+        self.assertTrue(base.startswith('W/"'))
+        self.assertEqual(base, self._etag(self._request()))
+        self.assertNotEqual(base, self._etag(self._request(), stamps={"global": 1, "centre": 2, "parent": 3, "feed": 5}))
+        self.assertNotEqual(base, self._etag(self._request("/api/students/parent/homework/?student=4")))
+        self.assertNotEqual(base, self._etag(self._request(), franchise_id=6))
+        self.assertNotEqual(base, self._etag(self._request(), namespace="announcements"))
+
+    def test_if_none_match_accepts_weak_and_listed_tags(self):
+        from students.change_stamps import etag_matches
+
+        tag = 'W/"abc"'
+        self.assertTrue(etag_matches(self._request(HTTP_IF_NONE_MATCH='"abc"'), tag))
+        self.assertTrue(etag_matches(self._request(HTTP_IF_NONE_MATCH='W/"zzz", W/"abc"'), tag))
+        self.assertTrue(etag_matches(self._request(HTTP_IF_NONE_MATCH="*"), tag))
+        self.assertFalse(etag_matches(self._request(HTTP_IF_NONE_MATCH='W/"abd"'), tag))
+        self.assertFalse(etag_matches(self._request(), tag))
+
+    def test_matching_etag_skips_the_handler(self):
+        from rest_framework.views import APIView
+        from rest_framework.response import Response
+
+        from students import change_stamps
+
+        built = []
+
+        class View(change_stamps.ParentETagMixin, APIView):
+            authentication_classes = []
+            permission_classes = []
+
+            def get(self, request):
+                built.append(1)
+                return Response({"ok": True})
+
+        with patch.object(change_stamps, "parent_etag", return_value='W/"v1"'):
+            fresh = View.as_view()(self._request())
+            cached = View.as_view()(self._request(HTTP_IF_NONE_MATCH='W/"v1"'))
+        self.assertEqual((fresh.status_code, fresh["ETag"]), (200, 'W/"v1"'))
+        self.assertEqual((cached.status_code, cached["ETag"]), (304, 'W/"v1"'))
+        self.assertEqual(built, [1])
+
+    def test_bumps_wait_for_commit(self):
+        from students import change_stamps
+
+        with patch.object(change_stamps.transaction, "on_commit") as on_commit, patch.object(
+            change_stamps, "_bump_now"
+        ) as bump_now:
+            change_stamps.parents_changed([4, None, 4])
+            change_stamps.centres_changed([None])
+            bump_now.assert_not_called()
+            self.assertEqual(on_commit.call_count, 1)
+            on_commit.call_args.args[0]()
+        bump_now.assert_called_once_with("parent", {4})
+
+
+@override_settings(PARENT_FEED_OUTBOX_AUTO_DRAIN=False)
+class ParentETagViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@x.in", password="x12345678", role="ADMIN")
+        cls.centre = Franchise.objects.create(name="Kondapur", slug="kondapur-timekids", user=admin, admin=admin)
+        cls.user = User.objects.create_user(email="p@x.in", password="x12345678", role="PARENT")
+        cls.parent = ParentProfile.objects.create(user=cls.user, franchise=cls.centre)
+        StudentProfile.objects.create(parent=cls.parent, first_name="A", last_name="B", class_name="Nursery")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_feed_answers_304_until_a_write_commits(self):
+        url = "/api/students/parent/notifications/"
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        tag = first["ETag"]
+
+        again = self.client.get(url, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual((again.status_code, again["ETag"]), (304, tag))
+        self.assertEqual(again.content, b"")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(franchise=self.centre, title="Sports day")
+        with self.captureOnCommitCallbacks(execute=True):
+            feed_outbox.drain_jobs()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=tag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], tag)
+        self.assertEqual([row["title"] for row in changed.json()["notifications"]], ["Sports day"])
+
+
+    def test_bootstrap_rejects_a_bad_month_like_the_calendar(self):
+        for url in ("/api/students/parent/calendar-attendance/", "/api/students/parent/bootstrap/"):
+            for query in ("?month=2026-13", "?from_month=2026-05&to_month=2026-01"):
+                with self.subTest(url=url, query=query):
+                    response = self.client.get(url + query)
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn("detail", response.json())
+        self.assertEqual(self.client.get("/api/students/parent/bootstrap/?sections=fees&month=bad").status_code, 200)
+
+
+class ParentBootstrapTests(SimpleTestCase):
+    def _ctx(self, **stamps):
+        from rest_framework.request import Request
+
+        from students.parent_bootstrap import BootstrapContext
+
+        request = Request(RequestFactory().get("/api/students/parent/bootstrap/?sections=fees&student=3"))
+        request.user = SimpleNamespace(pk=7)
+        values = {"global": 1, "centre": 1, "parent": 1, "feed": 1}
+        values.update(stamps)
+        return BootstrapContext(
+            request=request,
+            profile=SimpleNamespace(pk=11),
+            centre=SimpleNamespace(pk=5),
+            focus=SimpleNamespace(pk=3),
+            explicit=SimpleNamespace(pk=3),
+            stamps=values,
+        )
+
+    def test_parse_sections(self):
+        from students.parent_bootstrap import SECTIONS, parse_sections
+
+        self.assertEqual(parse_sections(""), (list(SECTIONS), []))
+        self.assertEqual(parse_sections("Fees, students,fees"), (["fees", "students"], []))
+        self.assertEqual(parse_sections("fees,bogus"), (["fees"], ["bogus"]))
+
+    def test_section_keys_follow_only_their_own_stamps(self):
+        from students.parent_bootstrap import section_cache_key
+
+        base = self._ctx()
+        feed_read = self._ctx(feed=2)
+        homework = self._ctx(centre=2, feed=2)
+        self.assertEqual(section_cache_key("fees", base), section_cache_key("fees", feed_read))
+        self.assertEqual(section_cache_key("fees", base), section_cache_key("fees", homework))
+        self.assertNotEqual(section_cache_key("notifications", base), section_cache_key("notifications", feed_read))
+        self.assertEqual(section_cache_key("calendar", base), section_cache_key("calendar", feed_read))
+        self.assertNotEqual(section_cache_key("calendar", base), section_cache_key("calendar", homework))
+
+    def test_sections_are_served_from_cache(self):
+        from students import parent_bootstrap
+
+        build = Mock(return_value={"total": 1})
+        section = parent_bootstrap.Section(build, ("parent",))
+        ctx = self._ctx(parent=41)
+        with patch.dict(parent_bootstrap.SECTIONS, {"fees": section}), patch(
+            "students.change_stamps.cache"
+        ) as cache:
+            cache.get.return_value = None
+            self.assertEqual(parent_bootstrap._build_section("fees", ctx, 60), {"total": 1})
+            cache.set.assert_called_once()
+            cache.get.return_value = {"total": 1}
+            parent_bootstrap._build_section("fees", ctx, 60)
+            self.assertEqual(build.call_count, 1)
+            parent_bootstrap._build_section("fees", ctx, 0)
+            self.assertEqual(build.call_count, 2)
+
+
+class CalendarMonthBucketTests(SimpleTestCase):
+    def test_parse_month_range(self):
+        from django.http import QueryDict
+
+        from students.calendar_months import parse_month_range
+
+        self.assertIsNone(parse_month_range(QueryDict("")))
+        self.assertEqual(parse_month_range(QueryDict("month=2026-10")), ["2026-10"])
+        self.assertEqual(
+            parse_month_range(QueryDict("from_month=2026-11&to_month=2027-02")),
+            ["2026-11", "2026-12", "2027-01", "2027-02"],
+        )
+        self.assertEqual(parse_month_range(QueryDict("from_month=2026-11")), ["2026-11"])
+        for bad in ("month=2026-13", "month=oct", "from_month=2026-10&to_month=2026-09", "from_month=2025-01&to_month=2026-01"):
+            with self.assertRaises(ValueError):
+                parse_month_range(QueryDict(bad))
+
+    def test_items_spanning_months_land_in_each(self):
+        from students.calendar_months import _in_month
+
+        event = {"date": "2026-09-28", "end_date": "2026-10-03"}
+        self.assertTrue(_in_month(event, "2026-09"))
+        self.assertTrue(_in_month(event, "2026-10"))
+        self.assertFalse(_in_month(event, "2026-11"))
+        self.assertFalse(_in_month({"date": ""}, "2026-10"))
+
+    def test_bucket_key_follows_class_month_and_content_stamps(self):
+        from students.calendar_months import bucket_cache_key
+
+        request = RequestFactory().get("/")
+        request.user = SimpleNamespace(pk=7)
+        pp, centre = SimpleNamespace(pk=11), SimpleNamespace(pk=5)
+        stamps = {"global": 1, "centre": 1, "parent": 1, "feed": 1}
+
+        def key(month="2026-10", class_name="Nursery", **changed):
+            focus = SimpleNamespace(pk=3, class_name=class_name)
+            return bucket_cache_key(request, pp, centre, focus, month, {**stamps, **changed})
+
+        self.assertTrue(key().startswith("parent-calendar:5:3:2026-10:"))
+        self.assertNotIn(" ", key(class_name="Junior KG"))
+        self.assertEqual(key(), key(feed=2))
+        self.assertNotEqual(key(), key(centre=2))
+        self.assertNotEqual(key(), key(month="2026-09"))
+        self.assertNotEqual(key(), key(class_name="LKG"))
+
+
+class AttendanceMatrixTests(SimpleTestCase):
+    def test_rows_become_status_strings_with_holidays_applied(self):
+        from students.attendance_matrix import build_matrix
+
+        start, end = date(2026, 10, 1), date(2026, 10, 5)
+        rows = [
+            (3, "Asha", "K", "12", "Nursery", "2026-27", date(2026, 10, 1), "PRESENT"),
+            (3, "Asha", "K", "12", "Nursery", "2026-27", date(2026, 10, 2), "ABSENT"),
+            (3, "Asha", "K", "12", "Nursery", "2026-27", date(2026, 10, 5), "LATE"),
+            (4, "Ravi", "", "", "Nursery", "2025-26", date(2026, 10, 1), "EXCUSED"),
+            (8, "Zoya", "M", "", "Nursery", "2026-27", None, None),
+        ]
+        holidays = {date(2026, 10, 2): "Gandhi Jayanti", date(2026, 10, 4): "Sunday", date(2026, 11, 1): "Sunday"}
+
+        matrix = build_matrix(rows, start, end, holidays)
+        self.assertEqual(matrix["days"], 5)
+        self.assertEqual(matrix["students"]["ids"], [3, 4, 8])
+        self.assertEqual(matrix["students"]["names"], ["Asha K", "Ravi", "Zoya M"])
+        self.assertEqual(matrix["statuses"], ["PH-HL", "EH-H-", "-H-H-"])
+        self.assertEqual(matrix["holiday_days"], [2, 4])
+        self.assertEqual(matrix["holiday_labels"], ["Gandhi Jayanti", "Sunday"])
+        self.assertEqual(matrix["totals"], {"present": [2, 0, 0], "absent": [0, 1, 0], "unmarked": [1, 2, 3]})
+        self.assertEqual(matrix["working_days"], 3)
+
+        same_year = build_matrix(rows, start, end, holidays, include=lambda s: s.Year == "2026-27")
+        self.assertEqual(same_year["students"]["ids"], [3, 8])
+        self.assertEqual(same_year["totals"]["absent"], [0, 0])
+
+
+@override_settings(HOLIDAY_CALENDAR_CACHE_SECONDS=0, PARENT_FEED_OUTBOX_AUTO_DRAIN=False)
+class AttendanceMatrixDatabaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@x.in", password="x12345678", role="ADMIN")
+        cls.centre = Franchise.objects.create(name="Kondapur", slug="kondapur-timekids", user=admin, admin=admin)
+        other_admin = User.objects.create_user(email="admin2@x.in", password="x12345678", role="ADMIN")
+        other_centre = Franchise.objects.create(name="Madhapur", slug="madhapur-timekids", user=other_admin, admin=other_admin)
+        user = User.objects.create_user(email="p@x.in", password="x12345678", role="PARENT")
+        parent = ParentProfile.objects.create(user=user, franchise=cls.centre)
+        cls.asha = StudentProfile.objects.create(parent=parent, first_name="Asha", last_name="K", class_name="Nursery")
+        cls.zoya = StudentProfile.objects.create(parent=parent, first_name="Zoya", last_name="M", class_name="Nursery 25-26")
+        lkg = StudentProfile.objects.create(parent=parent, first_name="Ravi", last_name="", class_name="LKG")
+        left = StudentProfile.objects.create(
+            parent=parent, first_name="Old", last_name="", class_name="Nursery", is_active=False
+        )
+        other_user = User.objects.create_user(email="q@x.in", password="x12345678", role="PARENT")
+        other_parent = ParentProfile.objects.create(user=other_user, franchise=other_centre)
+        elsewhere = StudentProfile.objects.create(parent=other_parent, first_name="Ben", last_name="", class_name="Nursery")
+        AttendanceRecord.objects.bulk_create(
+            [
+                AttendanceRecord(student=cls.asha, date=date(2026, 10, 1), status="PRESENT"),
+                AttendanceRecord(student=cls.asha, date=date(2026, 10, 5), status="ABSENT"),
+                # Outside the month: must not duplicate or mark the row.
+                AttendanceRecord(student=cls.asha, date=date(2026, 9, 30), status="ABSENT"),
+                AttendanceRecord(student=cls.zoya, date=date(2026, 11, 2), status="PRESENT"),
+                AttendanceRecord(student=lkg, date=date(2026, 10, 1), status="PRESENT"),
+                AttendanceRecord(student=left, date=date(2026, 10, 1), status="PRESENT"),
+                AttendanceRecord(student=elsewhere, date=date(2026, 10, 1), status="PRESENT"),
+            ]
+        )
+
+    def test_rows_left_join_only_the_months_marks(self):
+        from students.attendance_matrix import class_month_rows
+
+        with self.assertNumQueries(1):
+            rows = class_month_rows(self.centre, "nursery", date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual(
+            [(row[0], row[6], row[7]) for row in rows],
+            [
+                (self.asha.pk, date(2026, 10, 1), "PRESENT"),
+                (self.asha.pk, date(2026, 10, 5), "ABSENT"),
+                (self.zoya.pk, None, None),
+            ],
+        )
+
+    def test_matrix_for_a_centre_month(self):
+        from students.attendance_matrix import class_month_matrix
+
+        matrix = class_month_matrix(self.centre, "Nursery", date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual(matrix["students"]["ids"], [self.asha.pk, self.zoya.pk])
+        asha, zoya = matrix["statuses"]
+        self.assertEqual((asha[0], asha[4], asha[3]), ("P", "A", "H"))  # 4 Oct 2026 is a Sunday
+        self.assertEqual(set(zoya) - {"-", "H"}, set())
+        self.assertEqual(matrix["totals"]["present"], [1, 0])
+
+
+class AttendanceBulkUpsertTests(SimpleTestCase):
+    def test_csv_upload_rows_resolve_to_marks_and_errors(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from students.attendance_upsert import Mark, read_upload, resolve_upload_rows
+
+        upload = SimpleUploadedFile(
+            "term.csv",
+            (
+                "﻿Student_ID,IdCardNo,Date,Status,Note\n"
+                "3,,2026-10-01,P,\n"
+                ",TK-9,05/10/2026,absent,fever\n"
+                "99,,2026-10-01,P,\n"
+                "3,,2026-02-30,P,\n"
+                "3,,2026-10-02,maybe,\n"
+                ",,2026-10-02,P,\n"
+            ).encode(),
+        )
+        rows = read_upload(upload)
+        self.assertEqual(rows[0]["student_id"], "3")
+        with patch("students.attendance_upsert.StudentProfile.objects") as objects:
+            objects.annotate.return_value.filter.return_value.values_list.return_value = [(3, None), (4, "TK-9")]
+            marks, errors = resolve_upload_rows(SimpleNamespace(pk=5), rows)
+
+        self.assertEqual(
+            marks,
+            [Mark(3, date(2026, 10, 1), "PRESENT", ""), Mark(4, date(2026, 10, 5), "ABSENT", "fever")],
+        )
+        self.assertEqual([error["line"] for error in errors], [4, 5, 6, 7])
+        self.assertEqual(errors[0]["detail"], "Student is not enrolled at your centre.")
+        self.assertEqual(errors[3]["detail"], "student_id or idcardno is required.")
+
+    def test_unsupported_upload_is_rejected(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        from students.attendance_upsert import UploadError, read_upload
+
+        with self.assertRaises(UploadError):
+            read_upload(SimpleUploadedFile("term.pdf", b"%PDF"))
+
+    def test_repeated_marks_collapse_and_chunks_add_up(self):
+        from students import attendance_upsert
+        from students.attendance_upsert import Mark, upsert_marks
+
+        day = date(2026, 10, 1)
+        marks = [Mark(sid, day, "PRESENT", "") for sid in range(1, 6)] + [Mark(2, day, "ABSENT", "")]
+        chunks = []
+
+        def fake_chunk(chunk):
+            chunks.append(chunk)
+            return len(chunk) - 1, 1, 0
+
+        with patch.object(attendance_upsert, "UPSERT_CHUNK_SIZE", 2), patch.object(
+            attendance_upsert, "_upsert_chunk", side_effect=fake_chunk
+        ):
+            counts = upsert_marks(marks)
+
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        self.assertEqual(chunks[0][1], Mark(2, day, "ABSENT", ""))
+        self.assertEqual(counts, {"created": 2, "updated": 3, "skipped": 1})
+
+
+@override_settings(PARENT_FEED_OUTBOX_AUTO_DRAIN=False)
+class AttendanceUpsertDatabaseTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = User.objects.create_user(email="admin@x.in", password="x12345678", role="ADMIN")
+        cls.centre = Franchise.objects.create(name="Kondapur", slug="kondapur-timekids", user=admin, admin=admin)
+        user = User.objects.create_user(email="p@x.in", password="x12345678", role="PARENT")
+        parent = ParentProfile.objects.create(user=user, franchise=cls.centre)
+        cls.asha = StudentProfile.objects.create(
+            parent=parent, first_name="Asha", last_name="K", class_name="Nursery", Idcardno=" TK-9 "
+        )
+        cls.ravi = StudentProfile.objects.create(parent=parent, first_name="Ravi", last_name="", class_name="Nursery")
+
+    def test_padded_id_card_matches_the_uploaded_value(self):
+        from students.attendance_upsert import Mark, resolve_upload_rows
+
+        rows = [
+            {"idcardno": "TK-9", "date": "2026-10-05", "status": "A"},
+            {"idcardno": " TK-9", "date": "2026-10-06", "status": "P"},
+        ]
+        marks, errors = resolve_upload_rows(self.centre, rows)
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            marks,
+            [Mark(self.asha.pk, date(2026, 10, 5), "ABSENT", ""), Mark(self.asha.pk, date(2026, 10, 6), "PRESENT", "")],
+        )
+
+    def test_rerun_upserts_in_place(self):
+        from students.attendance_upsert import Mark, upsert_marks
+
+        day = date(2026, 10, 1)
+        marks = [Mark(self.asha.pk, day, "PRESENT", ""), Mark(self.ravi.pk, day, "ABSENT", "fever")]
+        self.assertEqual(upsert_marks(marks), {"created": 2, "updated": 0, "skipped": 0})
+        self.assertEqual(upsert_marks(marks), {"created": 0, "updated": 0, "skipped": 2})
+
+        changed = [Mark(self.asha.pk, day, "PRESENT", ""), Mark(self.ravi.pk, day, "PRESENT", "")]
+        self.assertEqual(upsert_marks(changed), {"created": 0, "updated": 1, "skipped": 1})
+        self.assertEqual(
+            sorted(AttendanceRecord.objects.values_list("student_id", "status", "note")),
+            sorted([(self.asha.pk, "PRESENT", ""), (self.ravi.pk, "PRESENT", "")]),
+        )
+        # Bulk writes skip post_save; each written chunk queued its own feed sync.
+        self.assertEqual(ParentFeedJob.objects.filter(source="attendance").count(), 2)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "holiday-calendar-tests"}},
+    HOLIDAY_CALENDAR_CACHE_SECONDS=300,
+)
+class HolidayCalendarTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.centre = SimpleNamespace(pk=5, id=5)
+        self.compiled = {2026: {"2026-10-02": "Gandhi Jayanti", "2026-10-20": "Diwali"}, 2027: {"2027-06-07": "Centre closed"}}
+        compile_patch = patch(
+            "students.holiday_calendar.compile_years",
+            side_effect=lambda franchise, years: {year: dict(self.compiled.get(year, {})) for year in years},
+        )
+        self.compile = compile_patch.start()
+        self.addCleanup(compile_patch.stop)
+        on_commit_patch = patch("students.change_stamps.transaction.on_commit", side_effect=lambda run: run())
+        on_commit_patch.start()
+        self.addCleanup(on_commit_patch.stop)
+
+    def test_academic_year_runs_june_to_may(self):
+        from students.holiday_calendar import academic_year_bounds, academic_year_label, academic_year_of
+
+        self.assertEqual(academic_year_of(date(2026, 5, 31)), 2025)
+        self.assertEqual(academic_year_of(date(2026, 6, 1)), 2026)
+        self.assertEqual(academic_year_bounds(2026), (date(2026, 6, 1), date(2027, 5, 31)))
+        self.assertEqual(academic_year_label(2026), "AY 2026-27")
+        self.assertEqual(academic_year_label(2099), "AY 2099-00")
+
+    def test_compiled_once_then_served_from_cache(self):
+        from students.attendance_logic import collect_holiday_map, day_is_holiday
+
+        october = collect_holiday_map(self.centre, date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual(october[date(2026, 10, 2)], "Gandhi Jayanti")
+        self.assertEqual(october[date(2026, 10, 4)], "Sunday")
+        self.assertNotIn(date(2026, 10, 5), october)
+        self.assertEqual(day_is_holiday(self.centre, date(2026, 10, 20)), (True, "Diwali"))
+        self.assertEqual(day_is_holiday(self.centre, date(2026, 10, 21))[0], False)
+        self.assertEqual(self.compile.call_count, 1)
+
+        # A range across academic years compiles only the year not cached yet.
+        spring = collect_holiday_map(self.centre, date(2027, 5, 30), date(2027, 6, 8))
+        self.assertEqual(spring[date(2027, 6, 7)], "Centre closed")
+        self.assertEqual(self.compile.call_count, 2)
+        self.assertEqual(self.compile.call_args.args[1], [2027])
+
+    def test_invalidation_recompiles(self):
+        from students import holiday_calendar
+
+        holiday_calendar.holidays_between(self.centre, date(2026, 10, 1), date(2026, 10, 31))
+        holiday_calendar.centres_changed([6])
+        holiday_calendar.holidays_between(self.centre, date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual(self.compile.call_count, 1)
+
+        self.compiled[2026]["2026-10-03"] = "Closed for repairs"
+        holiday_calendar.centres_changed([5])
+        self.assertIn(date(2026, 10, 3), holiday_calendar.holidays_between(self.centre, date(2026, 10, 1), date(2026, 10, 31)))
+        holiday_calendar.all_centres_changed()
+        holiday_calendar.holidays_between(self.centre, date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual(self.compile.call_count, 3)
+
+    @override_settings(HOLIDAY_CALENDAR_CACHE_SECONDS=0)
+    def test_disabled_cache_compiles_every_read(self):
+        from students.holiday_calendar import holidays_between
+
+        holidays_between(self.centre, date(2026, 10, 2), date(2026, 10, 2))
+        holidays_between(self.centre, date(2026, 10, 2), date(2026, 10, 2))
+        self.assertEqual(self.compile.call_count, 2)
+
+    def test_generations_live_in_the_database(self):
+        from django.core.cache import cache
+
+        from students import change_stamps, holiday_calendar
+
+        holiday_calendar.centres_changed([5, None])
+        holiday_calendar.all_centres_changed()
+        stamps = dict(
+            PortalChangeStamp.objects.filter(scope=PortalChangeStamp.Scope.HOLIDAYS).values_list("owner_id", "version")
+        )
+        self.assertEqual(set(stamps), {0, 5})
+        generations = holiday_calendar._generations(5)
+        self.assertEqual(generations, (stamps[0], stamps[5]))
+
+        # Losing the cache only costs a recompile; the generations are not reset.
+        holiday_calendar.holidays_between(self.centre, date(2026, 10, 1), date(2026, 10, 31))
+        cache.clear()
+        holiday_calendar.holidays_between(self.centre, date(2026, 10, 1), date(2026, 10, 31))
+        self.assertEqual(self.compile.call_count, 2)
+        self.assertEqual(holiday_calendar._generations(5), generations)
+        self.assertNotIn("holidays", change_stamps.current_stamps(None, 5))
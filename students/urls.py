@@ -8,6 +8,7 @@ from .portal_views import (
     FranchiseAnnouncementDetailView,
     FranchiseNotificationReadView,
     FranchiseNotificationsView,
+    FranchiseNotificationUnreadCountView,
     cron_dispatch_scheduled_announcements,
     FranchiseAnnouncementListCreateView,
     FranchiseAttendanceBulkUpsertView,
@@ -17,6 +18,7 @@ from .portal_views import (
     FranchiseAttendanceHolidaysView,
     FranchiseAttendanceDetailView,
     FranchiseAttendanceListCreateView,
+    FranchiseAttendanceMatrixView,
     FranchiseFeeDetailView,
     FranchiseFeeLineStatusView,
     FranchiseFeeListCreateView,
@@ -33,6 +35,7 @@ from .portal_views import (
     FranchiseTransportListCreateView,
     ParentAnnouncementListView,
     ParentAttendanceListView,
+    ParentBootstrapView,
     ParentCalendarAttendanceView,
     ParentFeeListView,
     ParentFeePaymentConfigView,
@@ -49,6 +52,7 @@ from .portal_views import (
     ParentLiveTransportView,
     ParentTransportListView,
     ParentNotificationsView,
+    ParentNotificationUnreadCountView,
 
     FranchiseDriverListCreateView,
     FranchiseDriverDetailView,
@@ -78,6 +82,7 @@ from .views import (
 
 urlpatterns = [
     path("parent/dashboard/", ParentDashboardView.as_view(), name="parent-dashboard"),
+    path("parent/bootstrap/", ParentBootstrapView.as_view(), name="parent-bootstrap"),
     path("parent/students/", ParentStudentListView.as_view(), name="parent-students"),
     path("parent/students/<int:pk>/", ParentStudentDetailView.as_view(), name="parent-student-detail"),
     path("parent/students/<int:student_id>/grades/", ParentStudentGradesView.as_view(), name="parent-student-grades"),
@@ -99,6 +104,11 @@ urlpatterns = [
     path("parent/transport/live/", ParentLiveTransportView.as_view(), name="parent-transport-live"),
     path("parent/notifications/", ParentNotificationsView.as_view(), name="parent-notifications"),
     path("parent/notifications/read/", ParentNotificationReadView.as_view(), name="parent-notification-read"),
+    path(
+        "parent/notifications/unread-count/",
+        ParentNotificationUnreadCountView.as_view(),
+        name="parent-notification-unread-count",
+    ),
     path("parent/tickets/", ParentSupportTicketListCreateView.as_view(), name="parent-tickets"),
     path("franchise/students/", FranchiseStudentListCreateView.as_view(), name="franchise-students"),
     path("franchise/students/mini/", FranchiseStudentMiniListView.as_view(), name="franchise-students-mini"),
@@ -122,10 +132,16 @@ urlpatterns = [
     path("franchise/announcements/<int:pk>/", FranchiseAnnouncementDetailView.as_view(), name="franchise-announcement-detail"),
     path("franchise/notifications/", FranchiseNotificationsView.as_view(), name="franchise-notifications"),
     path("franchise/notifications/read/", FranchiseNotificationReadView.as_view(), name="franchise-notification-read"),
+    path(
+        "franchise/notifications/unread-count/",
+        FranchiseNotificationUnreadCountView.as_view(),
+        name="franchise-notification-unread-count",
+    ),
     path("cron/dispatch-announcements/", cron_dispatch_scheduled_announcements, name="cron-dispatch-announcements"),
     path("franchise/attendance/", FranchiseAttendanceListCreateView.as_view(), name="franchise-attendance"),
     path("franchise/attendance/bulk/", FranchiseAttendanceBulkUpsertView.as_view(), name="franchise-attendance-bulk"),
     path("franchise/attendance/clear/", FranchiseAttendanceClearDateView.as_view(), name="franchise-attendance-clear"),
+    path("franchise/attendance/matrix/", FranchiseAttendanceMatrixView.as_view(), name="franchise-attendance-matrix"),
     path("franchise/attendance/holidays/", FranchiseAttendanceHolidaysView.as_view(), name="franchise-attendance-holidays"),
     path("franchise/attendance/closed-days/", FranchiseAttendanceClosedDayListCreateView.as_view(), name="franchise-attendance-closed-days"),
     path("franchise/attendance/closed-days/<int:pk>/", FranchiseAttendanceClosedDayDetailView.as_view(), name="franchise-attendance-closed-day-detail"),
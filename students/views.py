@@ -83,6 +83,51 @@ class ParentStudentGradesView(generics.ListAPIView):
         return Grade.objects.filter(student=student).order_by('-exam_date', 'subject')
 
 
+def parent_dashboard_payload(request, parent_profile) -> dict:
+    """Welcome line and student / grade / event counts for the parent home screen."""
+    # Get students
+    students = StudentProfile.objects.filter(
+        parent=parent_profile,
+        is_active=True
+    )
+    
+    # Get first student for welcome message
+    first_student = students.first()
+    
+    # Count grades
+    total_grades = Grade.objects.filter(student__parent=parent_profile).count()
+    
+    # Count upcoming events
+    upcoming_events_count = Event.objects.filter(
+        franchise=parent_profile.franchise,
+        start_date__gte=date.today()
+    ).count()
+    
+    # Prepare dashboard data
+    dashboard_data = {
+        "welcome_message": f"Welcome, {first_student.full_name}'s family!" if first_student else f"Welcome, {request.user.full_name}!",
+        "student_summary": {
+            "total_students": students.count(),
+            "first_student": StudentProfileSerializer(first_student).data if first_student else None,
+        },
+        "grades_summary": {
+            "total_records": total_grades,
+            "message": f"{total_grades} Records saved" if total_grades > 0 else "No records yet"
+        },
+        "events_summary": {
+            "upcoming_count": upcoming_events_count,
+            "message": f"{upcoming_events_count} Stay updated" if upcoming_events_count > 0 else "No upcoming events"
+        },
+        "franchise": {
+            "id": parent_profile.franchise.id,
+            "name": parent_profile.franchise.name,
+            "slug": parent_profile.franchise.slug,
+        }
+    }
+    
+    return dashboard_data
+
+
 class ParentDashboardView(APIView):
     """Parent dashboard with summary statistics"""
     permission_classes = [IsParentUser]
@@ -91,48 +136,7 @@ class ParentDashboardView(APIView):
         parent_profile = resolved_parent_profile_for_user(request.user)
         if not parent_profile:
             return Response({"error": "Parent profile not found"}, status=404)
-        
-        # Get students
-        students = StudentProfile.objects.filter(
-            parent=parent_profile,
-            is_active=True
-        )
-        
-        # Get first student for welcome message
-        first_student = students.first()
-        
-        # Count grades
-        total_grades = Grade.objects.filter(student__parent=parent_profile).count()
-        
-        # Count upcoming events
-        upcoming_events_count = Event.objects.filter(
-            franchise=parent_profile.franchise,
-            start_date__gte=date.today()
-        ).count()
-        
-        # Prepare dashboard data
-        dashboard_data = {
-            "welcome_message": f"Welcome, {first_student.full_name}'s family!" if first_student else f"Welcome, {request.user.full_name}!",
-            "student_summary": {
-                "total_students": students.count(),
-                "first_student": StudentProfileSerializer(first_student).data if first_student else None,
-            },
-            "grades_summary": {
-                "total_records": total_grades,
-                "message": f"{total_grades} Records saved" if total_grades > 0 else "No records yet"
-            },
-            "events_summary": {
-                "upcoming_count": upcoming_events_count,
-                "message": f"{upcoming_events_count} Stay updated" if upcoming_events_count > 0 else "No upcoming events"
-            },
-            "franchise": {
-                "id": parent_profile.franchise.id,
-                "name": parent_profile.franchise.name,
-                "slug": parent_profile.franchise.slug,
-            }
-        }
-        
-        return Response(dashboard_data)
+        return Response(parent_dashboard_payload(request, parent_profile))
 
 
 class ParentAchievementListView(generics.ListAPIView):
@@ -4,6 +4,8 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
+from common.env import env_int
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Load environment variables - prioritize .env.local, then .env
@@ -149,6 +151,20 @@ else:
         }
     }
 
+    if os.getenv("DB_SKIP_MIGRATIONS", "False").lower() == "true":
+        # Opt-in (DB_SKIP_MIGRATIONS=True) for SQLite test runs: the migrations carry
+        # PostgreSQL-only SQL (DO $$ blocks, information_schema checks), so the test
+        # database is built straight from the models. Run the suite against
+        # PostgreSQL to exercise the migrations themselves.
+        class _NoMigrations(dict):
+            def __contains__(self, app_label):
+                return True
+
+            def __getitem__(self, app_label):
+                return None
+
+        MIGRATION_MODULES = _NoMigrations()
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -214,6 +230,32 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Seconds a JWT-authenticated user snapshot (role, active flag, CRM scope) is served
+# from the cache instead of reading ``users`` on every request; dropped on User save.
+# Off (0) by default unless REDIS_CACHE_URL is set: with per-process caches a role or
+# is_active change would only reach the other workers after the TTL.
+AUTH_USER_CACHE_SECONDS = env_int(
+    "AUTH_USER_CACHE_SECONDS", 60 if (os.getenv("REDIS_CACHE_URL", "") or "").strip() else 0
+)
+
+# Upper bound, in seconds, on a cached /parent/bootstrap/ section (students.parent_bootstrap).
+# Sections are keyed by the parent / centre change stamps, so writes invalidate them
+# immediately; the TTL only bounds memory. 0 disables section caching.
+PARENT_BOOTSTRAP_CACHE_SECONDS = env_int("PARENT_BOOTSTRAP_CACHE_SECONDS", 900)
+
+# Same for a cached month of the parent calendar (students.calendar_months).
+PARENT_CALENDAR_CACHE_SECONDS = env_int("PARENT_CALENDAR_CACHE_SECONDS", 900)
+
+# Upper bound, in seconds, on a compiled centre holiday calendar (students.holiday_calendar).
+# Holiday-list, closed-day and centre saves invalidate it; the TTL only covers writes
+# that skip signals. 0 compiles on every read.
+HOLIDAY_CALENDAR_CACHE_SECONDS = env_int("HOLIDAY_CALENDAR_CACHE_SECONDS", 21600)
+
+# Parent notification feed fan-out runs from the parent_feed_job outbox (students.feed_outbox)
+# after the write commits: jobs per claim and attempts before a job is marked failed.
+PARENT_FEED_OUTBOX_BATCH_SIZE = env_int("PARENT_FEED_OUTBOX_BATCH_SIZE", 50)
+PARENT_FEED_OUTBOX_MAX_ATTEMPTS = env_int("PARENT_FEED_OUTBOX_MAX_ATTEMPTS", 5)
+
 # SendGrid — one API key for landing pages, admission/register forms, enquiries, careers, etc.
 SENDGRID_API_KEY = (os.getenv("SENDGRID_API_KEY", "") or "").strip()
 MAIL_FROM_ADDRESS = (
@@ -255,6 +297,20 @@ EMAIL_SENDING_ENABLED = os.getenv(
     "False" if DEBUG else "True",
 ).lower() == "true"
 
+# Public form emails (enquiry / franchise / CRM lead / landing) are queued in
+# lead_notification_outbox with the lead and sent off the request thread:
+# concurrent senders, rows per claim, retry backoff base (doubles per attempt,
+# capped at 6h) and attempts before a message is marked failed.
+LEAD_NOTIFY_OUTBOX_WORKERS = env_int("LEAD_NOTIFY_OUTBOX_WORKERS", 4)
+LEAD_NOTIFY_OUTBOX_BATCH_SIZE = env_int("LEAD_NOTIFY_OUTBOX_BATCH_SIZE", 50)
+LEAD_NOTIFY_OUTBOX_BACKOFF_SECONDS = env_int("LEAD_NOTIFY_OUTBOX_BACKOFF_SECONDS", 60)
+LEAD_NOTIFY_OUTBOX_MAX_ATTEMPTS = env_int("LEAD_NOTIFY_OUTBOX_MAX_ATTEMPTS", 6)
+
+# Intake dedupe (enquiries.lead_dedupe): a lead with the same mobile and lead family
+# (admission / franchise) as a lead from the last N minutes is linked to it and sends
+# no emails of its own. 0 disables.
+LEAD_DEDUPE_WINDOW_MINUTES = env_int("LEAD_DEDUPE_WINDOW_MINUTES", 1440)
+
 _default_email_backend = (
     "django.core.mail.backends.smtp.EmailBackend"
     if SENDGRID_API_KEY
@@ -268,12 +324,49 @@ EMAIL_PORT = int(os.getenv("EMAIL_PORT", "587"))
 EMAIL_USE_TLS = os.getenv("EMAIL_USE_TLS", "True").lower() == "true"
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL", "") or MAIL_FROM_ADDRESS
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "time4kids-default-cache",
+# Set REDIS_CACHE_URL (e.g. redis://127.0.0.1:6379/1, needs the ``redis`` package) so
+# every gunicorn worker shares cached data. Without it each process keeps its own
+# in-memory cache, and OTP state moves to the database-backed "otp" cache below.
+REDIS_CACHE_URL = (os.getenv("REDIS_CACHE_URL", "") or "").strip()
+if REDIS_CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "KEY_PREFIX": "time4kids",
+        }
     }
-}
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "time4kids-default-cache",
+        },
+        # OTP codes, cooldowns and rate-limit buckets must be visible to every
+        # worker: send and verify often land in different processes. Table is
+        # created by enquiries migration 0038 (or ``manage.py createcachetable``).
+        "otp": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "otp_cache",
+            "OPTIONS": {"MAX_ENTRIES": 100000},
+        },
+    }
+OTP_CACHE_ALIAS = "default" if REDIS_CACHE_URL else "otp"
+
+# Mobile OTP (enquiries.otp_service): code lifetime, resend cooldown, wrong codes
+# allowed per OTP, per-phone / per-IP send budgets (CAPACITY sends per CAPACITY ×
+# REFILL_SECONDS window) and SMS sender threads. OTP_TRUSTED_PROXY_COUNT is the
+# number of reverse proxies (nginx) that append to X-Forwarded-For; the per-IP
+# bucket keys on the hop the outermost trusted proxy saw. 0 = use REMOTE_ADDR only.
+OTP_TTL_SECONDS = env_int("OTP_TTL_SECONDS", 600)
+OTP_RESEND_SECONDS = env_int("OTP_RESEND_SECONDS", 30)
+OTP_MAX_VERIFY_ATTEMPTS = env_int("OTP_MAX_VERIFY_ATTEMPTS", 5)
+OTP_PHONE_BUCKET_CAPACITY = env_int("OTP_PHONE_BUCKET_CAPACITY", 5)
+OTP_PHONE_BUCKET_REFILL_SECONDS = env_int("OTP_PHONE_BUCKET_REFILL_SECONDS", 120)
+OTP_IP_BUCKET_CAPACITY = env_int("OTP_IP_BUCKET_CAPACITY", 20)
+OTP_IP_BUCKET_REFILL_SECONDS = env_int("OTP_IP_BUCKET_REFILL_SECONDS", 30)
+OTP_SMS_WORKERS = env_int("OTP_SMS_WORKERS", 4)
+OTP_TRUSTED_PROXY_COUNT = env_int("OTP_TRUSTED_PROXY_COUNT", 1)
 
 # Public URL of the Next.js site (for links in parent announcement emails)
 PUBLIC_SITE_URL = os.getenv("PUBLIC_SITE_URL", "http://localhost:3000").rstrip("/")
@@ -335,6 +428,11 @@ PARENT_FEE_QR_IMAGE_URL = os.getenv("PARENT_FEE_QR_IMAGE_URL", "").strip()
 # When using a static QR image, set the exact amount encoded in that QR (e.g. 1 for ₹1 test payments).
 PARENT_FEE_QR_FIXED_AMOUNT = os.getenv("PARENT_FEE_QR_FIXED_AMOUNT", "").strip()
 
+# Parent portal identity (students.ParentIdentityLink): login → ParentProfile → children
+# is resolved at login / on data change and read in one query per request. Logins that
+# resolve to no profile are retried after this many seconds.
+PARENT_IDENTITY_RETRY_SECONDS = env_int("PARENT_IDENTITY_RETRY_SECONDS", 300)
+
 # --- Meta Lead Ads → CRM webhook ---
 # Callback URL: https://www.timekidspreschools.in/api/enquiries/meta-leads/webhook/
 # App: TIME Kids Lead CRM (developers.facebook.com) — subscribe Page → leadgen
@@ -359,6 +457,22 @@ try:
     META_LEADS_AUTO_SYNC_SECONDS = max(60, int(os.getenv("META_LEADS_AUTO_SYNC_SECONDS", "300") or "300"))
 except (TypeError, ValueError):
     META_LEADS_AUTO_SYNC_SECONDS = 300
+# Adaptive bounds: new leads / inbox backlog shorten the wait, errors and idle
+# passes lengthen it. One poller cluster-wide (scheduler_lease row).
+# MAX 0 (default) caps the wait at META_LEADS_AUTO_SYNC_SECONDS, so polling never
+# gets slower than the fixed interval unless a larger cap is set.
+META_LEADS_AUTO_SYNC_MIN_SECONDS = max(30, env_int("META_LEADS_AUTO_SYNC_MIN_SECONDS", 60))
+META_LEADS_AUTO_SYNC_MAX_SECONDS = env_int("META_LEADS_AUTO_SYNC_MAX_SECONDS", 0)
+# Instant Form / ad metadata cache (in-process LRU + meta_graph_metadata_cache table).
+# Per-entry TTLs in seconds; warm after deploy with `manage.py warm_meta_metadata_cache`.
+META_METADATA_CACHE_FORM_TTL_SECONDS = env_int("META_METADATA_CACHE_FORM_TTL_SECONDS", 86400)
+META_METADATA_CACHE_AD_TTL_SECONDS = env_int("META_METADATA_CACHE_AD_TTL_SECONDS", 21600)
+META_METADATA_CACHE_MAX_ENTRIES = env_int("META_METADATA_CACHE_MAX_ENTRIES", 2048)
+# Meta webhook inbox (meta_lead_webhook_inbox): the webhook only stores + acks;
+# drained by a background thread, the auto-sync loop, or `manage.py drain_meta_webhook_inbox`.
+META_WEBHOOK_INBOX_WORKERS = env_int("META_WEBHOOK_INBOX_WORKERS", 4)
+META_WEBHOOK_INBOX_BATCH_SIZE = env_int("META_WEBHOOK_INBOX_BATCH_SIZE", 50)
+META_WEBHOOK_INBOX_STALE_SECONDS = env_int("META_WEBHOOK_INBOX_STALE_SECONDS", 900)
 
 # --- Meta Conversions API (CRM / Conversion Leads) ---
 # Uploads Instant Form lead stage changes to the Pixel on the live BCWW ads account.
@@ -370,6 +484,12 @@ META_CAPI_API_VERSION = (os.getenv("META_CAPI_API_VERSION", "") or "").strip() o
 META_CAPI_LEAD_EVENT_SOURCE = (os.getenv("META_CAPI_LEAD_EVENT_SOURCE", "") or "").strip() or "TIME Kids CRM"
 # Optional. Only for Events Manager Test events tab — leave empty in production.
 META_CAPI_TEST_EVENT_CODE = (os.getenv("META_CAPI_TEST_EVENT_CODE", "") or "").strip()
+# CAPI outbox (meta_capi_outbox): events per upload (max 1000), retry backoff base
+# (doubles per attempt, capped at 6h), attempts before giving up, coalescing delay.
+META_CAPI_OUTBOX_BATCH_SIZE = env_int("META_CAPI_OUTBOX_BATCH_SIZE", 1000)
+META_CAPI_OUTBOX_BACKOFF_SECONDS = env_int("META_CAPI_OUTBOX_BACKOFF_SECONDS", 30)
+META_CAPI_OUTBOX_MAX_ATTEMPTS = env_int("META_CAPI_OUTBOX_MAX_ATTEMPTS", 8)
+META_CAPI_OUTBOX_FLUSH_DELAY_SECONDS = env_int("META_CAPI_OUTBOX_FLUSH_DELAY_SECONDS", 2)
 
 # Add file handler if enabled
 if ENABLE_FILE_LOGGING: